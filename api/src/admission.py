@@ -0,0 +1,185 @@
+"""Bounded admission control for inference work called from async routes."""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(RuntimeError):
+    """Raised when the admission queue is full and a request is turned away."""
+
+
+class QueueTimeoutError(RuntimeError):
+    """Raised when a queued request waits longer than the queue timeout."""
+
+
+class InferenceGate:
+    """
+    Run blocking inference calls on a dedicated executor with bounded concurrency.
+
+    At most ``max_concurrency`` calls run at once. Up to ``max_queue`` more wait
+    for a slot, and each waits at most ``queue_timeout_s``. When the queue is full,
+    new requests fail immediately with OverloadedError. This keeps overload from
+    piling up decodes until every request times out together.
+
+    The executor has one thread per running or queued request. This keeps
+    inference off the event loop and off the default threadpool that serves
+    lexicon hits.
+
+    Args:
+        max_concurrency: Maximum number of inference calls running at once
+        max_queue: Maximum number of requests waiting for a slot
+        queue_timeout_s: Longest a request may wait for a slot
+        name: Thread name prefix for the executor
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        queue_timeout_s: float = 30.0,
+        name: str = "inference",
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue cannot be negative")
+        if queue_timeout_s <= 0:
+            raise ValueError("queue_timeout_s must be positive")
+
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency + max_queue, thread_name_prefix=name
+        )
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._admitted = 0  # running + queued
+        self._running = 0
+        self._waits_ms = deque(maxlen=1024)
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _admit(self):
+        """Reserve a place in the queue or fail fast if it is full."""
+        with self._lock:
+            if self._admitted >= self.max_concurrency + self.max_queue:
+                self.rejected += 1
+                raise OverloadedError(
+                    f"Server busy: {self._running} running, {self._admitted - self._running} queued"
+                )
+            self._admitted += 1
+
+    def _wait_for_slot(self):
+        """Block (on an executor thread) until a slot frees up or the timeout hits."""
+        start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=self.queue_timeout_s)
+        waited_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._waits_ms.append(waited_ms)
+            if not acquired:
+                self._admitted -= 1
+                self.timed_out += 1
+            else:
+                self._running += 1
+        if not acquired:
+            logger.warning(f"Request gave up after waiting {waited_ms:.0f}ms for a slot")
+            raise QueueTimeoutError(f"Timed out after {waited_ms:.0f}ms waiting for a free slot")
+
+    def release(self):
+        """Give back a slot taken by ``acquire``."""
+        with self._lock:
+            self._admitted -= 1
+            self._running -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def _call(self, fn, args, kwargs):
+        """Executor-side wrapper: wait for a slot, run ``fn``, free the slot."""
+        self._wait_for_slot()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.release()
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` on the executor once a slot is free.
+
+        Returns:
+            The return value of ``fn``
+
+        Raises:
+            OverloadedError: If the queue is already full
+            QueueTimeoutError: If no slot frees up within queue_timeout_s
+        """
+        self._admit()
+        loop = asyncio.get_running_loop()
+        # A cancelled await (client gone) still lets _call finish and free its slot
+        return await loop.run_in_executor(self._executor, self._call, fn, args, kwargs)
+
+    async def acquire(self):
+        """
+        Hold a slot for work that runs outside ``run`` (e.g. a streamed decode).
+
+        The caller must call ``release()`` exactly once when done. If the caller is
+        cancelled while waiting (client gone), the slot is released as soon as the
+        executor thread takes it, since nobody else will.
+
+        Raises:
+            OverloadedError: If the queue is already full
+            QueueTimeoutError: If no slot frees up within queue_timeout_s
+        """
+        self._admit()
+        loop = asyncio.get_running_loop()
+        waiting = loop.run_in_executor(self._executor, self._wait_for_slot)
+        try:
+            await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            waiting.add_done_callback(self._release_abandoned)
+            raise
+
+    def _release_abandoned(self, waiting):
+        """Give back a slot that a cancelled ``acquire`` went on to take."""
+        if waiting.cancelled():
+            # The wait never started, so only the queue place is held
+            with self._lock:
+                self._admitted -= 1
+        elif waiting.exception() is None:
+            self.release()
+
+    def stats(self):
+        """
+        Return queue and concurrency counters.
+
+        Returns:
+            dict: running, queued, max_concurrency, max_queue, completed, rejected,
+            timed_out, wait_ms_avg, wait_ms_p95
+        """
+        with self._lock:
+            waits = sorted(self._waits_ms)
+            return {
+                "running": self._running,
+                "queued": self._admitted - self._running,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "wait_ms_avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                # Nearest-rank percentile over the most recent waits
+                "wait_ms_p95": round(waits[math.ceil(0.95 * len(waits)) - 1], 3) if waits else 0.0,
+            }
+
+    def shutdown(self):
+        """Stop the executor, letting running calls finish."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,171 @@
+"""Find and explain the slang terms in chat messages."""
+
+import itertools
+import logging
+import re
+
+from . import retrieval
+
+logger = logging.getLogger(__name__)
+
+_LETTER_RUN = re.compile(r"([^\W\d_])\1{2,}")
+# Numbers with a short unit or ordinal suffix ("3pm", "10k", "2nd", "90s") are not slang
+_NUMBER_SUFFIX = re.compile(r"^\d+[^\W\d_]{0,2}$")
+_MAX_CANDIDATE_CHARS = 30
+
+
+def _is_candidate(token: str, shouting: bool) -> bool:
+    """
+    Whether a word that is not a lexicon term looks like slang worth explaining.
+
+    Candidates are elongated words ("sheeesh"), letter/digit mixes ("gr8",
+    "2day") and, unless the message is mostly written in capitals, short all-caps
+    words ("ISTG"). Other out-of-lexicon words are taken to be ordinary language.
+    """
+    if len(token) > _MAX_CANDIDATE_CHARS or token.isdigit():
+        return False
+    if any(ch.isdigit() for ch in token):
+        return any(ch.isalpha() for ch in token) and not _NUMBER_SUFFIX.match(token.lower())
+    if _LETTER_RUN.search(token.lower()):
+        return True
+    return not shouting and 2 <= len(token) <= 5 and token.isalpha() and token.isupper()
+
+
+def _candidates(text: str, tokens, spans):
+    """Word tokens outside ``spans`` that pass _is_candidate, as (start, end, token)."""
+    words = [token for token in tokens if token[2][0].isalnum()]
+    upper = sum(1 for _, _, word in words if len(word) > 1 and word.isupper())
+    shouting = upper >= 3 and upper * 2 > len(words)
+
+    found = []
+    covered = iter(spans)
+    span = next(covered, None)
+    for start, end, word in words:
+        while span is not None and span.end <= start:
+            span = next(covered, None)
+        if span is not None and span.start <= start:
+            continue
+        if _is_candidate(word, shouting):
+            found.append((start, end, word))
+    return found
+
+
+def _span(text: str, start: int, end: int, term: str, match: str, entry, source="lexicon"):
+    """Span dict for a lexicon answer (``source`` is ignored without an entry)."""
+    return {
+        "start": start,
+        "end": end,
+        "text": text[start:end],
+        "term": term,
+        "match": match,
+        "definition": entry["definition"] if entry else None,
+        "example": entry["example"] if entry else None,
+        "source": source if entry else None,
+    }
+
+
+def annotate(text: str):
+    """
+    Find the slang terms in one message.
+
+    Lexicon terms, including multi-word ones, are found with the lexicon's
+    TermMatcher and answered from the lexicon. Words outside those spans that
+    still look like slang (see _is_candidate) are matched against the lexicon
+    index, which tolerates typos. Squeezed and fuzzy matches of those words
+    are only similar terms, so their answers are labeled ``lexicon_fuzzy``.
+    What is still unmatched is returned with ``match="unknown"`` and no
+    definition, ready to be explained by the model.
+
+    Args:
+        text: Message text
+
+    Returns:
+        list[dict]: Spans in text order, each with start, end (character offsets),
+        text, term, match ("exact", "normalized", "squeezed", "fuzzy" or "unknown"),
+        definition, example and source ("lexicon", "lexicon_fuzzy" for squeezed and
+        fuzzy matches, or None for unknown terms)
+    """
+    matcher, entries = retrieval.term_matcher()
+    tokens = matcher.tokens(text)
+    found = matcher.find(text, tokens)
+    spans = [_span(text, s.start, s.end, s.term, s.kind, entries[s.term]) for s in found]
+
+    for start, end, word in _candidates(text, tokens, found):
+        hit = retrieval.match(word)
+        if hit:
+            source = "lexicon" if hit.authoritative else "lexicon_fuzzy"
+            spans.append(_span(text, start, end, hit.term, hit.kind, hit.entry, source))
+        else:
+            spans.append(_span(text, start, end, word.lower(), "unknown", None))
+    if len(spans) > len(found):
+        spans.sort(key=lambda span: span["start"])
+    return spans
+
+
+def unknown_terms(results, limit: int):
+    """
+    Unique unknown terms across annotated messages, in order of first appearance.
+
+    Args:
+        results: Span lists returned by annotate()
+        limit: Maximum number of terms to return
+
+    Returns:
+        list[str]: At most ``limit`` terms
+    """
+    terms = dict.fromkeys(
+        span["term"] for spans in results for span in spans if span["match"] == "unknown"
+    )
+    return list(itertools.islice(terms, limit))
+
+
+def attach(results, answers):
+    """
+    Fill in the explanations of unknown spans in place.
+
+    Args:
+        results: Span lists returned by annotate()
+        answers: Term -> answer dict with definition, example, source and/or error
+    """
+    for spans in results:
+        for span in spans:
+            answer = answers.get(span["term"]) if span["match"] == "unknown" else None
+            if answer:
+                span["definition"] = answer.get("definition")
+                span["example"] = answer.get("example")
+                span["source"] = answer.get("source")
+                if answer.get("error"):
+                    span["error"] = answer["error"]
+
+
+def annotate_stream(messages, explain=None, batch_size: int = 64, max_unknown: int = 32):
+    """
+    Annotate a stream of messages, explaining unknown terms in batches.
+
+    Messages are read ``batch_size`` at a time. With ``explain``, the unique
+    unknown terms of each batch (at most ``max_unknown``) are passed to it in a
+    single call, so the model sees one batch per group of messages rather than
+    one request per word.
+
+    Args:
+        messages: Iterable of message texts
+        explain: Callable taking a list of terms and returning term -> answer dicts
+            (see attach), e.g. a wrapper around batched generation; None to skip
+        batch_size: Messages per batch
+        max_unknown: Unknown terms explained per batch; the rest stay unexplained
+
+    Yields:
+        list[dict]: The spans of each message (see annotate), in input order
+    """
+    messages = iter(messages)
+    while True:
+        batch = list(itertools.islice(messages, batch_size))
+        if not batch:
+            return
+        results = [annotate(text) for text in batch]
+        if explain is not None:
+            terms = unknown_terms(results, max_unknown)
+            if terms:
+                logger.info(f"Explaining {len(terms)} unknown terms from {len(batch)} messages")
+                attach(results, explain(terms))
+        yield from results
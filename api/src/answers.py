@@ -0,0 +1,96 @@
+"""Serving policies: how lexicon matches and model output become explain answers."""
+
+import logging
+import time
+
+from .metrics import ANSWERS, STAGE_SECONDS
+from .postprocess import parse_definition_example
+from .retrieval import lookup_match
+
+logger = logging.getLogger(__name__)
+
+# Serving policies:
+#   lexicon_first - answer lexicon hits directly, run the model only on misses
+#   model_first   - always run the model, fall back to the lexicon on bad output
+#   model_only    - always run the model, never consult the lexicon
+SERVING_POLICIES = ("lexicon_first", "model_first", "model_only")
+DEFAULT_SERVING_POLICY = "lexicon_first"
+
+
+def timed_lookup(term: str):
+    """Authoritative lexicon match (see lookup_match), recorded as the ``lookup`` stage."""
+    start = time.perf_counter()
+    hit = lookup_match(term)
+    STAGE_SECONDS.observe(time.perf_counter() - start, "lookup")
+    return hit
+
+
+def lexicon_answer(term: str, policy: str):
+    """
+    Answer ``term`` from the lexicon, if ``policy`` is lexicon_first and it is a hit.
+
+    Args:
+        term: Normalized term
+        policy: Serving policy in effect for this request
+
+    Returns:
+        dict or None: term, definition, example, source, matched_term and match_kind
+    """
+    if policy != "lexicon_first":
+        return None
+
+    hit = timed_lookup(term)
+    if not hit:
+        return None
+
+    logger.debug("Explained term: %s (source: lexicon)", term)
+    ANSWERS.inc("lexicon")
+    return {
+        "term": term,
+        "definition": hit.entry["definition"],
+        "example": hit.entry["example"],
+        "source": "lexicon",
+        "matched_term": hit.term,
+        "match_kind": hit.kind,
+    }
+
+
+def model_answer(term: str, raw: str, policy: str):
+    """
+    Parse raw model output and apply the lexicon fallback allowed by ``policy``.
+
+    Args:
+        term: Normalized term
+        raw: Full generated text, including the prompt
+        policy: Serving policy in effect for this request
+
+    Returns:
+        dict: term, definition, example and source, plus matched_term and
+        match_kind when the lexicon filled in (source ``lora+baseline``)
+    """
+    start = time.perf_counter()
+    parsed = parse_definition_example(raw)
+    STAGE_SECONDS.observe(time.perf_counter() - start, "parse")
+
+    answer = {
+        "term": term,
+        "definition": parsed["definition"],
+        "example": parsed["example"],
+        "source": "lora",
+    }
+    if not parsed["format_ok"]:
+        logger.warning(f"LoRA output format invalid for term: {term}, trying fallback")
+        # lexicon_first already missed before generation and model_only never consults it
+        base = timed_lookup(term) if policy == "model_first" else None
+        if base:
+            answer["definition"] = answer["definition"] or base.entry["definition"]
+            answer["example"] = answer["example"] or base.entry["example"]
+            answer.update(source="lora+baseline", matched_term=base.term, match_kind=base.kind)
+            logger.debug("Used baseline fallback for term: %s", term)
+        else:
+            answer["source"] = "lora_raw"
+            logger.warning(f"No baseline match found for term: {term}")
+
+    logger.debug("Explained term: %s (source: %s)", term, answer["source"])
+    ANSWERS.inc(answer["source"])
+    return answer
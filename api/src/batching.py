@@ -0,0 +1,133 @@
+"""Request coalescing for batched model calls."""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item requests into batched calls.
+
+    Callers submit items from any thread and get a Future back. A single worker
+    thread waits for the first pending item, keeps collecting items until either
+    ``max_batch_size`` items are gathered or ``max_wait_ms`` has elapsed, then calls
+    ``batch_fn`` once with the whole batch and resolves each caller's Future with
+    its own result.
+
+    Args:
+        batch_fn: Callable taking a list of items and returning a list of results
+            in the same order
+        max_batch_size: Maximum number of items passed to one ``batch_fn`` call
+        max_wait_ms: How long to wait for more items after the first one arrives
+        name: Name of the worker thread
+    """
+
+    def __init__(self, batch_fn, max_batch_size: int = 8, max_wait_ms: float = 10.0, name=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms cannot be negative")
+
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name or "micro-batcher"
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._closed = False
+
+    def submit(self, item) -> Future:
+        """
+        Queue an item for the next batch.
+
+        Args:
+            item: The item to pass to ``batch_fn``
+
+        Returns:
+            Future: Resolves to the result for this item
+
+        Raises:
+            RuntimeError: If the batcher has been closed
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+            self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Submit an item and block until its result is ready."""
+        return self.submit(item).result(timeout=timeout)
+
+    def close(self):
+        """Stop the worker thread after it drains already-queued items."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+            self._queue.put(_STOP)
+        if worker is not None:
+            worker.join()
+
+    def _collect(self, first):
+        """Gather a batch starting with ``first`` until it is full or the window closes."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                # Re-queue the sentinel so the run loop exits after this batch
+                self._queue.put(_STOP)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        """Worker loop: collect a batch, run it, resolve futures."""
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = self._collect(first)
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            logger.debug("%s: running batch of %d", self.name, len(items))
+
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"batch_fn returned {len(results)} results for {len(items)} items"
+                    )
+            except Exception as e:  # noqa: BLE001
+                # Deliberately broad: batch_fn is the model call and may raise anything.
+                # Each caller gets the error on its future instead of the worker dying.
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
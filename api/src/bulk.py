@@ -0,0 +1,326 @@
+"""Streaming JSONL explain job with checkpoints, for large offline term lists."""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from . import inference
+from .answers import SERVING_POLICIES, lexicon_answer, model_answer
+from .inference import BATCH_MAX_SIZE, normalize_term
+from .lexicon_store import record_term
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+def read_term(record):
+    """
+    Term of a lexicon-style (``term`` field) or training-style (``text`` field) record.
+
+    Returns:
+        str or None: The normalized term, or None if the record has none
+    """
+    return normalize_term(record_term(record) or "") or None
+
+
+def checkpoint_path(out_path: str) -> str:
+    """Checkpoint file kept next to the output file."""
+    return f"{out_path}.ckpt.json"
+
+
+def load_checkpoint(path: str):
+    """Saved job state, or None if there is no checkpoint."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path: str, state: dict):
+    """Write job state atomically, so a crash leaves the old or the new checkpoint."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({**state, "updated_at": time.time()}, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def explain_terms(terms, policy: str, max_new_tokens: int, adapter: str | None = None):
+    """
+    Explain unique normalized terms like /v1/explain:batch does.
+
+    Answers follow the API's serving policies (see answers). Lexicon hits are
+    answered directly under ``lexicon_first``. The rest go through the response
+    cache and one batched generate call per adapter.
+
+    Args:
+        terms: Unique normalized terms
+        policy: One of SERVING_POLICIES
+        max_new_tokens: Maximum number of tokens to generate per term
+        adapter: Adapter for every term, or None to pick per term
+
+    Returns:
+        dict: Term -> answer fields (see answers.model_answer), or error
+
+    Raises:
+        RuntimeError: If the model failed to load, so later batches would fail too
+    """
+    answers = {}
+    misses = []
+    for term in terms:
+        answer = lexicon_answer(term, policy)
+        if answer:
+            answers[term] = answer
+        else:
+            misses.append(term)
+    if not misses:
+        return answers
+
+    try:
+        raws = inference.generate_batch(misses, max_new_tokens, adapter)
+    except Exception as e:
+        if inference.engine.state == "failed":
+            raise
+        logger.error(f"Batch of {len(misses)} terms failed: {e}")
+        return {**answers, **{term: {"error": str(e)} for term in misses}}
+    for term, raw in zip(misses, raws):
+        answers[term] = model_answer(term, raw, policy)
+    return answers
+
+
+def _batches(f, batch_size: int, stats: dict):
+    """
+    Read (line number, term) batches from a binary file positioned at a line start.
+
+    Yields:
+        tuple: (list of (line number, term), input offset after the batch)
+    """
+    batch = []
+    offset = f.tell()
+    for line in f:
+        offset += len(line)
+        stats["lines"] += 1
+        text = line.strip()
+        if not text:
+            continue
+        try:
+            term = read_term(json.loads(text))
+        except (json.JSONDecodeError, AttributeError) as e:
+            logger.warning(f"Skipping invalid line {stats['lines']}: {e}")
+            term = None
+        if term is None:
+            stats["skipped"] += 1
+            continue
+        batch.append((stats["lines"], term))
+        if len(batch) == batch_size:
+            yield batch, offset
+            batch = []
+    yield batch, offset
+
+
+def _resume_state(input_path: str, out_path: str, ckpt: dict):
+    """
+    Validate a checkpoint against the files it describes.
+
+    Raises:
+        ValueError: If the checkpoint is for another input, or either file no longer
+            matches it
+    """
+    if ckpt.get("version") != CHECKPOINT_VERSION or ckpt.get("input") != input_path:
+        raise ValueError(
+            f"Checkpoint {checkpoint_path(out_path)} belongs to another job "
+            f"({ckpt.get('input')}); use --restart to start over"
+        )
+    if os.path.getsize(input_path) < ckpt["input_offset"]:
+        raise ValueError(f"Input {input_path} is shorter than the checkpoint offset")
+    if not os.path.exists(out_path) or os.path.getsize(out_path) < ckpt["output_bytes"]:
+        raise ValueError(f"Output {out_path} is shorter than the checkpoint says")
+    return ckpt
+
+
+def run(
+    input_path: str,
+    out_path: str,
+    policy: str = "lexicon_first",
+    batch_size: int = BATCH_MAX_SIZE,
+    max_new_tokens: int = 100,
+    adapter: str | None = None,
+    checkpoint_s: float = 30,
+    progress_s: float = 10,
+    restart: bool = False,
+):
+    """
+    Explain every term of a JSONL file, resuming after the last checkpoint.
+
+    The input is read as a stream, ``batch_size`` records at a time, so memory
+    use does not depend on its size. Each batch is deduplicated, answered
+    (see explain_terms) and appended to ``out_path`` as one JSONL record per
+    input record, in input order. At most every ``checkpoint_s`` seconds the
+    output is fsynced and the input offset and output size are saved to
+    ``<out>.ckpt.json``. After a crash the job continues from that offset and
+    the output is truncated back to the saved size, so records are neither
+    lost nor duplicated. A completed job is not run again unless ``restart``.
+
+    Args:
+        input_path: JSONL with ``term`` (lexicon) or ``text`` (training) records
+        out_path: Output JSONL
+        policy: One of SERVING_POLICIES
+        batch_size: Records per batch (one generate call per adapter)
+        max_new_tokens: Maximum number of tokens to generate per term
+        adapter: Adapter for every term, or None to pick per term
+        checkpoint_s: Minimum seconds between checkpoints
+        progress_s: Seconds between progress log lines
+        restart: Ignore an existing checkpoint and start from the beginning
+
+    Returns:
+        dict: The final job state (counts, offsets, throughput of this run)
+
+    Raises:
+        ValueError: For an unknown policy or a checkpoint that does not match the files
+        RuntimeError: If the model failed to load; rerunning resumes the job
+    """
+    if policy not in SERVING_POLICIES:
+        raise ValueError(f"Unknown policy '{policy}', expected one of {SERVING_POLICIES}")
+
+    input_path = os.path.abspath(input_path)
+    ckpt_path = checkpoint_path(out_path)
+    ckpt = None if restart else load_checkpoint(ckpt_path)
+    if ckpt is not None:
+        state = _resume_state(input_path, out_path, ckpt)
+        if state["complete"]:
+            logger.info(f"Job already complete ({state['records']} records); nothing to do")
+            return state
+        os.truncate(out_path, state["output_bytes"])
+        logger.info(f"Resuming at line {state['lines']} ({state['records']} records written)")
+    else:
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "input": input_path,
+            "input_offset": 0,
+            "output_bytes": 0,
+            "lines": 0,
+            "records": 0,
+            "skipped": 0,
+            "errors": 0,
+            "sources": {},
+            "complete": False,
+        }
+        open(out_path, "wb").close()
+
+    input_size = os.path.getsize(input_path)
+    start = time.perf_counter()
+    at_start = {"records": state["records"], "input_offset": state["input_offset"]}
+    last_checkpoint = last_progress = start
+
+    def checkpoint():
+        out.flush()
+        os.fsync(out.fileno())
+        save_checkpoint(ckpt_path, state)
+
+    with open(input_path, "rb") as f, open(out_path, "ab") as out:
+        f.seek(state["input_offset"])
+        # Line and skip counters advance while reading; the rest only once a batch is written
+        reading = {"lines": state["lines"], "skipped": state["skipped"]}
+        try:
+            for batch, offset in _batches(f, batch_size, reading):
+                unique = list(dict.fromkeys(term for _, term in batch))
+                answers = explain_terms(unique, policy, max_new_tokens, adapter)
+                for line, term in batch:
+                    answer = answers[term]
+                    out.write(
+                        json.dumps(
+                            {"line": line, "term": term, **answer}, ensure_ascii=False
+                        ).encode("utf-8")
+                        + b"\n"
+                    )
+                    if "error" in answer:
+                        state["errors"] += 1
+                    else:
+                        source = answer["source"]
+                        state["sources"][source] = state["sources"].get(source, 0) + 1
+                state["records"] += len(batch)
+                state.update(reading, input_offset=offset, output_bytes=out.tell())
+
+                now = time.perf_counter()
+                if now - last_checkpoint >= checkpoint_s:
+                    checkpoint()
+                    last_checkpoint = now
+                if now - last_progress >= progress_s:
+                    last_progress = now
+                    _log_progress(state, at_start, now - start, input_size)
+            state["complete"] = True
+        finally:
+            # Also on errors and Ctrl-C: the state always describes fully written batches
+            checkpoint()
+
+    seconds = time.perf_counter() - start
+    done = state["records"] - at_start["records"]
+    logger.info(f"Done: {state['records']} records, {state['errors']} errors in {seconds:.1f}s")
+    return {
+        **state,
+        "seconds": round(seconds, 2),
+        "records_per_s": round(done / seconds, 2) if seconds else None,
+    }
+
+
+def _log_progress(state: dict, start: dict, seconds: float, input_size: int):
+    """Log records written, share of the input read, throughput and ETA of this run."""
+    rate = (state["records"] - start["records"]) / seconds
+    read = state["input_offset"] - start["input_offset"]
+    share = state["input_offset"] / input_size if input_size else 1.0
+    eta = (input_size - state["input_offset"]) / (read / seconds) if read else float("nan")
+    logger.info(
+        f"{state['records']} records ({share:.1%} of input), {rate:.1f} records/s, "
+        f"ETA {eta:.0f}s, sources {state['sources']}, {state['errors']} errors"
+    )
+
+
+def main(argv=None):
+    """Command line entry point: explain every term of a JSONL file."""
+    parser = argparse.ArgumentParser(
+        description="Explain every term of a JSONL file, resumable after a crash"
+    )
+    parser.add_argument("input", help="JSONL with term (lexicon) or text (training) records")
+    parser.add_argument("--out", required=True, help="Output JSONL, one record per input term")
+    parser.add_argument(
+        "--policy",
+        choices=SERVING_POLICIES,
+        default=os.getenv("SLANG_SERVING_POLICY", "lexicon_first"),
+        help="Serving policy (default: SLANG_SERVING_POLICY or lexicon_first)",
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_MAX_SIZE)
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    parser.add_argument("--adapter", help="Adapter for every term (default: traffic split)")
+    parser.add_argument(
+        "--checkpoint-s", type=float, default=30, help="Seconds between checkpoints"
+    )
+    parser.add_argument(
+        "--progress-s", type=float, default=10, help="Seconds between progress logs"
+    )
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint, start over")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    summary = run(
+        args.input,
+        args.out,
+        policy=args.policy,
+        batch_size=args.batch_size,
+        max_new_tokens=args.max_new_tokens,
+        adapter=args.adapter,
+        checkpoint_s=args.checkpoint_s,
+        progress_s=args.progress_s,
+        restart=args.restart,
+    )
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""Response caches: in-process LRU with TTL expiry, and a persistent SQLite cache."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Thread-safe bounded cache with least-recently-used eviction and per-entry TTL.
+
+    Args:
+        maxsize: Maximum number of entries; 0 disables caching entirely
+        ttl_s: Seconds an entry stays valid after it is stored; None means no expiry
+        clock: Monotonic time source, overridable for tests
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_s: float | None = 3600.0, clock=time.monotonic):
+        if maxsize < 0:
+            raise ValueError("maxsize cannot be negative")
+        if ttl_s is not None and ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for ``key``, or ``default`` if missing or expired.
+
+        A hit moves the entry to the most-recently-used position.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store ``value`` under ``key``, evicting least-recently-used entries if full."""
+        if self.maxsize == 0:
+            return
+
+        expires_at = None if self.ttl_s is None else self._clock() + self.ttl_s
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate=None):
+        """
+        Drop cached entries.
+
+        Args:
+            predicate: Callable taking a key and returning True if the entry should
+                be dropped; None drops everything
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._data)
+                self._data.clear()
+            else:
+                stale = [key for key in self._data if predicate(key)]
+                for key in stale:
+                    del self._data[key]
+                removed = len(stale)
+
+        if removed:
+            logger.info(f"Invalidated {removed} cache entries")
+        return removed
+
+    def stats(self):
+        """
+        Return cache counters.
+
+        Returns:
+            dict: size, maxsize, ttl_s, hits, misses, evictions, expirations, hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Executed one by one: executescript() would commit the surrounding schema transaction
+_DISK_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        accessed REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)",
+    # Running total of entry sizes, kept by triggers so puts need not sum the table
+    "CREATE TABLE IF NOT EXISTS usage (bytes INTEGER NOT NULL)",
+    "INSERT INTO usage SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM usage)",
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries
+    BEGIN UPDATE usage SET bytes = bytes + new.size; END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries
+    BEGIN UPDATE usage SET bytes = bytes + new.size - old.size; END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries
+    BEGIN UPDATE usage SET bytes = bytes - old.size; END
+    """,
+)
+
+
+class DiskCache:
+    """
+    Persistent cache in a SQLite database, shared by processes and kept across restarts.
+
+    The database runs in WAL mode, so readers in any number of worker processes
+    never block each other or the writer. Each process opens its own connection
+    (again after a fork) and serializes its threads on it. Keys are JSON-encoded
+    tuples and values are strings.
+
+    The total size of keys and values is bounded by ``max_bytes``. When a put
+    goes over it, the least recently used entries are evicted down to 90% of the
+    limit. A hit refreshes the entry's access time at most every ``touch_s``
+    seconds, so hot keys do not turn every read into a write.
+
+    Database errors are logged and counted, never raised: a broken cache file
+    degrades to misses.
+
+    Args:
+        path: Database file, created if missing
+        max_bytes: Size bound for keys plus values; 0 disables caching entirely
+        touch_s: Minimum seconds between access time updates of an entry
+        timeout_s: Seconds to wait for another process's write lock
+        clock: Wall time source, overridable for tests
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 256 << 20,
+        touch_s: float = 60.0,
+        timeout_s: float = 5.0,
+        clock=time.time,
+    ):
+        if max_bytes < 0:
+            raise ValueError("max_bytes cannot be negative")
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_s = touch_s
+        self.timeout_s = timeout_s
+        self._clock = clock
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _connection(self):
+        """This process's connection, opened (and the schema created) on first use."""
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+
+        # A connection inherited through fork() must not be used, or closed, by the child
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(
+            self.path, timeout=self.timeout_s, isolation_level=None, check_same_thread=False
+        )
+        try:
+            self._enable_wal(conn)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version not in (0, self.SCHEMA_VERSION):
+                    raise sqlite3.DatabaseError(f"unsupported cache schema version {version}")
+                for statement in _DISK_SCHEMA:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self._conn, self._pid = conn, os.getpid()
+        logger.info(f"Opened disk cache: {self.path}")
+        return conn
+
+    def _enable_wal(self, conn):
+        """Switch the database to WAL mode, which is kept in the file once set."""
+        # While another process holds a lock during its own first open, switching
+        # fails at once instead of waiting out the busy timeout
+        deadline = time.monotonic() + self.timeout_s
+        while True:
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.01)
+
+    @staticmethod
+    def _encode(key) -> str:
+        return json.dumps(key, separators=(",", ":"), ensure_ascii=False)
+
+    def _failed(self, action: str, error: Exception):
+        self.errors += 1
+        logger.warning(f"Disk cache {action} failed ({self.path}): {error}")
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key``, or ``default`` if missing."""
+        if self.max_bytes == 0:
+            return default
+
+        encoded = self._encode(key)
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT value, accessed FROM entries WHERE key = ?", (encoded,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return default
+                now = self._clock()
+                if now - row[1] >= self.touch_s:
+                    conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, encoded))
+            except (sqlite3.Error, OSError) as e:
+                self._failed("read", e)
+                self.misses += 1
+                return default
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value: str):
+        """Store ``value`` under ``key``, evicting least-recently-used entries if full."""
+        if self.max_bytes == 0:
+            return
+
+        encoded = self._encode(key)
+        size = len(encoded.encode("utf-8")) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute(
+                        "INSERT INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+                        "size = excluded.size, accessed = excluded.accessed",
+                        (encoded, value, size, self._clock()),
+                    )
+                    self._evict(conn)
+            except (sqlite3.Error, OSError) as e:
+                self._failed("write", e)
+
+    def _evict(self, conn):
+        """Delete least recently used entries until the cache fits, inside a write."""
+        used = conn.execute("SELECT bytes FROM usage").fetchone()[0]
+        if used <= self.max_bytes:
+            return
+        excess = used - self.max_bytes * 0.9
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+        self.evictions += len(stale)
+        logger.info(f"Evicted {len(stale)} disk cache entries")
+
+    def invalidate(self, predicate=None):
+        """
+        Drop cached entries.
+
+        Args:
+            predicate: Callable taking a key (as a tuple) and returning True if the
+                entry should be dropped; None drops everything
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    if predicate is None:
+                        removed = conn.execute("DELETE FROM entries").rowcount
+                    else:
+                        stale = [
+                            (encoded,)
+                            for (encoded,) in conn.execute("SELECT key FROM entries")
+                            if predicate(tuple(json.loads(encoded)))
+                        ]
+                        conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+                        removed = len(stale)
+            except (sqlite3.Error, OSError) as e:
+                self._failed("invalidate", e)
+                return 0
+
+        if removed:
+            logger.info(f"Invalidated {removed} disk cache entries")
+        return removed
+
+    def stats(self):
+        """
+        Return cache counters. Hits, misses and evictions count this process only.
+
+        Returns:
+            dict: path, size, bytes, max_bytes, hits, misses, evictions, errors, hit_rate
+        """
+        with self._lock:
+            try:
+                conn = self._connection()
+                size = conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+                used = conn.execute("SELECT bytes FROM usage").fetchone()[0]
+            except (sqlite3.Error, OSError) as e:
+                self._failed("stats", e)
+                size = used = 0
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "size": size,
+                "bytes": used,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        """Close this process's connection; the next call reopens it."""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
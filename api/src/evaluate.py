@@ -0,0 +1,347 @@
+"""Batch evaluation of the base and fine-tuned model against reference definitions."""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .inference import BASE_ADAPTER, PRECISION, InferenceEngine
+from .lexicon_store import parse_record
+from .postprocess import parse_definition_example
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = ("base", "finetuned")
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Engine of a pool worker, loaded once by _init_worker
+_engine = None
+
+
+def read_items(path: str):
+    """
+    Stream evaluation items from a term list or a JSONL lexicon/training file.
+
+    ``.jsonl`` files are read with the lexicon store's record parser, so both
+    lexicon rows and training ``text`` rows work and carry a reference answer.
+    Any other file is a plain term list, one term per line, without references.
+
+    Args:
+        path: Input file
+
+    Yields:
+        dict: term, plus reference definition and example (None for a term list)
+    """
+    jsonl = path.endswith(".jsonl")
+    with open(path, "r", encoding="utf-8") as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if not jsonl:
+                yield {"term": line, "definition": None, "example": None}
+                continue
+            try:
+                parsed = parse_record(json.loads(line))
+            except (json.JSONDecodeError, KeyError, AttributeError) as e:
+                logger.warning(f"Skipping invalid line {line_num} in {path}: {e}")
+                continue
+            if parsed is None:
+                logger.warning(f"Skipping line {line_num} in {path}: no term/definition/example")
+                continue
+            term, definition, example = parsed
+            yield {"term": term.strip(), "definition": definition, "example": example}
+
+
+def batched(items, size: int):
+    """Group an iterable into lists of up to ``size`` items without reading ahead."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _words(text: str):
+    """Lowercased word tokens used for matching."""
+    return _WORD.findall(text.lower())
+
+
+def rouge_l(candidate: str, reference: str) -> float:
+    """
+    ROUGE-L F1 between two texts: longest common word subsequence over lengths.
+
+    Args:
+        candidate: Generated text
+        reference: Ground truth text
+
+    Returns:
+        float: F1 in [0, 1]; 0.0 if either text has no words
+    """
+    cand, ref = _words(candidate), _words(reference)
+    if not cand or not ref:
+        return 0.0
+    # One row of the LCS table at a time
+    prev = [0] * (len(ref) + 1)
+    for word in cand:
+        row = [0]
+        for j, ref_word in enumerate(ref):
+            row.append(prev[j] + 1 if word == ref_word else max(prev[j + 1], row[j]))
+        prev = row
+    lcs = prev[-1]
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(cand), lcs / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def score(raw: str, reference: str | None):
+    """
+    Parse one generation and score its definition against the reference.
+
+    Returns:
+        dict: definition, example, format_ok, and exact / rouge_l (None without a reference)
+    """
+    parsed = parse_definition_example(raw)
+    result = dict(parsed, exact=None, rouge_l=None)
+    if reference is not None:
+        definition = parsed["definition"] or ""
+        result["exact"] = _words(definition) == _words(reference)
+        result["rouge_l"] = round(rouge_l(definition, reference), 4)
+    return result
+
+
+def evaluate_batch(engine, items, max_new_tokens: int, variants=VARIANTS, adapter=None):
+    """
+    Generate and score one batch with each variant on the same loaded model.
+
+    The base variant runs the shared base model with LoRA disabled for the call
+    (BASE_ADAPTER), so one copy of the weights serves both variants.
+
+    Args:
+        engine: InferenceEngine with the adapter unmerged
+        items: Items from read_items()
+        max_new_tokens: Maximum number of tokens to generate per term
+        variants: Subset of VARIANTS to run
+        adapter: Adapter of the fine-tuned variant, or None for the default
+
+    Returns:
+        list[dict]: One record per item with the reference and a result per variant;
+        ``seconds`` is the variant's batch time divided by the batch size
+    """
+    terms = [item["term"] for item in items]
+    records = [{"term": item["term"], "reference": item["definition"]} for item in items]
+    for variant in variants:
+        start = time.perf_counter()
+        outputs = engine.generate_batch(
+            terms, max_new_tokens, BASE_ADAPTER if variant == "base" else adapter
+        )
+        seconds = round((time.perf_counter() - start) / len(items), 4)
+        for record, item, raw in zip(records, items, outputs):
+            record[variant] = dict(score(raw, item["definition"]), seconds=seconds)
+    return records
+
+
+def _init_worker(engine_kwargs: dict, threads: int):
+    """Pool initializer: limit torch threads and load this worker's engine once."""
+    import torch
+
+    global _engine
+    torch.set_num_threads(threads)
+    _engine = InferenceEngine(**engine_kwargs)
+    _engine.load()
+
+
+def _worker_batch(items, max_new_tokens: int, variants, adapter):
+    """Evaluate one batch on the worker's engine."""
+    return evaluate_batch(_engine, items, max_new_tokens, variants, adapter)
+
+
+class Summary:
+    """Running totals per variant, reported as rates and means."""
+
+    def __init__(self, variants):
+        self.variants = variants
+        self.terms = 0
+        self._totals = {
+            variant: {"format_ok": 0, "exact": 0, "rouge_l": 0.0, "scored": 0, "seconds": 0.0}
+            for variant in variants
+        }
+
+    def add(self, record):
+        """Count one record."""
+        self.terms += 1
+        for variant in self.variants:
+            result, totals = record[variant], self._totals[variant]
+            totals["format_ok"] += result["format_ok"]
+            totals["seconds"] += result["seconds"]
+            if result["exact"] is not None:
+                totals["scored"] += 1
+                totals["exact"] += result["exact"]
+                totals["rouge_l"] += result["rouge_l"]
+
+    def report(self, wall_seconds: float):
+        """Summary dict: per variant format_ok rate, exact rate, mean ROUGE-L and seconds."""
+        variants = {}
+        for variant, totals in self._totals.items():
+            n, scored = self.terms or 1, totals["scored"]
+            variants[variant] = {
+                "format_ok_rate": round(totals["format_ok"] / n, 4),
+                "exact_rate": round(totals["exact"] / scored, 4) if scored else None,
+                "rouge_l": round(totals["rouge_l"] / scored, 4) if scored else None,
+                "seconds_per_term": round(totals["seconds"] / n, 4),
+            }
+        return {
+            "terms": self.terms,
+            "wall_seconds": round(wall_seconds, 1),
+            "terms_per_s": round(self.terms / wall_seconds, 2) if wall_seconds else None,
+            "variants": variants,
+        }
+
+
+def run(
+    path: str,
+    out_path: str,
+    workers: int = 1,
+    batch_size: int = 8,
+    max_new_tokens: int = 100,
+    variants=VARIANTS,
+    adapter: str | None = None,
+    limit: int | None = None,
+    engine_kwargs: dict | None = None,
+):
+    """
+    Evaluate every item of ``path`` and write one JSONL record per term to ``out_path``.
+
+    Items are streamed and batched. With one worker the batches run in this
+    process. With more, each worker process loads its own engine and at most two
+    batches per worker are in flight, so memory stays bounded for any input size.
+    Records are written and flushed as batches finish, in completion order.
+
+    Args:
+        path: Term list or JSONL file (see read_items)
+        out_path: Output JSONL file
+        workers: Worker processes
+        batch_size: Terms per generate call
+        max_new_tokens: Maximum number of tokens to generate per term
+        variants: Subset of VARIANTS to run
+        adapter: Adapter of the fine-tuned variant, or None for the default
+        limit: Evaluate only the first ``limit`` items
+        engine_kwargs: InferenceEngine arguments; the adapter is never merged, so
+            precision (default SLANG_PRECISION) must be fp32 or bf16
+
+    Returns:
+        dict: Summary (see Summary.report)
+
+    Raises:
+        ValueError: If a variant is unknown, ``workers`` / ``batch_size`` is below 1,
+            or the precision is int8
+    """
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        raise ValueError(f"Unknown variants {sorted(unknown)}, expected a subset of {VARIANTS}")
+    if workers < 1 or batch_size < 1:
+        raise ValueError("workers and batch_size must be at least 1")
+
+    # The base variant needs the LoRA weights kept separate from the base weights
+    engine_kwargs = {"few_shot_k": 0, **(engine_kwargs or {}), "merge_adapter": False}
+    # int8 always merges the adapter (quantized layers cannot host LoRA); checked here
+    # because SLANG_PRECISION bypasses the --precision choices
+    if engine_kwargs.get("precision", PRECISION) == "int8":
+        raise ValueError("Evaluation needs an unmerged adapter: use fp32 or bf16, not int8")
+    items = read_items(path)
+    if limit is not None:
+        items = (item for _, item in zip(range(limit), items))
+    batches = batched(items, batch_size)
+    summary = Summary(tuple(variants))
+
+    start = time.perf_counter()
+    with open(out_path, "w", encoding="utf-8") as out:
+
+        def write(records):
+            for record in records:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                summary.add(record)
+            out.flush()
+            logger.info(f"Evaluated {summary.terms} terms")
+
+        if workers == 1:
+            engine = InferenceEngine(**engine_kwargs)
+            for batch in batches:
+                write(evaluate_batch(engine, batch, max_new_tokens, variants, adapter))
+        else:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            # spawn: a forked child would inherit torch thread pools in an unknown state
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(engine_kwargs, threads),
+            ) as pool:
+                pending = set()
+                for batch in batches:
+                    if len(pending) >= 2 * workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            write(future.result())
+                    pending.add(
+                        pool.submit(_worker_batch, batch, max_new_tokens, variants, adapter)
+                    )
+                for future in pending:
+                    write(future.result())
+
+    return summary.report(time.perf_counter() - start)
+
+
+def main(argv=None):
+    """Command line entry point: evaluate base vs fine-tuned generations."""
+    parser = argparse.ArgumentParser(
+        description="Score base and fine-tuned generations against reference definitions"
+    )
+    parser.add_argument("input", help="Term list (one per line) or lexicon/training JSONL")
+    parser.add_argument("--out", required=True, help="Output JSONL, one record per term")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--batch-size", type=int, default=8, help="Terms per generate call")
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--adapter", help="Adapter of the fine-tuned variant (default adapter)")
+    parser.add_argument("--limit", type=int, help="Evaluate only the first N terms")
+    parser.add_argument(
+        "--few-shot-k",
+        type=int,
+        default=0,
+        help="Lexicon examples per prompt (default 0: the lexicon holds the answers)",
+    )
+    parser.add_argument("--precision", choices=("fp32", "bf16"), help="Default: SLANG_PRECISION")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    engine_kwargs = {"few_shot_k": args.few_shot_k}
+    if args.precision:
+        engine_kwargs["precision"] = args.precision
+    summary = run(
+        args.input,
+        args.out,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        max_new_tokens=args.max_new_tokens,
+        variants=args.variants,
+        adapter=args.adapter,
+        limit=args.limit,
+        engine_kwargs=engine_kwargs,
+    )
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,85 +1,1399 @@
-import os
+import copy
+import hashlib
 import logging
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
-from peft import PeftModel
+import os
+import shutil
+import threading
+import time
+import zlib
+
+from . import retrieval
+from .batching import MicroBatcher
+from .cache import DiskCache, TTLCache
+from .metrics import STAGE_SECONDS
 
 logger = logging.getLogger(__name__)
 
-BASE_MODEL = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+BASE_MODEL = os.getenv("SLANG_BASE_MODEL", "TinyLlama/TinyLlama-1.1B-Chat-v1.0")
 # Navigate up two levels from src/ to project root, then to models/
-ADAPTER_DIR = os.path.join(
-    os.path.dirname(__file__), "..", "..", "models", "adapters", "tinyllama-lora@2025-10-29"
+ADAPTER_DIR = os.getenv(
+    "SLANG_ADAPTER_DIR",
+    os.path.join(
+        os.path.dirname(__file__), "..", "..", "models", "adapters", "tinyllama-lora@2025-10-29"
+    ),
+)
+
+# Multi-adapter serving: every LoRA adapter directory under ADAPTERS_ROOT is loaded
+# onto the one shared base model next to ADAPTER_DIR, which stays the default.
+# Requests may name an adapter. Otherwise ADAPTER_SPLIT ("name=weight,name=weight")
+# spreads terms across adapters by a stable hash, e.g. for a canary.
+ADAPTERS_ROOT = os.getenv(
+    "SLANG_ADAPTERS_ROOT", os.path.join(os.path.dirname(__file__), "..", "..", "models", "adapters")
 )
+ADAPTER_SPLIT = os.getenv("SLANG_ADAPTER_SPLIT", "")
 
 INSTRUCT_TEMPLATE = "Task: Explain the internet slang.\n" "Term: {term}\n\n" "Definition:"
+REPETITION_PENALTY = 1.2  # Reduce repetition
+
+# Retrieval-augmented prompts: the FEW_SHOT_K lexicon entries nearest to the term
+# (vector search, see retrieval.neighbors) are prepended as worked examples.
+# Off by default: no evaluation has shown them to improve answers over the bare
+# template, and they lengthen every prompt. Set SLANG_FEW_SHOT_K=2 to enable.
+FEW_SHOT_K = int(os.getenv("SLANG_FEW_SHOT_K", "0"))
+SHOT_TEMPLATE = INSTRUCT_TEMPLATE + " {definition}\nExample: {example}\n\n"
+
+# Prefix KV cache: every prompt (and every few-shot example) starts with the template
+# text before the term. Its past_key_values are computed once per model load and
+# reused, so prefill only runs over the rest of each prompt. SLANG_PREFIX_CACHE=0
+# disables it.
+PROMPT_PREFIX = INSTRUCT_TEMPLATE.split("{term}")[0].rstrip()
+PREFIX_CACHE = os.getenv("SLANG_PREFIX_CACHE", "1") != "0"
+
+# Micro-batching: concurrent generate() calls are coalesced into one model.generate
+# call of up to BATCH_MAX_SIZE prompts, waiting at most BATCH_MAX_WAIT_MS for company.
+BATCH_MAX_SIZE = int(os.getenv("SLANG_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("SLANG_BATCH_MAX_WAIT_MS", "10"))
+
+# Response cache: greedy decoding is deterministic, so identical requests against
+# the same adapter can reuse earlier output. SLANG_CACHE_SIZE=0 disables it.
+CACHE_SIZE = int(os.getenv("SLANG_CACHE_SIZE", "1024"))
+CACHE_TTL_S = float(os.getenv("SLANG_CACHE_TTL_S", "3600"))
+
+# Persistent response cache: a SQLite file shared by all worker processes and kept across
+# restarts, consulted when the in-process cache misses. Bounded to SLANG_DISK_CACHE_MB by
+# LRU eviction. Fill it before a rollout with ``python -m src.prewarm``. Empty disables it.
+DISK_CACHE = os.getenv("SLANG_DISK_CACHE", "")
+DISK_CACHE_MB = float(os.getenv("SLANG_DISK_CACHE_MB", "256"))
+
+# Prompt encoding cache: token ids of recently seen prompts (LRU, no expiry), so hot
+# terms are not re-tokenized on every request. SLANG_ENCODE_CACHE_SIZE=0 disables it.
+ENCODE_CACHE_SIZE = int(os.getenv("SLANG_ENCODE_CACHE_SIZE", "4096"))
+
+# How long generate() waits for a model that is still loading in the background
+# before giving up with ModelNotReadyError (the API turns this into a 503).
+MODEL_WAIT_S = float(os.getenv("SLANG_MODEL_WAIT_S", "0"))
+
+# Stop decoding once the Example line is complete instead of running to max_new_tokens
+EARLY_STOP = os.getenv("SLANG_EARLY_STOP", "1") != "0"
+
+# Assisted decoding of single-term calls: draft tokens are copied from the term's lexicon
+# answer and the prompt (prompt lookup) and the model verifies up to SLANG_DRAFT_TOKENS of
+# them per forward pass. The output is identical to plain greedy decoding.
+SPECULATIVE = os.getenv("SLANG_SPECULATIVE", "0") == "1"
+DRAFT_TOKENS = int(os.getenv("SLANG_DRAFT_TOKENS", "8"))
+# Draft source for a term's lexicon entry, laid out like the model's answer
+DRAFT_TEMPLATE = "Definition: {definition}\nExample: {example}"
+
+# Streaming: max seconds to wait for the next decoded chunk before giving up
+STREAM_TIMEOUT_S = float(os.getenv("SLANG_STREAM_TIMEOUT_S", "60"))
+
+# Merge the LoRA adapter into the base weights once and cache the merged checkpoint
+# under MERGED_DIR, so later startups load plain weights without the PEFT wrapper.
+MERGE_ADAPTER = os.getenv("SLANG_MERGE_ADAPTER", "0") == "1"
+MERGED_DIR = os.getenv(
+    "SLANG_MERGED_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "models", "merged")
+)
+
+
+# Weight precision: fp32 (default), bf16, or int8 (dynamic quantization of every
+# Linear layer; the adapter is merged first since quantized layers cannot host LoRA).
+PRECISIONS = ("fp32", "bf16", "int8")
+DEFAULT_PRECISION = "fp32"
+
+
+def _resolve_precision():
+    """
+    Read the weight precision from the SLANG_PRECISION environment variable.
+
+    Returns:
+        str: One of PRECISIONS, defaulting to fp32 for unknown values
+    """
+    precision = os.getenv("SLANG_PRECISION", DEFAULT_PRECISION).strip().lower()
+    if precision not in PRECISIONS:
+        logger.warning(f"Unknown precision '{precision}', falling back to '{DEFAULT_PRECISION}'")
+        return DEFAULT_PRECISION
+    return precision
+
+
+PRECISION = _resolve_precision()
+
+# Pseudo-adapter for the base model without LoRA (PEFT's name for it in adapter_names,
+# which needs peft>=0.10.0 like every per-call adapter selection).
+# Only generate_batch() accepts it; it is never served by the API.
+BASE_ADAPTER = "__base__"
+
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when the model is still loading and the caller cannot wait."""
+
+
+class UnknownAdapterError(ValueError):
+    """Raised when a request names an adapter that is not registered."""
+
+
+def _peft_name(name: str) -> str:
+    """PEFT adapter name for a registry name (PEFT module keys cannot contain dots)."""
+    return name.replace(".", "_")
+
+
+def adapter_name(adapter_dir: str) -> str:
+    """Registry name of an adapter: its directory name, e.g. ``tinyllama-lora@2025-10-29``."""
+    return os.path.basename(os.path.normpath(adapter_dir))
+
+
+def discover_adapters(root: str):
+    """
+    Find LoRA adapter directories (those with an adapter_config.json) under ``root``.
+
+    Args:
+        root: Directory holding one subdirectory per adapter
+
+    Returns:
+        dict: Adapter name -> directory, sorted by name; empty if ``root`` is missing
+    """
+    if not os.path.isdir(root):
+        return {}
+    return {
+        name: os.path.join(root, name)
+        for name in sorted(os.listdir(root))
+        if os.path.isfile(os.path.join(root, name, "adapter_config.json"))
+    }
+
+
+def parse_adapter_split(spec: str):
+    """
+    Parse a traffic split such as ``"lora@v1=90,lora@v2=10"``.
+
+    Args:
+        spec: Comma-separated ``name=weight`` pairs; empty for no split
+
+    Returns:
+        list[tuple[str, float]]: (adapter name, weight) pairs with positive weights
+
+    Raises:
+        ValueError: If a pair is malformed or a weight is not a number
+    """
+    split = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, sep, weight = part.rpartition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid adapter split entry '{part}', expected name=weight")
+        if float(weight) > 0:
+            split.append((name.strip(), float(weight)))
+    return split
+
+
+def adapter_identity(adapter_dir: str) -> str:
+    """
+    Compute a short fingerprint of an adapter directory.
+
+    The fingerprint covers the name and contents of every file in the directory, so
+    replacing the adapter weights changes the identity while copying the same
+    adapter to another machine does not.
+
+    Args:
+        adapter_dir: Path to the LoRA adapter directory
+
+    Returns:
+        str: 16-character hex digest, or "missing" if the directory does not exist
+    """
+    if not os.path.isdir(adapter_dir):
+        return "missing"
+
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(adapter_dir)):
+        path = os.path.join(adapter_dir, name)
+        if not os.path.isfile(path):
+            continue
+        digest.update(f"{name};".encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def merged_checkpoint_dir(
+    base_model: str, adapter_id: str, root: str = MERGED_DIR, dtype: str = "fp32"
+) -> str:
+    """
+    Return the directory of the merged checkpoint for a base model + adapter pair.
+
+    Args:
+        base_model: Hugging Face model id or local path of the base model
+        adapter_id: Adapter fingerprint from ``adapter_identity``
+        root: Directory holding merged checkpoints
+        dtype: Storage dtype of the merged weights ("fp32" or "bf16")
+
+    Returns:
+        str: ``<root>/<base name>-<base hash>-<adapter id>``, with a ``-bf16`` suffix
+        for bf16 weights
+    """
+    base_hash = hashlib.sha1(base_model.encode()).hexdigest()[:8]
+    base_name = os.path.basename(base_model.rstrip("/\\")) or "model"
+    suffix = "" if dtype == "fp32" else f"-{dtype}"
+    return os.path.join(root, f"{base_name}-{base_hash}-{adapter_id}{suffix}")
+
+
+def _is_checkpoint(path: str) -> bool:
+    """True if ``path`` holds a complete saved model (config plus safetensors weights)."""
+    if not os.path.isfile(os.path.join(path, "config.json")):
+        return False
+    return any(name.endswith(".safetensors") for name in os.listdir(path))
+
+
+def _quantize_int8(model):
+    """Apply dynamic int8 quantization to every Linear layer of a (merged) model."""
+    import torch
+
+    logger.info("Quantizing Linear layers to dynamic int8")
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def normalize_term(term: str) -> str:
+    """Normalize a term for prompts and cache keys: strip, lowercase and collapse whitespace."""
+    return " ".join(term.split()).lower()
+
+
+def build_prompt(term: str, shots=()):
+    """
+    Build the generation prompt for a term, preceded by few-shot examples.
+
+    Args:
+        term: Stripped slang term
+        shots: Lexicon entries (dicts with term, definition, example) to show first
+
+    Returns:
+        str: Prompt ending in INSTRUCT_TEMPLATE for ``term``
+    """
+    examples = "".join(
+        SHOT_TEMPLATE.format(term=s["term"], definition=s["definition"], example=s["example"])
+        for s in shots
+    )
+    return examples + INSTRUCT_TEMPLATE.format(term=term)
+
+
+class DecodeStats:
+    """
+    Thread-safe counters for tokens generated against the max_new_tokens budget.
+
+    Wall time saved by early stopping is estimated as the unused token budget times
+    the observed average decode time per token.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter."""
+        with self._lock:
+            self.requests = 0
+            self.generated_tokens = 0
+            self.budget_tokens = 0
+            self.stopped_early = 0
+            self.decode_seconds = 0.0
+            self.prefix_tokens_reused = 0
+            self.tokenize_seconds = 0.0
+            self.draft_tokens = 0
+            self.draft_accepted = 0
+            self.assisted_forwards = 0
+
+    def record(self, token_counts, max_new_tokens: int, seconds: float, prefix_tokens: int = 0):
+        """
+        Record one generate call.
+
+        Args:
+            token_counts: Generated token count for each sequence in the call
+            max_new_tokens: Token budget per sequence
+            seconds: Wall time of the generate call
+            prefix_tokens: Prompt tokens per sequence served from the prefix KV cache
+        """
+        with self._lock:
+            self.requests += len(token_counts)
+            self.generated_tokens += sum(token_counts)
+            self.budget_tokens += max_new_tokens * len(token_counts)
+            self.stopped_early += sum(1 for n in token_counts if n < max_new_tokens)
+            self.decode_seconds += seconds
+            self.prefix_tokens_reused += prefix_tokens * len(token_counts)
+
+    def record_draft(self, drafted: int, accepted: int, forwards: int):
+        """Record one assisted decode: draft tokens proposed and accepted, forward passes."""
+        with self._lock:
+            self.draft_tokens += drafted
+            self.draft_accepted += accepted
+            self.assisted_forwards += forwards
+
+    def record_tokenize(self, seconds: float):
+        """Record time spent turning prompts into token ids (cache lookups included)."""
+        with self._lock:
+            self.tokenize_seconds += seconds
+
+    def snapshot(self):
+        """
+        Return the counters and derived averages.
+
+        Returns:
+            dict: requests, generated_tokens, avg_tokens_per_request, stopped_early,
+            tokens_saved, decode_seconds, avg_ms_per_token, est_seconds_saved,
+            prefix_tokens_reused, tokenize_seconds, tokenize_share (tokenizing time as
+            a share of tokenizing plus generate time), draft_tokens, draft_accepted,
+            draft_acceptance_rate and assisted_forwards (assisted decoding)
+        """
+        with self._lock:
+            tokens_saved = self.budget_tokens - self.generated_tokens
+            busy = self.tokenize_seconds + self.decode_seconds
+            sec_per_token = (
+                self.decode_seconds / self.generated_tokens if self.generated_tokens else 0.0
+            )
+            return {
+                "requests": self.requests,
+                "generated_tokens": self.generated_tokens,
+                "avg_tokens_per_request": (
+                    self.generated_tokens / self.requests if self.requests else 0.0
+                ),
+                "stopped_early": self.stopped_early,
+                "tokens_saved": tokens_saved,
+                "decode_seconds": round(self.decode_seconds, 3),
+                "avg_ms_per_token": round(sec_per_token * 1000, 3),
+                "est_seconds_saved": round(tokens_saved * sec_per_token, 3),
+                "prefix_tokens_reused": self.prefix_tokens_reused,
+                "tokenize_seconds": round(self.tokenize_seconds, 4),
+                "tokenize_share": round(self.tokenize_seconds / busy, 4) if busy else 0.0,
+                "draft_tokens": self.draft_tokens,
+                "draft_accepted": self.draft_accepted,
+                "draft_acceptance_rate": (
+                    round(self.draft_accepted / self.draft_tokens, 4) if self.draft_tokens else 0.0
+                ),
+                "assisted_forwards": self.assisted_forwards,
+            }
+
+
+class InferenceEngine:
+    """
+    Owns the tokenizer, the base model and its LoRA adapters and loads them on demand.
+
+    Nothing heavy happens at construction time: torch, transformers and peft are
+    imported and the weights are read only when ``load()`` runs, either directly,
+    lazily from the first ``generate_batch()`` call, or in a background thread via
+    ``start_background_load()``. ``status()`` reports load progress.
+
+    Args:
+        base_model: Hugging Face model id or local path of the base model
+        adapter_dir: Path to the default LoRA adapter directory
+        adapters: Extra adapters (name -> directory) to load on the same base model.
+            They are served unmerged, so they are skipped when the default adapter
+            is merged or the precision is int8.
+        merge_adapter: Merge the adapter into the base weights and cache the result
+        merged_root: Directory holding merged checkpoints
+        precision: Weight precision, one of PRECISIONS
+        early_stop: Stop decoding each sequence once its answer is complete
+        few_shot_k: Nearest lexicon entries to include in each prompt as examples
+        prefix_cache: Reuse the past_key_values of PROMPT_PREFIX across requests
+        encode_cache_size: Prompts whose token ids are kept for reuse (0 disables)
+        speculative: Decode single-term calls with prompt-lookup drafts (same output)
+        draft_tokens: Maximum draft tokens verified per forward pass
+
+    Raises:
+        ValueError: If ``precision`` is not one of PRECISIONS
+    """
+
+    # Load stages in order; progress is the share of completed stages
+    STAGES = ("imports", "tokenizer", "base_model", "adapter")
+
+    def __init__(
+        self,
+        base_model: str = BASE_MODEL,
+        adapter_dir: str = ADAPTER_DIR,
+        adapters=None,
+        merge_adapter: bool = MERGE_ADAPTER,
+        merged_root: str = MERGED_DIR,
+        precision: str = PRECISION,
+        early_stop: bool = EARLY_STOP,
+        few_shot_k: int = FEW_SHOT_K,
+        prefix_cache: bool = PREFIX_CACHE,
+        encode_cache_size: int = ENCODE_CACHE_SIZE,
+        speculative: bool = SPECULATIVE,
+        draft_tokens: int = DRAFT_TOKENS,
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+        self.base_model = base_model
+        self.adapter_dir = adapter_dir
+        self.default_adapter = adapter_name(adapter_dir)
+        # Registered adapters; adapters that fail to load are dropped again by load()
+        self.adapter_dirs = {self.default_adapter: adapter_dir}
+        for name, path in (adapters or {}).items():
+            self.adapter_dirs.setdefault(name, path)
+        self.adapter_ids = {
+            name: adapter_identity(path) for name, path in self.adapter_dirs.items()
+        }
+        self.merge_adapter = merge_adapter
+        self.merged_root = merged_root
+        self.merge = "off"  # off | merged | loaded_merged
+        self.precision = precision
+        self.early_stop = early_stop
+        self.few_shot_k = few_shot_k
+        self.prefix_cache = prefix_cache
+        self.decode_stats = DecodeStats()
+        self.encode_cache = TTLCache(maxsize=encode_cache_size, ttl_s=None)
+        self.speculative = speculative
+        self.draft_tokens = draft_tokens
+
+        self.tokenizer = None
+        self.model = None
+        self._prefix_ids = None  # Token ids of PROMPT_PREFIX
+        self._prefix_kv = {}  # Adapter name -> past_key_values (batch size 1), never mutated
+        self._multi_adapter = False  # True when generate() must be told which adapter to use
+
+        self.state = "not_loaded"  # not_loaded -> loading -> ready | failed
+        self.stage = None
+        self.error = None
+        self.load_seconds = None
+        self._completed_stages = 0
+        self._load_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+
+    @property
+    def adapter_id(self) -> str:
+        """Identity of the default adapter (see adapter_identity)."""
+        return self.adapter_ids[self.default_adapter]
+
+    @adapter_id.setter
+    def adapter_id(self, value: str):
+        self.adapter_ids[self.default_adapter] = value
+
+    def resolve_adapter(self, adapter: str | None = None, allow_base: bool = False) -> str:
+        """
+        Return the registered adapter name to use, the default if ``adapter`` is None.
+
+        Args:
+            adapter: Adapter name, or None for the default adapter
+            allow_base: Also accept BASE_ADAPTER (the base model with LoRA disabled)
+
+        Raises:
+            UnknownAdapterError: If ``adapter`` is not registered, or is BASE_ADAPTER
+                while the adapter is merged into the weights
+        """
+        if adapter is None:
+            return self.default_adapter
+        if allow_base and adapter == BASE_ADAPTER:
+            if self.merge != "off" or self.precision == "int8":
+                raise UnknownAdapterError(
+                    "The base model is not available once the adapter is merged (or int8)"
+                )
+            return adapter
+        if adapter not in self.adapter_dirs:
+            raise UnknownAdapterError(
+                f"Unknown adapter '{adapter}', expected one of {sorted(self.adapter_dirs)}"
+            )
+        return adapter
+
+    def _adapter_kwargs(self, adapter: str, batch_size: int):
+        """Extra generate() kwargs selecting ``adapter`` for every row of a batch."""
+        if adapter == BASE_ADAPTER:
+            return {"adapter_names": [BASE_ADAPTER] * batch_size}
+        if not self._multi_adapter:
+            return {}
+        # Per-call adapter selection, so concurrent batches never flip shared model state
+        return {"adapter_names": [_peft_name(adapter)] * batch_size}
+
+    @property
+    def is_ready(self) -> bool:
+        """True once the model is loaded and can serve requests."""
+        return self._ready.is_set()
+
+    def _set_stage(self, stage):
+        self.stage = stage
+        self._completed_stages = self.STAGES.index(stage)
+        logger.info(f"Model load stage: {stage}")
+
+    def load(self):
+        """
+        Load tokenizer, base model and LoRA adapters. Safe to call repeatedly.
+
+        Raises:
+            FileNotFoundError: If the adapter directory does not exist
+            Exception: Any error raised while loading; also recorded in ``status()``
+        """
+        with self._load_lock:
+            if self.is_ready:
+                return
+
+            self.state = "loading"
+            self.error = None
+            start = time.perf_counter()
+            try:
+                # Heavy imports are deferred so importing this module stays cheap
+                self._set_stage("imports")
+                import torch
+                from peft import PeftModel
+                from transformers import AutoModelForCausalLM, AutoTokenizer
+
+                # int8 quantizes an fp32 model, bf16 loads (and merges) in bf16
+                load_dtype = "bf16" if self.precision == "bf16" else "fp32"
+                merged_dir = None
+                if self.merge_adapter and self.adapter_id != "missing":
+                    merged_dir = merged_checkpoint_dir(
+                        self.base_model, self.adapter_id, self.merged_root, load_dtype
+                    )
+                use_merged = merged_dir is not None and _is_checkpoint(merged_dir)
+                source = merged_dir if use_merged else self.base_model
+
+                self._set_stage("tokenizer")
+                logger.info(f"Loading base model: {source}")
+                tokenizer = AutoTokenizer.from_pretrained(source, use_fast=True)
+                if tokenizer.pad_token is None:
+                    tokenizer.pad_token = tokenizer.eos_token
+                # Left padding keeps every prompt adjacent to its generated tokens in a batch
+                tokenizer.padding_side = "left"
+
+                self._set_stage("base_model")
+                base = AutoModelForCausalLM.from_pretrained(
+                    source,
+                    torch_dtype=torch.bfloat16 if load_dtype == "bf16" else torch.float32,
+                    device_map={"": "cpu"},
+                    low_cpu_mem_usage=True,
+                )
+                base.config.pad_token_id = tokenizer.pad_token_id
+
+                self._set_stage("adapter")
+                if use_merged:
+                    logger.info(f"Using merged checkpoint: {merged_dir}")
+                    model = base
+                    self.merge = "loaded_merged"
+                else:
+                    logger.info(f"Loading LoRA adapters from: {self.adapter_dir}")
+                    if not os.path.exists(self.adapter_dir):
+                        logger.error(f"Adapter directory not found: {self.adapter_dir}")
+                        raise FileNotFoundError(f"Adapter directory not found: {self.adapter_dir}")
+
+                    model = PeftModel.from_pretrained(
+                        base,
+                        self.adapter_dir,
+                        adapter_name=_peft_name(self.default_adapter),
+                        device_map={"": "cpu"},
+                    )
+                    if merged_dir is not None:
+                        model = model.merge_and_unload()
+                        self.merge = "merged"
+                        self._save_merged(model, tokenizer, merged_dir)
+
+                extras = [name for name in self.adapter_dirs if name != self.default_adapter]
+                if extras and (self.merge != "off" or self.precision == "int8"):
+                    logger.warning(
+                        f"Adapters {extras} need the unmerged fp32/bf16 model; "
+                        f"serving only {self.default_adapter}"
+                    )
+                    for name in extras:
+                        self._drop_adapter(name)
+                elif extras:
+                    self._load_extra_adapters(model, extras)
+                self._multi_adapter = len(self.adapter_dirs) > 1
+
+                if self.precision == "int8":
+                    if self.merge == "off":
+                        model = model.merge_and_unload()
+                        self.merge = "merged"
+                    model = _quantize_int8(model)
+                model.eval()
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                logger.error(f"Failed to load model: {e}", exc_info=True)
+                raise
+
+            self.tokenizer = tokenizer
+            self.model = model
+            # Ids from a previous tokenizer are not valid for this one
+            self.encode_cache.invalidate()
+            if self.prefix_cache:
+                self._build_prefix_cache()
+            if self.few_shot_k > 0:
+                self._open_vectors()
+            self.adapter_ids = {
+                name: adapter_identity(path) for name, path in self.adapter_dirs.items()
+            }
+            self._completed_stages = len(self.STAGES)
+            self.stage = None
+            self.load_seconds = time.perf_counter() - start
+            self.state = "ready"
+            self._ready.set()
+            logger.info(
+                f"Model loaded successfully in {self.load_seconds:.1f}s "
+                f"(adapter id: {self.adapter_id}, precision: {self.precision})"
+            )
+
+    def _load_extra_adapters(self, model, names):
+        """Load non-default adapters onto the PEFT model, dropping any that fail."""
+        for name in names:
+            path = self.adapter_dirs[name]
+            try:
+                logger.info(f"Loading LoRA adapter {name} from: {path}")
+                model.load_adapter(path, adapter_name=_peft_name(name))
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Could not load adapter {name}, not serving it: {e}")
+                self._drop_adapter(name)
+
+    def _drop_adapter(self, name: str):
+        """Unregister an adapter that cannot be served."""
+        self.adapter_dirs.pop(name, None)
+        self.adapter_ids.pop(name, None)
+
+    def _build_prefix_cache(self):
+        """Run PROMPT_PREFIX through the model once per adapter and keep its past_key_values."""
+        import torch
+
+        try:
+            from transformers import DynamicCache
+        except ImportError:
+            DynamicCache = None
+
+        # The LoRA weights change the attention keys/values, so each adapter needs its own
+        self._prefix_ids, self._prefix_kv = None, {}
+        if not hasattr(DynamicCache, "batch_repeat_interleave"):
+            logger.warning(
+                "This transformers version cannot share a DynamicCache across a batch; "
+                "prompts are prefilled in full"
+            )
+            return
+        try:
+            ids = tuple(self.tokenizer(PROMPT_PREFIX)["input_ids"])
+            with torch.no_grad():
+                for name in self.adapter_dirs:
+                    out = self.model(
+                        input_ids=torch.tensor([ids]),
+                        past_key_values=DynamicCache(),
+                        use_cache=True,
+                        **self._adapter_kwargs(name, 1),
+                    )
+                    self._prefix_kv[name] = out.past_key_values
+        except Exception as e:  # noqa: BLE001
+            # Only an optimization: prompts are then prefilled in full
+            logger.warning(f"Could not build the prefix KV cache: {e}")
+            self._prefix_ids, self._prefix_kv = None, {}
+            return
+        self._prefix_ids = ids
+        logger.info(
+            f"Cached prompt prefix KV for {len(ids)} tokens x {len(self._prefix_kv)} adapters"
+        )
+
+    def _open_vectors(self):
+        """Build the few-shot vector index with the model, not in the first request."""
+        try:
+            retrieval.vector_index()
+        except Exception as e:  # noqa: BLE001
+            # _prompts() falls back to bare prompts while retrieval fails
+            logger.warning(f"Could not open the few-shot vector index: {e}")
+
+    def _save_merged(self, model, tokenizer, merged_dir):
+        """Write a merged checkpoint atomically; failures only cost the next startup."""
+        tmp_dir = f"{merged_dir}.tmp-{os.getpid()}"
+        try:
+            logger.info(f"Saving merged checkpoint to: {merged_dir}")
+            model.save_pretrained(tmp_dir, safe_serialization=True)
+            tokenizer.save_pretrained(tmp_dir)
+            os.replace(tmp_dir, merged_dir)
+        except Exception as e:  # noqa: BLE001
+            # Not only OSError: serialization raises RuntimeError/ValueError too, and the
+            # merged model in memory is fine. Drop the partial copy so it is never loaded.
+            logger.warning(f"Could not save merged checkpoint to {merged_dir}: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def start_background_load(self):
+        """
+        Start loading the model in a daemon thread if it is not loaded yet.
+
+        Returns:
+            threading.Thread or None: The loader thread, or None if already ready
+        """
+        with self._load_lock:
+            if self.is_ready:
+                return None
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+            # Mark as loading before the thread starts so callers never see a gap
+            self.state = "loading"
+            self._thread = threading.Thread(
+                target=self._background_load, name="model-loader", daemon=True
+            )
+            self._thread.start()
+            return self._thread
+
+    def _background_load(self):
+        """Thread target of start_background_load; the error stays visible in status()."""
+        try:
+            self.load()
+        except Exception:
+            # Nobody waits on this thread, so the log is where a failed /ready is traced
+            logger.exception(f"Background model load failed (state: {self.state})")
+
+    def ensure_loaded(self, timeout: float | None = None):
+        """
+        Make sure the model is ready, loading it synchronously if nobody else is.
+
+        Args:
+            timeout: How long to wait for a load already running in another thread;
+                None waits indefinitely
+
+        Raises:
+            ModelNotReadyError: If a background load is still running after ``timeout``
+            RuntimeError: If a previous load failed
+        """
+        if self.is_ready:
+            return
+        if self.state == "failed":
+            raise RuntimeError(f"Model failed to load: {self.error}")
+        if self.state == "loading":
+            if not self._ready.wait(timeout):
+                raise ModelNotReadyError("Model is still loading")
+            return
+        self.load()
+
+    def status(self):
+        """
+        Report load progress.
+
+        Returns:
+            dict: state, stage, progress (0.0-1.0), load_seconds, error, base_model,
+            adapter_id, adapters (registered names), merge (off, merged or
+            loaded_merged), precision
+        """
+        return {
+            "state": self.state,
+            "stage": self.stage,
+            "progress": round(self._completed_stages / len(self.STAGES), 3),
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+            "base_model": self.base_model,
+            "adapter_id": self.adapter_id,
+            "adapters": sorted(self.adapter_dirs),
+            "merge": self.merge,
+            "precision": self.precision,
+        }
 
-# Initialize model and tokenizer at module level
-try:
-    logger.info(f"Loading base model: {BASE_MODEL}")
-    tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL, use_fast=True)
-    base = AutoModelForCausalLM.from_pretrained(
-        BASE_MODEL,
-        torch_dtype=torch.float32,  # CPU-friendly
-        device_map={"": "cpu"},
-        low_cpu_mem_usage=True,
+    def _stopping_criteria(self, prompt_length: int, timer, cancel=None):
+        """Build the stopping criteria for one generate call, led by its step timer."""
+        from transformers import StoppingCriteriaList
+
+        from .stopping import StopWhenComplete
+
+        criteria = [timer]
+        if self.early_stop or cancel is not None:
+            criteria.append(
+                StopWhenComplete(self.tokenizer, prompt_length, cancel, self.early_stop)
+            )
+        return StoppingCriteriaList(criteria)
+
+    def _record_decode(
+        self, sequences, prompt_length: int, max_new_tokens: int, start, timer, prefix_tokens=0
+    ):
+        """
+        Count the tokens each sequence generated (padding after a stop excluded).
+
+        The generate call that started at ``start`` is split into its prefill and
+        decode stages at the first step recorded by ``timer``.
+        """
+        end = time.perf_counter()
+        first_step = timer.first_step or end
+        STAGE_SECONDS.observe(first_step - start, "prefill")
+        STAGE_SECONDS.observe(end - first_step, "decode")
+
+        generated = sequences[:, prompt_length:]
+        counts = (generated != self.tokenizer.pad_token_id).sum(dim=1).tolist()
+        self.decode_stats.record(counts, max_new_tokens, end - start, prefix_tokens)
+
+    def _token_ids(self, prompts):
+        """
+        Token ids of each prompt, tokenizing only prompts not in the encode cache.
+
+        Misses are tokenized together in one call. Attention masks are not cached;
+        they follow from the id lengths when the batch is padded.
+
+        Args:
+            prompts: Prompt strings
+
+        Returns:
+            list[tuple[int, ...]]: Token ids per prompt
+        """
+        start = time.perf_counter()
+        ids = [self.encode_cache.get(prompt) for prompt in prompts]
+        misses = [i for i, cached in enumerate(ids) if cached is None]
+        if misses:
+            encoded = self.tokenizer([prompts[i] for i in misses])["input_ids"]
+            for i, row in zip(misses, encoded):
+                ids[i] = tuple(row)
+                self.encode_cache.put(prompts[i], ids[i])
+        seconds = time.perf_counter() - start
+        self.decode_stats.record_tokenize(seconds)
+        STAGE_SECONDS.observe(seconds, "tokenize")
+        return ids
+
+    def _encode(self, prompts, adapter: str):
+        """
+        Tokenize prompts into one left-padded batch, reusing the prefix KV cache.
+
+        If every prompt starts with the cached PROMPT_PREFIX tokens, each row is
+        laid out as prefix + padding + rest of the prompt. A copy of the prefix
+        cache, repeated to the batch size, is passed as ``past_key_values``, so
+        generate() only prefills the rest. The attention mask hides the padding
+        and position ids are derived from it, so the output matches a plain
+        left-padded batch.
+
+        Args:
+            prompts: Prompt strings
+            adapter: Registered adapter the batch runs with (prefix caches are per adapter)
+
+        Returns:
+            tuple: (generate() input kwargs, padded prompt length, prefix tokens reused per row)
+        """
+        import torch
+
+        encoded = self._token_ids(prompts)
+        head = ()
+        prefix_kv = self._prefix_kv.get(adapter)
+        if prefix_kv is not None:
+            n = len(self._prefix_ids)
+            # Token boundaries can differ after the prefix; only reuse an exact match
+            if all(len(ids) > n and ids[:n] == self._prefix_ids for ids in encoded):
+                head = self._prefix_ids
+
+        tails = [ids[len(head) :] for ids in encoded]
+        width = max(len(tail) for tail in tails)
+        pad = self.tokenizer.pad_token_id
+        inputs = {
+            "input_ids": torch.tensor(
+                [[*head, *[pad] * (width - len(tail)), *tail] for tail in tails]
+            ),
+            "attention_mask": torch.tensor(
+                [[1] * len(head) + [0] * (width - len(tail)) + [1] * len(tail) for tail in tails]
+            ),
+        }
+        if head:
+            # generate() appends to the cache in place, so every call gets its own copy
+            cache = copy.deepcopy(prefix_kv)
+            cache.batch_repeat_interleave(len(prompts))
+            inputs["past_key_values"] = cache
+        return inputs, inputs["input_ids"].shape[1], len(head)
+
+    def _prompts(self, terms):
+        """Build retrieval-augmented prompts for a batch of terms."""
+        shots = [[] for _ in terms]
+        if self.few_shot_k > 0:
+            start = time.perf_counter()
+            try:
+                shots = retrieval.neighbors(terms, self.few_shot_k)
+            except Exception as e:  # noqa: BLE001
+                # Grounding is best effort; the bare template still works
+                logger.warning(f"Few-shot retrieval failed, using bare prompts: {e}")
+            STAGE_SECONDS.observe(time.perf_counter() - start, "retrieve")
+        return [build_prompt(term, s) for term, s in zip(terms, shots)]
+
+    def _assisted_generate(self, term: str, inputs, max_new_tokens: int, adapter: str, criteria):
+        """
+        Greedy-decode one prompt, verifying prompt-lookup drafts (see speculative).
+
+        Drafts come from the lexicon answer of the term, or of the entry it is a
+        typo or variant of, and from the prompt with its few-shot examples.
+        """
+        from transformers import LogitsProcessorList, RepetitionPenaltyLogitsProcessor
+
+        from .speculative import PromptLookupDraft, greedy_decode
+
+        sources = []
+        hit = retrieval.match(term)
+        if hit:
+            text = DRAFT_TEMPLATE.format(**hit.entry)
+            sources.append(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+        eos = self.model.generation_config.eos_token_id
+        eos = [] if eos is None else [eos] if isinstance(eos, int) else list(eos)
+
+        out, drafted, accepted, forwards = greedy_decode(
+            self.model,
+            inputs["input_ids"],
+            max_new_tokens,
+            PromptLookupDraft(sources, num_tokens=self.draft_tokens),
+            LogitsProcessorList([RepetitionPenaltyLogitsProcessor(REPETITION_PENALTY)]),
+            criteria,
+            eos,
+            inputs.get("past_key_values"),
+            **self._adapter_kwargs(adapter, 1),
+        )
+        self.decode_stats.record_draft(drafted, accepted, forwards)
+        return out
+
+    def generate_batch(self, terms, max_new_tokens: int, adapter: str | None = None):
+        """
+        Run one left-padded model.generate call over a list of stripped terms.
+
+        Only the generated tokens are decoded, and each result is returned after
+        the bare INSTRUCT_TEMPLATE for its term. Few-shot examples in the prompt
+        therefore never reach the parser. Every row runs with the same adapter
+        (the default adapter if None); BASE_ADAPTER runs the base model alone.
+        With ``speculative``, a single term is decoded with assisted decoding instead.
+        """
+        self.ensure_loaded()
+        import torch
+
+        from .stopping import FirstStepTimer
+
+        # Resolved after loading: adapters that failed to load are no longer registered
+        adapter = self.resolve_adapter(adapter, allow_base=True)
+        inputs, prompt_length, prefix_tokens = self._encode(self._prompts(terms), adapter)
+        timer = FirstStepTimer()
+
+        criteria = self._stopping_criteria(prompt_length, timer)
+
+        start = time.perf_counter()
+        with torch.no_grad():
+            if self.speculative and len(terms) == 1:
+                out = self._assisted_generate(terms[0], inputs, max_new_tokens, adapter, criteria)
+            else:
+                out = self.model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=False,  # Use greedy decoding for more deterministic output
+                    num_beams=1,
+                    repetition_penalty=REPETITION_PENALTY,
+                    pad_token_id=self.tokenizer.eos_token_id,
+                    # Finished rows are padded while the rest of the batch keeps decoding
+                    stopping_criteria=criteria,
+                    **self._adapter_kwargs(adapter, len(terms)),
+                )
+        self._record_decode(out, prompt_length, max_new_tokens, start, timer, prefix_tokens)
+
+        generated = self.tokenizer.batch_decode(out[:, prompt_length:], skip_special_tokens=True)
+        return [INSTRUCT_TEMPLATE.format(term=term) + text for term, text in zip(terms, generated)]
+
+    def stream(self, term: str, max_new_tokens: int, adapter: str | None = None):
+        """
+        Generate an explanation for one term, yielding text chunks as they decode.
+
+        With early stopping, decoding ends as soon as the Example line is complete.
+        Closing the generator early (e.g. on client disconnect) cancels the decode.
+
+        Args:
+            term: Stripped slang term
+            max_new_tokens: Maximum number of tokens to generate
+            adapter: Registered adapter name, or None for the default adapter
+
+        Yields:
+            str: Newly decoded text, excluding the prompt
+        """
+        self.ensure_loaded()
+        from transformers import TextIteratorStreamer
+
+        from .stopping import FirstStepTimer
+
+        adapter = self.resolve_adapter(adapter)
+        inputs, prompt_length, prefix_tokens = self._encode(self._prompts([term]), adapter)
+        streamer = TextIteratorStreamer(
+            self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=STREAM_TIMEOUT_S
+        )
+        cancel = threading.Event()
+        timer = FirstStepTimer()
+        criteria = self._stopping_criteria(prompt_length, timer, cancel)
+        errors = []
+
+        def run():
+            import torch
+
+            try:
+                start = time.perf_counter()
+                with torch.no_grad():
+                    out = self.model.generate(
+                        **inputs,
+                        max_new_tokens=max_new_tokens,
+                        do_sample=False,
+                        num_beams=1,
+                        repetition_penalty=REPETITION_PENALTY,
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        stopping_criteria=criteria,
+                        streamer=streamer,
+                        **self._adapter_kwargs(adapter, 1),
+                    )
+                self._record_decode(out, prompt_length, max_new_tokens, start, timer, prefix_tokens)
+            except Exception as e:  # noqa: BLE001
+                errors.append(e)
+                streamer.end()  # Unblock the consumer
+
+        thread = threading.Thread(target=run, name="stream-generate", daemon=True)
+        thread.start()
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+        finally:
+            cancel.set()
+            thread.join()
+
+        if errors:
+            raise errors[0]
+
+
+engine = InferenceEngine(adapters=discover_adapters(ADAPTERS_ROOT))
+
+
+def _load_split(spec: str):
+    """Parse ADAPTER_SPLIT, keeping only registered adapters."""
+    try:
+        split = parse_adapter_split(spec)
+    except ValueError as e:
+        logger.error(f"Ignoring invalid SLANG_ADAPTER_SPLIT: {e}")
+        return []
+    unknown = [name for name, _ in split if name not in engine.adapter_dirs]
+    if unknown:
+        logger.warning(f"Ignoring unknown adapters in SLANG_ADAPTER_SPLIT: {unknown}")
+    return [(name, weight) for name, weight in split if name in engine.adapter_dirs]
+
+
+_split = _load_split(ADAPTER_SPLIT)
+
+
+def choose_adapter(term: str, adapter: str | None = None) -> str:
+    """
+    Pick the adapter a request is served by.
+
+    A requested adapter wins. Otherwise, with a traffic split configured, the
+    term is hashed into the split, so the same term always lands on the same
+    adapter (and the same cache entries). Without a split the default adapter
+    serves everything.
+
+    Args:
+        term: The slang term
+        adapter: Adapter named by the request, or None
+
+    Returns:
+        str: Registered adapter name
+
+    Raises:
+        UnknownAdapterError: If ``adapter`` is not registered
+    """
+    if adapter is not None:
+        return engine.resolve_adapter(adapter)
+    # Adapters that failed to load drop out of the split
+    split = [(name, weight) for name, weight in _split if name in engine.adapter_dirs]
+    if not split:
+        return engine.default_adapter
+
+    # crc32 rather than hash(): stable across processes and restarts
+    bucket = zlib.crc32(normalize_term(term).encode("utf-8")) / 2**32
+    point = bucket * sum(weight for _, weight in split)
+    for name, weight in split:
+        point -= weight
+        if point < 0:
+            return name
+    return split[-1][0]
+
+
+def adapters_info():
+    """
+    Describe the registered adapters.
+
+    Returns:
+        dict: default adapter, traffic split (name -> share) and per-adapter identity
+    """
+    total = sum(weight for _, weight in _split)
+    return {
+        "default": engine.default_adapter,
+        "split": {name: round(weight / total, 4) for name, weight in _split},
+        "adapters": [
+            {"name": name, "adapter_id": engine.adapter_ids.get(name)}
+            for name in sorted(engine.adapter_dirs)
+        ],
+    }
+
+
+def _run_batch(items):
+    """
+    Batch function for the micro-batcher.
+
+    Items are ``(term, max_new_tokens, adapter)`` tuples. Items are grouped by
+    ``max_new_tokens`` and adapter so each group runs as a single generate call.
+    """
+    results = [None] * len(items)
+    groups = {}
+    for idx, (term, max_new_tokens, adapter) in enumerate(items):
+        groups.setdefault((max_new_tokens, adapter), []).append(idx)
+
+    for (max_new_tokens, adapter), indices in groups.items():
+        outputs = engine.generate_batch([items[i][0] for i in indices], max_new_tokens, adapter)
+        for i, output in zip(indices, outputs):
+            results[i] = output
+
+    logger.debug("Generated batch of %d in %d generate call(s)", len(items), len(groups))
+    return results
+
+
+_batcher = MicroBatcher(
+    _run_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    name="inference-batcher",
+)
+
+_cache = TTLCache(maxsize=CACHE_SIZE, ttl_s=CACHE_TTL_S)
+_disk_cache = DiskCache(DISK_CACHE, int(DISK_CACHE_MB * (1 << 20))) if DISK_CACHE else None
+
+# Prompt templates, fixed per process but possibly changed by a deploy, so a hash of
+# them is part of the persistent cache key
+_PROMPT_ID = hashlib.sha1(f"{SHOT_TEMPLATE}|{PROMPT_PREFIX}".encode()).hexdigest()[:8]
+_lexicon_id = (None, "")  # (lexicon mapping, its content hash)
+
+
+def _cache_key(term: str, max_new_tokens: int, adapter: str):
+    """Build the response cache key for a term, its adapter and the generation settings."""
+    return (
+        normalize_term(term),
+        max_new_tokens,
+        REPETITION_PENALTY,
+        engine.adapter_ids[adapter],
+        engine.precision,
+        engine.few_shot_k,
     )
 
-    if tokenizer.pad_token is None:
-        tokenizer.pad_token = tokenizer.eos_token
-    base.config.pad_token_id = tokenizer.pad_token_id
 
-    logger.info(f"Loading LoRA adapters from: {ADAPTER_DIR}")
-    if not os.path.exists(ADAPTER_DIR):
-        logger.error(f"Adapter directory not found: {ADAPTER_DIR}")
-        raise FileNotFoundError(f"Adapter directory not found: {ADAPTER_DIR}")
+def _disk_key(key):
+    """
+    Extend a response cache key with what else the output depends on across deploys.
+
+    Few-shot prompts hold lexicon entries, so with few_shot_k > 0 the key includes
+    the lexicon content hash, computed once per loaded lexicon version.
+    """
+    global _lexicon_id
+    lexicon = ""
+    if engine.few_shot_k:
+        entries = retrieval.lexicon()
+        if _lexicon_id[0] is not entries:
+            _lexicon_id = (entries, retrieval.lexicon_identity(entries))
+        lexicon = _lexicon_id[1]
+    return key + (engine.base_model, engine.early_stop, _PROMPT_ID, lexicon)
+
+
+def _cache_get(key):
+    """Cached result for ``key`` from memory, else from the disk cache (then kept in memory)."""
+    result = _cache.get(key)
+    if result is None and _disk_cache is not None:
+        result = _disk_cache.get(_disk_key(key))
+        if result is not None:
+            _cache.put(key, result)
+    return result
+
+
+def _cache_put(key, result: str):
+    """Store a result in the in-process cache and the disk cache."""
+    _cache.put(key, result)
+    if _disk_cache is not None:
+        _disk_cache.put(_disk_key(key), result)
+
 
-    model = PeftModel.from_pretrained(base, ADAPTER_DIR, device_map={"": "cpu"})
-    model.eval()
-    logger.info("Model loaded successfully")
-except Exception as e:
-    logger.error(f"Failed to load model: {str(e)}", exc_info=True)
-    raise
+def use_disk_cache(path: str | None, max_mb: float = DISK_CACHE_MB):
+    """
+    Switch the persistent response cache to another file, or turn it off.
+
+    Args:
+        path: SQLite database file; None or empty disables the disk cache
+        max_mb: Size bound in megabytes
+
+    Returns:
+        DiskCache or None: The cache now in use
+    """
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.close()
+    _disk_cache = DiskCache(path, int(max_mb * (1 << 20))) if path else None
+    return _disk_cache
+
+
+def cache_stats():
+    """Return hit/miss/eviction counters of the response cache (and of the disk cache)."""
+    stats = _cache.stats()
+    if _disk_cache is not None:
+        stats["disk"] = _disk_cache.stats()
+    return stats
 
 
-def generate(term: str, max_new_tokens: int = 100) -> str:
+def invalidate_cache(all_entries: bool = False):
+    """
+    Drop cached responses that no longer match the adapter on disk.
+
+    Call this after replacing adapter files (and reloading the model).
+    The identities of all registered adapters are recomputed and entries produced
+    by any other adapter version are removed, from the disk cache as well.
+
+    Args:
+        all_entries: Drop every entry regardless of adapter
+
+    Returns:
+        int: Number of entries removed
+    """
+    engine.adapter_ids = {
+        name: adapter_identity(path) for name, path in engine.adapter_dirs.items()
+    }
+    current = set(engine.adapter_ids.values())
+    stale = None if all_entries else (lambda key: key[3] not in current)
+    removed = _cache.invalidate(stale)
+    if _disk_cache is not None:
+        removed += _disk_cache.invalidate(stale)
+    return removed
+
+
+def generate_batch(terms, max_new_tokens: int = 100, adapter: str | None = None):
+    """
+    Generate slang explanations for several terms in a single batched call.
+
+    Cached terms are answered from the response cache. The remaining terms go to
+    the model in one ``model.generate`` call per adapter and their results are cached.
+
+    Args:
+        terms: List of slang terms to explain
+        max_new_tokens: Maximum number of tokens to generate per term
+        adapter: Adapter for every term, or None to pick per term (see choose_adapter)
+
+    Returns:
+        list[str]: Generated explanation text, in the same order as ``terms``
+
+    Raises:
+        ValueError: If any term is empty
+        UnknownAdapterError: If ``adapter`` is not registered
+        ModelNotReadyError: If the model is still loading after MODEL_WAIT_S
+        RuntimeError: If generation fails
+    """
+    if any(not term or not term.strip() for term in terms):
+        raise ValueError("Term cannot be empty")
+    if not terms:
+        return []
+    # Prompted exactly as keyed, so a cached answer is what the model gives that key
+    terms = [normalize_term(term) for term in terms]
+
+    adapters = [choose_adapter(term, adapter) for term in terms]
+    keys = [_cache_key(term, max_new_tokens, a) for term, a in zip(terms, adapters)]
+    results = [_cache_get(key) for key in keys]
+    misses = {}
+    for i, result in enumerate(results):
+        if result is None:
+            misses.setdefault(adapters[i], []).append(i)
+    if not misses:
+        return results
+
+    engine.ensure_loaded(timeout=MODEL_WAIT_S)
+
+    for name, indices in misses.items():
+        try:
+            generated = engine.generate_batch([terms[i] for i in indices], max_new_tokens, name)
+        except Exception as e:
+            logger.error(f"Batch generation failed for {len(indices)} terms: {e}", exc_info=True)
+            raise RuntimeError(f"Generation failed: {e}") from e
+
+        for i, result in zip(indices, generated):
+            _cache_put(keys[i], result)
+            results[i] = result
+    return results
+
+
+def generate(term: str, max_new_tokens: int = 100, adapter: str | None = None) -> str:
     """
     Generate slang explanation using the fine-tuned model.
 
+    Results are served from the response cache when possible. Otherwise concurrent
+    calls are coalesced by the micro-batcher into a single batched
+    ``model.generate`` call, and each caller receives its own decoded result.
+
+    If the model is not loaded yet it is loaded on first use. If it is already
+    loading in the background, the call waits up to MODEL_WAIT_S seconds.
+
     Args:
         term: The slang term to explain
         max_new_tokens: Maximum number of tokens to generate
+        adapter: Adapter to use, or None to pick one (see choose_adapter)
 
     Returns:
         str: Generated explanation text
 
     Raises:
         ValueError: If term is empty
+        UnknownAdapterError: If ``adapter`` is not registered
+        ModelNotReadyError: If the model is still loading after MODEL_WAIT_S
         RuntimeError: If generation fails
     """
     if not term or not term.strip():
         raise ValueError("Term cannot be empty")
+    term = normalize_term(term)
 
-    try:
-        prompt = INSTRUCT_TEMPLATE.format(term=term.strip())
-        logger.debug(f"Generating explanation for term: {term}")
+    adapter = choose_adapter(term, adapter)
+    key = _cache_key(term, max_new_tokens, adapter)
+    cached = _cache_get(key)
+    if cached is not None:
+        logger.debug("Cache hit for term: %s", term)
+        return cached
 
-        inputs = tokenizer(prompt, return_tensors="pt")  # already on CPU
+    engine.ensure_loaded(timeout=MODEL_WAIT_S)
 
-        with torch.no_grad():
-            out = model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
-                do_sample=False,  # Use greedy decoding for more deterministic output
-                num_beams=1,
-                repetition_penalty=1.2,  # Reduce repetition
-                pad_token_id=tokenizer.eos_token_id,
-            )
-
-        result = tokenizer.decode(out[0], skip_special_tokens=True)
-        logger.debug(f"Generated text length: {len(result)} characters")
+    try:
+        logger.debug("Generating explanation for term: %s", term)
+        result = _batcher((term, max_new_tokens, adapter))
+        logger.debug("Generated text length: %d characters", len(result))
+        _cache_put(key, result)
         return result
 
     except Exception as e:
-        logger.error(f"Generation failed for term '{term}': {str(e)}", exc_info=True)
-        raise RuntimeError(f"Generation failed: {str(e)}") from e
+        logger.error(f"Generation failed for term '{term}': {e}", exc_info=True)
+        raise RuntimeError(f"Generation failed: {e}") from e
+
+
+def stream_generate(term: str, max_new_tokens: int = 100, adapter: str | None = None):
+    """
+    Stream a slang explanation as it is generated.
+
+    Validation and model readiness are checked eagerly, so errors surface before
+    the first chunk. Cached responses are replayed as a single chunk.
+
+    Args:
+        term: The slang term to explain
+        max_new_tokens: Maximum number of tokens to generate
+        adapter: Adapter to use, or None to pick one (see choose_adapter)
+
+    Returns:
+        Iterator[str]: Generated text chunks, excluding the prompt
+
+    Raises:
+        ValueError: If term is empty
+        UnknownAdapterError: If ``adapter`` is not registered
+        ModelNotReadyError: If the model is still loading after MODEL_WAIT_S
+    """
+    if not term or not term.strip():
+        raise ValueError("Term cannot be empty")
+    term = normalize_term(term)
+
+    adapter = choose_adapter(term, adapter)
+    cached = _cache_get(_cache_key(term, max_new_tokens, adapter))
+    if cached is not None:
+        prompt = INSTRUCT_TEMPLATE.format(term=term)
+        return iter([cached.removeprefix(prompt)])
+
+    engine.ensure_loaded(timeout=MODEL_WAIT_S)
+    return _stream_and_cache(term, max_new_tokens, adapter)
+
+
+def _stream_and_cache(term: str, max_new_tokens: int, adapter: str):
+    """
+    Relay engine.stream() chunks and cache the full text once the stream finishes.
+
+    Closing this generator closes the engine stream, which cancels its decode.
+    """
+    key = _cache_key(term, max_new_tokens, adapter)
+    parts = []
+    stream = engine.stream(term, max_new_tokens, adapter)
+    try:
+        for chunk in stream:
+            parts.append(chunk)
+            yield chunk
+    finally:
+        stream.close()
+    _cache_put(key, INSTRUCT_TEMPLATE.format(term=term) + "".join(parts))
+
+
+def decode_stats():
+    """Return generated-token counters, time saved by early stopping and encode cache counters."""
+    return {**engine.decode_stats.snapshot(), "encode_cache": engine.encode_cache.stats()}
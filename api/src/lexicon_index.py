@@ -0,0 +1,446 @@
+"""Precomputed lexicon index with normalized and typo-tolerant matching."""
+
+import copy
+import re
+import unicodedata
+from typing import NamedTuple
+
+# Curly quotes, primes and backticks all become plain ASCII quotes
+_QUOTES = str.maketrans(
+    {
+        "‘": "'",
+        "’": "'",
+        "‚": "'",
+        "‛": "'",
+        "′": "'",
+        "`": "'",
+        "“": '"',
+        "”": '"',
+        "„": '"',
+        "″": '"',
+    }
+)
+_REPEATS = re.compile(r"(.)\1+")
+
+
+def canonical_key(term: str) -> str:
+    """
+    Aggressively normalize a term for matching.
+
+    Applies NFKC unicode normalization, folds curly quotes and case, then drops
+    everything that is not a letter or digit. For example "L + ratio", "l+ratio"
+    and "L+Ratio" all give "lratio", and "N.P.C." gives "npc".
+
+    Args:
+        term: Raw term
+
+    Returns:
+        str: Canonical key (may be empty for punctuation-only input)
+    """
+    text = unicodedata.normalize("NFKC", term).translate(_QUOTES).casefold()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def squeeze_key(key: str) -> str:
+    """Collapse runs of a repeated character, so "rizzz" and "rizz" both give "riz"."""
+    return _REPEATS.sub(r"\1", key)
+
+
+def _deletes(key: str, max_distance: int):
+    """All strings reachable from ``key`` by deleting up to ``max_distance`` characters."""
+    found = {key}
+    frontier = {key}
+    for _ in range(max_distance):
+        frontier = {
+            variant[:i] + variant[i + 1 :]
+            for variant in frontier
+            if len(variant) > 1
+            for i in range(len(variant))
+        }
+        found |= frontier
+    return found
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Damerau-Levenshtein (optimal string alignment) distance with an early exit.
+
+    Args:
+        a: First string
+        b: Second string
+        limit: Distances above this are not computed exactly
+
+    Returns:
+        int: The distance, or ``limit + 1`` if it exceeds ``limit``
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= limit else limit + 1
+
+
+class Match(NamedTuple):
+    """A lexicon match returned by LexiconIndex.match."""
+
+    term: str  # Lexicon term that matched
+    entry: dict  # Its definition/example entry
+    kind: str  # "exact", "normalized", "squeezed" or "fuzzy"
+    score: float  # 1.0 except for fuzzy matches: 1 - distance / length
+
+    @property
+    def authoritative(self) -> bool:
+        """
+        Whether the query is the lexicon term itself, up to case, spacing and punctuation.
+
+        Squeezed and fuzzy matches are only close ("beet" squeezes to "bet", "boat"
+        is one edit from "goat"), so they must not be served as the term's answer.
+        """
+        return self.kind in ("exact", "normalized")
+
+
+class _MemoryTables:
+    """In-process match tables built from a plain dict lexicon."""
+
+    def __init__(self, entries, max_distance: int):
+        self.max_distance = max_distance
+        self._canonical = {}  # canonical key -> term
+        self._squeezed = {}  # squeezed key -> term
+        self._variants = {}  # delete variant -> list of squeezed keys
+        self._shared = False  # True once the lists may be shared with another copy
+
+        for term in entries:
+            self._add(term)
+
+    def _add(self, term: str):
+        canonical = canonical_key(term)
+        if not canonical:
+            return
+        # First term wins on collisions so results do not depend on dict churn
+        self._canonical.setdefault(canonical, term)
+        squeezed = squeeze_key(canonical)
+        if squeezed in self._squeezed:
+            return
+        self._squeezed[squeezed] = term
+        for variant in _deletes(squeezed, self.max_distance):
+            if self._shared:
+                # Copy on write: the old list may still be read through another version
+                self._variants[variant] = [*self._variants.get(variant, ()), squeezed]
+            else:
+                self._variants.setdefault(variant, []).append(squeezed)
+
+    def extended(self, terms):
+        """Copy of these tables with ``terms`` added; this object is left unchanged."""
+        tables = copy.copy(self)
+        tables._canonical = dict(self._canonical)
+        tables._squeezed = dict(self._squeezed)
+        tables._variants = dict(self._variants)
+        tables._shared = True
+        for term in terms:
+            tables._add(term)
+        return tables
+
+    def canonical(self, key: str):
+        return self._canonical.get(key)
+
+    def squeezed(self, key: str):
+        return self._squeezed.get(key)
+
+    def variants(self, variant: str):
+        return self._variants.get(variant, ())
+
+
+class LexiconIndex:
+    """
+    Lexicon lookup index built once at load time.
+
+    A query is tried in four steps, from cheapest to most expensive:
+
+    1. exact: ``term.strip().lower()``, as before
+    2. normalized: ``canonical_key`` (unicode, quotes, punctuation, whitespace)
+    3. squeezed: ``squeeze_key`` of the canonical key (repeated letters)
+    4. fuzzy: SymSpell-style deletion index over the squeezed keys. Candidates
+       that share a delete variant with the query are verified with
+       ``edit_distance``. A candidate is accepted if its distance is at most
+       ``max_distance`` and its score is at least ``min_score``. Queries with
+       a canonical key shorter than ``min_fuzzy_length`` get no fuzzy match:
+       one edit away from a short word is usually another word.
+
+    Only exact and normalized matches are authoritative (see Match.authoritative).
+
+    The fuzzy step costs one dict probe per delete variant of the query. This
+    does not depend on lexicon size, so lookups stay well under a millisecond
+    for 100k terms.
+
+    A compiled LexiconStore already holds these tables on disk, so it provides
+    them through ``match_tables()`` instead of having them built in memory. Its
+    fuzzy distance is capped at the distance the store was compiled with.
+
+    Args:
+        entries: Mapping of lexicon term (stripped, lower-cased) to its entry
+        max_distance: Max edit distance for fuzzy matches; 0 disables fuzzy matching
+        min_score: Minimum ``1 - distance / max(len)`` for a fuzzy match
+        min_fuzzy_length: Minimum canonical key length of a query to try fuzzy matching
+    """
+
+    def __init__(
+        self,
+        entries,
+        max_distance: int = 1,
+        min_score: float = 0.75,
+        min_fuzzy_length: int = 5,
+    ):
+        if max_distance < 0:
+            raise ValueError("max_distance cannot be negative")
+
+        self.entries = entries
+        self.min_score = min_score
+        self.min_fuzzy_length = min_fuzzy_length
+        if hasattr(entries, "match_tables"):
+            self._tables = entries.match_tables()
+            self.max_distance = min(max_distance, self._tables.max_distance)
+        else:
+            self._tables = _MemoryTables(entries, max_distance)
+            self.max_distance = max_distance
+
+    def __len__(self):
+        return len(self.entries)
+
+    def extended(self, added):
+        """
+        Copy of this index with ``added`` merged in; this index is left unchanged.
+
+        Only the new terms are indexed, so appending a few terms to a large
+        lexicon costs a few dict copies instead of a rebuild. Entries for terms
+        that already exist replace the old ones.
+
+        Args:
+            added: Mapping of new or changed terms to their entries
+
+        Returns:
+            LexiconIndex: The extended index
+
+        Raises:
+            TypeError: If the index is backed by a read-only LexiconStore
+        """
+        if not isinstance(self._tables, _MemoryTables):
+            raise TypeError("Only in-memory lexicon indexes can be extended")
+        index = copy.copy(self)
+        index.entries = {**self.entries, **added}
+        index._tables = self._tables.extended(t for t in added if t not in self.entries)
+        return index
+
+    def match(self, term: str):
+        """
+        Find the best lexicon match for ``term``.
+
+        Args:
+            term: Raw query term
+
+        Returns:
+            Match or None: The best match, or None if nothing is close enough
+        """
+        if not term:
+            return None
+
+        exact = term.strip().lower()
+        entry = self.entries.get(exact)
+        if entry is not None:
+            return Match(exact, entry, "exact", 1.0)
+
+        canonical = canonical_key(term)
+        if not canonical:
+            return None
+        hit = self._tables.canonical(canonical)
+        if hit is None:
+            squeezed = squeeze_key(canonical)
+            hit = self._tables.squeezed(squeezed)
+            if hit is None:
+                if len(canonical) < self.min_fuzzy_length:
+                    return None
+                return self._fuzzy(squeezed)
+            return Match(hit, self.entries[hit], "squeezed", 1.0)
+        return Match(hit, self.entries[hit], "normalized", 1.0)
+
+    def _fuzzy(self, squeezed: str):
+        """Best deletion-index candidate for a squeezed query key, or None."""
+        if self.max_distance == 0:
+            return None
+
+        best = None
+        seen = set()
+        for variant in _deletes(squeezed, self.max_distance):
+            for key in self._tables.variants(variant):
+                if key in seen:
+                    continue
+                seen.add(key)
+                distance = edit_distance(squeezed, key, self.max_distance)
+                if distance > self.max_distance:
+                    continue
+                score = 1 - distance / max(len(squeezed), len(key))
+                if score < self.min_score:
+                    continue
+                rank = (distance, -score, key)
+                if best is None or rank < best[0]:
+                    best = (rank, key, score)
+
+        if best is None:
+            return None
+        term = self._tables.squeezed(best[1])
+        return Match(term, self.entries[term], "fuzzy", round(best[2], 3))
+
+
+# Words (letters/digits, with apostrophes inside them as in "it's") or single symbols;
+# control characters are not tokens
+_TEXT_TOKEN = re.compile(r"[^\W_]+(?:['‘’`′][^\W_]+)*|[^\w\s\x00-\x1f\x7f-\x9f]|_")
+_ELONGATED = re.compile(r"(.)\1{2,}")
+_NUMBER = re.compile(r"^[\d.,\s]+$")
+# Trie keys besides the token children; not strings, so no token can collide with them
+_END = object()  # Marks a complete term
+_SQUEEZED = object()  # A node's squeezed child key -> child key map
+
+
+def _token_key(token: str) -> str:
+    """Match key of one text token: case folded, with NFKC and quote folding if non-ASCII."""
+    if token.isascii():
+        return token.lower().replace("`", "'")
+    return unicodedata.normalize("NFKC", token).translate(_QUOTES).casefold()
+
+
+def _elongation_keys(key: str):
+    """Keys of an elongated word ("sooo"), with runs of 3+ cut to two, then to one character."""
+    return (_ELONGATED.sub(r"\1\1", key), _ELONGATED.sub(r"\1", key))
+
+
+class TermSpan(NamedTuple):
+    """A lexicon term found in text by TermMatcher.find."""
+
+    start: int  # Character offsets of the matched text
+    end: int
+    term: str  # Lexicon term
+    kind: str  # "exact" if the text is the term up to case, else "normalized"
+
+
+class TermMatcher:
+    """
+    Token trie over lexicon terms for finding every term in running text.
+
+    Text is split into words and single symbols, so multi-word and punctuated
+    entries such as "no cap", "L+ratio" and "<3" are matched token by token:
+
+    - Case is ignored and curly quotes are folded, as in ``canonical_key``.
+    - Tokens of one term may be separated by spaces, but not by a newline.
+    - Elongated words (a letter repeated 3+ times) match their lexicon form:
+      "sooo" finds "so" and "riiizzz" finds "rizz".
+
+    Matching is leftmost-longest and spans do not overlap. Each text token costs
+    one dict probe, so the time per message does not depend on lexicon size.
+
+    Terms without a letter or digit ("?", "^^") and, unless ``numbers`` is set,
+    purely numeric terms ("2", "19") are left out. They would otherwise match
+    ordinary punctuation and numbers in almost every message.
+
+    Args:
+        terms: Lexicon terms (stripped, lower-cased); the first of equal-keyed terms wins
+        numbers: Also index purely numeric terms
+    """
+
+    def __init__(self, terms, numbers: bool = False):
+        self._root = {}
+        self.size = 0
+        for term in terms:
+            if not any(ch.isalnum() for ch in term) or (not numbers and _NUMBER.match(term)):
+                continue
+            node = self._root
+            for token in _TEXT_TOKEN.findall(term):
+                key = _token_key(token)
+                node.setdefault(_SQUEEZED, {}).setdefault(squeeze_key(key), key)
+                node = node.setdefault(key, {})
+            if _END not in node:
+                node[_END] = term
+                self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def tokens(text: str):
+        """Word and symbol tokens of ``text`` as (start, end, token) tuples."""
+        return [(m.start(), m.end(), m.group()) for m in _TEXT_TOKEN.finditer(text)]
+
+    @staticmethod
+    def _child(node, token: str):
+        """Trie node after ``token``, trying elongation variants; None if there is none."""
+        key = _token_key(token)
+        child = node.get(key)
+        if child is None and _ELONGATED.search(key):
+            for variant in _elongation_keys(key):
+                child = node.get(variant)
+                if child is not None:
+                    return child
+            # Runs of different lengths ("riiizzz"): any term token with the same squeezed form
+            squeezed = node[_SQUEEZED].get(squeeze_key(key)) if _SQUEEZED in node else None
+            child = node.get(squeezed) if squeezed is not None else None
+        return child
+
+    def find(self, text: str, tokens=None):
+        """
+        Find the lexicon terms in ``text``.
+
+        Args:
+            text: Any text, e.g. a chat message
+            tokens: ``tokens(text)``, if the caller already has it
+
+        Returns:
+            list[TermSpan]: Non-overlapping matches in text order
+        """
+        if tokens is None:
+            tokens = self.tokens(text)
+        spans = []
+        i, n = 0, len(tokens)
+        while i < n:
+            node = self._child(self._root, tokens[i][2])
+            if node is None:
+                i += 1
+                continue
+
+            last = i if _END in node else None
+            j = i + 1
+            while j < n:
+                gap = text[tokens[j - 1][1] : tokens[j][0]]
+                if gap and (not gap.isspace() or "\n" in gap):
+                    break
+                node = self._child(node, tokens[j][2])
+                if node is None:
+                    break
+                if _END in node:
+                    last = j
+                j += 1
+            if last is None:
+                i += 1
+                continue
+
+            start, end = tokens[i][0], tokens[last][1]
+            term = self._terminal(tokens, i, last)
+            kind = "exact" if text[start:end].lower() == term else "normalized"
+            spans.append(TermSpan(start, end, term, kind))
+            i = last + 1
+        return spans
+
+    def _terminal(self, tokens, first: int, last: int) -> str:
+        """Lexicon term at the end of the path through ``tokens[first:last + 1]``."""
+        node = self._root
+        for _, _, token in tokens[first : last + 1]:
+            node = self._child(node, token)
+        return node[_END]
@@ -0,0 +1,380 @@
+"""Compiled, memory-mapped lexicon store shared by all workers through the page cache."""
+
+import argparse
+import bisect
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+from .lexicon_index import _deletes, canonical_key, squeeze_key
+from .postprocess import parse_definition_example
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SLEX"
+VERSION = 1
+# MAGIC, VERSION, header length; the JSON header follows, then 8-byte aligned sections
+_PREAMBLE = struct.Struct("<4sIQ")
+
+_TERM_LINE = re.compile(r"^Term:\s*(.+)$", re.MULTILINE)
+
+_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+_DEFAULT_SOURCES = [
+    os.path.join(_ROOT, "api", "data", "slang_pairs.jsonl"),
+    os.path.join(_ROOT, "training", "genz_slang_training_v2.jsonl"),
+]
+
+
+def record_term(record):
+    """
+    Term of a lexicon (``term`` field) or training (``text`` field) JSONL record.
+
+    Returns:
+        str or None: The term as written, or None if the record has no string term
+    """
+    if isinstance(record.get("term"), str):
+        return record["term"]
+    text = record.get("text")
+    term = _TERM_LINE.search(text) if isinstance(text, str) else None
+    return term.group(1) if term else None
+
+
+def parse_record(record):
+    """
+    Extract (term, definition, example) from a lexicon or training JSONL record.
+
+    Lexicon rows have term/definition/example fields. Training rows have one
+    ``text`` field in INSTRUCT_TEMPLATE format.
+
+    Returns:
+        tuple or None: (term, definition, example), or None if the record is unusable
+    """
+    if "term" in record:
+        return record["term"], record["definition"], record["example"]
+
+    term = record_term(record)
+    if not term:
+        return None
+    parsed = parse_definition_example(record["text"])
+    if not parsed["format_ok"]:
+        return None
+    return term, parsed["definition"], parsed["example"]
+
+
+def read_sources(paths):
+    """
+    Read lexicon entries from JSONL files in order; the first entry for a term wins.
+
+    Args:
+        paths: JSONL files (lexicon or training format)
+
+    Returns:
+        dict: Normalized term -> (definition, example), in first-seen order
+    """
+    entries = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    parsed = parse_record(json.loads(line))
+                    if parsed is None:
+                        logger.warning(f"Skipping unparseable line {line_num} in {path}")
+                        continue
+                    term, definition, example = parsed
+                    term = term.strip().lower()
+                    entry = (definition.strip(), example.strip())
+                except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+                    # TypeError/AttributeError: a field that is not a string (e.g. a number or null)
+                    logger.warning(f"Skipping invalid line {line_num} in {path}: {e}")
+                    continue
+                if term:
+                    entries.setdefault(term, entry)
+    return entries
+
+
+def _string_table(keys):
+    """Encode strings as (uint64 offsets, blob) with len(keys) + 1 offsets."""
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for key in keys:
+        blob += key
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def compile_lexicon(sources, output_path: str, max_distance: int = 1):
+    """
+    Compile JSONL lexicon sources into a binary, memory-mappable store.
+
+    The store holds sorted UTF-8 key tables with uint64 offsets into string blobs:
+
+    - ``terms``: sorted normalized terms (entry ``i`` is the i-th term)
+    - ``text``: definition ``2i`` and example ``2i + 1`` of entry ``i``
+    - ``canonical`` / ``squeezed``: sorted normalized keys with an int32 column
+      pointing at the entry (see LexiconIndex)
+    - ``deletes``: sorted SymSpell delete variants with an int32 column pointing at
+      the squeezed key they came from
+
+    The file is written to a temp path and renamed into place.
+
+    Args:
+        sources: JSONL files in priority order
+        output_path: Destination file
+        max_distance: Edit distance the delete table is built for
+
+    Returns:
+        dict: Summary with terms, sources and output path
+    """
+    entries = read_sources(sources)
+    source_order = list(entries)
+    terms = sorted(source_order, key=lambda t: t.encode("utf-8"))
+    position = {term: i for i, term in enumerate(terms)}
+
+    digest = hashlib.sha1()
+    text_keys = []
+    for term in terms:
+        definition, example = entries[term]
+        digest.update(f"{term}\t{definition}\t{example}\n".encode())
+        text_keys += [definition.encode("utf-8"), example.encode("utf-8")]
+
+    # Normalized keys: first term in source order wins, like the in-memory index
+    canonical, squeezed = {}, {}
+    for term in source_order:
+        key = canonical_key(term)
+        if not key:
+            continue
+        canonical.setdefault(key, position[term])
+        squeezed.setdefault(squeeze_key(key), position[term])
+    canonical_rows = sorted((k.encode("utf-8"), v) for k, v in canonical.items())
+    squeezed_rows = sorted((k.encode("utf-8"), v) for k, v in squeezed.items())
+    delete_rows = sorted(
+        (variant.encode("utf-8"), row)
+        for row, (key, _) in enumerate(squeezed_rows)
+        for variant in _deletes(key.decode("utf-8"), max_distance)
+    )
+
+    sections = {}
+    for name, keys, values in (
+        ("terms", [t.encode("utf-8") for t in terms], None),
+        ("text", text_keys, None),
+        ("canonical", [k for k, _ in canonical_rows], [v for _, v in canonical_rows]),
+        ("squeezed", [k for k, _ in squeezed_rows], [v for _, v in squeezed_rows]),
+        ("deletes", [k for k, _ in delete_rows], [v for _, v in delete_rows]),
+    ):
+        offsets, blob = _string_table(keys)
+        sections[f"{name}.offsets"] = ("Q", offsets.tobytes())
+        sections[f"{name}.blob"] = ("B", blob)
+        if values is not None:
+            sections[f"{name}.values"] = ("i", array("i", values).tobytes())
+
+    header = {
+        "count": len(terms),
+        "max_distance": max_distance,
+        "identity": digest.hexdigest()[:16],
+        "byteorder": sys.byteorder,
+        "sources": [os.path.basename(p) for p in sources],
+        "sections": {},
+    }
+    # Section offsets depend on the header length, so lay out until it is stable
+    header_len = 0
+    while True:
+        offset = _align(_PREAMBLE.size + header_len)
+        for name, (typecode, data) in sections.items():
+            header["sections"][name] = [offset, typecode, len(data)]
+            offset = _align(offset + len(data))
+        encoded = json.dumps(header).encode("utf-8")
+        if len(encoded) == header_len:
+            break
+        header_len = len(encoded)
+
+    tmp_path = f"{output_path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, header_len))
+        f.write(encoded)
+        for name, (_, data) in sections.items():
+            f.seek(header["sections"][name][0])
+            f.write(data)
+    os.replace(tmp_path, output_path)
+
+    logger.info(f"Compiled {len(terms)} terms into {output_path}")
+    return {"terms": len(terms), "sources": list(sources), "output": output_path}
+
+
+def _align(offset: int, to: int = 8) -> int:
+    """Round ``offset`` up to a multiple of ``to``."""
+    return (offset + to - 1) // to * to
+
+
+class _Table:
+    """Sorted string table inside the mapped file (sequence of keys as bytes)."""
+
+    def __init__(self, offsets, blob, values=None):
+        self.offsets = offsets
+        self.blob = blob
+        self.values = values
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i] : self.offsets[i + 1]])
+
+    def find(self, key: bytes):
+        """Index of ``key``, or -1 if absent."""
+        i = bisect.bisect_left(self, key)
+        return i if i < len(self) and self[i] == key else -1
+
+    def lookup(self, key: bytes):
+        """Value of ``key``, or None if absent."""
+        i = self.find(key)
+        return None if i < 0 else self.values[i]
+
+    def lookup_all(self, key: bytes):
+        """Values of every row equal to ``key``."""
+        lo = bisect.bisect_left(self, key)
+        hi = bisect.bisect_right(self, key, lo)
+        return self.values[lo:hi]
+
+
+class LexiconStore(Mapping):
+    """
+    Read-only lexicon backed by a file written by ``compile_lexicon``.
+
+    The file is memory-mapped, so every worker process shares the same physical
+    pages and opening it costs almost nothing. Lookups binary-search the sorted
+    key table and only build Python objects for the entry that is returned.
+    It behaves like the ``{term: {"definition", "example"}}`` dict it replaces,
+    and also provides the match tables used by LexiconIndex.
+
+    Args:
+        path: Compiled store file
+
+    Raises:
+        ValueError: If the file is not a compatible lexicon store
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _PREAMBLE.size:
+            raise ValueError(f"{path} is not a version {VERSION} lexicon store")
+        magic, version, header_len = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} lexicon store")
+        header = json.loads(self._mmap[_PREAMBLE.size : _PREAMBLE.size + header_len])
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was compiled for a {header['byteorder']}-endian machine")
+
+        self.identity = header["identity"]
+        self.max_distance = header["max_distance"]
+        self.sources = header["sources"]
+        self._count = header["count"]
+
+        view = memoryview(self._mmap)
+        self._views = [view]
+        arrays = {}
+        for name, (offset, typecode, size) in header["sections"].items():
+            section = view[offset : offset + size]
+            arrays[name] = section if typecode == "B" else section.cast(typecode)
+            self._views += [section, arrays[name]]
+
+        def table(name):
+            return _Table(
+                arrays[f"{name}.offsets"], arrays[f"{name}.blob"], arrays.get(f"{name}.values")
+            )
+
+        self._terms = table("terms")
+        self._text = table("text")
+        self._canonical = table("canonical")
+        self._squeezed = table("squeezed")
+        self._deletes = table("deletes")
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._terms[i].decode("utf-8")
+
+    def __getitem__(self, term):
+        i = self._terms.find(term.encode("utf-8"))
+        if i < 0:
+            raise KeyError(term)
+        return self._entry(i)
+
+    def __contains__(self, term):
+        return isinstance(term, str) and self._terms.find(term.encode("utf-8")) >= 0
+
+    def _entry(self, i: int):
+        """Build the entry dict of row ``i``."""
+        return {
+            "definition": self._text[2 * i].decode("utf-8"),
+            "example": self._text[2 * i + 1].decode("utf-8"),
+        }
+
+    def items(self):
+        """Iterate (term, entry) pairs in sorted term order without a lookup per row."""
+        for i in range(self._count):
+            yield self._terms[i].decode("utf-8"), self._entry(i)
+
+    # Match tables used by LexiconIndex
+
+    def match_tables(self):
+        """Return the object LexiconIndex queries for normalized and fuzzy matches."""
+        return self
+
+    def canonical(self, key: str):
+        """Term whose canonical key is ``key``, or None."""
+        i = self._canonical.lookup(key.encode("utf-8"))
+        return None if i is None else self._terms[i].decode("utf-8")
+
+    def squeezed(self, key: str):
+        """Term whose squeezed key is ``key``, or None."""
+        i = self._squeezed.lookup(key.encode("utf-8"))
+        return None if i is None else self._terms[i].decode("utf-8")
+
+    def variants(self, variant: str):
+        """Squeezed keys that have ``variant`` among their delete variants."""
+        rows = self._deletes.lookup_all(variant.encode("utf-8"))
+        return [self._squeezed[row].decode("utf-8") for row in rows]
+
+    def close(self):
+        """Release the section views and unmap the file."""
+        for view in reversed(self._views):
+            view.release()
+        self._mmap.close()
+
+
+def main(argv=None):
+    """Command line entry point: compile JSONL sources into a lexicon store."""
+    parser = argparse.ArgumentParser(description="Compile JSONL lexicons into a lexicon store")
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        default=_DEFAULT_SOURCES,
+        help="JSONL files in priority order (default: slang_pairs.jsonl, training data)",
+    )
+    parser.add_argument("--out", required=True, help="Output store file")
+    parser.add_argument(
+        "--max-distance", type=int, default=1, help="Edit distance of the fuzzy delete table"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    summary = compile_lexicon(args.sources, args.out, max_distance=args.max_distance)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
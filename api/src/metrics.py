@@ -0,0 +1,227 @@
+"""In-process metrics rendered in the Prometheus text exposition format."""
+
+import bisect
+import threading
+from typing import NamedTuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from sub-millisecond lexicon lookups up to full decodes on CPU
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class MetricFamily(NamedTuple):
+    """One metric and its samples, as collected at scrape time."""
+
+    name: str
+    kind: str  # "counter", "gauge" or "histogram"
+    help: str
+    label: str | None  # Name of the single label, or None
+    samples: dict  # Label value (None without a label) -> value or histogram series
+
+
+class Counter:
+    """
+    Monotonic counter with at most one label.
+
+    ``inc`` only does a dict update under a lock; label values are used as dict
+    keys as-is and are formatted only when the registry is rendered.
+
+    Args:
+        name: Metric name, conventionally ending in ``_total``
+        help: One-line description
+        label: Label name, or None for a single unlabeled series
+    """
+
+    def __init__(self, name: str, help: str, label: str | None = None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value=None, amount: float = 1):
+        """Add ``amount`` to the series of ``label_value``."""
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def value(self, label_value=None):
+        """Current value of one series."""
+        with self._lock:
+            return self._values.get(label_value, 0)
+
+    def collect(self):
+        """Snapshot as a MetricFamily."""
+        with self._lock:
+            return MetricFamily(self.name, "counter", self.help, self.label, dict(self._values))
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with at most one label.
+
+    ``observe`` costs one bisect and a few integer updates. Counts are stored
+    per bucket and only made cumulative when rendered.
+
+    Args:
+        name: Metric name, conventionally ending in ``_seconds``
+        help: One-line description
+        label: Label name, or None for a single unlabeled series
+        buckets: Upper bounds of the buckets, in increasing order
+    """
+
+    def __init__(self, name: str, help: str, label: str | None = None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}  # label value -> [per-bucket counts (last is +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value=None):
+        """Record one observation in the series of ``label_value``."""
+        # le semantics: a value equal to a bound falls into that bucket
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def count(self, label_value=None):
+        """Number of observations in one series."""
+        with self._lock:
+            series = self._series.get(label_value)
+            return sum(series[0]) if series else 0
+
+    def collect(self):
+        """Snapshot as a MetricFamily whose samples are (bounds, per-bucket counts, sum)."""
+        with self._lock:
+            samples = {
+                key: (self.buckets, list(counts), total)
+                for key, (counts, total) in self._series.items()
+            }
+        return MetricFamily(self.name, "histogram", self.help, self.label, samples)
+
+
+class Registry:
+    """
+    Metrics rendered together by ``render()``.
+
+    Besides counters and histograms updated on the request path, a registry takes
+    collectors: callables run at scrape time that return MetricFamily objects.
+    They export counters the service already keeps (cache, queue, decode stats)
+    without counting anything twice.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, help: str, label: str | None = None) -> Counter:
+        """Create and register a Counter."""
+        metric = Counter(name, help, label)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, label: str | None = None, buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create and register a Histogram."""
+        metric = Histogram(name, help, label, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """Add a callable returning an iterable of MetricFamily, run on every render."""
+        self._collectors.append(collector)
+
+    def collect(self):
+        """All metric families, registered metrics first."""
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {_escape_help(family.help)}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for label_value, value in family.samples.items():
+                label = None if label_value is None else (family.label, label_value)
+                if family.kind == "histogram":
+                    lines.extend(_histogram_lines(family.name, label, value))
+                else:
+                    lines.append(f"{family.name}{_labels(label)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name: str, label, series):
+    """Cumulative _bucket lines plus _sum and _count for one histogram series."""
+    bounds, counts, total = series
+    cumulative = 0
+    for bound, count in zip([repr(float(b)) for b in bounds] + ["+Inf"], counts):
+        cumulative += count
+        yield f"{name}_bucket{_labels(label, ('le', bound))} {cumulative}"
+    yield f"{name}_sum{_labels(label)} {_number(total)}"
+    yield f"{name}_count{_labels(label)} {cumulative}"
+
+
+def _labels(*pairs) -> str:
+    """Format ``{name="value",...}`` from (name, value) pairs, skipping None."""
+    pairs = [pair for pair in pairs if pair is not None]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in pairs) + "}"
+
+
+def _escape_label(value: str) -> str:
+    """Escape backslashes, quotes and newlines in a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _escape_help(text: str) -> str:
+    """Escape backslashes and newlines in HELP text."""
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _number(value) -> str:
+    """Format a sample value; integers without a trailing .0."""
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+
+# Time per pipeline stage: lookup and parse per request, annotate per /v1/annotate
+# request; retrieve, tokenize, prefill and decode per generate call (a batch counts once)
+STAGE_SECONDS = REGISTRY.histogram(
+    "slang_stage_seconds", "Time spent in each pipeline stage", label="stage"
+)
+ANSWERS = REGISTRY.counter(
+    "slang_answers_total", "Answers served, by where the definition came from", label="source"
+)
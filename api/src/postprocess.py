@@ -1,7 +1,7 @@
 """Post-processing utilities for parsing model outputs."""
 
-import re
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +23,8 @@ def parse_definition_example(text: str):
             - example (str or None): Extracted example
             - format_ok (bool): True if both definition and example were found
     """
-    defn = re.search(r"Definition:\s*(.+)", text, re.I)
-    ex = re.search(r"Example:\s*(.+)", text, re.I)
+    defn = re.search(r"Definition:\s*(.+)", text, re.IGNORECASE)
+    ex = re.search(r"Example:\s*(.+)", text, re.IGNORECASE)
 
     result = {
         "definition": defn.group(1).strip() if defn else None,
@@ -33,6 +33,30 @@ def parse_definition_example(text: str):
     }
 
     if not result["format_ok"]:
-        logger.debug(f"Parse incomplete - definition: {bool(defn)}, example: {bool(ex)}")
+        logger.debug("Parse incomplete - definition: %s, example: %s", bool(defn), bool(ex))
 
     return result
+
+
+# A finished answer: an Example line with some content, terminated by a newline
+_EXAMPLE_LINE = re.compile(r"Example:[ \t]*\S[^\n]*\n", re.IGNORECASE)
+# The model starting another prompt block instead of ending the answer
+_NEW_BLOCK = re.compile(r"(?:^|\n)[ \t]*(?:Task|Term):", re.IGNORECASE)
+
+
+def is_complete(text: str) -> bool:
+    """
+    Check whether generated text already contains everything that will be used.
+
+    Used to stop decoding early. Decoding can stop once the Example line has
+    content and ends with a newline, since ``parse_definition_example`` ignores
+    anything after it. It can also stop once the model starts a new "Task:" or
+    "Term:" block.
+
+    Args:
+        text: Generated text (without the prompt)
+
+    Returns:
+        bool: True if a non-empty Example line has been terminated or a new block began
+    """
+    return bool(_EXAMPLE_LINE.search(text) or _NEW_BLOCK.search(text))
@@ -0,0 +1,119 @@
+"""Fill the persistent response cache with lexicon and training terms before a rollout."""
+
+import argparse
+import json
+import logging
+import sys
+import time
+
+from . import inference
+from .inference import BATCH_MAX_SIZE, DISK_CACHE, DISK_CACHE_MB
+from .lexicon_store import _DEFAULT_SOURCES, read_sources
+
+logger = logging.getLogger(__name__)
+
+
+def prewarm(
+    terms,
+    max_new_tokens: int = 100,
+    adapters=(None,),
+    batch_size: int = BATCH_MAX_SIZE,
+    progress_s: float = 10.0,
+):
+    """
+    Generate every term through the response caches, so later requests hit the disk cache.
+
+    Terms already cached are not generated again, so an interrupted prewarm picks
+    up where it stopped when run again. The cache key holds the model, adapter and
+    generation settings of this process: run it with the servers' configuration.
+
+    Args:
+        terms: Slang terms to warm
+        max_new_tokens: Token budget the requests to be served use (the API uses 100)
+        adapters: Adapters to warm every term for; None picks one per term like
+            served traffic (see choose_adapter)
+        batch_size: Terms per batched generate call
+        progress_s: Seconds between progress logs
+
+    Returns:
+        dict: terms, adapters, generated, cached, failed, seconds and the disk cache stats
+    """
+    terms = list(terms)
+    generated_before = inference.decode_stats()["requests"]
+    failed = 0
+    t0 = last_log = time.perf_counter()
+    for adapter in adapters:
+        for start in range(0, len(terms), batch_size):
+            batch = terms[start : start + batch_size]
+            try:
+                inference.generate_batch(batch, max_new_tokens, adapter)
+            except Exception as e:  # noqa: BLE001
+                failed += len(batch)
+                logger.error(f"Prewarm failed for {len(batch)} terms from {batch[0]!r}: {e}")
+            now = time.perf_counter()
+            if now - last_log >= progress_s:
+                last_log = now
+                logger.info(
+                    f"Prewarm: {start + len(batch)}/{len(terms)} terms for adapter "
+                    f"{adapter or 'split'} in {now - t0:.0f}s"
+                )
+
+    generated = inference.decode_stats()["requests"] - generated_before
+    total = len(terms) * len(adapters)
+    return {
+        "terms": len(terms),
+        "adapters": [adapter or "split" for adapter in adapters],
+        "generated": generated,
+        "cached": total - generated - failed,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - t0, 1),
+        "disk_cache": inference.cache_stats().get("disk"),
+    }
+
+
+def main(argv=None):
+    """Command line entry point: warm the disk cache from lexicon/training JSONL files."""
+    parser = argparse.ArgumentParser(
+        description="Fill the persistent response cache before switching traffic over"
+    )
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        default=_DEFAULT_SOURCES,
+        help="JSONL files with terms (default: slang_pairs.jsonl, training data)",
+    )
+    parser.add_argument(
+        "--cache", default=DISK_CACHE, help="Cache database (default: SLANG_DISK_CACHE)"
+    )
+    parser.add_argument("--max-mb", type=float, default=DISK_CACHE_MB, help="Cache size bound")
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    parser.add_argument(
+        "--adapter",
+        action="append",
+        help="Warm every term for this adapter; repeatable (default: traffic split)",
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_MAX_SIZE)
+    parser.add_argument("--limit", type=int, help="Warm only the first N terms")
+    parser.add_argument(
+        "--progress-s", type=float, default=10, help="Seconds between progress logs"
+    )
+    args = parser.parse_args(argv)
+    if not args.cache:
+        parser.error("no cache database: pass --cache or set SLANG_DISK_CACHE")
+
+    logging.basicConfig(level=logging.INFO)
+    inference.use_disk_cache(args.cache, args.max_mb)
+    terms = list(read_sources(args.sources))[: args.limit]
+    summary = prewarm(
+        terms,
+        max_new_tokens=args.max_new_tokens,
+        adapters=args.adapter or [None],
+        batch_size=args.batch_size,
+        progress_s=args.progress_s,
+    )
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
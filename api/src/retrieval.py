@@ -1,6 +1,21 @@
+import hashlib
 import json
-import os
 import logging
+import os
+import threading
+import time
+from collections.abc import Mapping
+from typing import NamedTuple
+
+from .lexicon_index import LexiconIndex, TermMatcher
+from .lexicon_store import LexiconStore
+from .vector_index import (
+    HashingVectorizer,
+    TransformerVectorizer,
+    VectorIndex,
+    build_vector_index,
+    is_vector_index,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -8,66 +23,531 @@ DATA = os.getenv(
     "SLANG_DATA", os.path.join(os.path.dirname(__file__), "..", "data", "slang_pairs.jsonl")
 )
 
+# Compiled lexicon store (see lexicon_store.py). When set, the lexicon is memory-mapped
+# from this file and shared between workers instead of parsing DATA into dicts.
+LEXICON_STORE = os.getenv("SLANG_LEXICON_STORE", "")
 
-def _load_lexicon():
+# Typo-tolerant matching: max edit distance (0 disables it) and minimum similarity score
+FUZZY_MAX_DISTANCE = int(os.getenv("SLANG_FUZZY_MAX_DISTANCE", "1"))
+FUZZY_MIN_SCORE = float(os.getenv("SLANG_FUZZY_MIN_SCORE", "0.75"))
+# Queries shorter than this (letters/digits only) get no typo-tolerant match
+FUZZY_MIN_LENGTH = int(os.getenv("SLANG_FUZZY_MIN_LENGTH", "5"))
+
+# Vector index for retrieval-augmented prompts. Built on first use and cached under
+# VECTOR_DIR, keyed by lexicon content and vectorizer. SLANG_EMBED_MODEL names a
+# small local embedding model; by default a hashed n-gram vectorizer is used.
+VECTOR_DIR = os.getenv(
+    "SLANG_VECTOR_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "models", "vector_index"),
+)
+EMBED_MODEL = os.getenv("SLANG_EMBED_MODEL", "")
+
+# Hot reload: how often (seconds) the watcher checks the lexicon source for changes.
+# Lines appended to a JSONL lexicon are applied incrementally. 0 disables the watcher.
+LEXICON_POLL_S = float(os.getenv("SLANG_LEXICON_POLL_S", "5"))
+
+
+def _parse_lexicon(path: str, start: int = 0, complete_lines: bool = False):
     """
-    Load slang lexicon from JSONL file.
+    Parse lexicon JSONL from byte ``start`` of ``path``.
+
+    Args:
+        path: Lexicon JSONL file
+        start: Byte offset to start reading at (the end of an earlier read)
+        complete_lines: Ignore a trailing line without a newline (it may still be written)
 
     Returns:
-        dict: Dictionary mapping terms to their definitions and examples
+        tuple: (dict of term -> entry, byte offset just past the last complete line)
 
     Raises:
-        No exceptions - returns empty dict if file not found or invalid
+        OSError: If the file cannot be read
     """
     lex = {}
+    offset = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        for line_num, line in enumerate(f, 1):
+            if line.endswith(b"\n"):
+                offset += len(line)
+            elif complete_lines:
+                break
+            if not line.strip():
+                continue
+            try:
+                r = json.loads(line)
+                term = r["term"].strip().lower()
+                lex[term] = {
+                    "definition": r["definition"].strip(),
+                    "example": r["example"].strip(),
+                }
+            except (json.JSONDecodeError, UnicodeDecodeError, KeyError) as e:
+                where = f"line {line_num}" if start == 0 else f"appended line {line_num}"
+                logger.warning(f"Skipping invalid {where} in {path}: {e}")
+                continue
+    return lex, offset
+
+
+def _read_lexicon():
+    """
+    Load DATA, also returning how many bytes of it were consumed.
+
+    Returns:
+        tuple: (dict of term -> entry, byte offset just past the last complete line)
+
+    Raises:
+        No exceptions - returns an empty lexicon if the file is not found or invalid
+    """
     try:
         logger.info(f"Loading lexicon from: {DATA}")
-        with open(DATA, "r", encoding="utf-8") as f:
-            for line_num, line in enumerate(f, 1):
-                if not line.strip():
-                    continue
-                try:
-                    r = json.loads(line)
-                    term = r["term"].strip().lower()
-                    lex[term] = {
-                        "definition": r["definition"].strip(),
-                        "example": r["example"].strip(),
-                    }
-                except (json.JSONDecodeError, KeyError) as e:
-                    logger.warning(f"Skipping invalid line {line_num} in {DATA}: {e}")
-                    continue
-
+        lex, offset = _parse_lexicon(DATA)
         logger.info(f"Loaded {len(lex)} terms from lexicon")
+        return lex, offset
     except FileNotFoundError:
         logger.warning(f"Lexicon file not found: {DATA}. Starting with empty lexicon.")
     except Exception as e:
-        logger.error(f"Error loading lexicon: {str(e)}", exc_info=True)
+        logger.error(f"Error loading lexicon: {e}", exc_info=True)
+    return {}, 0
+
+
+def _load_lexicon():
+    """
+    Load slang lexicon from JSONL file.
+
+    Returns:
+        dict: Dictionary mapping terms to their definitions and examples
+
+    Raises:
+        No exceptions - returns empty dict if file not found or invalid
+    """
+    return _read_lexicon()[0]
 
-    return lex
 
+class LexiconSnapshot(NamedTuple):
+    """One immutable version of the loaded lexicon. Reloads swap in a new one."""
 
-_LEX = _load_lexicon()
+    version: int  # Increases on every reload that changes the lexicon
+    entries: Mapping  # Term -> {"definition", "example"} (dict or LexiconStore)
+    index: LexiconIndex  # Match index over entries
+    kind: str  # "jsonl" or "store"
+    source: str  # File the lexicon was loaded from
+    stat: tuple | None  # (device, inode, size, mtime_ns) of source when it was read
+    offset: int  # JSONL bytes applied so far (end of the last complete line)
+    loaded_at: float  # Unix time of the load
+    mode: str  # How this version was made: "initial", "full" or "incremental"
+    added: int  # Terms loaded, or added/changed by an incremental reload
+    seconds: float  # Time the load took
 
 
-def lookup(term: str):
+def _file_stat(path: str):
+    """(device, inode, size, mtime_ns) of ``path``, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _make_index(entries):
+    return LexiconIndex(
+        entries,
+        max_distance=FUZZY_MAX_DISTANCE,
+        min_score=FUZZY_MIN_SCORE,
+        min_fuzzy_length=FUZZY_MIN_LENGTH,
+    )
+
+
+def _snapshot(version, lex, kind, source, stat, offset, mode, started):
+    """Index ``lex`` and wrap it in a LexiconSnapshot."""
+    return LexiconSnapshot(
+        version=version,
+        entries=lex,
+        index=_make_index(lex),
+        kind=kind,
+        source=source,
+        stat=stat,
+        offset=offset,
+        loaded_at=time.time(),
+        mode=mode,
+        added=len(lex),
+        seconds=time.perf_counter() - started,
+    )
+
+
+def _open_lexicon(version: int = 1, mode: str = "initial"):
     """
-    Look up a slang term in the lexicon.
+    Open the compiled lexicon store if one is configured, else load DATA.
 
     Args:
-        term: The slang term to look up
+        version: Version number of the new snapshot
+        mode: Recorded as the snapshot's load mode
 
     Returns:
-        dict or None: Dictionary with 'definition' and 'example' keys, or None if not found
+        LexiconSnapshot: The loaded lexicon and its match index
+    """
+    t0 = time.perf_counter()
+    if LEXICON_STORE:
+        stat = _file_stat(LEXICON_STORE)
+        try:
+            store = LexiconStore(LEXICON_STORE)
+            logger.info(f"Mapped {len(store)} terms from lexicon store: {LEXICON_STORE}")
+            return _snapshot(version, store, "store", LEXICON_STORE, stat, 0, mode, t0)
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot open lexicon store {LEXICON_STORE}: {e}. Loading {DATA}")
+
+    # Stat before reading: anything appended meanwhile is picked up by the next reload
+    stat = _file_stat(DATA)
+    lex, offset = _read_lexicon()
+    return _snapshot(version, lex, "jsonl", DATA, stat, offset, mode, t0)
+
+
+_STATE = _open_lexicon()
+_RELOAD_LOCK = threading.Lock()
+
+
+def lexicon():
+    """The currently loaded lexicon mapping (term -> definition/example entry)."""
+    return _STATE.entries
+
+
+def reload_lexicon(full: bool = False) -> bool:
     """
-    if not term:
+    Reload the lexicon if its source file changed, without blocking lookups.
+
+    Lines appended to a JSONL lexicon since the last load are parsed on their
+    own and merged into a copy of the index (LexiconIndex.extended). A
+    replaced, truncated or rewritten file, a recompiled store, or ``full=True``
+    loads everything again. The new snapshot is published with a single
+    assignment, so concurrent lookups see the old or the new lexicon, never a
+    mix, and never wait for the reload.
+
+    Args:
+        full: Load from scratch even if the source looks unchanged
+
+    Returns:
+        bool: True if a new lexicon version was swapped in
+    """
+    global _STATE
+    with _RELOAD_LOCK:
+        state = _STATE
+        stat = _file_stat(state.source)
+        if not full and (stat is None or stat == state.stat):
+            # Unchanged, or the file is gone: keep serving what is loaded
+            return False
+
+        appended = (
+            state.kind == "jsonl"
+            and state.stat is not None
+            and stat[:2] == state.stat[:2]
+            and stat[2] > state.stat[2]
+        )
+        if full or not appended:
+            new = _open_lexicon(state.version + 1, "full")
+        else:
+            t0 = time.perf_counter()
+            added, offset = _parse_lexicon(state.source, state.offset, complete_lines=True)
+            if not added:
+                # Only invalid lines or a partial one so far. Skip past the complete
+                # lines, so they are not parsed (and warned about) again on every poll
+                _STATE = state._replace(stat=stat, offset=offset)
+                return False
+            index = state.index.extended(added)
+            new = state._replace(
+                version=state.version + 1,
+                entries=index.entries,
+                index=index,
+                stat=stat,
+                offset=offset,
+                loaded_at=time.time(),
+                mode="incremental",
+                added=len(added),
+                seconds=time.perf_counter() - t0,
+            )
+
+        _STATE = new
+        logger.info(
+            f"Reloaded lexicon v{new.version} ({new.mode}): {len(new.entries)} terms, "
+            f"{new.added} loaded in {new.seconds * 1000:.1f} ms"
+        )
+
+    if _VECTORS is not None:
+        threading.Thread(target=_refresh_vectors, name="vector-refresh", daemon=True).start()
+    if _MATCHER is not None:
+        threading.Thread(target=_refresh_matcher, name="matcher-refresh", daemon=True).start()
+    return True
+
+
+def lexicon_status():
+    """
+    Describe the loaded lexicon version for the admin endpoint.
+
+    Returns:
+        dict: version, terms, kind, source, loaded_at, the last reload and watcher settings
+    """
+    state = _STATE
+    return {
+        "version": state.version,
+        "terms": len(state.entries),
+        "kind": state.kind,
+        "source": state.source,
+        "loaded_at": state.loaded_at,
+        "last_reload": {
+            "mode": state.mode,
+            "added": state.added,
+            "ms": round(state.seconds * 1000, 3),
+        },
+        "watching": _WATCHER is not None and _WATCHER.is_alive(),
+        "poll_s": LEXICON_POLL_S,
+    }
+
+
+_WATCHER = None
+_WATCHER_STOP = threading.Event()
+
+
+def _watch(interval: float):
+    while not _WATCHER_STOP.wait(interval):
+        try:
+            reload_lexicon()
+        except Exception as e:
+            logger.error(f"Lexicon reload failed: {e}", exc_info=True)
+
+
+def start_watcher(interval: float | None = None):
+    """
+    Poll the lexicon source in a daemon thread and reload it when it changes.
+
+    Args:
+        interval: Seconds between checks (default LEXICON_POLL_S; 0 disables)
+
+    Returns:
+        threading.Thread or None: The watcher thread, or None if disabled
+    """
+    global _WATCHER
+    interval = LEXICON_POLL_S if interval is None else interval
+    if interval <= 0:
         return None
+    if _WATCHER is not None and _WATCHER.is_alive():
+        return _WATCHER
+    _WATCHER_STOP.clear()
+    _WATCHER = threading.Thread(
+        target=_watch, args=(interval,), name="lexicon-watcher", daemon=True
+    )
+    _WATCHER.start()
+    return _WATCHER
+
+
+def stop_watcher():
+    """Stop the watcher thread started by start_watcher, if any."""
+    _WATCHER_STOP.set()
+    if _WATCHER is not None:
+        _WATCHER.join(timeout=5)
+
+
+def match(term: str):
+    """
+    Find the lexicon entry closest to a slang term.
+
+    Matching is exact first, then normalized (punctuation, whitespace, unicode
+    quotes), then squeezed (repeated letters), then typo-tolerant. See
+    LexiconIndex; only exact and normalized matches are ``authoritative``.
+
+    Args:
+        term: The slang term to look up
 
-    normalized_term = term.strip().lower()
-    result = _LEX.get(normalized_term)
+    Returns:
+        Match or None: Matched lexicon term, entry, match kind and score
+    """
+    result = _STATE.index.match(term)
 
     if result:
-        logger.debug(f"Found term in lexicon: {normalized_term}")
+        logger.debug("Found term in lexicon: %r -> %s (%s)", term, result.term, result.kind)
     else:
-        logger.debug(f"Term not found in lexicon: {normalized_term}")
+        logger.debug("Term not found in lexicon: %r", term)
 
     return result
+
+
+def lookup_match(term: str):
+    """
+    Find the lexicon entry of a slang term itself, ignoring merely similar terms.
+
+    Only authoritative matches (exact or normalized) count: a squeezed or fuzzy
+    match is a different term, whose entry must not be served as this one's.
+    Use match() to see those.
+
+    Args:
+        term: The slang term to look up
+
+    Returns:
+        Match or None: The authoritative match, or None
+    """
+    result = match(term)
+    return result if result and result.authoritative else None
+
+
+def lookup(term: str):
+    """
+    Look up a slang term in the lexicon (authoritative matches only, see lookup_match).
+
+    Args:
+        term: The slang term to look up
+
+    Returns:
+        dict or None: Dictionary with 'definition' and 'example' keys, or None if not found
+    """
+    result = lookup_match(term)
+    return result.entry if result else None
+
+
+_MATCHER = None  # (lexicon version, TermMatcher, entries it was built from)
+_MATCHER_LOCK = threading.Lock()
+
+
+def _build_matcher(state):
+    t0 = time.perf_counter()
+    matcher = TermMatcher(state.entries)
+    logger.info(
+        f"Built term matcher for lexicon v{state.version}: {len(matcher)} terms "
+        f"in {(time.perf_counter() - t0) * 1000:.1f} ms"
+    )
+    return (state.version, matcher, state.entries)
+
+
+def term_matcher():
+    """
+    Token trie for finding lexicon terms in running text, built on first use.
+
+    After a lexicon reload the previous matcher keeps serving, together with
+    the entries it was built from, until the background refresh replaces it.
+
+    Returns:
+        tuple: (TermMatcher, entries mapping of the same lexicon version)
+    """
+    global _MATCHER
+    matcher = _MATCHER
+    if matcher is None:
+        with _MATCHER_LOCK:
+            if _MATCHER is None:
+                _MATCHER = _build_matcher(_STATE)
+            matcher = _MATCHER
+    return matcher[1], matcher[2]
+
+
+def _refresh_matcher():
+    """Rebuild the term matcher if it was built for an older lexicon version."""
+    global _MATCHER
+    try:
+        with _MATCHER_LOCK:
+            state = _STATE
+            if _MATCHER is None or _MATCHER[0] == state.version:
+                return
+            _MATCHER = _build_matcher(state)
+    except Exception as e:
+        logger.error(f"Term matcher refresh failed: {e}", exc_info=True)
+
+
+_VECTORS = None  # (lexicon version, vectorizer, VectorIndex)
+_VECTORS_LOCK = threading.Lock()
+
+
+def lexicon_identity(lex) -> str:
+    """Content hash of a lexicon, so a vector index is rebuilt when the data changes."""
+    if hasattr(lex, "identity"):
+        # Compiled stores carry the same hash, computed once at build time
+        return lex.identity
+    digest = hashlib.sha1()
+    for term in sorted(lex):
+        entry = lex[term]
+        digest.update(f"{term}\t{entry['definition']}\t{entry['example']}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def _make_vectorizer():
+    """The configured embedding model, or the hashed n-gram vectorizer."""
+    if EMBED_MODEL:
+        try:
+            return TransformerVectorizer(EMBED_MODEL)
+        except Exception as e:  # noqa: BLE001
+            logger.warning(
+                f"Could not load embedding model '{EMBED_MODEL}': {e}. Using hashed n-grams."
+            )
+    return HashingVectorizer()
+
+
+def _build_vectors(entries, vectorizer=None):
+    """Open (building if needed) the vector index for ``entries``."""
+    vectorizer = vectorizer or _make_vectorizer()
+    path = os.path.join(VECTOR_DIR, f"{lexicon_identity(entries)}-{vectorizer.name}")
+    if not is_vector_index(path):
+        logger.info(f"Building vector index for {len(entries)} terms at {path}")
+        os.makedirs(VECTOR_DIR, exist_ok=True)
+        rows = ({"term": term, **entry} for term, entry in entries.items())
+        build_vector_index(rows, path, vectorizer, count=len(entries))
+    return vectorizer, VectorIndex(path)
+
+
+def vector_index():
+    """
+    Open the vector index for the current lexicon, building it on first use.
+
+    After a lexicon reload the previous index keeps serving until the
+    background refresh has built the new one.
+
+    Returns:
+        tuple: (vectorizer, VectorIndex)
+    """
+    global _VECTORS
+    vectors = _VECTORS
+    if vectors is None:
+        with _VECTORS_LOCK:
+            if _VECTORS is None:
+                state = _STATE
+                _VECTORS = (state.version, *_build_vectors(state.entries))
+            vectors = _VECTORS
+    return vectors[1], vectors[2]
+
+
+def _refresh_vectors():
+    """Rebuild the vector index if it was built for an older lexicon version."""
+    global _VECTORS
+    try:
+        with _VECTORS_LOCK:
+            state = _STATE
+            if _VECTORS is None or _VECTORS[0] == state.version:
+                return
+            old = _VECTORS[2]
+            _VECTORS = (state.version, *_build_vectors(state.entries, _VECTORS[1]))
+        # Searches still running on the old index finish before its file is closed
+        old.close()
+    except Exception as e:
+        logger.error(f"Vector index refresh failed: {e}", exc_info=True)
+
+
+def neighbors(terms, k: int = 2):
+    """
+    Find the lexicon entries most similar to each term (batched cosine search).
+
+    Args:
+        terms: Query terms
+        k: Neighbors per term
+
+    Returns:
+        list[list[dict]]: Per term, up to ``k`` entries with term, definition,
+        example and score, best first
+    """
+    if k <= 0 or not _STATE.entries:
+        return [[] for _ in terms]
+
+    while True:
+        vectorizer, index = vector_index()
+        try:
+            with index.reading():
+                hits = index.search(vectorizer.encode_queries(terms), k)
+                return [
+                    [{**index.entry(row), "score": round(score, 4)} for row, score in per_term]
+                    for per_term in hits
+                ]
+        except ValueError:
+            if not index.closed:
+                raise
+            # Replaced by a refresh between vector_index() and reading(); use the new one
@@ -1,9 +1,39 @@
+import json
 import logging
-from fastapi import FastAPI, HTTPException
+import os
+import threading
+import time
+
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from .inference import generate
-from .postprocess import parse_definition_example
-from .retrieval import lookup
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from .admission import InferenceGate, OverloadedError, QueueTimeoutError
+from .annotate import annotate, attach, unknown_terms
+from .answers import DEFAULT_SERVING_POLICY, SERVING_POLICIES, lexicon_answer, model_answer
+from .inference import (
+    BATCH_MAX_SIZE,
+    INSTRUCT_TEMPLATE,
+    ModelNotReadyError,
+    UnknownAdapterError,
+    adapters_info,
+    cache_stats,
+    choose_adapter,
+    decode_stats,
+    engine,
+    generate,
+    generate_batch,
+    stream_generate,
+)
+from .metrics import CONTENT_TYPE, REGISTRY, STAGE_SECONDS, MetricFamily
+from .retrieval import (
+    lexicon_status,
+    reload_lexicon,
+    start_watcher,
+    stop_watcher,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -11,6 +41,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def _resolve_serving_policy():
+    """
+    Read the serving policy from the SLANG_SERVING_POLICY environment variable.
+
+    Returns:
+        str: One of SERVING_POLICIES, defaulting to lexicon_first for unknown values
+    """
+    policy = os.getenv("SLANG_SERVING_POLICY", DEFAULT_SERVING_POLICY).strip().lower()
+    if policy not in SERVING_POLICIES:
+        logger.warning(
+            f"Unknown serving policy '{policy}', falling back to '{DEFAULT_SERVING_POLICY}'"
+        )
+        return DEFAULT_SERVING_POLICY
+    return policy
+
+
+SERVING_POLICY = _resolve_serving_policy()
+
+# Start loading the model in the background at startup (set to 0 to load on first use)
+PRELOAD_MODEL = os.getenv("SLANG_PRELOAD", "1") != "0"
+# Max terms accepted by one /v1/explain:batch request
+EXPLAIN_BATCH_MAX = int(os.getenv("SLANG_EXPLAIN_BATCH_MAX", "256"))
+# /v1/annotate limits: texts per request, characters per text, and unknown terms
+# sent to the model per request (the rest are returned unexplained)
+ANNOTATE_MAX_TEXTS = int(os.getenv("SLANG_ANNOTATE_MAX_TEXTS", "256"))
+ANNOTATE_MAX_CHARS = int(os.getenv("SLANG_ANNOTATE_MAX_CHARS", "10000"))
+ANNOTATE_MAX_UNKNOWN = int(os.getenv("SLANG_ANNOTATE_MAX_UNKNOWN", "32"))
+# Retry-After hint (seconds) for requests that need the model while it is still loading
+RETRY_AFTER_S = 5
+
+# Inference admission: how many decodes run at once, how many requests may queue for
+# a slot, and how long a queued request waits before giving up with a 503. Requests
+# arriving at a full queue get an immediate 429. Concurrent decodes are coalesced by
+# the micro-batcher, so the default lets one full batch run at a time.
+MAX_CONCURRENCY = int(os.getenv("SLANG_MAX_CONCURRENCY", str(BATCH_MAX_SIZE)))
+MAX_QUEUE = int(os.getenv("SLANG_MAX_QUEUE", "32"))
+QUEUE_TIMEOUT_S = float(os.getenv("SLANG_QUEUE_TIMEOUT_S", "30"))
+
+gate = InferenceGate(
+    max_concurrency=MAX_CONCURRENCY, max_queue=MAX_QUEUE, queue_timeout_s=QUEUE_TIMEOUT_S
+)
+
 app = FastAPI(
     title="Gen Z Slang Explainer API",
     description="Fine-tuned LLM API for explaining Gen Z slang with definitions and examples",
@@ -22,14 +95,18 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def startup_event():
-    """Log startup information."""
-    logger.info("Starting Gen Z Slang Explainer API")
+    """Log startup information and start warming the model without blocking startup."""
+    logger.info(f"Starting Gen Z Slang Explainer API (serving policy: {SERVING_POLICY})")
+    if PRELOAD_MODEL:
+        engine.start_background_load()
+    start_watcher()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Log shutdown information."""
+    """Log shutdown information and stop the lexicon watcher."""
     logger.info("Shutting down Gen Z Slang Explainer API")
+    stop_watcher()
 
 
 @app.get("/")
@@ -40,14 +117,195 @@ def index():
 
 @app.get("/health")
 def health():
-    """Health check endpoint."""
+    """Liveness check endpoint; does not depend on the model being loaded."""
     return {"ok": True}
 
 
+@app.get("/ready")
+def ready(response: Response):
+    """
+    Readiness check endpoint reporting model load progress.
+
+    Returns 200 once the model is loaded and 503 while it is loading or failed.
+    Lexicon hits are served either way.
+    """
+    status = engine.status()
+    if status["state"] != "ready":
+        response.status_code = 503
+    return {"ready": status["state"] == "ready", **status}
+
+
+@app.get("/v1/cache/stats")
+def get_cache_stats():
+    """Response cache counters (size, hits, misses, evictions, hit rate)."""
+    return cache_stats()
+
+
+@app.get("/v1/queue/stats")
+def get_queue_stats():
+    """Inference queue depth, running decodes, rejections and queue wait times."""
+    return gate.stats()
+
+
+@app.get("/v1/decode/stats")
+def get_decode_stats():
+    """Generated-token counters and the estimated decode time saved by early stopping."""
+    return decode_stats()
+
+
+def _service_metrics():
+    """Export the counters already kept by the caches, queue, decoder and lexicon."""
+    cache = cache_stats()
+    decode = decode_stats()
+    encode = decode["encode_cache"]
+    caches = {"response": cache, "encode": encode}
+    if "disk" in cache:
+        caches["disk"] = cache["disk"]
+    queue = gate.stats()
+    lexicon = lexicon_status()
+    decode_s = decode["decode_seconds"]
+    return [
+        MetricFamily(
+            "slang_generated_tokens_total",
+            "counter",
+            "Tokens generated by the model",
+            None,
+            {None: decode["generated_tokens"]},
+        ),
+        MetricFamily(
+            "slang_generated_sequences_total",
+            "counter",
+            "Sequences generated by the model",
+            None,
+            {None: decode["requests"]},
+        ),
+        MetricFamily(
+            "slang_generate_seconds_total",
+            "counter",
+            "Wall time spent in model.generate",
+            None,
+            {None: decode_s},
+        ),
+        MetricFamily(
+            "slang_generated_tokens_per_second",
+            "gauge",
+            "Generated tokens per second of model.generate time since start",
+            None,
+            {None: decode["generated_tokens"] / decode_s if decode_s else 0.0},
+        ),
+        MetricFamily(
+            "slang_cache_hits_total",
+            "counter",
+            "Cache hits",
+            "cache",
+            {name: stats["hits"] for name, stats in caches.items()},
+        ),
+        MetricFamily(
+            "slang_cache_misses_total",
+            "counter",
+            "Cache misses",
+            "cache",
+            {name: stats["misses"] for name, stats in caches.items()},
+        ),
+        MetricFamily(
+            "slang_cache_hit_ratio",
+            "gauge",
+            "Cache hit rate since start",
+            "cache",
+            {name: stats["hit_rate"] for name, stats in caches.items()},
+        ),
+        MetricFamily(
+            "slang_cache_entries",
+            "gauge",
+            "Entries held by each cache",
+            "cache",
+            {name: stats["size"] for name, stats in caches.items()},
+        ),
+        MetricFamily(
+            "slang_queue_requests",
+            "gauge",
+            "Inference requests running or waiting for a slot",
+            "state",
+            {"running": queue["running"], "queued": queue["queued"]},
+        ),
+        MetricFamily(
+            "slang_queue_rejected_total",
+            "counter",
+            "Inference requests turned away",
+            "reason",
+            {"full": queue["rejected"], "timeout": queue["timed_out"]},
+        ),
+        MetricFamily(
+            "slang_model_ready",
+            "gauge",
+            "1 once the model is loaded",
+            None,
+            {None: int(engine.is_ready)},
+        ),
+        MetricFamily(
+            "slang_lexicon_terms",
+            "gauge",
+            "Terms in the loaded lexicon",
+            None,
+            {None: lexicon["terms"]},
+        ),
+    ]
+
+
+REGISTRY.register_collector(_service_metrics)
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus metrics.
+
+    Per-stage latency histograms (``slang_stage_seconds``), answers by source,
+    generated tokens and tokens/sec, cache hit rates, queue and model state.
+    Request handlers only update counters; all formatting happens here.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/v1/adapters")
+def get_adapters():
+    """Registered LoRA adapters, the default adapter and the traffic split."""
+    return adapters_info()
+
+
+@app.get("/v1/admin/lexicon")
+def get_lexicon_status():
+    """Loaded lexicon version, term count, source and how the last reload went."""
+    return lexicon_status()
+
+
+@app.post("/v1/admin/lexicon/reload")
+async def reload_lexicon_now(full: bool = False):
+    """
+    Reload the lexicon now instead of waiting for the watcher.
+
+    Appended lines are applied incrementally unless ``full`` is set. The reload
+    runs in a worker thread and lookups keep using the current lexicon until the
+    new version is swapped in.
+
+    Raises:
+        HTTPException: 500 if the lexicon cannot be reloaded
+    """
+    try:
+        reloaded = await run_in_threadpool(reload_lexicon, full)
+    except Exception as e:
+        logger.error(f"Lexicon reload failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Lexicon reload failed: {e}")
+    return {"reloaded": reloaded, **lexicon_status()}
+
+
 class ExplainInput(BaseModel):
     """Request model for explain endpoint."""
 
     term: str = Field(..., min_length=1, max_length=100, description="The slang term to explain")
+    adapter: str | None = Field(
+        None, description="LoRA adapter to use (default: traffic split or default adapter)"
+    )
 
 
 class ExplainResponse(BaseModel):
@@ -57,13 +315,93 @@ class ExplainResponse(BaseModel):
     definition: str | None
     example: str | None
     source: str
+    precision: str | None = None
+    adapter: str | None = None
+    matched_term: str | None = None
+    match_kind: str | None = None
+
+
+class ExplainBatchInput(BaseModel):
+    """Request model for the batch explain endpoint."""
+
+    terms: list[str] = Field(..., min_length=1, description="Slang terms to explain")
+    adapter: str | None = Field(
+        None, description="LoRA adapter for every term (default: traffic split or default adapter)"
+    )
+
+
+class ExplainBatchItem(BaseModel):
+    """One per-term result of the batch explain endpoint."""
+
+    term: str
+    definition: str | None = None
+    example: str | None = None
+    source: str | None = None
+    precision: str | None = None
+    adapter: str | None = None
+    matched_term: str | None = None
+    match_kind: str | None = None
+    error: str | None = None
+
+
+class ExplainBatchResponse(BaseModel):
+    """Response model for the batch explain endpoint."""
+
+    results: list[ExplainBatchItem]
+    unique_terms: int
+
+
+def _model_answer(term: str, raw: str, policy: str, adapter: str):
+    """ExplainResponse fields for generated text (see answers.model_answer)."""
+    return {**model_answer(term, raw, policy), "precision": engine.precision, "adapter": adapter}
+
+
+def _check_adapter(adapter: str | None):
+    """Reject a request naming an adapter that is not registered with a 400."""
+    if adapter is None:
+        return
+    try:
+        engine.resolve_adapter(adapter)
+    except UnknownAdapterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _model_not_ready(term: str):
+    """Build the 503 response for requests that need a model that is still loading."""
+    logger.warning(f"Model not ready for term: {term}")
+    return HTTPException(
+        status_code=503,
+        detail="Model is still loading, please retry",
+        headers={"Retry-After": str(RETRY_AFTER_S)},
+    )
+
+
+def _overloaded(term: str, error: Exception):
+    """Build the fast 429/503 response for requests the inference queue turned away."""
+    logger.warning(f"Inference queue rejected term: {term} ({error})")
+    # A full queue means "slow down" (429), a timed-out wait means "try later" (503)
+    status_code = 429 if isinstance(error, OverloadedError) else 503
+    return HTTPException(
+        status_code=status_code,
+        detail="Server is busy, please retry",
+        headers={"Retry-After": str(RETRY_AFTER_S)},
+    )
 
 
 @app.post("/v1/explain", response_model=ExplainResponse)
-def explain(payload: ExplainInput):
+async def explain(payload: ExplainInput):
     """
     Explain a Gen Z slang term with definition and example.
 
+    The order in which the lexicon and the model are consulted is controlled by
+    SERVING_POLICY. Under ``lexicon_first`` a lexicon hit is returned directly with
+    ``source="lexicon"`` and the model only runs on misses. Model answers also report
+    the weight precision and the LoRA adapter the model ran with. The adapter is
+    the one named in the request, else the one SLANG_ADAPTER_SPLIT assigns the term.
+
+    Lexicon hits are answered on the event loop. Generation runs on the inference
+    executor, behind a bounded queue (see InferenceGate).
+
     Args:
         payload: Input containing the slang term to explain
 
@@ -71,42 +409,346 @@ def explain(payload: ExplainInput):
         ExplainResponse with definition, example, and metadata
 
     Raises:
-        HTTPException: If an error occurs during processing
+        HTTPException: 400 for empty terms or unknown adapters, 500 on errors
     """
     term = payload.term.strip().lower()
 
     if not term:
         raise HTTPException(status_code=400, detail="Term cannot be empty")
+    _check_adapter(payload.adapter)
+    adapter = choose_adapter(term, payload.adapter)
 
-    logger.info(f"Explaining term: {term}")
+    logger.debug("Explaining term: %s", term)
 
     try:
-        # 1) Try LoRA model generation
-        raw = generate(term)
-        parsed = parse_definition_example(raw)
-
-        # 2) Fallback to baseline if needed
-        source = "lora"
-        if not parsed["format_ok"]:
-            logger.warning(f"LoRA output format invalid for term: {term}, trying fallback")
-            base = lookup(term)
-            if base:
-                parsed["definition"] = parsed["definition"] or base["definition"]
-                parsed["example"] = parsed["example"] or base["example"]
-                source = "lora+baseline"
-                logger.info(f"Used baseline fallback for term: {term}")
-            else:
-                source = "lora_raw"
-                logger.warning(f"No baseline match found for term: {term}")
-
-        logger.info(f"Successfully explained term: {term} (source: {source})")
-
-        return {
-            "term": term,
-            "definition": parsed["definition"],
-            "example": parsed["example"],
-            "source": source,
-        }
+        policy = SERVING_POLICY
+
+        # 1) Lexicon fast path: skip generation entirely for known terms
+        answer = lexicon_answer(term, policy)
+        if answer:
+            return answer
+
+        # 2) Try LoRA model generation, 3) fall back to baseline if needed
+        raw = await gate.run(generate, term, adapter=adapter)
+        return _model_answer(term, raw, policy, adapter)
+    except ModelNotReadyError:
+        raise _model_not_ready(term)
+    except (OverloadedError, QueueTimeoutError) as e:
+        raise _overloaded(term, e)
     except Exception as e:
-        logger.error(f"Error explaining term '{term}': {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error processing term: {str(e)}")
+        logger.error(f"Error explaining term '{term}': {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error processing term: {e}")
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/v1/explain/stream")
+async def explain_stream(payload: ExplainInput):
+    """
+    Stream an explanation as Server-Sent Events while the model decodes.
+
+    Emits one ``token`` event per decoded chunk (``{"text": ...}``) and a final
+    ``done`` event with the same fields as /v1/explain plus ``ttft_ms`` (time to
+    first token) and ``total_ms``. Lexicon hits produce only the ``done`` event.
+    Errors after the stream has started are reported as an ``error`` event.
+    A streamed decode holds an inference slot until the stream ends.
+
+    Args:
+        payload: Input containing the slang term to explain
+
+    Returns:
+        StreamingResponse with media type text/event-stream
+
+    Raises:
+        HTTPException: 400 for empty terms or unknown adapters, 429/503 when overloaded
+            or while the model is loading, 500 on errors
+    """
+    start = time.perf_counter()
+    term = payload.term.strip().lower()
+
+    if not term:
+        raise HTTPException(status_code=400, detail="Term cannot be empty")
+    _check_adapter(payload.adapter)
+    adapter = choose_adapter(term, payload.adapter)
+
+    logger.debug("Streaming explanation for term: %s", term)
+    policy = SERVING_POLICY
+
+    answer = lexicon_answer(term, policy)
+    chunks = None
+    holding_slot = False
+    slot_lock = threading.Lock()
+
+    def release_slot():
+        nonlocal holding_slot
+        with slot_lock:
+            if not holding_slot:
+                return
+            holding_slot = False
+        gate.release()
+
+    def close_stream():
+        """Cancel a decode the client walked away from, then free its slot."""
+        close = getattr(chunks, "close", None)
+        while close is not None:
+            try:
+                # Sets the decode's cancel event and waits for its thread
+                close()
+                break
+            except ValueError:
+                # A worker thread is still inside next(): the chunk nobody will read
+                time.sleep(0.01)
+        release_slot()
+
+    if not answer:
+        try:
+            await gate.acquire()
+            holding_slot = True
+            chunks = await run_in_threadpool(stream_generate, term, adapter=adapter)
+        except (OverloadedError, QueueTimeoutError) as e:
+            raise _overloaded(term, e)
+        except ModelNotReadyError:
+            release_slot()
+            raise _model_not_ready(term)
+        except Exception as e:
+            release_slot()
+            logger.error(f"Error explaining term '{term}': {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Error processing term: {e}")
+
+    def events():
+        if answer:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            yield _sse("done", {**answer, "ttft_ms": elapsed_ms, "total_ms": elapsed_ms})
+            return
+
+        parts = []
+        ttft_ms = None
+        try:
+            for chunk in chunks:
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - start) * 1000
+                parts.append(chunk)
+                yield _sse("token", {"text": chunk})
+
+            raw = INSTRUCT_TEMPLATE.format(term=term) + "".join(parts)
+            result = _model_answer(term, raw, policy, adapter)
+        except Exception as e:
+            logger.error(f"Error streaming term '{term}': {e}", exc_info=True)
+            yield _sse("error", {"detail": f"Error processing term: {e}"})
+            return
+        finally:
+            release_slot()
+
+        total_ms = (time.perf_counter() - start) * 1000
+        logger.debug("Streamed term: %s (ttft: %.0fms)", term, ttft_ms or total_ms)
+        yield _sse("done", {**result, "ttft_ms": ttft_ms or total_ms, "total_ms": total_ms})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # On disconnect (or a stream never consumed) stops the decode before freeing the slot
+        background=BackgroundTask(close_stream),
+    )
+
+
+def _explain_misses(terms, policy: str, adapter: str | None = None):
+    """
+    Run lexicon misses through batched generation in chunks of BATCH_MAX_SIZE.
+
+    Terms are grouped by the adapter that serves them, so every chunk runs with
+    one adapter. A chunk that fails only marks its own terms as failed.
+
+    Args:
+        terms: Normalized, unique terms to generate
+        policy: Serving policy in effect for this request
+        adapter: Adapter named by the request, or None to pick one per term
+
+    Returns:
+        dict: Term -> ExplainBatchItem fields
+    """
+    groups = {}
+    for term in terms:
+        groups.setdefault(choose_adapter(term, adapter), []).append(term)
+    chunks = [
+        (name, group[start : start + BATCH_MAX_SIZE])
+        for name, group in groups.items()
+        for start in range(0, len(group), BATCH_MAX_SIZE)
+    ]
+
+    answers = {}
+    for n, (name, chunk) in enumerate(chunks):
+        try:
+            raws = generate_batch(chunk, adapter=name)
+        except ModelNotReadyError:
+            pending = [term for _, rest in chunks[n:] for term in rest]
+            logger.warning(f"Model not ready for {len(pending)} batch terms")
+            for term in pending:
+                answers[term] = {"term": term, "error": "Model is still loading, please retry"}
+            break
+        except Exception as e:
+            logger.error(f"Error explaining batch of {len(chunk)} terms: {e}", exc_info=True)
+            for term in chunk:
+                answers[term] = {"term": term, "error": f"Error processing term: {e}"}
+            continue
+
+        for term, raw in zip(chunk, raws):
+            try:
+                answers[term] = _model_answer(term, raw, policy, name)
+            except Exception as e:
+                logger.error(f"Error parsing term '{term}': {e}", exc_info=True)
+                answers[term] = {"term": term, "error": f"Error processing term: {e}"}
+    return answers
+
+
+@app.post("/v1/explain:batch", response_model=ExplainBatchResponse)
+async def explain_batch(payload: ExplainBatchInput):
+    """
+    Explain many slang terms in one request.
+
+    Terms are normalized like /v1/explain and deduplicated, so a repeated term
+    is looked up or generated once. Lexicon hits are answered directly (under
+    ``lexicon_first``). The misses go through batched generation, at most
+    BATCH_MAX_SIZE terms per ``model.generate`` call. Results come back in input
+    order, one per input term. Terms that fail have ``error`` set, and the other
+    terms in the request are unaffected. All of the generation for one request
+    runs in a single inference slot. ``adapter`` applies to every term; without
+    it each term gets the adapter SLANG_ADAPTER_SPLIT assigns it.
+
+    Args:
+        payload: Input containing the list of slang terms
+
+    Returns:
+        ExplainBatchResponse with one result per input term
+
+    Raises:
+        HTTPException: 400 for unknown adapters, 413 if more than EXPLAIN_BATCH_MAX
+            terms are sent, 429/503 when the inference queue is overloaded
+    """
+    if len(payload.terms) > EXPLAIN_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many terms: {len(payload.terms)} (max {EXPLAIN_BATCH_MAX})",
+        )
+    _check_adapter(payload.adapter)
+
+    policy = SERVING_POLICY
+    normalized = [term.strip().lower() for term in payload.terms]
+    unique = list(dict.fromkeys(term for term in normalized if 0 < len(term) <= 100))
+    logger.debug("Explaining batch of %d terms (%d unique)", len(normalized), len(unique))
+
+    answers = {}
+    misses = []
+    for term in unique:
+        answer = lexicon_answer(term, policy)
+        if answer:
+            answers[term] = answer
+        else:
+            misses.append(term)
+    if misses:
+        try:
+            answers.update(await gate.run(_explain_misses, misses, policy, payload.adapter))
+        except (OverloadedError, QueueTimeoutError) as e:
+            raise _overloaded(f"<batch of {len(misses)}>", e)
+
+    results = []
+    for term in normalized:
+        if not term:
+            results.append({"term": term, "error": "Term cannot be empty"})
+        elif len(term) > 100:
+            results.append({"term": term, "error": "Term is longer than 100 characters"})
+        else:
+            results.append(answers[term])
+    return {"results": results, "unique_terms": len(unique)}
+
+
+class AnnotateInput(BaseModel):
+    """Request model for the annotate endpoint."""
+
+    texts: list[str] = Field(..., min_length=1, description="Messages to scan for slang")
+    explain_unknown: bool = Field(
+        False, description="Explain slang-looking words missing from the lexicon with the model"
+    )
+    adapter: str | None = Field(
+        None, description="LoRA adapter for unknown terms (default: traffic split or default)"
+    )
+
+
+class AnnotatedSpan(BaseModel):
+    """One slang term found in a message."""
+
+    start: int
+    end: int
+    text: str
+    term: str
+    match: str
+    definition: str | None = None
+    example: str | None = None
+    source: str | None = None
+    error: str | None = None
+
+
+class AnnotatedText(BaseModel):
+    """The slang terms found in one message."""
+
+    spans: list[AnnotatedSpan]
+
+
+class AnnotateResponse(BaseModel):
+    """Response model for the annotate endpoint."""
+
+    results: list[AnnotatedText]
+    unknown_terms: int
+
+
+@app.post("/v1/annotate", response_model=AnnotateResponse)
+async def annotate_texts(payload: AnnotateInput):
+    """
+    Find and explain every slang term in a list of messages.
+
+    Lexicon terms, multi-word ones included, are found in one pass over each
+    message and answered from the lexicon on the event loop. Words that look
+    like slang but are not lexicon terms get ``match="unknown"``. With
+    ``explain_unknown`` the unique unknown terms of the whole request (at most
+    ANNOTATE_MAX_UNKNOWN) are generated like the misses of /v1/explain:batch,
+    in batches and a single inference slot. Detection always uses the lexicon,
+    whatever the serving policy.
+
+    Args:
+        payload: Messages and whether to explain unknown terms
+
+    Returns:
+        AnnotateResponse with the spans of each message, in input order
+
+    Raises:
+        HTTPException: 400 for unknown adapters, 413 for too many or too long texts,
+            429/503 when the inference queue is overloaded
+    """
+    if len(payload.texts) > ANNOTATE_MAX_TEXTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many texts: {len(payload.texts)} (max {ANNOTATE_MAX_TEXTS})",
+        )
+    if any(len(text) > ANNOTATE_MAX_CHARS for text in payload.texts):
+        raise HTTPException(
+            status_code=413, detail=f"Texts are limited to {ANNOTATE_MAX_CHARS} characters"
+        )
+    _check_adapter(payload.adapter)
+
+    start = time.perf_counter()
+    # Up to ANNOTATE_MAX_TEXTS scans of ANNOTATE_MAX_CHARS each: keep them off the event loop
+    results = await run_in_threadpool(lambda: [annotate(text) for text in payload.texts])
+    STAGE_SECONDS.observe(time.perf_counter() - start, "annotate")
+
+    terms = unknown_terms(results, ANNOTATE_MAX_UNKNOWN) if payload.explain_unknown else []
+    if terms:
+        logger.debug("Explaining %d unknown terms from %d texts", len(terms), len(results))
+        try:
+            answers = await gate.run(_explain_misses, terms, SERVING_POLICY, payload.adapter)
+        except (OverloadedError, QueueTimeoutError) as e:
+            raise _overloaded(f"<{len(terms)} unknown terms>", e)
+        attach(results, answers)
+    return {"results": [{"spans": spans} for spans in results], "unknown_terms": len(terms)}
@@ -0,0 +1,261 @@
+"""Pre-fork serving: load the model once, then serve it from several worker processes."""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+
+from . import inference
+
+logger = logging.getLogger(__name__)
+
+# Worker processes sharing one copy of the weights, and torch threads per worker
+# (0: the available cores divided evenly between the workers)
+WORKERS = int(os.getenv("SLANG_WORKERS", "1"))
+WORKER_THREADS = int(os.getenv("SLANG_WORKER_THREADS", "0"))
+# A worker that exits sooner than this after starting is not respawned again
+RESPAWN_MIN_UPTIME_S = 5
+
+
+def available_cpus():
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_slices(workers: int, threads: int = 0, cpus=None):
+    """
+    Give each worker a contiguous slice of ``threads`` CPUs.
+
+    With more ``workers * threads`` than CPUs the slices wrap around and
+    overlap, which oversubscribes the cores; a warning is logged.
+
+    Args:
+        workers: Number of worker processes
+        threads: CPUs (and torch threads) per worker; 0 divides ``cpus`` evenly
+        cpus: CPU ids to divide; defaults to available_cpus()
+
+    Returns:
+        list[list[int]]: The CPU ids of each worker
+
+    Raises:
+        ValueError: If ``workers`` or ``threads`` is out of range
+    """
+    if workers < 1 or threads < 0:
+        raise ValueError("workers must be at least 1 and threads at least 0")
+    cpus = list(cpus) if cpus is not None else available_cpus()
+    threads = threads or max(1, len(cpus) // workers)
+    if workers * threads > len(cpus):
+        logger.warning(
+            f"{workers} workers x {threads} threads oversubscribe {len(cpus)} CPUs; "
+            f"slices overlap"
+        )
+    return [[cpus[(i * threads + j) % len(cpus)] for j in range(threads)] for i in range(workers)]
+
+
+def configure_worker(cpus):
+    """Pin this process to ``cpus`` and use one torch intra-op thread per CPU."""
+    import torch
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(len(cpus))
+
+
+def preload(engine=None):
+    """
+    Load the model in this process so forked workers share its weights.
+
+    Tensor data lives outside the Python objects, so the forked workers read the
+    parent's weight pages without copying them as long as nothing writes to
+    them. Loading runs on a single torch thread: an OpenMP thread team created
+    before fork() is not usable in the children. Afterwards the Python heap is
+    frozen (gc.freeze) so that collections in the workers do not touch, and
+    copy, the pages of the objects created here.
+
+    Args:
+        engine: InferenceEngine to load; defaults to the API's shared engine
+
+    Raises:
+        Exception: Any error raised while loading (see InferenceEngine.load)
+    """
+    import torch
+
+    # Tokenizer threads started before fork() would be gone in the workers
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    torch.set_num_threads(1)
+    (engine or inference.engine).load()
+    gc.collect()
+    gc.freeze()
+
+
+class WorkerPool:
+    """
+    Forks worker processes from a parent that has already loaded the model.
+
+    Each worker is pinned to its CPU slice (see cpu_slices), configured with a
+    matching torch thread count and then runs ``target(index)``. The parent only
+    supervises: a worker that dies is forked again from the loaded parent, which
+    takes milliseconds rather than a model load. A worker that exits within
+    RESPAWN_MIN_UPTIME_S of starting is not replaced, so a crash loop ends.
+
+    Args:
+        target: Function run in each worker with the worker index; the worker
+            exits with status 0 when it returns and 1 when it raises
+        slices: CPU ids of each worker, e.g. from cpu_slices()
+        respawn: Fork a replacement when a worker exits
+    """
+
+    def __init__(self, target, slices, respawn: bool = True):
+        self.target = target
+        self.slices = [list(cpus) for cpus in slices]
+        self.respawn = respawn
+        self.pids = {}  # pid -> worker index
+        self._started = {}  # worker index -> monotonic start time
+        self._stopping = False
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                configure_worker(self.slices[index])
+                self.target(index)
+                code = 0
+            except BaseException:
+                logger.exception(f"Worker {index} failed")
+            finally:
+                # Never return into the parent's code (or its atexit handlers)
+                os._exit(code)
+        self.pids[pid] = index
+        self._started[index] = time.monotonic()
+        logger.info(f"Started worker {index} (pid {pid}) on CPUs {self.slices[index]}")
+        return pid
+
+    def start(self):
+        """Fork every worker."""
+        for index in range(len(self.slices)):
+            self._spawn(index)
+
+    def supervise(self):
+        """
+        Wait for workers to exit, respawning them, until none is left.
+
+        Returns:
+            dict: Worker index -> exit status of its last process
+        """
+        statuses = {}
+        while self.pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = self.pids.pop(pid, None)
+            if index is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            statuses[index] = code
+            uptime = time.monotonic() - self._started[index]
+            if self._stopping or not self.respawn:
+                continue
+            if uptime < RESPAWN_MIN_UPTIME_S:
+                logger.error(f"Worker {index} exited with {code} after {uptime:.1f}s; giving up")
+                continue
+            logger.warning(f"Worker {index} (pid {pid}) exited with {code}; respawning")
+            self._spawn(index)
+        return statuses
+
+    def stop(self, sig: int = signal.SIGTERM):
+        """Ask every worker to exit and stop respawning them."""
+        self._stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+
+def _listen(host: str, port: int):
+    """A listening TCP socket shared by every worker."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(
+    host: str = "0.0.0.0", port: int = 8000, workers: int = WORKERS, threads: int = WORKER_THREADS
+):
+    """
+    Serve the API from ``workers`` processes that share one loaded model.
+
+    The parent binds the socket, loads the model (see preload), imports the app
+    and forks. Every worker runs uvicorn on the shared socket, so the kernel
+    spreads connections across them. The weights are resident once however
+    many workers run. Caches, metrics and micro-batching stay per worker.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind
+        workers: Worker processes
+        threads: Torch threads (and CPUs) per worker; 0 divides the CPUs evenly
+
+    Returns:
+        dict: Worker index -> exit status
+    """
+    import uvicorn
+
+    from .router import app
+
+    slices = cpu_slices(workers, threads)
+    sock = _listen(host, port)
+    start = time.perf_counter()
+    preload()
+    logger.info(
+        f"Model loaded once in {time.perf_counter() - start:.1f}s; forking {workers} workers "
+        f"x {len(slices[0])} threads on {host}:{port}"
+    )
+
+    def run_worker(index: int):
+        # uvicorn installs its own SIGTERM/SIGINT handlers for a graceful shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        uvicorn.Server(uvicorn.Config(app, log_level="info")).run(sockets=[sock])
+
+    pool = WorkerPool(run_worker, slices)
+    pool.start()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: pool.stop())
+    try:
+        return pool.supervise()
+    finally:
+        sock.close()
+
+
+def main(argv=None):
+    """Command line entry point: serve the API from pre-forked workers."""
+    parser = argparse.ArgumentParser(
+        description="Serve the API from several processes sharing one copy of the model"
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument(
+        "--threads", type=int, default=WORKER_THREADS, help="Torch threads per worker (0: even)"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    serve(args.host, args.port, args.workers, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Greedy decoding that verifies several prompt-lookup draft tokens per forward pass."""
+
+import torch
+
+
+class PromptLookupDraft:
+    """
+    Propose draft tokens by finding the sequence's latest n-gram in known text.
+
+    The sources (e.g. the lexicon answer for a term) are searched first, then
+    the sequence itself, whose prompt holds the few-shot examples. The tokens
+    that followed the first match are proposed as the continuation.
+
+    Args:
+        sources: Token id lists to copy drafts from
+        max_ngram: Longest n-gram to match; shorter ones are tried when it fails
+        num_tokens: Maximum number of tokens proposed per step
+    """
+
+    def __init__(self, sources=(), max_ngram: int = 3, num_tokens: int = 8):
+        self.sources = [list(source) for source in sources if source]
+        self.max_ngram = max_ngram
+        self.num_tokens = num_tokens
+
+    def propose(self, ids):
+        """
+        Draft tokens to follow ``ids``.
+
+        Args:
+            ids: Token ids of the sequence so far (prompt included)
+
+        Returns:
+            list[int]: Up to ``num_tokens`` tokens, empty if no n-gram matches
+        """
+        for n in range(min(self.max_ngram, len(ids) - 1), 0, -1):
+            tail = ids[-n:]
+            # In the sequence itself, skip the occurrence that is the tail
+            for source, end in [(s, len(s)) for s in self.sources] + [(ids, len(ids) - n)]:
+                for start in range(end - n):
+                    if source[start : start + n] == tail:
+                        return source[start + n : start + n + self.num_tokens]
+        return []
+
+
+def greedy_decode(
+    model,
+    input_ids,
+    max_new_tokens: int,
+    draft,
+    logits_processor,
+    stopping_criteria,
+    eos_token_ids=(),
+    past_key_values=None,
+    **model_kwargs,
+):
+    """
+    Greedy-decode one sequence, verifying draft tokens in one forward pass each step.
+
+    Each step feeds the pending token plus the draft and keeps the drafted tokens
+    up to the first one that differs from the model's own greedy choice, plus that
+    choice. Every kept token is picked from logits processed against exactly the
+    tokens before it, and eos and the stopping criteria are checked after each
+    one, so the output is token for token what plain greedy generate() returns.
+    A step without a draft is a plain decoding step.
+
+    Args:
+        model: Causal LM (PEFT-wrapped or not)
+        input_ids: Prompt token ids of shape (1, length)
+        max_new_tokens: Maximum number of tokens to generate
+        draft: Object with ``propose(ids) -> list[int]``, e.g. PromptLookupDraft
+        logits_processor: LogitsProcessorList applied as in generate()
+        stopping_criteria: StoppingCriteriaList checked after every token
+        eos_token_ids: Token ids that end the sequence (kept in the output)
+        past_key_values: DynamicCache already holding a prefix of ``input_ids``
+        **model_kwargs: Extra forward() arguments (e.g. ``adapter_names``)
+
+    Returns:
+        tuple: (sequence of shape (1, length), tokens drafted, drafted tokens accepted,
+        forward passes)
+    """
+    from transformers import DynamicCache
+
+    ids = input_ids[0].tolist()
+    prompt_length = len(ids)
+    cache = past_key_values if past_key_values is not None else DynamicCache()
+    pending = ids[cache.get_seq_length() :]
+    drafted = accepted = forwards = 0
+    done = False
+
+    while not done and len(ids) - prompt_length < max_new_tokens:
+        budget = max_new_tokens - (len(ids) - prompt_length)
+        # The model adds one token of its own after the draft
+        proposal = draft.propose(ids)[: budget - 1]
+        feed = pending + proposal
+        outputs = model(
+            input_ids=torch.tensor([feed], device=input_ids.device),
+            past_key_values=cache,
+            use_cache=True,
+            **model_kwargs,
+        )
+        forwards += 1
+        logits = outputs.logits[0, -len(proposal) - 1 :].float()
+        drafted += len(proposal)
+
+        for i in range(len(proposal) + 1):
+            sequence = torch.tensor([ids], device=input_ids.device)
+            scores = logits_processor(sequence, logits[i : i + 1])
+            token = int(scores.argmax(dim=-1))
+            ids.append(token)
+            matched = i < len(proposal) and token == proposal[i]
+            accepted += matched
+            sequence = torch.tensor([ids], device=input_ids.device)
+            if token in eos_token_ids or stopping_criteria(sequence, scores).any():
+                done = True
+                break
+            if not matched:
+                break
+        # The cache keeps every token but the newest, which the next step feeds
+        rejected = cache.get_seq_length() - (len(ids) - 1)
+        if rejected > 0:
+            cache.crop(-rejected)
+        pending = ids[-1:]
+
+    return torch.tensor([ids], device=input_ids.device), drafted, accepted, forwards
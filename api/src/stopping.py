@@ -0,0 +1,67 @@
+"""Stopping criteria that end decoding once the answer is complete."""
+
+import time
+
+import torch
+from transformers import StoppingCriteria
+
+from .postprocess import is_complete
+
+
+class StopWhenComplete(StoppingCriteria):
+    """
+    Stop each sequence once its generated text holds a complete answer.
+
+    Works on left-padded batches: every row shares the same prompt length, so the
+    generated part of each row starts at ``prompt_length``. A row is only re-checked
+    when its newest token contains a newline or a colon, since those are the only
+    points where ``is_complete`` can change its answer.
+
+    Args:
+        tokenizer: Tokenizer used to decode generated tokens
+        prompt_length: Length of the (padded) prompt in tokens
+        cancel: Optional threading.Event; when set, every sequence stops
+        check_complete: If False, only ``cancel`` stops decoding
+    """
+
+    def __init__(self, tokenizer, prompt_length: int, cancel=None, check_complete: bool = True):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.cancel = cancel
+        self.check_complete = check_complete
+
+    def __call__(self, input_ids, scores, **kwargs):
+        batch_size = input_ids.shape[0]
+        if self.cancel is not None and self.cancel.is_set():
+            return torch.ones(batch_size, dtype=torch.bool, device=input_ids.device)
+
+        done = torch.zeros(batch_size, dtype=torch.bool, device=input_ids.device)
+        if not self.check_complete:
+            return done
+        for row in range(batch_size):
+            last = self.tokenizer.decode(input_ids[row, -1:], skip_special_tokens=True)
+            if "\n" not in last and ":" not in last:
+                continue
+            generated = self.tokenizer.decode(
+                input_ids[row, self.prompt_length :], skip_special_tokens=True
+            )
+            done[row] = is_complete(generated)
+        return done
+
+
+class FirstStepTimer(StoppingCriteria):
+    """
+    Never stops decoding; records when the first generation step finished.
+
+    generate() checks its stopping criteria after every step and the first step
+    runs the prefill, so the time up to ``first_step`` is the prefill (time to
+    first token) and the rest of the call is decoding.
+    """
+
+    def __init__(self):
+        self.first_step = None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.first_step is None:
+            self.first_step = time.perf_counter()
+        return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
@@ -0,0 +1,145 @@
+"""Tiny randomly initialized Llama checkpoints for offline tests and benchmarks."""
+
+import os
+
+
+def build_tokenizer():
+    """
+    Build a byte-level tokenizer that needs no downloaded vocabulary.
+
+    Every byte maps to one token, so any text round-trips through encode/decode.
+
+    Returns:
+        PreTrainedTokenizerFast: Tokenizer with <s>, </s> and <unk> special tokens
+    """
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    vocab = {"<unk>": 0, "<s>": 1, "</s>": 2}
+    for ch in sorted(pre_tokenizers.ByteLevel.alphabet()):
+        vocab[ch] = len(vocab)
+
+    tok = Tokenizer(models.BPE(vocab=vocab, merges=[], unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tok.decoder = decoders.ByteLevel()
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tok, bos_token="<s>", eos_token="</s>", unk_token="<unk>"
+    )
+
+
+def train_tokenizer(texts, vocab_size: int = 2000):
+    """
+    Train a byte-level BPE tokenizer on ``texts``.
+
+    Words of the texts become one or a few tokens, as with a real model's
+    vocabulary, while any other text still round-trips byte by byte.
+
+    Args:
+        texts: Training texts
+        vocab_size: Vocabulary size including the byte alphabet and special tokens
+
+    Returns:
+        PreTrainedTokenizerFast: Tokenizer with <s>, </s> and <unk> special tokens
+    """
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    tok = Tokenizer(models.BPE(unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tok.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=vocab_size,
+        special_tokens=["<unk>", "<s>", "</s>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+    )
+    tok.train_from_iterator(texts, trainer)
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tok, bos_token="<s>", eos_token="</s>", unk_token="<unk>"
+    )
+
+
+def build_tiny_model(
+    output_dir: str,
+    hidden_size: int = 64,
+    num_layers: int = 2,
+    num_heads: int = 4,
+    seed: int = 0,
+    tokenizer=None,
+):
+    """
+    Save a tiny randomly initialized Llama model and its tokenizer.
+
+    The checkpoint has the same architecture family as TinyLlama, so it exercises
+    the real loading and generation code paths in seconds on any CPU.
+
+    Args:
+        output_dir: Directory to write the checkpoint to
+        hidden_size: Model width
+        num_layers: Number of decoder layers
+        num_heads: Number of attention heads
+        seed: Torch seed for the random weights
+        tokenizer: Tokenizer with bos/eos tokens; defaults to build_tokenizer()
+
+    Returns:
+        str: ``output_dir``
+    """
+    import torch
+    from transformers import LlamaConfig, LlamaForCausalLM
+
+    tokenizer = tokenizer or build_tokenizer()
+    config = LlamaConfig(
+        vocab_size=len(tokenizer),
+        hidden_size=hidden_size,
+        intermediate_size=hidden_size * 2,
+        num_hidden_layers=num_layers,
+        num_attention_heads=num_heads,
+        num_key_value_heads=num_heads,
+        max_position_embeddings=1024,
+        bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        pad_token_id=tokenizer.eos_token_id,
+    )
+
+    torch.manual_seed(seed)
+    model = LlamaForCausalLM(config).eval()
+
+    os.makedirs(output_dir, exist_ok=True)
+    model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return output_dir
+
+
+def build_tiny_adapter(model_dir: str, output_dir: str, r: int = 4, seed: int = 0):
+    """
+    Save a LoRA adapter with random (non-zero) weights for a tiny model.
+
+    The adapter targets q/k/v/o_proj like the shipped TinyLlama adapter.
+
+    Args:
+        model_dir: Directory written by ``build_tiny_model``
+        output_dir: Directory to write the adapter to
+        r: LoRA rank
+        seed: Torch seed for the adapter weights
+
+    Returns:
+        str: ``output_dir``
+    """
+    import torch
+    from peft import LoraConfig, get_peft_model
+    from transformers import AutoModelForCausalLM
+
+    torch.manual_seed(seed)
+    base = AutoModelForCausalLM.from_pretrained(model_dir)
+    lora = LoraConfig(
+        r=r,
+        lora_alpha=2 * r,
+        target_modules=["q_proj", "k_proj", "v_proj", "o_proj"],
+        task_type="CAUSAL_LM",
+        # Random B matrices so the adapter actually changes the outputs
+        init_lora_weights=False,
+    )
+    model = get_peft_model(base, lora)
+
+    os.makedirs(output_dir, exist_ok=True)
+    model.save_pretrained(output_dir)
+    return output_dir
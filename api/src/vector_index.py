@@ -0,0 +1,327 @@
+"""Memory-mapped vector index over the lexicon for retrieval-augmented prompts."""
+
+import itertools
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WORDS = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1 << 18)
+def _word_features(word: str, dim: int, ngram_sizes):
+    """
+    Signed hash buckets of one word: the whole word plus its character n-grams.
+
+    Words repeat heavily across a lexicon, so this is memoized per word.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: int64 buckets and float32 signs
+    """
+    padded = f"<{word}>"
+    features = ["w:" + word] + [
+        padded[i : i + n] for n in ngram_sizes for i in range(len(padded) - n + 1)
+    ]
+    hashes = np.array([zlib.crc32(f.encode("utf-8")) for f in features], dtype=np.int64)
+    # The sign bit keeps hash collisions from only ever adding up
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+    return hashes % dim, signs
+
+
+class HashingVectorizer:
+    """
+    Offline text vectorizer based on hashed word and character n-gram features.
+
+    It needs no model download and is deterministic across processes because it
+    uses CRC32 rather than Python's salted ``hash``. Character n-grams let
+    spelling variants and derived forms ("rizzler", "rizz") land near each
+    other.
+
+    Args:
+        dim: Number of hash buckets (vector width)
+        ngram_sizes: Character n-gram lengths taken from each word
+    """
+
+    def __init__(self, dim: int = 256, ngram_sizes=(2, 3, 4)):
+        self.dim = dim
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.name = f"hash{dim}-{''.join(str(n) for n in self.ngram_sizes)}"
+
+    def _encode(self, weighted_texts):
+        """Encode a list of [(text, weight), ...] documents into unit-length rows."""
+        cells = []  # flat (row * dim + bucket) indexes, one array per word
+        values = []
+        for i, parts in enumerate(weighted_texts):
+            base = i * self.dim
+            for text, weight in parts:
+                for word in _WORDS.findall(text.lower()):
+                    buckets, signs = _word_features(word, self.dim, self.ngram_sizes)
+                    cells.append(buckets + base)
+                    values.append(signs * weight)
+
+        size = len(weighted_texts) * self.dim
+        if cells:
+            out = np.bincount(np.concatenate(cells), np.concatenate(values), minlength=size)
+        else:
+            out = np.zeros(size)
+        out = out.astype(np.float32).reshape(len(weighted_texts), self.dim)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+    def encode_documents(self, entries):
+        """
+        Encode lexicon entries, weighting the term above its definition and example.
+
+        Args:
+            entries: List of dicts with term, definition and example
+
+        Returns:
+            np.ndarray: float32 matrix of L2-normalized rows
+        """
+        return self._encode(
+            [[(e["term"], 1.0), (f"{e['definition']} {e['example']}", 0.5)] for e in entries]
+        )
+
+    def encode_queries(self, terms):
+        """Encode query terms into L2-normalized float32 rows."""
+        return self._encode([[(term, 1.0)] for term in terms])
+
+
+class TransformerVectorizer:
+    """
+    Sentence embeddings from a small local transformer (mean pooled, L2 normalized).
+
+    Works with sentence-transformers checkpoints such as
+    ``sentence-transformers/all-MiniLM-L6-v2`` using only ``transformers``.
+
+    Args:
+        model_name: Hugging Face model id or local path
+        batch_size: Texts encoded per forward pass
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        from transformers import AutoModel, AutoTokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+        self.dim = self.model.config.hidden_size
+        self.name = "emb-" + re.sub(r"[^A-Za-z0-9]+", "_", model_name).strip("_")
+
+    def _encode(self, texts):
+        """Mean-pool the last hidden state over non-padding tokens."""
+        import torch
+
+        chunks = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer(
+                texts[start : start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=128,
+                return_tensors="pt",
+            )
+            with torch.no_grad():
+                hidden = self.model(**batch).last_hidden_state
+            mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            chunks.append(torch.nn.functional.normalize(pooled, dim=-1).numpy())
+        if not chunks:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.concatenate(chunks).astype(np.float32)
+
+    def encode_documents(self, entries):
+        """Encode lexicon entries as "term: definition example" sentences."""
+        return self._encode([f"{e['term']}: {e['definition']} {e['example']}" for e in entries])
+
+    def encode_queries(self, terms):
+        """Encode query terms."""
+        return self._encode(list(terms))
+
+
+def build_vector_index(
+    entries, output_dir: str, vectorizer, chunk_size: int = 4096, count: int | None = None
+):
+    """
+    Encode lexicon entries and write them as a memory-mappable index.
+
+    Layout of ``output_dir``:
+
+    - ``vectors.npy``: float32 (n, dim) matrix of unit-length rows
+    - ``meta.jsonl``: one ``{"term", "definition", "example"}`` object per row
+    - ``offsets.npy``: int64 byte offsets of the meta lines (n + 1 values), so a row
+      can be read without parsing the whole file
+
+    Entries are encoded in chunks straight into the memory-mapped matrix, so
+    peak memory does not grow with lexicon size. The index is written to a temp
+    dir and renamed into place, so readers never see a partial index.
+
+    Args:
+        entries: Iterable of dicts with term, definition and example
+        output_dir: Directory to write the index to
+        vectorizer: HashingVectorizer or TransformerVectorizer
+        chunk_size: Entries encoded per chunk
+        count: Number of entries, to stream ``entries`` without materializing it
+
+    Returns:
+        str: ``output_dir``
+    """
+    if count is None:
+        entries = list(entries)
+        count = len(entries)
+    entries = iter(entries)
+    tmp_dir = f"{output_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    vectors = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, "vectors.npy"),
+        mode="w+",
+        dtype=np.float32,
+        shape=(count, vectorizer.dim),
+    )
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    with open(os.path.join(tmp_dir, "meta.jsonl"), "wb") as meta:
+        for start in range(0, count, chunk_size):
+            chunk = list(itertools.islice(entries, chunk_size))
+            vectors[start : start + len(chunk)] = vectorizer.encode_documents(chunk)
+            for i, e in enumerate(chunk, start):
+                offsets[i] = meta.tell()
+                record = {"term": e["term"], "definition": e["definition"], "example": e["example"]}
+                meta.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        offsets[count] = meta.tell()
+    vectors.flush()
+    del vectors
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    logger.info(f"Built vector index with {count} entries at {output_dir}")
+    return output_dir
+
+
+def is_vector_index(path: str) -> bool:
+    """Return True if ``path`` holds a complete index written by build_vector_index."""
+    return all(
+        os.path.isfile(os.path.join(path, name))
+        for name in ("vectors.npy", "meta.jsonl", "offsets.npy")
+    )
+
+
+class VectorIndex:
+    """
+    Read-only cosine-similarity index over a directory written by build_vector_index.
+
+    Vectors and offsets are memory-mapped. Only the rows touched by a search are
+    paged in, and only the metadata of the returned neighbors is parsed.
+
+    Searches that may overlap close() run inside ``reading()``, so an index
+    replaced after a lexicon reload is closed once its last reader is done.
+
+    Args:
+        path: Index directory
+        chunk_rows: Rows scored per matrix multiply during a search
+    """
+
+    def __init__(self, path: str, chunk_rows: int = 65536):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        # Held open for the life of the index; close() releases it
+        self._meta = open(os.path.join(path, "meta.jsonl"), "rb")  # noqa: SIM115
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._closing = False
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @property
+    def closed(self) -> bool:
+        """True once close() was called, even while readers keep the file open."""
+        return self._closing
+
+    @contextmanager
+    def reading(self):
+        """
+        Keep the index open while the block reads from it.
+
+        Raises:
+            ValueError: If the index was already closed
+        """
+        with self._lock:
+            if self._closing:
+                raise ValueError(f"Vector index is closed: {self.path}")
+            self._readers += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._readers -= 1
+                if self._closing and self._readers == 0:
+                    self._meta.close()
+
+    def close(self):
+        """Close the metadata file, after the last running ``reading()`` block if any."""
+        with self._lock:
+            self._closing = True
+            if self._readers == 0:
+                self._meta.close()
+
+    def entry(self, row: int):
+        """Read the metadata of one row."""
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        # os.pread keeps concurrent readers from racing on a shared file position
+        return json.loads(os.pread(self._meta.fileno(), end - start, start))
+
+    def search(self, queries, k: int):
+        """
+        Batched top-k cosine search.
+
+        Args:
+            queries: float32 (b, dim) matrix of unit-length query rows
+            k: Neighbors per query
+
+        Returns:
+            list[list[tuple[int, float]]]: (row, score) pairs per query, best first
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        n = len(self)
+        k = min(k, n)
+        if k <= 0 or len(queries) == 0:
+            return [[] for _ in range(len(queries))]
+
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, n, self.chunk_rows):
+            scores = queries @ self.vectors[start : start + self.chunk_rows].T
+            kk = min(k, scores.shape[1])
+            top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            best_scores = np.concatenate(
+                [best_scores, np.take_along_axis(scores, top, axis=1)], axis=1
+            )
+            if best_rows.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        return [
+            [(int(r), float(s)) for r, s in zip(rows, scores)]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
@@ -1,8 +1,26 @@
 """Pytest configuration and shared fixtures."""
 
+import os
 import sys
+import tempfile
 from pathlib import Path
 
+import pytest
+
 # Add src directory to path for imports
 src_path = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_path))
+
+# Keep lexicon vector indexes built during tests out of the repository
+os.environ.setdefault("SLANG_VECTOR_DIR", tempfile.mkdtemp(prefix="slang-vectors-"))
+
+
+@pytest.fixture(scope="session")
+def tiny_checkpoint(tmp_path_factory):
+    """Build a tiny random Llama model and LoRA adapter once per test session."""
+    from src.tiny_model import build_tiny_adapter, build_tiny_model
+
+    root = tmp_path_factory.mktemp("tiny")
+    model_dir = build_tiny_model(str(root / "model"))
+    adapter_dir = build_tiny_adapter(model_dir, str(root / "adapter"))
+    return model_dir, adapter_dir
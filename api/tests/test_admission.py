@@ -0,0 +1,149 @@
+"""Tests for admission module."""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.admission import InferenceGate, OverloadedError, QueueTimeoutError
+
+
+class TestInferenceGate:
+    """Test bounded concurrency and backpressure of the InferenceGate."""
+
+    def test_run_returns_result(self):
+        """Test that run() returns the function's result off the event loop."""
+        gate = InferenceGate(max_concurrency=1, max_queue=0)
+        loop_thread = threading.get_ident()
+
+        async def main():
+            return await gate.run(lambda x: (x * 2, threading.get_ident()), 21)
+
+        result, worker_thread = asyncio.run(main())
+
+        assert result == 42
+        assert worker_thread != loop_thread
+        assert gate.stats()["completed"] == 1
+
+    def test_concurrency_is_bounded(self):
+        """Test that no more than max_concurrency calls run at once."""
+        gate = InferenceGate(max_concurrency=2, max_queue=8)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            threading.Event().wait(0.02)
+            with lock:
+                running[0] -= 1
+
+        async def main():
+            await asyncio.gather(*(gate.run(work) for _ in range(6)))
+
+        asyncio.run(main())
+
+        assert peak[0] == 2
+        stats = gate.stats()
+        assert stats["completed"] == 6
+        assert stats["running"] == 0
+        assert stats["queued"] == 0
+
+    def test_full_queue_rejects_fast(self):
+        """Test that requests beyond running + queued capacity are rejected."""
+        gate = InferenceGate(max_concurrency=1, max_queue=1)
+        release = threading.Event()
+
+        async def main():
+            first = asyncio.ensure_future(gate.run(release.wait))
+            second = asyncio.ensure_future(gate.run(release.wait))
+            await asyncio.sleep(0.05)
+            with pytest.raises(OverloadedError):
+                await gate.run(release.wait)
+            stats = gate.stats()
+            release.set()
+            await asyncio.gather(first, second)
+            return stats
+
+        stats = asyncio.run(main())
+
+        assert stats["running"] == 1
+        assert stats["queued"] == 1
+        assert stats["rejected"] == 1
+
+    def test_queue_timeout(self):
+        """Test that a queued request gives up after queue_timeout_s."""
+        gate = InferenceGate(max_concurrency=1, max_queue=1, queue_timeout_s=0.05)
+        release = threading.Event()
+
+        async def main():
+            first = asyncio.ensure_future(gate.run(release.wait))
+            await asyncio.sleep(0.01)
+            with pytest.raises(QueueTimeoutError):
+                await gate.run(lambda: None)
+            release.set()
+            await first
+
+        asyncio.run(main())
+
+        stats = gate.stats()
+        assert stats["timed_out"] == 1
+        assert stats["queued"] == 0
+        assert stats["wait_ms_p95"] >= 50
+
+    def test_acquire_and_release(self):
+        """Test that a slot held with acquire() blocks others until released."""
+        gate = InferenceGate(max_concurrency=1, max_queue=0)
+
+        async def main():
+            await gate.acquire()
+            with pytest.raises(OverloadedError):
+                await gate.run(lambda: None)
+            gate.release()
+            return await gate.run(lambda: "ok")
+
+        assert asyncio.run(main()) == "ok"
+
+    def test_cancelled_acquire_frees_slot(self):
+        """Test that a slot taken after its waiter was cancelled is given back."""
+        gate = InferenceGate(max_concurrency=1, max_queue=1, queue_timeout_s=5)
+
+        async def main():
+            await gate.acquire()
+            waiter = asyncio.create_task(gate.acquire())
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            gate.release()
+            # The cancelled waiter takes the freed slot, then hands it back
+            return await asyncio.wait_for(gate.run(lambda: "ok"), timeout=5)
+
+        assert asyncio.run(main()) == "ok"
+        stats = gate.stats()
+        assert (stats["running"], stats["queued"]) == (0, 0)
+
+    def test_exception_frees_slot(self):
+        """Test that a failing call still releases its slot."""
+        gate = InferenceGate(max_concurrency=1, max_queue=0)
+
+        def boom():
+            raise RuntimeError("boom")
+
+        async def main():
+            with pytest.raises(RuntimeError, match="boom"):
+                await gate.run(boom)
+            return await gate.run(lambda: "ok")
+
+        assert asyncio.run(main()) == "ok"
+
+    def test_invalid_config(self):
+        """Test that invalid gate settings are rejected."""
+        with pytest.raises(ValueError):
+            InferenceGate(max_concurrency=0)
+        with pytest.raises(ValueError):
+            InferenceGate(max_queue=-1)
+        with pytest.raises(ValueError):
+            InferenceGate(queue_timeout_s=0)
@@ -0,0 +1,121 @@
+"""Tests for annotate module."""
+
+import pytest
+
+from src import retrieval
+from src.annotate import annotate, annotate_stream, attach, unknown_terms
+from src.lexicon_index import LexiconIndex, TermMatcher
+
+LEXICON = {
+    term: {"definition": definition, "example": f"So {term}"}
+    for term, definition in [
+        ("mid", "Mediocre"),
+        ("no cap", "For real"),
+        ("cap", "A lie"),
+        ("npc", "Someone acting scripted"),
+        ("bussin", "Really good"),
+    ]
+}
+
+
+@pytest.fixture(autouse=True)
+def lexicon(monkeypatch):
+    """Serve a small fixed lexicon to the annotator."""
+    matcher, index = TermMatcher(LEXICON), LexiconIndex(LEXICON)
+    monkeypatch.setattr(retrieval, "term_matcher", lambda: (matcher, LEXICON))
+    monkeypatch.setattr(retrieval, "match", index.match)
+
+
+def terms(spans):
+    """(text, term, match) of each span."""
+    return [(span["text"], span["term"], span["match"]) for span in spans]
+
+
+class TestAnnotate:
+    """Test finding slang in messages."""
+
+    def test_lexicon_terms(self):
+        """Test that single and multi-word terms are answered from the lexicon."""
+        spans = annotate("ngl that fit is mid, no cap")
+
+        assert terms(spans) == [("mid", "mid", "exact"), ("no cap", "no cap", "exact")]
+        assert spans[1]["start"] == 21 and spans[1]["end"] == 27
+        assert spans[1]["source"] == "lexicon"
+        assert spans[1]["definition"]
+
+    def test_unknown_candidates(self):
+        """Test that slang-looking words outside the lexicon are marked unknown."""
+        spans = annotate("sheeesh gr8 job, ISTG see you at 3pm")
+
+        assert terms(spans) == [
+            ("sheeesh", "sheeesh", "unknown"),
+            ("gr8", "gr8", "unknown"),
+            ("ISTG", "istg", "unknown"),
+        ]
+        assert all(span["definition"] is None for span in spans)
+
+    def test_shouting_is_not_slang(self):
+        """Test that words of an all-caps message are not taken for acronyms."""
+        assert annotate("THIS IS SO GOOD") == []
+
+    def test_typos_resolve_to_the_lexicon(self):
+        """Test that candidates are matched with the typo-tolerant lexicon index."""
+        spans = annotate("that was BUSIN fr")
+
+        assert terms(spans) == [("BUSIN", "bussin", "squeezed")]
+        assert spans[0]["source"] == "lexicon_fuzzy"
+
+    def test_short_words_are_not_fuzzy_matched(self):
+        """Test that a short word one edit from a term stays unknown."""
+        assert terms(annotate("what a bunch of NPCS")) == [("NPCS", "npcs", "unknown")]
+
+
+class TestExplainUnknown:
+    """Test collecting and explaining unknown terms."""
+
+    def test_unknown_terms_are_unique_and_limited(self):
+        """Test that unknown terms are deduplicated across messages and capped."""
+        results = [annotate("gr8 ISTG"), annotate("GR8 sheeesh, mid")]
+
+        assert unknown_terms(results, 10) == ["gr8", "istg", "sheeesh"]
+        assert unknown_terms(results, 2) == ["gr8", "istg"]
+
+    def test_attach(self):
+        """Test that answers fill in unknown spans only."""
+        results = [annotate("gr8 and mid"), annotate("ISTG")]
+        mid = dict(results[0][1])
+
+        attach(
+            results,
+            {
+                "gr8": {"definition": "Great", "example": "gr8 job", "source": "lora"},
+                "istg": {"term": "istg", "error": "Model is still loading, please retry"},
+            },
+        )
+
+        assert results[0][0]["definition"] == "Great"
+        assert results[0][0]["source"] == "lora"
+        assert results[0][1] == mid
+        assert results[1][0]["error"] == "Model is still loading, please retry"
+
+    def test_stream_batches_explanations(self):
+        """Test that each batch of messages makes one explain call."""
+        calls = []
+
+        def explain(batch_terms):
+            calls.append(batch_terms)
+            return {
+                t: {"definition": t.upper(), "example": "", "source": "lora"} for t in batch_terms
+            }
+
+        messages = iter(["gr8", "mid", "gr8 2day", "l8r"])
+
+        results = list(annotate_stream(messages, explain, batch_size=3))
+
+        assert calls == [["gr8", "2day"], ["l8r"]]
+        assert [[span["definition"] for span in spans] for spans in results] == [
+            ["GR8"],
+            ["Mediocre"],
+            ["GR8", "2DAY"],
+            ["L8R"],
+        ]
@@ -0,0 +1,77 @@
+"""Tests for answers module."""
+
+from unittest.mock import patch
+
+import pytest
+
+from src import answers
+from src.lexicon_index import Match
+
+RIZZ = Match("rizz", {"definition": "Charm", "example": "He has rizz"}, "normalized", 1.0)
+BROKEN = "Term: rizz\n\nno definition here"
+
+
+class TestLexiconAnswer:
+    """Test answering terms directly from the lexicon."""
+
+    def test_hit_under_lexicon_first(self):
+        """Test that a hit is answered with the entry it matched."""
+        with patch("src.answers.lookup_match", return_value=RIZZ):
+            answer = answers.lexicon_answer("rizz!", "lexicon_first")
+
+        assert answer == {
+            "term": "rizz!",
+            "definition": "Charm",
+            "example": "He has rizz",
+            "source": "lexicon",
+            "matched_term": "rizz",
+            "match_kind": "normalized",
+        }
+
+    @pytest.mark.parametrize("policy", ["model_first", "model_only"])
+    def test_other_policies_skip_the_lexicon(self, policy):
+        """Test that only lexicon_first answers from the lexicon."""
+        with patch("src.answers.lookup_match", return_value=RIZZ) as lookup:
+            assert answers.lexicon_answer("rizz", policy) is None
+
+        lookup.assert_not_called()
+
+    def test_miss(self):
+        """Test that a miss leaves the term to the model."""
+        with patch("src.answers.lookup_match", return_value=None):
+            assert answers.lexicon_answer("zzz", "lexicon_first") is None
+
+
+class TestModelAnswer:
+    """Test parsing model output and the lexicon fallback."""
+
+    def test_well_formed_output(self):
+        """Test that parsed output is served as is."""
+        raw = "Term: rizz\n\nDefinition: Charm\nExample: He has rizz"
+
+        answer = answers.model_answer("rizz", raw, "model_first")
+
+        assert answer == {
+            "term": "rizz",
+            "definition": "Charm",
+            "example": "He has rizz",
+            "source": "lora",
+        }
+
+    def test_fallback_under_model_first(self):
+        """Test that bad output is filled in from the lexicon under model_first."""
+        with patch("src.answers.lookup_match", return_value=RIZZ):
+            answer = answers.model_answer("rizz", BROKEN, "model_first")
+
+        assert answer["source"] == "lora+baseline"
+        assert answer["definition"] == "Charm"
+        assert (answer["matched_term"], answer["match_kind"]) == ("rizz", "normalized")
+
+    @pytest.mark.parametrize("policy", ["lexicon_first", "model_only"])
+    def test_no_fallback_under_other_policies(self, policy):
+        """Test that bad output is returned raw when the policy allows no fallback."""
+        with patch("src.answers.lookup_match", return_value=RIZZ) as lookup:
+            answer = answers.model_answer("rizz", BROKEN, policy)
+
+        assert answer["source"] == "lora_raw"
+        lookup.assert_not_called()
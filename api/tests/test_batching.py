@@ -0,0 +1,116 @@
+"""Tests for batching module."""
+
+import threading
+import time
+
+import pytest
+
+from src.batching import MicroBatcher
+
+
+class TestMicroBatcher:
+    """Test the MicroBatcher request coalescing."""
+
+    @pytest.fixture
+    def calls(self):
+        """Record every batch passed to the batch function."""
+        return []
+
+    @pytest.fixture
+    def batcher(self, calls):
+        """Create a batcher that upper-cases items and records each batch."""
+
+        def batch_fn(items):
+            calls.append(list(items))
+            return [item.upper() for item in items]
+
+        b = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=50)
+        yield b
+        b.close()
+
+    def test_single_item(self, batcher, calls):
+        """Test that a lone item is processed on its own."""
+        assert batcher("rizz", timeout=5) == "RIZZ"
+        assert calls == [["rizz"]]
+
+    def test_concurrent_items_are_coalesced(self, batcher, calls):
+        """Test that items submitted within the wait window share one batch."""
+        futures = [batcher.submit(term) for term in ["rizz", "mid", "cap"]]
+
+        results = [f.result(timeout=5) for f in futures]
+
+        assert results == ["RIZZ", "MID", "CAP"]
+        assert calls == [["rizz", "mid", "cap"]]
+
+    def test_max_batch_size(self, batcher, calls):
+        """Test that batches never exceed max_batch_size."""
+        futures = [batcher.submit(f"term{i}") for i in range(10)]
+
+        results = [f.result(timeout=5) for f in futures]
+
+        assert results == [f"TERM{i}" for i in range(10)]
+        assert all(len(batch) <= 4 for batch in calls)
+        assert sum(len(batch) for batch in calls) == 10
+
+    def test_results_routed_to_callers_across_threads(self, batcher):
+        """Test that each thread receives its own result."""
+        results = {}
+
+        def worker(term):
+            results[term] = batcher(term, timeout=5)
+
+        threads = [threading.Thread(target=worker, args=(f"t{i}",)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results == {f"t{i}": f"T{i}" for i in range(8)}
+
+    def test_exception_propagates_to_every_caller(self):
+        """Test that a failing batch raises in every waiting caller."""
+
+        def batch_fn(items):
+            raise RuntimeError("boom")
+
+        b = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=50)
+        try:
+            futures = [b.submit(i) for i in range(3)]
+            for f in futures:
+                with pytest.raises(RuntimeError, match="boom"):
+                    f.result(timeout=5)
+        finally:
+            b.close()
+
+    def test_result_count_mismatch(self):
+        """Test that a batch function returning the wrong number of results fails."""
+        b = MicroBatcher(lambda items: [], max_batch_size=2, max_wait_ms=0)
+        try:
+            with pytest.raises(RuntimeError, match="0 results for 1 items"):
+                b("x", timeout=5)
+        finally:
+            b.close()
+
+    def test_lone_item_waits_at_most_max_wait(self):
+        """Test that a lone item is dispatched once the wait window closes."""
+        b = MicroBatcher(lambda items: items, max_batch_size=8, max_wait_ms=20)
+        try:
+            start = time.monotonic()
+            assert b("x", timeout=5) == "x"
+            assert time.monotonic() - start < 1.0
+        finally:
+            b.close()
+
+    def test_submit_after_close(self, batcher):
+        """Test that submitting to a closed batcher raises."""
+        batcher.close()
+
+        with pytest.raises(RuntimeError, match="closed"):
+            batcher.submit("rizz")
+
+    def test_invalid_config(self):
+        """Test that invalid batch settings are rejected."""
+        with pytest.raises(ValueError):
+            MicroBatcher(lambda items: items, max_batch_size=0)
+        with pytest.raises(ValueError):
+            MicroBatcher(lambda items: items, max_wait_ms=-1)
@@ -0,0 +1,200 @@
+"""Tests for bulk module."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src import answers, bulk, inference
+from src.lexicon_index import Match
+
+LEXICON = {"rizz": {"definition": "Charm in flirting", "example": "He has rizz"}}
+
+
+def _lookup_match(term):
+    """Exact match in LEXICON, like retrieval.lookup_match."""
+    entry = LEXICON.get(term)
+    return Match(term, entry, "exact", 1.0) if entry else None
+
+
+def _raw(term):
+    """Well-formed model output for a term."""
+    return f"Term: {term}\n\nDefinition: Meaning of {term}\nExample: So {term}"
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    """Lexicon-style and training-style rows, a duplicate and two unusable lines."""
+    rows = [
+        json.dumps({"term": "Rizz", "definition": "d", "example": "e"}),
+        json.dumps({"text": "Task: Explain the internet slang.\nTerm: gyatt\n\nDefinition: x"}),
+        "not json",
+        json.dumps({"term": "skibidi"}),
+        "",
+        json.dumps({"text": "no term here"}),
+        json.dumps({"term": "gyatt"}),
+        json.dumps({"term": "fanum tax"}),
+    ]
+    path = tmp_path / "terms.jsonl"
+    path.write_text("\n".join(rows) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def model_calls():
+    """Patch the lexicon and the model; return the list of generate_batch calls."""
+    calls = []
+
+    def generate_batch(terms, max_new_tokens=100, adapter=None):
+        calls.append(list(terms))
+        return [_raw(term) for term in terms]
+
+    with (
+        patch.object(answers, "lookup_match", _lookup_match),
+        patch.object(inference, "generate_batch", generate_batch),
+    ):
+        yield calls
+
+
+def _records(path):
+    """Output records of a job."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestReadTerm:
+    """Test extracting terms from input records."""
+
+    def test_record_shapes(self):
+        """Test lexicon and training records, and records without a term."""
+        assert bulk.read_term({"term": "  No  Cap "}) == "no cap"
+        assert bulk.read_term({"text": "Term: Rizz\n\nDefinition: Charm"}) == "rizz"
+        assert bulk.read_term({"text": "no term"}) is None
+        assert bulk.read_term({"term": " "}) is None
+
+    @pytest.mark.parametrize("record", [{"text": 5}, {"term": 5}, {"term": None, "text": ["x"]}])
+    def test_non_string_fields(self, record):
+        """Test that records whose term or text is not a string have no term."""
+        assert bulk.read_term(record) is None
+
+    def test_non_string_fields_are_skipped(self, tmp_path, model_calls):
+        """Test that a job counts non-string fields as skipped lines and keeps going."""
+        path = tmp_path / "terms.jsonl"
+        path.write_text('{"text": 5}\n{"term": ["rizz"]}\n{"term": "gyatt"}\n')
+        out = str(tmp_path / "out.jsonl")
+
+        summary = bulk.run(str(path), out, checkpoint_s=0)
+
+        assert summary["complete"] is True
+        assert summary["skipped"] == 2
+        assert [r["term"] for r in _records(out)] == ["gyatt"]
+
+
+class TestRun:
+    """Test streaming jobs, checkpoints and resume."""
+
+    def test_lexicon_and_model(self, input_file, tmp_path, model_calls):
+        """Test one record per input term in order, with duplicates generated once."""
+        out = str(tmp_path / "out.jsonl")
+
+        summary = bulk.run(input_file, out, batch_size=4, checkpoint_s=0)
+
+        records = _records(out)
+        assert [(r["line"], r["term"]) for r in records] == [
+            (1, "rizz"),
+            (2, "gyatt"),
+            (4, "skibidi"),
+            (7, "gyatt"),
+            (8, "fanum tax"),
+        ]
+        assert records[0]["source"] == "lexicon"
+        assert records[1]["definition"] == "Meaning of gyatt"
+        assert model_calls == [["gyatt", "skibidi"], ["fanum tax"]]
+        assert summary["complete"] is True
+        assert summary["records"] == 5 and summary["skipped"] == 2
+        assert summary["sources"] == {"lexicon": 1, "lora": 4}
+        assert bulk.load_checkpoint(bulk.checkpoint_path(out))["complete"] is True
+
+    def test_model_only(self, input_file, tmp_path, model_calls):
+        """Test that model_only skips the lexicon."""
+        out = str(tmp_path / "out.jsonl")
+
+        summary = bulk.run(input_file, out, policy="model_only", batch_size=8)
+
+        assert summary["sources"] == {"lora": 5}
+        assert model_calls == [["rizz", "gyatt", "skibidi", "fanum tax"]]
+
+    def test_batch_errors(self, input_file, tmp_path):
+        """Test that a failed batch yields error records and the job goes on."""
+        out = str(tmp_path / "out.jsonl")
+
+        with (
+            patch.object(answers, "lookup_match", _lookup_match),
+            patch.object(inference, "generate_batch", side_effect=RuntimeError("boom")),
+        ):
+            summary = bulk.run(input_file, out, batch_size=4)
+
+        assert summary["complete"] is True
+        assert summary["errors"] == 4
+        assert _records(out)[1]["error"] == "boom"
+
+    def test_resume_after_crash(self, input_file, tmp_path, model_calls):
+        """Test that a rerun continues after the last checkpoint without duplicates."""
+        out = str(tmp_path / "out.jsonl")
+        real = inference.generate_batch
+
+        def crash_on_second_batch(terms, max_new_tokens=100, adapter=None):
+            if model_calls:
+                raise KeyboardInterrupt
+            return real(terms, max_new_tokens, adapter)
+
+        with (
+            patch.object(inference, "generate_batch", crash_on_second_batch),
+            pytest.raises(KeyboardInterrupt),
+        ):
+            bulk.run(input_file, out, batch_size=4, checkpoint_s=3600)
+        state = bulk.load_checkpoint(bulk.checkpoint_path(out))
+        assert state["complete"] is False and state["records"] == 4
+        # Simulate a torn write after the checkpoint; resume must drop it
+        with open(out, "ab") as f:
+            f.write(b'{"line": 8, "te')
+
+        summary = bulk.run(input_file, out, batch_size=4)
+
+        records = _records(out)
+        assert [r["line"] for r in records] == [1, 2, 4, 7, 8]
+        assert summary["records"] == 5 and summary["complete"] is True
+        assert model_calls == [["gyatt", "skibidi"], ["fanum tax"]]
+
+    def test_complete_job_is_not_rerun(self, input_file, tmp_path, model_calls):
+        """Test that a finished job does nothing unless restarted."""
+        out = str(tmp_path / "out.jsonl")
+        bulk.run(input_file, out, batch_size=4)
+
+        bulk.run(input_file, out, batch_size=4)
+        assert len(model_calls) == 2
+        bulk.run(input_file, out, batch_size=4, restart=True)
+        assert len(model_calls) == 4
+        assert len(_records(out)) == 5
+
+    def test_checkpoint_mismatch(self, input_file, tmp_path, model_calls):
+        """Test that a checkpoint of another input is refused."""
+        out = str(tmp_path / "out.jsonl")
+        bulk.run(input_file, out)
+        other = tmp_path / "other.jsonl"
+        other.write_text(json.dumps({"term": "rizz"}) + "\n")
+
+        with pytest.raises(ValueError, match="another job"):
+            bulk.run(str(other), out)
+        with pytest.raises(ValueError, match="Unknown policy"):
+            bulk.run(input_file, out, policy="nope")
+
+    def test_main(self, input_file, tmp_path, model_calls, capsys):
+        """Test the command line entry point prints the summary."""
+        out = str(tmp_path / "out.jsonl")
+
+        bulk.main([input_file, "--out", out, "--batch-size", "2", "--policy", "lexicon_first"])
+
+        summary = json.loads(capsys.readouterr().out)
+        assert summary["records"] == 5
+        assert summary["records_per_s"] > 0
@@ -0,0 +1,233 @@
+"""Tests for cache module."""
+
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from src.cache import DiskCache, TTLCache
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Test the TTLCache LRU/TTL behavior."""
+
+    @pytest.fixture
+    def clock(self):
+        """Create a controllable clock."""
+        return FakeClock()
+
+    def test_put_and_get(self):
+        """Test storing and retrieving a value."""
+        cache = TTLCache(maxsize=4)
+        cache.put(("rizz", 100), "Definition: charm")
+
+        assert cache.get(("rizz", 100)) == "Definition: charm"
+        assert cache.get(("rizz", 50)) is None
+
+    def test_hit_and_miss_counters(self):
+        """Test that hits and misses are counted."""
+        cache = TTLCache(maxsize=4)
+        cache.put("a", 1)
+
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TTLCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self, clock):
+        """Test that entries expire after ttl_s."""
+        cache = TTLCache(maxsize=4, ttl_s=10, clock=clock)
+        cache.put("a", 1)
+
+        clock.now = 9.9
+        assert cache.get("a") == 1
+
+        clock.now = 10.0
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+        assert len(cache) == 0
+
+    def test_no_ttl(self, clock):
+        """Test that ttl_s=None keeps entries until evicted."""
+        cache = TTLCache(maxsize=4, ttl_s=None, clock=clock)
+        cache.put("a", 1)
+
+        clock.now = 1e9
+        assert cache.get("a") == 1
+
+    def test_zero_size_disables_cache(self):
+        """Test that maxsize=0 never stores anything."""
+        cache = TTLCache(maxsize=0)
+        cache.put("a", 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalidate_all(self):
+        """Test dropping every entry."""
+        cache = TTLCache(maxsize=4)
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        assert cache.invalidate() == 2
+        assert len(cache) == 0
+
+    def test_invalidate_by_predicate(self):
+        """Test dropping only entries from a stale adapter."""
+        cache = TTLCache(maxsize=4)
+        cache.put(("rizz", 100, 1.2, "old"), "old output")
+        cache.put(("mid", 100, 1.2, "new"), "new output")
+
+        removed = cache.invalidate(lambda key: key[3] != "new")
+
+        assert removed == 1
+        assert cache.get(("rizz", 100, 1.2, "old")) is None
+        assert cache.get(("mid", 100, 1.2, "new")) == "new output"
+
+    def test_invalid_config(self):
+        """Test that invalid cache settings are rejected."""
+        with pytest.raises(ValueError):
+            TTLCache(maxsize=-1)
+        with pytest.raises(ValueError):
+            TTLCache(ttl_s=0)
+
+
+def _put_range(path, start, count):
+    """Write entries from a separate process."""
+    cache = DiskCache(path)
+    for i in range(start, start + count):
+        cache.put(["term", i], f"output {i}")
+
+
+class TestDiskCache:
+    """Test the persistent SQLite cache."""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        """Database path in a fresh directory."""
+        return str(tmp_path / "cache" / "responses.sqlite")
+
+    @pytest.fixture
+    def clock(self):
+        """Create a controllable clock."""
+        return FakeClock()
+
+    def test_put_and_get(self, path):
+        """Test storing and retrieving a value under a tuple key."""
+        cache = DiskCache(path)
+        cache.put(("rizz", 100, 1.2, "abc"), "Definition: charm")
+
+        assert cache.get(("rizz", 100, 1.2, "abc")) == "Definition: charm"
+        assert cache.get(("rizz", 50, 1.2, "abc")) is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+    def test_survives_reopen(self, path):
+        """Test that entries written by one instance are read by the next one."""
+        cache = DiskCache(path)
+        cache.put(("rizz",), "old")
+        cache.put(("rizz",), "new")
+        cache.close()
+
+        reopened = DiskCache(path)
+        assert reopened.get(("rizz",)) == "new"
+        assert reopened.stats()["bytes"] == len('["rizz"]') + len("new")
+
+    def test_lru_eviction_by_size(self, path, clock):
+        """Test that the least recently used entries go once the size bound is exceeded."""
+        entry = len('["a"]') + 10
+        cache = DiskCache(path, max_bytes=3 * entry, touch_s=0, clock=clock)
+        for t, key in enumerate("abc"):
+            clock.now = t
+            cache.put([key], "x" * 10)
+        clock.now = 3
+        cache.get(["a"])  # "b" is now least recently used
+        clock.now = 4
+        cache.put(["d"], "x" * 10)
+
+        assert cache.get(["b"]) is None
+        assert cache.get(["a"]) is not None
+        assert cache.get(["d"]) is not None
+        stats = cache.stats()
+        assert stats["bytes"] <= 0.9 * 3 * entry
+        assert stats["evictions"] == 2  # "b" and "c", down to 90% of the bound
+
+    def test_multi_process_writers(self, path):
+        """Test that concurrent processes share one database without losing writes."""
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_put_range, args=(path, i * 50, 50)) for i in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+
+        cache = DiskCache(path)
+        assert [worker.exitcode for worker in workers] == [0] * 4
+        assert cache.stats()["size"] == 200
+        assert cache.get(["term", 175]) == "output 175"
+
+    def test_invalidate_by_predicate(self, path):
+        """Test dropping only entries from a stale adapter, or everything."""
+        cache = DiskCache(path)
+        cache.put(("rizz", 100, 1.2, "old"), "old output")
+        cache.put(("mid", 100, 1.2, "new"), "new output")
+
+        assert cache.invalidate(lambda key: key[3] != "new") == 1
+        assert cache.get(("mid", 100, 1.2, "new")) == "new output"
+        assert cache.invalidate() == 1
+        assert cache.stats()["bytes"] == 0
+
+    def test_broken_file_degrades_to_misses(self, path, tmp_path):
+        """Test that an unreadable database is logged as errors, not raised."""
+        with open(tmp_path / "garbage.sqlite", "wb") as f:
+            f.write(b"not a database" * 100)
+        cache = DiskCache(str(tmp_path / "garbage.sqlite"))
+
+        cache.put(("rizz",), "output")
+
+        assert cache.get(("rizz",)) is None
+        assert cache.stats()["errors"] == 3
+
+    def test_unknown_schema_version(self, path):
+        """Test that a database from a newer schema is not written to."""
+        DiskCache(path).put(("rizz",), "output")
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA user_version = 99")
+        conn.close()
+
+        cache = DiskCache(path)
+        assert cache.get(("rizz",)) is None
+        assert cache.errors == 1
+
+    def test_invalid_config(self, path):
+        """Test that a negative size bound is rejected."""
+        with pytest.raises(ValueError):
+            DiskCache(path, max_bytes=-1)
@@ -0,0 +1,162 @@
+"""Tests for evaluate module."""
+
+import json
+import os
+
+import pytest
+
+from src import evaluate
+
+
+@pytest.fixture
+def training_file(tmp_path):
+    """Training-format JSONL with three terms and one unusable line."""
+    rows = [
+        {
+            "text": (
+                f"Task: Explain the internet slang.\nTerm: {term}\n\n"
+                f"Definition: {d}\nExample: {e}"
+            )
+        }
+        for term, d, e in [
+            ("rizz", "Charm in flirting", "He has rizz"),
+            ("mid", "Average, mediocre", "That movie was mid"),
+            ("sus", "Suspicious", "That's sus"),
+        ]
+    ]
+    path = tmp_path / "train.jsonl"
+    lines = [json.dumps(row) for row in rows]
+    lines.insert(1, json.dumps({"text": "no term here"}))
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def engine_kwargs(tiny_checkpoint):
+    """Engine arguments for the tiny checkpoint."""
+    model_dir, adapter_dir = tiny_checkpoint
+    return {"base_model": model_dir, "adapter_dir": adapter_dir}
+
+
+class TestScoring:
+    """Test matching generations against references."""
+
+    def test_rouge_l(self):
+        """Test LCS-based F1 over lowercased words."""
+        assert evaluate.rouge_l("Charm in flirting", "charm in flirting") == 1.0
+        assert evaluate.rouge_l("no overlap", "charm") == 0.0
+        assert evaluate.rouge_l("", "charm") == 0.0
+        # LCS "a c" of 3 and 2 words: precision 2/3, recall 1
+        assert evaluate.rouge_l("a b c", "a c") == pytest.approx(0.8)
+
+    def test_score(self):
+        """Test parsing plus exact and ROUGE-L scores."""
+        raw = "Task: ...\nTerm: mid\n\nDefinition: Average, mediocre.\nExample: It was mid"
+
+        result = evaluate.score(raw, "average mediocre")
+        unscored = evaluate.score("Definition: only", None)
+
+        assert result["format_ok"] is True
+        assert result["exact"] is True
+        assert result["rouge_l"] == 1.0
+        assert unscored["format_ok"] is False
+        assert unscored["exact"] is None and unscored["rouge_l"] is None
+
+
+class TestReadItems:
+    """Test streaming evaluation inputs."""
+
+    def test_training_jsonl(self, training_file):
+        """Test that training rows yield references and unusable rows are skipped."""
+        items = list(evaluate.read_items(training_file))
+
+        assert [item["term"] for item in items] == ["rizz", "mid", "sus"]
+        assert items[0]["definition"] == "Charm in flirting"
+
+    def test_term_list(self, tmp_path):
+        """Test that a plain term list yields terms without references."""
+        path = tmp_path / "terms.txt"
+        path.write_text("rizz\n\nno cap\n")
+
+        assert list(evaluate.read_items(str(path))) == [
+            {"term": "rizz", "definition": None, "example": None},
+            {"term": "no cap", "definition": None, "example": None},
+        ]
+
+
+class TestRun:
+    """Test the evaluation runner end to end on the tiny model."""
+
+    def test_single_process(self, training_file, engine_kwargs, tmp_path):
+        """Test that every term gets a record per variant and the summary counts them."""
+        out = tmp_path / "results.jsonl"
+
+        summary = evaluate.run(
+            training_file, str(out), batch_size=2, max_new_tokens=4, engine_kwargs=engine_kwargs
+        )
+
+        records = [json.loads(line) for line in out.read_text().splitlines()]
+        assert [record["term"] for record in records] == ["rizz", "mid", "sus"]
+        assert records[0]["reference"] == "Charm in flirting"
+        for record in records:
+            for variant in evaluate.VARIANTS:
+                assert set(record[variant]) >= {"format_ok", "exact", "rouge_l", "seconds"}
+        assert summary["terms"] == 3
+        assert set(summary["variants"]) == set(evaluate.VARIANTS)
+        assert summary["variants"]["base"]["rouge_l"] is not None
+
+    def test_limit_and_variants(self, training_file, engine_kwargs, tmp_path):
+        """Test evaluating a prefix of the input with one variant."""
+        out = tmp_path / "results.jsonl"
+
+        summary = evaluate.run(
+            training_file,
+            str(out),
+            max_new_tokens=4,
+            variants=["finetuned"],
+            limit=2,
+            engine_kwargs=engine_kwargs,
+        )
+
+        records = [json.loads(line) for line in out.read_text().splitlines()]
+        assert len(records) == 2
+        assert "base" not in records[0]
+        assert list(summary["variants"]) == ["finetuned"]
+
+    def test_worker_pool_matches_single_process(self, training_file, engine_kwargs, tmp_path):
+        """Test that batches fanned out to worker processes give the same records."""
+        single, pooled = tmp_path / "single.jsonl", tmp_path / "pooled.jsonl"
+        kwargs = {"batch_size": 1, "max_new_tokens": 4, "engine_kwargs": engine_kwargs}
+
+        evaluate.run(training_file, str(single), **kwargs)
+        summary = evaluate.run(training_file, str(pooled), workers=2, **kwargs)
+
+        def outputs(path):
+            records = [json.loads(line) for line in path.read_text().splitlines()]
+            for record in records:
+                for variant in evaluate.VARIANTS:
+                    del record[variant]["seconds"]
+            return sorted(records, key=lambda record: record["term"])
+
+        assert outputs(pooled) == outputs(single)
+        assert summary["terms"] == 3
+
+    def test_invalid_arguments(self, training_file, tmp_path):
+        """Test that unknown variants and empty pools are rejected."""
+        out = str(tmp_path / "results.jsonl")
+
+        with pytest.raises(ValueError, match="Unknown variants"):
+            evaluate.run(training_file, out, variants=["large"])
+        with pytest.raises(ValueError):
+            evaluate.run(training_file, out, workers=0)
+
+    def test_int8_is_rejected(self, training_file, tmp_path, monkeypatch):
+        """Test that int8, which merges the adapter, is rejected also from SLANG_PRECISION."""
+        out = str(tmp_path / "results.jsonl")
+        monkeypatch.setattr(evaluate, "PRECISION", "int8")
+
+        with pytest.raises(ValueError, match="int8"):
+            evaluate.run(training_file, out)
+        with pytest.raises(ValueError, match="int8"):
+            evaluate.run(training_file, out, engine_kwargs={"precision": "int8"})
+        assert not os.path.exists(out)
@@ -0,0 +1,1098 @@
+"""Tests for inference module."""
+
+import os
+
+import pytest
+
+from src import inference
+from src.cache import DiskCache, TTLCache
+from src.inference import InferenceEngine, ModelNotReadyError, UnknownAdapterError
+
+
+class TestInferenceEngine:
+    """Test lazy loading and generation of the InferenceEngine."""
+
+    @pytest.fixture
+    def engine(self, tiny_checkpoint):
+        """Create an unloaded engine backed by the tiny checkpoint."""
+        model_dir, adapter_dir = tiny_checkpoint
+        return InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir)
+
+    def test_construction_does_not_load(self, engine):
+        """Test that creating an engine does not load any weights."""
+        status = engine.status()
+
+        assert engine.is_ready is False
+        assert engine.model is None
+        assert status["state"] == "not_loaded"
+        assert status["progress"] == 0.0
+
+    def test_load(self, engine):
+        """Test that load() brings the engine to the ready state."""
+        engine.load()
+
+        status = engine.status()
+        assert engine.is_ready is True
+        assert status["state"] == "ready"
+        assert status["progress"] == 1.0
+        assert status["load_seconds"] > 0
+        assert engine.tokenizer.padding_side == "left"
+
+    def test_background_load(self, engine):
+        """Test that start_background_load() loads without blocking the caller."""
+        thread = engine.start_background_load()
+        assert engine.status()["state"] in ("loading", "ready")
+
+        thread.join(timeout=60)
+
+        assert engine.is_ready is True
+        assert engine.start_background_load() is None
+
+    def test_failed_load(self, tiny_checkpoint, tmp_path):
+        """Test that a missing adapter marks the engine as failed."""
+        engine = InferenceEngine(
+            base_model=tiny_checkpoint[0], adapter_dir=str(tmp_path / "missing")
+        )
+
+        with pytest.raises(FileNotFoundError):
+            engine.load()
+
+        status = engine.status()
+        assert status["state"] == "failed"
+        assert "Adapter directory not found" in status["error"]
+        with pytest.raises(RuntimeError, match="failed to load"):
+            engine.ensure_loaded()
+
+    def test_failed_background_load_is_logged(self, tiny_checkpoint, tmp_path, caplog):
+        """Test that a background load failure is logged with its traceback."""
+        engine = InferenceEngine(
+            base_model=tiny_checkpoint[0], adapter_dir=str(tmp_path / "missing")
+        )
+
+        engine.start_background_load().join(timeout=60)
+
+        assert engine.status()["state"] == "failed"
+        failures = [r for r in caplog.records if "Background model load failed" in r.message]
+        assert len(failures) == 1
+        assert failures[0].exc_info[0] is FileNotFoundError
+
+    def test_ensure_loaded_while_loading(self, engine):
+        """Test that callers time out while another thread is loading."""
+        engine.state = "loading"
+
+        with pytest.raises(ModelNotReadyError):
+            engine.ensure_loaded(timeout=0)
+
+    def test_generate_batch_loads_lazily(self, engine):
+        """Test that generate_batch() loads the model on first use."""
+        outputs = engine.generate_batch(["rizz", "no cap"], max_new_tokens=4)
+
+        assert engine.is_ready is True
+        assert len(outputs) == 2
+        assert outputs[0].startswith(inference.INSTRUCT_TEMPLATE.format(term="rizz"))
+        assert outputs[1].startswith(inference.INSTRUCT_TEMPLATE.format(term="no cap"))
+
+
+class TestMergedAdapter:
+    """Test merging the LoRA adapter and caching the merged checkpoint."""
+
+    def test_merged_checkpoint_dir(self):
+        """Test that the checkpoint path depends on base model and adapter id."""
+        a = inference.merged_checkpoint_dir("org/model", "abc", root="/cache")
+        b = inference.merged_checkpoint_dir("org/model", "def", root="/cache")
+        c = inference.merged_checkpoint_dir("other/model", "abc", root="/cache")
+
+        assert a.startswith("/cache/model-")
+        assert a.endswith("-abc")
+        assert len({a, b, c}) == 3
+
+    def test_adapter_identity_is_content_based(self, tiny_checkpoint, tmp_path):
+        """Test that a copied adapter keeps its identity."""
+        import shutil
+
+        copy = shutil.copytree(tiny_checkpoint[1], tmp_path / "copy")
+
+        assert inference.adapter_identity(str(copy)) == inference.adapter_identity(
+            tiny_checkpoint[1]
+        )
+        assert inference.adapter_identity(str(tmp_path / "missing")) == "missing"
+
+    def test_merge_and_reload(self, tiny_checkpoint, tmp_path):
+        """Test that merging preserves outputs and later loads reuse the checkpoint."""
+        model_dir, adapter_dir = tiny_checkpoint
+        terms = ["rizz", "no cap"]
+
+        unmerged = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir)
+        expected = unmerged.generate_batch(terms, max_new_tokens=6)
+
+        first = InferenceEngine(
+            base_model=model_dir,
+            adapter_dir=adapter_dir,
+            merge_adapter=True,
+            merged_root=str(tmp_path),
+        )
+        assert first.generate_batch(terms, max_new_tokens=6) == expected
+        assert first.status()["merge"] == "merged"
+
+        merged_dir = inference.merged_checkpoint_dir(model_dir, first.adapter_id, str(tmp_path))
+        assert os.path.isfile(os.path.join(merged_dir, "config.json"))
+
+        second = InferenceEngine(
+            base_model=model_dir,
+            adapter_dir=adapter_dir,
+            merge_adapter=True,
+            merged_root=str(tmp_path),
+        )
+        assert second.generate_batch(terms, max_new_tokens=6) == expected
+        assert second.status()["merge"] == "loaded_merged"
+        assert not hasattr(second.model, "peft_config")
+
+    def test_failed_save_is_not_fatal(self, tiny_checkpoint, tmp_path):
+        """Test that a serialization error leaves no checkpoint behind and does not raise."""
+        from unittest.mock import MagicMock
+
+        def save_pretrained(path, **kwargs):
+            os.makedirs(path)
+            open(os.path.join(path, "config.json"), "w").close()
+            raise RuntimeError("shared tensors")
+
+        engine = InferenceEngine(base_model=tiny_checkpoint[0])
+        merged_dir = str(tmp_path / "merged")
+
+        engine._save_merged(MagicMock(save_pretrained=save_pretrained), MagicMock(), merged_dir)
+
+        assert os.listdir(tmp_path) == []
+
+
+class TestPrecision:
+    """Test the fp32/bf16/int8 precision modes."""
+
+    @pytest.mark.parametrize("precision", ["bf16", "int8"])
+    def test_precision_modes_generate(self, tiny_checkpoint, precision):
+        """Test that reduced precision engines load and generate."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, precision=precision)
+
+        outputs = engine.generate_batch(["rizz"], max_new_tokens=4)
+
+        assert outputs[0].startswith(inference.INSTRUCT_TEMPLATE.format(term="rizz"))
+        assert engine.status()["precision"] == precision
+
+    def test_int8_quantizes_linear_layers(self, tiny_checkpoint):
+        """Test that int8 merges the adapter and quantizes the Linear layers."""
+        import torch
+
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, precision="int8")
+        engine.load()
+
+        q_proj = engine.model.model.layers[0].self_attn.q_proj
+        assert engine.merge == "merged"
+        assert not isinstance(q_proj, torch.nn.Linear)
+        assert "quantized" in type(q_proj).__module__
+
+    def test_bf16_weights(self, tiny_checkpoint):
+        """Test that bf16 loads the weights in bfloat16."""
+        import torch
+
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, precision="bf16")
+        engine.load()
+
+        assert engine.model.get_base_model().lm_head.weight.dtype == torch.bfloat16
+
+    def test_merged_checkpoint_dir_per_dtype(self):
+        """Test that bf16 merged checkpoints do not collide with fp32 ones."""
+        fp32 = inference.merged_checkpoint_dir("org/model", "abc", root="/cache")
+        bf16 = inference.merged_checkpoint_dir("org/model", "abc", root="/cache", dtype="bf16")
+
+        assert bf16 == fp32 + "-bf16"
+
+    def test_invalid_precision(self, tiny_checkpoint):
+        """Test that an unknown precision is rejected."""
+        with pytest.raises(ValueError, match="precision"):
+            InferenceEngine(base_model=tiny_checkpoint[0], precision="fp8")
+
+    def test_resolve_precision_from_env(self, monkeypatch):
+        """Test that SLANG_PRECISION is validated with a fallback to fp32."""
+        monkeypatch.setenv("SLANG_PRECISION", "INT8")
+        assert inference._resolve_precision() == "int8"
+
+        monkeypatch.setenv("SLANG_PRECISION", "fp4")
+        assert inference._resolve_precision() == "fp32"
+
+
+class TestStreaming:
+    """Test streaming generation and the early-stop criterion."""
+
+    @pytest.fixture
+    def engine(self, tiny_checkpoint):
+        """Create an engine backed by the tiny checkpoint."""
+        model_dir, adapter_dir = tiny_checkpoint
+        return InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir)
+
+    def test_stop_when_complete(self, engine):
+        """Test that rows stop once their Example line is terminated."""
+        import torch
+
+        from src.stopping import StopWhenComplete
+
+        engine.load()
+        tok = engine.tokenizer
+        prompt = tok("Definition:")["input_ids"]
+        done_ids = tok(" Charm\nExample: He has rizz\n")["input_ids"]
+        open_ids = tok(" Charm\nExample: He has rizz!")["input_ids"][: len(done_ids)]
+        input_ids = torch.tensor([prompt + done_ids, prompt + open_ids])
+
+        criterion = StopWhenComplete(tok, prompt_length=len(prompt))
+
+        assert criterion(input_ids, None).tolist() == [True, False]
+
+    def test_stop_when_cancelled(self, engine):
+        """Test that setting the cancel event stops every row."""
+        import threading
+
+        import torch
+
+        from src.stopping import StopWhenComplete
+
+        engine.load()
+        cancel = threading.Event()
+        criterion = StopWhenComplete(engine.tokenizer, prompt_length=1, cancel=cancel)
+        input_ids = torch.tensor([[5, 6, 7], [8, 9, 10]])
+
+        assert criterion(input_ids, None).tolist() == [False, False]
+        cancel.set()
+        assert criterion(input_ids, None).tolist() == [True, True]
+
+    def test_check_complete_disabled(self, engine):
+        """Test that only the cancel event stops rows when completion checks are off."""
+        import threading
+
+        import torch
+
+        from src.stopping import StopWhenComplete
+
+        engine.load()
+        tok = engine.tokenizer
+        input_ids = torch.tensor([tok("Definition: Charm\nExample: He has rizz\n")["input_ids"]])
+        cancel = threading.Event()
+        criterion = StopWhenComplete(tok, prompt_length=1, cancel=cancel, check_complete=False)
+
+        assert criterion(input_ids, None).tolist() == [False]
+        cancel.set()
+        assert criterion(input_ids, None).tolist() == [True]
+
+    def test_stream_matches_generate(self, engine):
+        """Test that streamed chunks add up to the generated text."""
+        prompt = inference.INSTRUCT_TEMPLATE.format(term="rizz")
+
+        chunks = list(engine.stream("rizz", max_new_tokens=6))
+        full = engine.generate_batch(["rizz"], max_new_tokens=6)[0]
+
+        assert len(chunks) >= 1
+        assert prompt + "".join(chunks) == full
+
+    def test_stream_generate_replays_cache(self, tiny_checkpoint, monkeypatch):
+        """Test that cached responses are streamed without touching the model."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir)
+        monkeypatch.setattr(inference, "engine", engine)
+        monkeypatch.setattr(inference, "_cache", TTLCache(maxsize=8))
+        prompt = inference.INSTRUCT_TEMPLATE.format(term="rizz")
+        key = inference._cache_key("rizz", 100, engine.default_adapter)
+        inference._cache.put(key, prompt + " Charm")
+
+        assert list(inference.stream_generate("rizz")) == [" Charm"]
+        assert engine.is_ready is False
+
+    def test_stream_generate_caches_result(self, tiny_checkpoint, monkeypatch):
+        """Test that a fully consumed stream is cached for generate()."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir)
+        monkeypatch.setattr(inference, "engine", engine)
+        monkeypatch.setattr(inference, "_cache", TTLCache(maxsize=8))
+
+        chunks = list(inference.stream_generate("rizz", max_new_tokens=6))
+        cached = inference._cache.get(inference._cache_key("rizz", 6, engine.default_adapter))
+
+        assert cached == inference.INSTRUCT_TEMPLATE.format(term="rizz") + "".join(chunks)
+
+    def test_stream_generate_empty_term(self):
+        """Test that an empty term is rejected before streaming starts."""
+        with pytest.raises(ValueError):
+            inference.stream_generate("  ")
+
+
+class TestDecodeStats:
+    """Test generated-token accounting for early stopping."""
+
+    def test_record_and_snapshot(self):
+        """Test that counters and derived savings are computed from recorded calls."""
+        stats = inference.DecodeStats()
+        stats.record([10, 30], max_new_tokens=30, seconds=0.4)
+
+        snap = stats.snapshot()
+        assert snap["requests"] == 2
+        assert snap["generated_tokens"] == 40
+        assert snap["avg_tokens_per_request"] == 20
+        assert snap["stopped_early"] == 1
+        assert snap["tokens_saved"] == 20
+        assert snap["avg_ms_per_token"] == 10.0
+        assert snap["est_seconds_saved"] == 0.2
+
+    def test_record_draft(self):
+        """Test that assisted decoding counters give the draft acceptance rate."""
+        stats = inference.DecodeStats()
+        stats.record_draft(drafted=8, accepted=6, forwards=3)
+
+        snap = stats.snapshot()
+        assert snap["draft_tokens"] == 8
+        assert snap["draft_accepted"] == 6
+        assert snap["draft_acceptance_rate"] == 0.75
+        assert snap["assisted_forwards"] == 3
+
+    def test_empty_snapshot(self):
+        """Test that an unused counter reports zeros."""
+        snap = inference.DecodeStats().snapshot()
+
+        assert snap["requests"] == 0
+        assert snap["avg_ms_per_token"] == 0.0
+
+    def test_generate_batch_records_tokens(self, tiny_checkpoint):
+        """Test that batched generation records one entry per sequence."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir)
+
+        engine.generate_batch(["rizz", "mid"], max_new_tokens=5)
+
+        snap = engine.decode_stats.snapshot()
+        assert snap["requests"] == 2
+        assert 0 < snap["generated_tokens"] <= 10
+
+    def test_early_stop_flag(self, tiny_checkpoint):
+        """Test that disabling early stop leaves generate() with only the step timer."""
+        from src.stopping import FirstStepTimer
+
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, early_stop=False)
+        timer = FirstStepTimer()
+
+        assert list(engine._stopping_criteria(3, timer)) == [timer]
+        assert len(engine._stopping_criteria(3, timer, cancel=object())) == 2
+
+
+@pytest.fixture(scope="module")
+def assisted(tiny_checkpoint):
+    """Loaded engine with assisted decoding."""
+    model_dir, adapter_dir = tiny_checkpoint
+    engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, speculative=True)
+    engine.load()
+    return engine
+
+
+class TestAssistedDecoding:
+    """Test assisted (prompt-lookup) decoding of single-term calls."""
+
+    def test_same_output_as_greedy(self, assisted, engines, monkeypatch):
+        """Test token-identical results with and without lexicon drafts."""
+        from src.lexicon_index import Match
+
+        cached, _ = engines
+        for term in ["rizz", "no cap", "skibidi"]:
+            expected = cached.generate_batch([term], 32)[0]
+            answer = expected.split("Definition:", 1)[1]
+            entry = {"definition": answer.strip(), "example": "So " + term}
+            monkeypatch.setattr(
+                inference.retrieval, "match", lambda t, entry=entry: Match(t, entry, "exact", 1)
+            )
+            assert assisted.generate_batch([term], 32) == [expected]
+            monkeypatch.setattr(inference.retrieval, "match", lambda t: None)
+            assert assisted.generate_batch([term], 32) == [expected]
+
+    def test_lexicon_drafts_are_accepted(self, assisted, engines, monkeypatch):
+        """Test that a lexicon answer matching the model's output saves forward passes."""
+        from src.lexicon_index import Match
+
+        cached, _ = engines
+        answer = cached.generate_batch(["mid"], 32)[0].split("Definition:", 1)[1]
+        entry = {"definition": answer.strip(), "example": "It was mid"}
+        monkeypatch.setattr(inference.retrieval, "match", lambda t: Match(t, entry, "exact", 1))
+        assisted.decode_stats.reset()
+
+        assisted.generate_batch(["mid"], 32)
+
+        snap = assisted.decode_stats.snapshot()
+        assert snap["draft_accepted"] > 0
+        assert snap["assisted_forwards"] < snap["generated_tokens"]
+
+    def test_batches_use_generate(self, assisted):
+        """Test that calls with several terms keep the batched generate() path."""
+        assisted.decode_stats.reset()
+
+        assisted.generate_batch(["rizz", "mid"], 8)
+
+        assert assisted.decode_stats.snapshot()["assisted_forwards"] == 0
+
+
+class TestStageMetrics:
+    """Test per-stage latency observations of the engine."""
+
+    STAGES = ("retrieve", "tokenize", "prefill", "decode")
+
+    def test_generate_batch_observes_stages(self, tiny_checkpoint):
+        """Test that one generate call records each engine stage once."""
+        from src.metrics import STAGE_SECONDS
+
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=2)
+        engine.load()
+        before = {stage: STAGE_SECONDS.count(stage) for stage in self.STAGES}
+
+        engine.generate_batch(["rizz", "mid"], max_new_tokens=5)
+
+        assert {stage: STAGE_SECONDS.count(stage) - before[stage] for stage in self.STAGES} == {
+            stage: 1 for stage in self.STAGES
+        }
+
+    def test_stream_observes_prefill_and_decode(self, tiny_checkpoint):
+        """Test that a streamed decode is split into prefill and decode too."""
+        from src.metrics import STAGE_SECONDS
+
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir)
+        engine.load()
+        before = STAGE_SECONDS.count("prefill"), STAGE_SECONDS.count("decode")
+
+        list(engine.stream("rizz", 5))
+
+        assert (STAGE_SECONDS.count("prefill"), STAGE_SECONDS.count("decode")) == (
+            before[0] + 1,
+            before[1] + 1,
+        )
+
+    def test_first_step_timer(self):
+        """Test that the timer only records the first step and never stops decoding."""
+        import torch
+
+        from src.stopping import FirstStepTimer
+
+        timer = FirstStepTimer()
+        ids = torch.zeros((2, 3), dtype=torch.long)
+
+        assert not timer(ids, None).any()
+        first = timer.first_step
+        timer(ids, None)
+
+        assert first is not None
+        assert timer.first_step == first
+
+
+class TestFewShotPrompts:
+    """Test retrieval-augmented prompt building."""
+
+    def test_build_prompt_without_shots(self):
+        """Test that no shots gives the bare template."""
+        assert inference.build_prompt("rizz") == inference.INSTRUCT_TEMPLATE.format(term="rizz")
+
+    def test_build_prompt_with_shots(self):
+        """Test that shots are rendered in the training format before the term."""
+        shot = {"term": "mid", "definition": "Mediocre", "example": "That movie was mid"}
+
+        prompt = inference.build_prompt("rizz", [shot])
+
+        assert prompt.startswith("Task: Explain the internet slang.\nTerm: mid\n\n")
+        assert "Definition: Mediocre\nExample: That movie was mid\n\n" in prompt
+        assert prompt.endswith(inference.INSTRUCT_TEMPLATE.format(term="rizz"))
+
+    def test_engine_prompts_use_neighbors(self, tiny_checkpoint, monkeypatch):
+        """Test that the engine asks retrieval for few_shot_k neighbors per term."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=1)
+        shot = {"term": "mid", "definition": "Mediocre", "example": "So mid"}
+        calls = []
+        monkeypatch.setattr(
+            inference.retrieval,
+            "neighbors",
+            lambda terms, k: calls.append(k) or [[shot]] * len(terms),
+        )
+
+        prompts = engine._prompts(["rizz", "cap"])
+
+        assert calls == [1]
+        assert all(p.startswith(inference.SHOT_TEMPLATE.format(**shot)) for p in prompts)
+
+    @pytest.mark.parametrize("few_shot_k", [0, 2])
+    def test_vector_index_opened_at_load(self, tiny_checkpoint, monkeypatch, few_shot_k):
+        """Test that loading opens the vector index only when prompts use few-shot examples."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(
+            base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=few_shot_k
+        )
+        calls = []
+        monkeypatch.setattr(inference.retrieval, "vector_index", lambda: calls.append(1))
+
+        engine.load()
+
+        assert len(calls) == (1 if few_shot_k else 0)
+
+    def test_retrieval_failure_falls_back(self, tiny_checkpoint, monkeypatch):
+        """Test that a retrieval error leaves bare prompts instead of failing."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=2)
+
+        def broken(terms, k):
+            raise OSError("index unreadable")
+
+        monkeypatch.setattr(inference.retrieval, "neighbors", broken)
+
+        assert engine._prompts(["rizz"]) == [inference.INSTRUCT_TEMPLATE.format(term="rizz")]
+
+    def test_generated_text_excludes_shots(self, tiny_checkpoint):
+        """Test that results start at the term's own template, not the examples."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=2)
+
+        result = engine.generate_batch(["rizzler"], max_new_tokens=3)[0]
+
+        assert result.startswith(inference.INSTRUCT_TEMPLATE.format(term="rizzler"))
+        assert result.count("Task:") == 1
+
+
+@pytest.fixture(scope="module")
+def engines(tiny_checkpoint):
+    """Loaded engines with and without the prefix cache."""
+    model_dir, adapter_dir = tiny_checkpoint
+    cached, plain = (
+        InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, prefix_cache=flag)
+        for flag in (True, False)
+    )
+    cached.load()
+    plain.load()
+    return cached, plain
+
+
+class TestPrefixCache:
+    """Test reuse of the prompt prefix KV cache."""
+
+    TERMS = ("rizz", "no cap", "it's giving main character energy")
+
+    def test_built_once_per_load(self, engines):
+        """Test that loading computes the prefix cache only when enabled."""
+        cached, plain = engines
+
+        assert list(cached._prefix_kv) == [cached.default_adapter]
+        assert list(cached._prefix_ids) == cached.tokenizer(inference.PROMPT_PREFIX)["input_ids"]
+        assert plain._prefix_kv == {}
+
+    def test_batch_output_unchanged(self, engines):
+        """Test that reusing the prefix gives the same text for prompts of mixed length."""
+        cached, plain = engines
+
+        assert cached.generate_batch(self.TERMS, 24) == plain.generate_batch(self.TERMS, 24)
+
+    def test_stream_output_unchanged(self, engines):
+        """Test that streaming with the prefix cache matches streaming without it."""
+        cached, plain = engines
+
+        assert "".join(cached.stream("rizz", 24)) == "".join(plain.stream("rizz", 24))
+
+    def test_encode_layout(self, engines):
+        """Test that rows are prefix + padding + rest, with padding masked out."""
+        cached, _ = engines
+        n = len(cached._prefix_ids)
+
+        prompts = [inference.build_prompt("a"), inference.build_prompt("a much longer term")]
+        inputs, prompt_length, reused = cached._encode(prompts, cached.default_adapter)
+
+        assert reused == n
+        assert inputs["past_key_values"].get_seq_length() == n
+        assert prompt_length == inputs["input_ids"].shape[1]
+        assert inputs["input_ids"][0, :n].tolist() == list(cached._prefix_ids)
+        assert inputs["attention_mask"][0, n] == 0
+        assert inputs["attention_mask"][1].all()
+
+    def test_prefix_cache_is_not_mutated(self, engines):
+        """Test that generation extends a copy, never the shared prefix cache."""
+        cached, _ = engines
+
+        cached.generate_batch(["rizz"], 8)
+
+        prefix_kv = cached._prefix_kv[cached.default_adapter]
+        assert prefix_kv.get_seq_length() == len(cached._prefix_ids)
+
+    def test_falls_back_when_prefix_differs(self, engines):
+        """Test that prompts not starting with the cached prefix are prefilled in full."""
+        cached, _ = engines
+
+        inputs, _, reused = cached._encode(["Explain: rizz"], cached.default_adapter)
+
+        assert reused == 0
+        assert "past_key_values" not in inputs
+
+    def test_decode_stats_count_reused_tokens(self, engines):
+        """Test that reused prefix tokens are reported per sequence."""
+        cached, _ = engines
+        cached.decode_stats.reset()
+
+        cached.generate_batch(["rizz", "cap"], 4)
+
+        reused = cached.decode_stats.snapshot()["prefix_tokens_reused"]
+        assert reused == 2 * len(cached._prefix_ids)
+
+    def test_disabled_without_batchable_cache(self, engines, tiny_checkpoint, monkeypatch):
+        """Test that a transformers without DynamicCache batching prefills in full."""
+        import transformers
+
+        _, plain = engines
+        model_dir, adapter_dir = tiny_checkpoint
+        monkeypatch.setattr(transformers, "DynamicCache", type("DynamicCache", (), {}))
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, prefix_cache=True)
+        engine.load()
+
+        assert engine._prefix_kv == {}
+        assert engine.generate_batch(self.TERMS, 8) == plain.generate_batch(self.TERMS, 8)
+
+
+@pytest.fixture(scope="module")
+def adapter_dirs(tiny_checkpoint, tmp_path_factory):
+    """Two more tiny adapters for the tiny model; one name contains a dot."""
+    from src.tiny_model import build_tiny_adapter
+
+    root = tmp_path_factory.mktemp("adapters")
+    return {
+        name: build_tiny_adapter(tiny_checkpoint[0], str(root / name), seed=seed)
+        for seed, name in enumerate(["canary@v2", "lora.v3"], 1)
+    }
+
+
+@pytest.fixture(scope="module")
+def multi(tiny_checkpoint, adapter_dirs):
+    """Loaded engine serving the default adapter plus two extra adapters."""
+    model_dir, adapter_dir = tiny_checkpoint
+    engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, adapters=adapter_dirs)
+    engine.load()
+    return engine
+
+
+class TestMultiAdapter:
+    """Test serving several LoRA adapters on one base model."""
+
+    TERMS = ("rizz", "no cap", "it's giving")
+
+    def test_registry(self, multi, adapter_dirs):
+        """Test that every adapter is registered with its own identity and prefix cache."""
+        names = sorted([multi.default_adapter, *adapter_dirs])
+
+        assert multi.status()["adapters"] == names
+        assert sorted(multi._prefix_kv) == names
+        assert len(set(multi.adapter_ids.values())) == 3
+
+    def test_outputs_match_single_adapter_engines(self, multi, tiny_checkpoint, adapter_dirs):
+        """Test that each adapter gives the same text as an engine serving only it."""
+        model_dir, adapter_dir = tiny_checkpoint
+        for name, path in [(multi.default_adapter, adapter_dir), *adapter_dirs.items()]:
+            single = InferenceEngine(base_model=model_dir, adapter_dir=path)
+
+            expected = single.generate_batch(self.TERMS, 12)
+            assert multi.generate_batch(self.TERMS, 12, name) == expected
+            assert "".join(multi.stream("rizz", 12, name)) == "".join(single.stream("rizz", 12))
+
+    def test_adapters_change_output(self, multi, adapter_dirs):
+        """Test that the adapters actually produce different text."""
+        outputs = {
+            tuple(multi.generate_batch(self.TERMS, 12, name))
+            for name in [multi.default_adapter, *adapter_dirs]
+        }
+
+        assert len(outputs) == 3
+
+    def test_unknown_adapter(self, multi):
+        """Test that an unregistered adapter name is rejected."""
+        with pytest.raises(UnknownAdapterError, match="Unknown adapter 'nope'"):
+            multi.generate_batch(["rizz"], 4, "nope")
+
+    def test_base_adapter(self, multi):
+        """Test that BASE_ADAPTER gives the base model's output with LoRA disabled."""
+        base = multi.generate_batch(self.TERMS, 12, inference.BASE_ADAPTER)
+        prefix_kv, multi._prefix_kv = multi._prefix_kv, {}
+        try:
+            with multi.model.disable_adapter():
+                expected = multi.generate_batch(self.TERMS, 12)
+        finally:
+            multi._prefix_kv = prefix_kv
+
+        assert base == expected
+        assert base != multi.generate_batch(self.TERMS, 12)
+        with pytest.raises(UnknownAdapterError):
+            multi.resolve_adapter(inference.BASE_ADAPTER)
+
+    def test_merged_engine_serves_only_default(self, tiny_checkpoint, adapter_dirs, tmp_path):
+        """Test that extra adapters are dropped when the default adapter is merged."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(
+            base_model=model_dir,
+            adapter_dir=adapter_dir,
+            adapters=adapter_dirs,
+            merge_adapter=True,
+            merged_root=str(tmp_path),
+        )
+        engine.load()
+
+        assert engine.status()["adapters"] == [engine.default_adapter]
+        with pytest.raises(UnknownAdapterError):
+            engine.generate_batch(["rizz"], 4, "canary@v2")
+        with pytest.raises(UnknownAdapterError, match="base model"):
+            engine.generate_batch(["rizz"], 4, inference.BASE_ADAPTER)
+
+    def test_broken_adapter_is_dropped(self, tiny_checkpoint, tmp_path):
+        """Test that an adapter that fails to load is unregistered and the rest still serve."""
+        model_dir, adapter_dir = tiny_checkpoint
+        broken = tmp_path / "broken"
+        broken.mkdir()
+        (broken / "adapter_config.json").write_text("{not json")
+        engine = InferenceEngine(
+            base_model=model_dir, adapter_dir=adapter_dir, adapters={"broken": str(broken)}
+        )
+        engine.load()
+
+        assert engine.status()["adapters"] == [engine.default_adapter]
+        assert len(engine.generate_batch(["rizz"], 4)) == 1
+
+    def test_discover_adapters(self, adapter_dirs, tmp_path):
+        """Test that only directories with an adapter config are discovered."""
+        root = os.path.dirname(adapter_dirs["canary@v2"])
+        os.makedirs(os.path.join(root, "not-an-adapter"), exist_ok=True)
+
+        assert inference.discover_adapters(root) == adapter_dirs
+        assert inference.discover_adapters(str(tmp_path / "missing")) == {}
+
+    def test_parse_adapter_split(self):
+        """Test parsing of name=weight traffic splits."""
+        assert inference.parse_adapter_split("") == []
+        assert inference.parse_adapter_split("a@v1=90, b=10,c=0") == [("a@v1", 90.0), ("b", 10.0)]
+        with pytest.raises(ValueError):
+            inference.parse_adapter_split("a@v1")
+        with pytest.raises(ValueError):
+            inference.parse_adapter_split("a=ten")
+
+
+class TestAdapterRouting:
+    """Test adapter selection, batching and caching in the module-level API."""
+
+    @pytest.fixture
+    def routed(self, multi, monkeypatch):
+        """Serve with the multi-adapter engine and an empty cache."""
+        monkeypatch.setattr(inference, "engine", multi)
+        monkeypatch.setattr(inference, "_cache", TTLCache(maxsize=64))
+        monkeypatch.setattr(inference, "_split", [])
+        return multi
+
+    def test_default_without_split(self, routed):
+        """Test that the default adapter serves unnamed requests without a split."""
+        assert inference.choose_adapter("rizz") == routed.default_adapter
+        assert inference.choose_adapter("rizz", "lora.v3") == "lora.v3"
+        with pytest.raises(UnknownAdapterError):
+            inference.choose_adapter("rizz", "nope")
+
+    def test_split_is_sticky_and_weighted(self, routed, monkeypatch):
+        """Test that a split sends each term to one adapter, in proportion to the weights."""
+        monkeypatch.setattr(inference, "_split", [(routed.default_adapter, 90), ("canary@v2", 10)])
+        terms = [f"term {i}" for i in range(2000)]
+
+        chosen = [inference.choose_adapter(term) for term in terms]
+
+        assert chosen == [inference.choose_adapter(term.upper()) for term in terms]
+        assert 0.05 < chosen.count("canary@v2") / len(terms) < 0.15
+
+    def test_run_batch_groups_by_adapter(self, monkeypatch):
+        """Test that the batcher runs one generate call per (max_new_tokens, adapter)."""
+        calls = []
+
+        class Engine:
+            def generate_batch(self, terms, max_new_tokens, adapter):
+                calls.append((list(terms), max_new_tokens, adapter))
+                return [f"{adapter}:{term}" for term in terms]
+
+        monkeypatch.setattr(inference, "engine", Engine())
+        items = [("a", 4, "x"), ("b", 4, "y"), ("c", 4, "x"), ("d", 8, "x")]
+
+        assert inference._run_batch(items) == ["x:a", "y:b", "x:c", "x:d"]
+        assert calls == [(["a", "c"], 4, "x"), (["b"], 4, "y"), (["d"], 8, "x")]
+
+    def test_cache_is_per_adapter(self, routed):
+        """Test that each adapter gets its own cache entries and invalidation keeps them."""
+        default = inference.generate("rizz", max_new_tokens=6)
+        canary = inference.generate("rizz", max_new_tokens=6, adapter="canary@v2")
+
+        assert default != canary
+        assert inference.cache_stats()["misses"] == 2
+        assert inference.generate("rizz", max_new_tokens=6, adapter="canary@v2") == canary
+        assert inference.invalidate_cache() == 0
+
+    def test_generate_batch_groups_misses_by_adapter(self, routed, monkeypatch):
+        """Test that batch requests under a split run one generate call per adapter."""
+        monkeypatch.setattr(inference, "_split", [("canary@v2", 1), ("lora.v3", 1)])
+        terms = [f"term {i}" for i in range(6)]
+        calls = []
+        original = routed.generate_batch
+        monkeypatch.setattr(
+            routed,
+            "generate_batch",
+            lambda terms, n, adapter: calls.append(adapter) or original(terms, n, adapter),
+        )
+
+        results = inference.generate_batch(terms, max_new_tokens=4)
+
+        assert sorted(calls) == ["canary@v2", "lora.v3"]
+        assert results == [
+            inference.generate(term, max_new_tokens=4, adapter=inference.choose_adapter(term))
+            for term in terms
+        ]
+
+    def test_adapters_info(self, routed, monkeypatch):
+        """Test that adapters_info reports the default, split shares and identities."""
+        monkeypatch.setattr(inference, "_split", [(routed.default_adapter, 3), ("canary@v2", 1)])
+
+        info = inference.adapters_info()
+
+        assert info["default"] == routed.default_adapter
+        assert info["split"] == {routed.default_adapter: 0.75, "canary@v2": 0.25}
+        assert [a["name"] for a in info["adapters"]] == sorted(routed.adapter_dirs)
+
+
+class CountingTokenizer:
+    """Tokenizer proxy that records the texts passed to each encode call."""
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+        self.calls = []
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return self._tokenizer(texts, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._tokenizer, name)
+
+
+class TestEncodeCache:
+    """Test the prompt token id cache."""
+
+    @pytest.fixture
+    def engine(self, tiny_checkpoint):
+        """A loaded engine whose tokenizer counts encode calls."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=0)
+        engine.load()
+        engine.tokenizer = CountingTokenizer(engine.tokenizer)
+        return engine
+
+    def test_hot_prompts_are_not_retokenized(self, engine):
+        """Test that a repeated batch is served from cached ids with the same output."""
+        first = engine.generate_batch(["rizz", "mid"], 8)
+        second = engine.generate_batch(["rizz", "mid"], 8)
+
+        assert first == second
+        assert len(engine.tokenizer.calls) == 1
+        assert engine.encode_cache.stats()["hits"] == 2
+
+    def test_only_misses_are_tokenized(self, engine):
+        """Test that a mixed batch tokenizes just the new prompts, in one call."""
+        engine.generate_batch(["rizz"], 4)
+        engine.generate_batch(["mid", "rizz", "cap"], 4)
+
+        assert engine.tokenizer.calls[-1] == [
+            inference.build_prompt("mid"),
+            inference.build_prompt("cap"),
+        ]
+
+    def test_cached_ids_match_tokenizer(self, engine):
+        """Test that cached ids are exactly what the tokenizer returns."""
+        prompts = [inference.build_prompt("rizz")]
+        engine._token_ids(prompts)
+
+        assert engine._token_ids(prompts) == [tuple(engine.tokenizer(prompts)["input_ids"][0])]
+
+    def test_disabled(self, tiny_checkpoint):
+        """Test that a size of 0 tokenizes every time."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(
+            base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=0, encode_cache_size=0
+        )
+        engine.load()
+        engine.tokenizer = CountingTokenizer(engine.tokenizer)
+
+        engine.generate_batch(["rizz"], 4)
+        engine.generate_batch(["rizz"], 4)
+
+        assert len(engine.tokenizer.calls) == 2
+        assert len(engine.encode_cache) == 0
+
+    def test_tokenize_time_is_reported(self, engine):
+        """Test that tokenizer time and its share of request time are recorded."""
+        engine.decode_stats.reset()
+
+        engine.generate_batch(["rizz"], 4)
+
+        stats = engine.decode_stats.snapshot()
+        assert stats["tokenize_seconds"] > 0
+        assert 0 < stats["tokenize_share"] < 1
+
+    def test_decode_stats_include_encode_cache(self):
+        """Test that the module-level stats expose encode cache counters."""
+        assert "hit_rate" in inference.decode_stats()["encode_cache"]
+
+
+class TestGenerate:
+    """Test the module-level generate() entry point."""
+
+    @pytest.fixture
+    def tiny_engine(self, tiny_checkpoint, monkeypatch):
+        """Swap in a tiny engine and an empty cache."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir)
+        monkeypatch.setattr(inference, "engine", engine)
+        monkeypatch.setattr(inference, "_cache", TTLCache(maxsize=8))
+        return engine
+
+    def test_generate(self, tiny_engine):
+        """Test that generate() returns the prompt followed by generated text."""
+        result = inference.generate("rizz", max_new_tokens=4)
+
+        assert result.startswith(inference.INSTRUCT_TEMPLATE.format(term="rizz"))
+        assert tiny_engine.is_ready is True
+
+    def test_generate_empty_term(self, tiny_engine):
+        """Test that an empty term is rejected."""
+        with pytest.raises(ValueError):
+            inference.generate("   ")
+
+    def test_generate_uses_cache(self, tiny_engine):
+        """Test that repeated terms are served from the cache."""
+        first = inference.generate("rizz", max_new_tokens=4)
+        second = inference.generate(" RIZZ ", max_new_tokens=4)
+
+        stats = inference.cache_stats()
+        assert first == second
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_prompt_uses_normalized_term(self, tiny_engine):
+        """Test that spellings sharing a cache key are prompted identically."""
+        prompt = inference.INSTRUCT_TEMPLATE.format(term="no cap")
+
+        uncached = inference.generate_batch([" No   CAP "], max_new_tokens=4)[0]
+        inference._cache.invalidate()
+        streamed = "".join(inference.stream_generate("NO CAP", max_new_tokens=4))
+
+        assert uncached.startswith(prompt)
+        assert uncached == inference.generate("no cap", max_new_tokens=4)
+        assert uncached == prompt + streamed
+
+    def test_generate_matches_batch(self, tiny_engine):
+        """Test that generate() and generate_batch() agree for a single term."""
+        single = inference.generate("mid", max_new_tokens=4)
+
+        assert inference.generate_batch(["mid"], max_new_tokens=4) == [single]
+
+    def test_generate_batch_uses_cache(self, tiny_engine, monkeypatch):
+        """Test that generate_batch() only sends uncached terms to the model."""
+        inference.generate("rizz", max_new_tokens=4)
+        calls = []
+        original = tiny_engine.generate_batch
+        monkeypatch.setattr(
+            tiny_engine,
+            "generate_batch",
+            lambda terms, n, adapter: calls.append(list(terms)) or original(terms, n, adapter),
+        )
+
+        results = inference.generate_batch(["rizz", "mid"], max_new_tokens=4)
+
+        assert calls == [["mid"]]
+        assert results[1] == inference.generate("mid", max_new_tokens=4)
+
+    def test_generate_while_loading(self, tiny_engine):
+        """Test that generate() raises ModelNotReadyError during a background load."""
+        tiny_engine.state = "loading"
+
+        with pytest.raises(ModelNotReadyError):
+            inference.generate("rizz")
+
+    def test_invalidate_cache(self, tiny_engine):
+        """Test that entries from a previous adapter are dropped."""
+        inference.generate("rizz", max_new_tokens=4)
+        tiny_engine.adapter_id = "previous-adapter"
+        inference.generate("mid", max_new_tokens=4)
+
+        # The adapter on disk is unchanged, so only the "previous-adapter" entry goes
+        assert inference.invalidate_cache() == 1
+        assert inference.invalidate_cache(all_entries=True) == 1
+
+
+class TestDiskCache:
+    """Test the persistent response cache behind the in-process one."""
+
+    @pytest.fixture
+    def tiny_engine(self, tiny_checkpoint, tmp_path, monkeypatch):
+        """Swap in a tiny engine, an empty in-process cache and an empty disk cache."""
+        model_dir, adapter_dir = tiny_checkpoint
+        engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=0)
+        monkeypatch.setattr(inference, "engine", engine)
+        monkeypatch.setattr(inference, "_cache", TTLCache(maxsize=8))
+        monkeypatch.setattr(inference, "_disk_cache", DiskCache(str(tmp_path / "cache.sqlite")))
+        return engine
+
+    def _restart(self, monkeypatch):
+        """Forget the in-process cache, as a new worker process would."""
+        monkeypatch.setattr(inference, "_cache", TTLCache(maxsize=8))
+
+    def test_served_after_restart_without_generating(self, tiny_engine, monkeypatch):
+        """Test that a new process answers cached terms from disk, single or batched."""
+        first = inference.generate("rizz", max_new_tokens=4)
+        batch = inference.generate_batch(["mid"], max_new_tokens=4)
+        self._restart(monkeypatch)
+        monkeypatch.setattr(
+            tiny_engine, "generate_batch", lambda *args: pytest.fail("generated again")
+        )
+
+        assert inference.generate(" RIZZ ", max_new_tokens=4) == first
+        assert inference.generate_batch(["mid"], max_new_tokens=4) == batch
+        assert "".join(inference.stream_generate("rizz", max_new_tokens=4)) in first
+        stats = inference.cache_stats()
+        assert stats["disk"]["hits"] == 2
+        assert stats["hits"] == 1  # The replayed stream hit the copy kept in memory
+
+    def test_key_covers_deploy_settings(self, tiny_engine, monkeypatch):
+        """Test that another prompt template or early stopping setting misses."""
+        inference.generate("rizz", max_new_tokens=4)
+        key = inference._cache_key("rizz", 4, tiny_engine.default_adapter)
+
+        prompt_id = inference._PROMPT_ID
+
+        assert inference._disk_cache.get(inference._disk_key(key)) is not None
+        monkeypatch.setattr(inference, "_PROMPT_ID", "changed")
+        assert inference._disk_cache.get(inference._disk_key(key)) is None
+        monkeypatch.setattr(inference, "_PROMPT_ID", prompt_id)
+        tiny_engine.early_stop = not tiny_engine.early_stop
+        assert inference._disk_cache.get(inference._disk_key(key)) is None
+
+    def test_few_shot_key_follows_the_lexicon(self, tiny_engine, monkeypatch):
+        """Test that few-shot entries are keyed by the lexicon they were built from."""
+        tiny_engine.few_shot_k = 2
+        key = inference._cache_key("rizz", 4, tiny_engine.default_adapter)
+        before = inference._disk_key(key)
+        monkeypatch.setattr(
+            inference.retrieval, "lexicon", lambda: {"rizz": {"definition": "d", "example": "e"}}
+        )
+
+        assert inference._disk_key(key) != before
+
+    def test_invalidate_drops_disk_entries(self, tiny_engine):
+        """Test that entries of a previous adapter version are removed from disk too."""
+        inference.generate("rizz", max_new_tokens=4)
+        tiny_engine.adapter_id = "previous-adapter"
+        inference.generate("mid", max_new_tokens=4)
+
+        assert inference.invalidate_cache() == 2
+        assert inference.cache_stats()["disk"]["size"] == 1
@@ -0,0 +1,234 @@
+"""Tests for lexicon_index module."""
+
+import pytest
+
+from src.lexicon_index import (
+    LexiconIndex,
+    TermMatcher,
+    canonical_key,
+    edit_distance,
+    squeeze_key,
+)
+
+
+def entry(definition):
+    """Build a lexicon entry."""
+    return {"definition": definition, "example": f"Example of {definition}"}
+
+
+class TestNormalization:
+    """Test the key normalization helpers."""
+
+    def test_canonical_key(self):
+        """Test that case, punctuation, whitespace and quotes are dropped."""
+        assert canonical_key("L + ratio") == "lratio"
+        assert canonical_key("l+ratio") == "lratio"
+        assert canonical_key("N.P.C.") == "npc"
+        assert canonical_key("  No   Cap ") == "nocap"
+        assert canonical_key("it’s giving") == canonical_key("it's giving") == "itsgiving"
+
+    def test_canonical_key_unicode(self):
+        """Test that compatibility forms are folded by NFKC."""
+        assert canonical_key("ＲＩＺＺ") == "rizz"
+
+    def test_canonical_key_punctuation_only(self):
+        """Test that punctuation-only input has an empty key."""
+        assert canonical_key("?!") == ""
+
+    def test_squeeze_key(self):
+        """Test that runs of repeated characters collapse to one."""
+        assert squeeze_key("rizzzz") == squeeze_key("rizz") == "riz"
+
+
+class TestEditDistance:
+    """Test the bounded edit distance."""
+
+    @pytest.mark.parametrize(
+        "a, b, expected",
+        [("busin", "busin", 0), ("busin", "bsin", 1), ("busin", "buisn", 1), ("mid", "mad", 1)],
+    )
+    def test_distance(self, a, b, expected):
+        """Test substitutions, deletions and transpositions."""
+        assert edit_distance(a, b, limit=2) == expected
+
+    def test_limit(self):
+        """Test that distances over the limit are capped at limit + 1."""
+        assert edit_distance("rizz", "sigma", limit=1) == 2
+        assert edit_distance("a", "abcdef", limit=2) == 3
+
+
+class TestLexiconIndex:
+    """Test exact, normalized and fuzzy matching."""
+
+    @pytest.fixture
+    def index(self):
+        """Build an index over a small lexicon."""
+        entries = {
+            "rizz": entry("Charm"),
+            "no cap": entry("No lie"),
+            "npc": entry("Scripted person"),
+            "bussin": entry("Really good"),
+            "mid": entry("Mediocre"),
+        }
+        return LexiconIndex(entries, max_distance=1, min_score=0.75)
+
+    def test_exact(self, index):
+        """Test that the old exact lookup still wins first."""
+        match = index.match("  RIZZ ")
+
+        assert match.term == "rizz"
+        assert match.kind == "exact"
+        assert match.score == 1.0
+
+    @pytest.mark.parametrize(
+        "query, term",
+        [("N.P.C.", "npc"), ("nocap", "no cap"), ("No-Cap", "no cap")],
+    )
+    def test_normalized(self, index, query, term):
+        """Test that punctuation and spacing are normalized away."""
+        match = index.match(query)
+
+        assert match.term == term
+        assert match.kind == "normalized"
+        assert match.authoritative
+
+    def test_squeezed(self, index):
+        """Test that repeated letters match, but not authoritatively."""
+        match = index.match("rizzz")
+
+        assert match.term == "rizz"
+        assert match.kind == "squeezed"
+        assert not match.authoritative
+
+    def test_fuzzy(self, index):
+        """Test that a one-letter typo matches with a score below 1."""
+        match = index.match("bussn")
+
+        assert match.term == "bussin"
+        assert match.kind == "fuzzy"
+        assert 0.75 <= match.score < 1.0
+        assert not match.authoritative
+
+    def test_short_terms_need_high_score(self, index):
+        """Test that one edit on a three-letter term is below the score threshold."""
+        assert index.match("mad") is None
+
+    @pytest.mark.parametrize("query", ["mild", "boat", "coat"])
+    def test_short_queries_are_not_fuzzy(self, query):
+        """Test that a query shorter than min_fuzzy_length never matches a similar term."""
+        index = LexiconIndex({"mid": entry("Mediocre"), "goat": entry("Greatest of all time")})
+
+        assert index.match(query) is None
+
+    def test_miss(self, index):
+        """Test that unrelated and empty terms do not match."""
+        assert index.match("skibidi") is None
+        assert index.match("") is None
+        assert index.match("?!") is None
+
+    def test_fuzzy_disabled(self):
+        """Test that max_distance=0 only allows exact and normalized matches."""
+        index = LexiconIndex({"bussin": entry("Really good")}, max_distance=0)
+
+        assert index.match("Bussin!").kind == "normalized"
+        assert index.match("bussn") is None
+
+    def test_invalid_distance(self):
+        """Test that a negative max_distance is rejected."""
+        with pytest.raises(ValueError):
+            LexiconIndex({}, max_distance=-1)
+
+
+class TestExtended:
+    """Test copy-on-write extension of an index."""
+
+    def test_adds_terms_without_touching_original(self):
+        """Test that new terms match through the copy only."""
+        base = LexiconIndex({"rizz": entry("Charm")})
+        extended = base.extended({"bussin": entry("Really good")})
+
+        assert extended.match("bussn").term == "bussin"
+        assert extended.match("RIZZZ").term == "rizz"
+        assert base.match("bussn") is None
+        assert len(base) == 1 and len(extended) == 2
+
+    def test_replaces_existing_entries(self):
+        """Test that an appended entry for a known term replaces the old one."""
+        base = LexiconIndex({"rizz": entry("Charm")})
+        extended = base.extended({"rizz": entry("Charisma")})
+
+        assert extended.match("Rizz!").entry["definition"] == "Charisma"
+        assert base.match("Rizz!").entry["definition"] == "Charm"
+
+    def test_shared_variant_lists_are_not_mutated(self):
+        """Test that terms sharing a delete variant do not leak into earlier versions."""
+        base = LexiconIndex({"bussin": entry("Really good")})
+        base.extended({"bussit": entry("Other")}).extended({"bussix": entry("Third")})
+
+        assert base._tables.variants("busi") == ["busin"]
+
+
+class TestTermMatcher:
+    """Test finding lexicon terms in running text."""
+
+    TERMS = ("no cap", "no", "rizz", "l+ratio", "<3", "i’m weak", "so", "?", "19", "e-boy")
+
+    @pytest.fixture
+    def matcher(self):
+        """Matcher over a small lexicon with multi-word, punctuated and noisy terms."""
+        return TermMatcher(self.TERMS)
+
+    @staticmethod
+    def found(matcher, text):
+        """(matched text, term, kind) of every span."""
+        return [(text[s.start : s.end], s.term, s.kind) for s in matcher.find(text)]
+
+    def test_multi_word_and_case(self, matcher):
+        """Test that the longest term wins and case is ignored."""
+        assert self.found(matcher, "No cap, that's RIZZ") == [
+            ("No cap", "no cap", "exact"),
+            ("RIZZ", "rizz", "exact"),
+        ]
+
+    def test_punctuated_terms(self, matcher):
+        """Test that symbols are tokens, so spacing around them may differ."""
+        assert self.found(matcher, "L + ratio <3") == [
+            ("L + ratio", "l+ratio", "normalized"),
+            ("<3", "<3", "exact"),
+        ]
+        assert self.found(matcher, "I'm weak an e-boy") == [
+            ("I'm weak", "i’m weak", "normalized"),
+            ("e-boy", "e-boy", "exact"),
+        ]
+
+    def test_terms_do_not_span_newlines_or_punctuation(self, matcher):
+        """Test that a term is not matched across a line break or a comma."""
+        assert [s.term for s in matcher.find("no\ncap")] == ["no"]
+        assert [s.term for s in matcher.find("no, cap")] == ["no"]
+
+    def test_control_characters(self, matcher):
+        """Test that a NUL or other control character is neither a token nor a trie key."""
+        assert matcher.find("\x00 riz") == []
+        assert self.found(matcher, "a \x00 rizz cap") == [("rizz", "rizz", "exact")]
+        assert self.found(matcher, "no cap \x00\x1b so") == [
+            ("no cap", "no cap", "exact"),
+            ("so", "so", "exact"),
+        ]
+        assert [s.term for s in matcher.find("no\x00cap")] == ["no"]
+
+    def test_words_inside_other_words(self, matcher):
+        """Test that terms only match whole words."""
+        assert matcher.find("snow socks rizzler") == []
+
+    def test_elongated_words(self, matcher):
+        """Test that repeated letters still find the lexicon form."""
+        assert self.found(matcher, "sooo riiizzz") == [
+            ("sooo", "so", "normalized"),
+            ("riiizzz", "rizz", "normalized"),
+        ]
+
+    def test_noisy_terms_are_skipped(self, matcher):
+        """Test that punctuation-only and numeric terms are not indexed by default."""
+        assert matcher.find("really? at 19") == []
+        assert len(matcher) == len(self.TERMS) - 2
+        assert [s.term for s in TermMatcher(self.TERMS, numbers=True).find("at 19")] == ["19"]
@@ -0,0 +1,149 @@
+"""Tests for lexicon_store module."""
+
+import json
+
+import pytest
+
+from src.lexicon_index import LexiconIndex
+from src.lexicon_store import LexiconStore, compile_lexicon, read_sources, record_term
+
+
+def write_jsonl(path, records):
+    """Write records as JSON lines."""
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+    return str(path)
+
+
+LEXICON = [
+    {"term": "Rizz", "definition": "Charm", "example": "He has rizz"},
+    {"term": "no cap", "definition": "No lie", "example": "That's true, no cap"},
+    {"term": "bussin", "definition": "Really good", "example": "This is bussin"},
+]
+TRAINING = [
+    {
+        "text": "Task: Explain the internet slang.\nTerm: L+ratio\n\n"
+        "Definition: A bad take\nExample: L + ratio."
+    },
+    {
+        "text": "Task: Explain the internet slang.\nTerm: rizz\n\n"
+        "Definition: Overridden\nExample: Should not win"
+    },
+    {"text": "Task: Explain the internet slang.\nTerm: broken\n\nDefinition: no example"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Compile the sample lexicon and training data into a store."""
+    sources = [
+        write_jsonl(tmp_path / "lex.jsonl", LEXICON),
+        write_jsonl(tmp_path / "train.jsonl", TRAINING),
+    ]
+    compile_lexicon(sources, str(tmp_path / "lexicon.slex"))
+    store = LexiconStore(str(tmp_path / "lexicon.slex"))
+    yield store
+    store.close()
+
+
+class TestCompile:
+    """Test reading sources and compiling the store."""
+
+    def test_read_sources_both_formats(self, tmp_path):
+        """Test that lexicon and training records are parsed and the first term wins."""
+        entries = read_sources(
+            [
+                write_jsonl(tmp_path / "a.jsonl", LEXICON),
+                write_jsonl(tmp_path / "b.jsonl", TRAINING),
+            ]
+        )
+
+        assert list(entries) == ["rizz", "no cap", "bussin", "l+ratio"]
+        assert entries["rizz"] == ("Charm", "He has rizz")
+        assert entries["l+ratio"] == ("A bad take", "L + ratio.")
+
+    def test_record_term(self):
+        """Test that the term comes from the term field or the training text."""
+        assert record_term({"term": "Rizz", "definition": "d"}) == "Rizz"
+        assert (
+            record_term({"text": "Task: Explain the internet slang.\nTerm: no cap\n"}) == "no cap"
+        )
+        assert record_term({"text": "no term here"}) is None
+        assert record_term({"text": None}) is None
+
+    def test_invalid_lines_are_skipped(self, tmp_path):
+        """Test that malformed lines do not abort compilation."""
+        path = tmp_path / "bad.jsonl"
+        path.write_text('{"term": "mid"}\nnot json\n\n' + json.dumps(LEXICON[0]) + "\n")
+
+        assert list(read_sources([str(path)])) == ["rizz"]
+
+    def test_non_string_fields_are_skipped(self, tmp_path):
+        """Test that a row with a numeric or null field is skipped, not fatal."""
+        rows = [
+            {"term": 5, "definition": "d", "example": "e"},
+            {"term": "mid", "definition": None, "example": "e"},
+            {"term": "bet", "definition": "d", "example": 3},
+            LEXICON[0],
+        ]
+        path = write_jsonl(tmp_path / "types.jsonl", rows)
+
+        assert list(read_sources([path])) == ["rizz"]
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that opening a file that is not a store fails clearly."""
+        path = tmp_path / "not-a-store"
+        path.write_bytes(b"x" * 64)
+
+        with pytest.raises(ValueError, match="lexicon store"):
+            LexiconStore(str(path))
+
+
+class TestLexiconStore:
+    """Test the store as a read-only mapping."""
+
+    def test_mapping(self, store):
+        """Test len, membership, iteration order and item access."""
+        assert len(store) == 4
+        assert "no cap" in store
+        assert "missing" not in store
+        assert list(store) == sorted(store)
+        assert store["bussin"] == {"definition": "Really good", "example": "This is bussin"}
+        assert store.get("missing") is None
+        with pytest.raises(KeyError):
+            store["missing"]
+
+    def test_items(self, store):
+        """Test that items() yields every entry."""
+        items = dict(store.items())
+
+        assert items["l+ratio"]["definition"] == "A bad take"
+        assert len(items) == 4
+
+    def test_identity_matches_in_memory_hash(self, store):
+        """Test that the stored identity equals the hash of the same dict lexicon."""
+        from src.retrieval import lexicon_identity
+
+        assert store.identity == lexicon_identity(dict(store.items()))
+
+
+class TestStoreMatching:
+    """Test that LexiconIndex gives the same answers over a store as over a dict."""
+
+    @pytest.mark.parametrize(
+        "query", ["RIZZ", "NoCap", "L + ratio", "rizzzz", "bussn", "bussinn!", "skibidi", "?!"]
+    )
+    def test_same_as_in_memory(self, store, query):
+        """Test exact, normalized, fuzzy and missing queries against both backends."""
+        on_disk = LexiconIndex(store).match(query)
+        in_memory = LexiconIndex(dict(store.items())).match(query)
+
+        assert on_disk == in_memory
+
+    def test_fuzzy_distance_capped_by_compiled_table(self, store):
+        """Test that the fuzzy distance cannot exceed what the store was compiled for."""
+        assert LexiconIndex(store, max_distance=3).max_distance == store.max_distance == 1
+
+    def test_store_index_cannot_be_extended(self, store):
+        """Test that a store-backed index refuses in-place extension."""
+        with pytest.raises(TypeError):
+            LexiconIndex(store).extended({"new": {"definition": "d", "example": "e"}})
@@ -0,0 +1,114 @@
+"""Tests for metrics module."""
+
+import threading
+
+from src.metrics import Counter, Histogram, MetricFamily, Registry
+
+
+class TestCounter:
+    """Test labeled counters."""
+
+    def test_inc_per_label(self):
+        """Test that each label value keeps its own series."""
+        counter = Counter("answers_total", "Answers", label="source")
+
+        counter.inc("lora")
+        counter.inc("lora")
+        counter.inc("lexicon", amount=3)
+
+        assert counter.value("lora") == 2
+        assert counter.value("lexicon") == 3
+        assert counter.value("lora_raw") == 0
+
+    def test_concurrent_inc(self):
+        """Test that increments from many threads are not lost."""
+        counter = Counter("hits_total", "Hits")
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.value() == 8000
+
+
+class TestHistogram:
+    """Test fixed-bucket histograms."""
+
+    def test_bucket_boundaries(self):
+        """Test that a value equal to a bound falls into that bucket (le semantics)."""
+        hist = Histogram("stage_seconds", "Stages", buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 1.0, 3.0):
+            hist.observe(value)
+
+        _, counts, total = hist.collect().samples[None]
+        assert counts == [2, 2, 1]
+        assert total == 4.65
+        assert hist.count() == 5
+
+    def test_series_per_label(self):
+        """Test that label values are counted separately."""
+        hist = Histogram("stage_seconds", "Stages", label="stage")
+
+        hist.observe(0.01, "prefill")
+        hist.observe(0.02, "decode")
+        hist.observe(0.03, "decode")
+
+        assert hist.count("prefill") == 1
+        assert hist.count("decode") == 2
+        assert hist.count("parse") == 0
+
+
+class TestRegistry:
+    """Test rendering in the Prometheus text format."""
+
+    def test_render_histogram(self):
+        """Test cumulative buckets, +Inf, sum and count lines."""
+        registry = Registry()
+        hist = registry.histogram("stage_seconds", "Time per stage", "stage", buckets=(0.1, 1))
+        hist.observe(0.05, "parse")
+        hist.observe(2, "parse")
+
+        lines = registry.render().splitlines()
+
+        assert lines == [
+            "# HELP stage_seconds Time per stage",
+            "# TYPE stage_seconds histogram",
+            'stage_seconds_bucket{stage="parse",le="0.1"} 1',
+            'stage_seconds_bucket{stage="parse",le="1.0"} 1',
+            'stage_seconds_bucket{stage="parse",le="+Inf"} 2',
+            'stage_seconds_sum{stage="parse"} 2.05',
+            'stage_seconds_count{stage="parse"} 2',
+        ]
+
+    def test_render_counter_and_escaping(self):
+        """Test unlabeled and labeled samples, with label values escaped."""
+        registry = Registry()
+        registry.counter("requests_total", "Requests").inc(amount=2)
+        registry.counter("answers_total", "Answers", "source").inc('a"b\\c')
+
+        text = registry.render()
+
+        assert "# TYPE requests_total counter\nrequests_total 2\n" in text
+        assert 'answers_total{source="a\\"b\\\\c"} 1' in text
+
+    def test_collectors_run_at_render(self):
+        """Test that collectors are called on every render."""
+        registry = Registry()
+        calls = []
+
+        def collect():
+            calls.append(1)
+            return [MetricFamily("ratio", "gauge", "Hit rate", "cache", {"response": 0.25})]
+
+        registry.register_collector(collect)
+
+        assert 'ratio{cache="response"} 0.25' in registry.render()
+        registry.render()
+        assert len(calls) == 2
@@ -1,6 +1,6 @@
 """Tests for postprocess module."""
 
-from src.postprocess import parse_definition_example
+from src.postprocess import is_complete, parse_definition_example
 
 
 class TestParseDefinitionExample:
@@ -83,3 +83,37 @@ Example: He's got so much rizz, everyone wants to talk to him"""
 
         assert result["definition"] == "Lots of spaces"
         assert result["example"] == "More spaces"
+
+
+class TestIsComplete:
+    """Test the is_complete early-stop check."""
+
+    def test_complete_example_line(self):
+        """Test that a terminated Example line is complete."""
+        assert is_complete(" Charm\nExample: He has rizz\n") is True
+
+    def test_unterminated_example_line(self):
+        """Test that an Example line still being written is not complete."""
+        assert is_complete(" Charm\nExample: He has ri") is False
+
+    def test_empty_example_line(self):
+        """Test that an Example line without content is not complete."""
+        assert is_complete(" Charm\nExample:\n") is False
+        assert is_complete(" Charm\nExample:   \n") is False
+
+    def test_definition_only(self):
+        """Test that a definition alone is not complete."""
+        assert is_complete(" Charm or smoothness\n") is False
+
+    def test_case_insensitive(self):
+        """Test that the Example label is matched case-insensitively."""
+        assert is_complete("example: so mid\n") is True
+
+    def test_new_block_started(self):
+        """Test that the model starting a new Task or Term block is complete."""
+        assert is_complete(" Charm\nTask:") is True
+        assert is_complete(" Charm\n  Term: mid") is True
+
+    def test_term_inside_definition(self):
+        """Test that the word Term inside a line does not count as a new block."""
+        assert is_complete(" A slang Term: for charm") is False
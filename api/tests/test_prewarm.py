@@ -0,0 +1,72 @@
+"""Tests for prewarm module."""
+
+import json
+
+import pytest
+
+from src import inference, prewarm
+from src.cache import DiskCache, TTLCache
+from src.inference import InferenceEngine
+
+
+@pytest.fixture
+def tiny_engine(tiny_checkpoint, tmp_path, monkeypatch):
+    """Serve with a tiny engine and empty in-process and disk caches."""
+    model_dir, adapter_dir = tiny_checkpoint
+    engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=0)
+    monkeypatch.setattr(inference, "engine", engine)
+    monkeypatch.setattr(inference, "_cache", TTLCache(maxsize=8))
+    monkeypatch.setattr(inference, "_disk_cache", DiskCache(str(tmp_path / "cache.sqlite")))
+    return engine
+
+
+class TestPrewarm:
+    """Test filling the disk cache before a rollout."""
+
+    def test_generates_each_term_once(self, tiny_engine, monkeypatch):
+        """Test that a second run finds every term cached on disk."""
+        first = prewarm.prewarm(["rizz", "mid", "sus"], max_new_tokens=4, batch_size=2)
+        monkeypatch.setattr(inference, "_cache", TTLCache(maxsize=8))
+        second = prewarm.prewarm(["rizz", "mid", "sus"], max_new_tokens=4, batch_size=2)
+
+        assert (first["generated"], first["cached"]) == (3, 0)
+        assert (second["generated"], second["cached"]) == (0, 3)
+        assert second["disk_cache"]["size"] == 3
+
+    def test_failed_batches_are_counted(self, tiny_engine, monkeypatch):
+        """Test that a failing batch is reported and the rest still runs."""
+        original = tiny_engine.generate_batch
+
+        def flaky(terms, max_new_tokens, adapter):
+            if "mid" in terms:
+                raise RuntimeError("boom")
+            return original(terms, max_new_tokens, adapter)
+
+        monkeypatch.setattr(tiny_engine, "generate_batch", flaky)
+
+        summary = prewarm.prewarm(["rizz", "mid", "sus"], max_new_tokens=4, batch_size=1)
+
+        assert (summary["generated"], summary["failed"]) == (2, 1)
+
+    def test_main_reads_sources(self, tiny_engine, tmp_path, monkeypatch, capsys):
+        """Test the command line on lexicon and training style files."""
+        lexicon = tmp_path / "lexicon.jsonl"
+        lexicon.write_text(
+            json.dumps({"term": "rizz", "definition": "Charm", "example": "He has rizz."}) + "\n"
+        )
+        training = tmp_path / "training.jsonl"
+        text = "Term: mid\n\nDefinition: Mediocre\nExample: That movie was mid."
+        training.write_text(json.dumps({"text": text}) + "\n")
+        monkeypatch.setattr(inference, "use_disk_cache", lambda path, max_mb: None)
+        cache = str(tmp_path / "cache.sqlite")
+
+        prewarm.main([str(lexicon), str(training), "--cache", cache, "--max-new-tokens", "4"])
+
+        summary = json.loads(capsys.readouterr().out)
+        assert summary["terms"] == 2
+        assert summary["generated"] == 2
+
+    def test_main_requires_a_cache(self, monkeypatch):
+        """Test that the command refuses to run without a cache database."""
+        with pytest.raises(SystemExit):
+            prewarm.main(["--cache", ""])
@@ -1,9 +1,10 @@
 """Tests for retrieval module."""
 
+import json
 import os
-import pytest
 import tempfile
-import json
+
+import pytest
 
 
 class TestRetrieval:
@@ -39,6 +40,7 @@ class TestRetrieval:
 
         # Need to reimport to get the new environment variable
         import importlib
+
         from src import retrieval
 
         importlib.reload(retrieval)
@@ -54,6 +56,7 @@ class TestRetrieval:
         monkeypatch.setenv("SLANG_DATA", test_data_file)
 
         import importlib
+
         from src import retrieval
 
         importlib.reload(retrieval)
@@ -70,6 +73,7 @@ class TestRetrieval:
         monkeypatch.setenv("SLANG_DATA", test_data_file)
 
         import importlib
+
         from src import retrieval
 
         importlib.reload(retrieval)
@@ -84,6 +88,7 @@ class TestRetrieval:
         monkeypatch.setenv("SLANG_DATA", test_data_file)
 
         import importlib
+
         from src import retrieval
 
         importlib.reload(retrieval)
@@ -98,6 +103,7 @@ class TestRetrieval:
         monkeypatch.setenv("SLANG_DATA", test_data_file)
 
         import importlib
+
         from src import retrieval
 
         importlib.reload(retrieval)
@@ -106,6 +112,90 @@ class TestRetrieval:
 
         assert result is None
 
+    def test_lookup_normalized_and_fuzzy(self, test_data_file, monkeypatch):
+        """Test that punctuation is normalized away and repeats and typos only match."""
+        monkeypatch.setenv("SLANG_DATA", test_data_file)
+
+        import importlib
+
+        from src import retrieval
+
+        importlib.reload(retrieval)
+
+        assert retrieval.lookup("No-Cap!")["definition"] == "No lie"
+        assert retrieval.match("rizzzz").entry["definition"] == "Charisma"
+        assert retrieval.match("bussn").kind == "fuzzy"
+        assert retrieval.match("rizz").kind == "exact"
+        # Only the term itself is an answer: squeezed and fuzzy matches are other terms
+        assert retrieval.lookup("rizzzz") is None
+        assert retrieval.lookup("bussn") is None
+
+    def test_neighbors(self, test_data_file, monkeypatch, tmp_path):
+        """Test that neighbors returns the closest lexicon entries per term."""
+        monkeypatch.setenv("SLANG_DATA", test_data_file)
+        monkeypatch.setenv("SLANG_VECTOR_DIR", str(tmp_path))
+
+        import importlib
+
+        from src import retrieval
+
+        importlib.reload(retrieval)
+
+        results = retrieval.neighbors(["rizzler", "no capping"], k=2)
+
+        assert [r[0]["term"] for r in results] == ["rizz", "no cap"]
+        assert all(len(r) == 2 for r in results)
+        assert results[0][0]["definition"] == "Charisma"
+        assert len(list(tmp_path.iterdir())) == 1
+
+    def test_neighbors_disabled(self):
+        """Test that k=0 returns no neighbors without building an index."""
+        from src import retrieval
+
+        assert retrieval.neighbors(["rizz"], k=0) == [[]]
+
+    def test_lexicon_identity_changes_with_content(self):
+        """Test that editing an entry changes the lexicon identity."""
+        from src.retrieval import lexicon_identity
+
+        lex = {"rizz": {"definition": "Charm", "example": "He has rizz"}}
+        edited = {"rizz": {"definition": "Charisma", "example": "He has rizz"}}
+
+        assert lexicon_identity(lex) != lexicon_identity(edited)
+        assert lexicon_identity(lex) == lexicon_identity(dict(lex))
+
+    def test_lexicon_store(self, test_data_file, monkeypatch, tmp_path):
+        """Test that SLANG_LEXICON_STORE serves lookups from the compiled store."""
+        from src.lexicon_store import LexiconStore, compile_lexicon
+
+        store_path = str(tmp_path / "lexicon.slex")
+        compile_lexicon([test_data_file], store_path)
+        monkeypatch.setenv("SLANG_DATA", "/nonexistent/path/file.jsonl")
+        monkeypatch.setenv("SLANG_LEXICON_STORE", store_path)
+
+        import importlib
+
+        from src import retrieval
+
+        importlib.reload(retrieval)
+
+        assert isinstance(retrieval.lexicon(), LexiconStore)
+        assert retrieval.lookup("No-Cap")["definition"] == "No lie"
+
+    def test_unreadable_store_falls_back_to_jsonl(self, test_data_file, monkeypatch, tmp_path):
+        """Test that a missing store falls back to parsing SLANG_DATA."""
+        monkeypatch.setenv("SLANG_DATA", test_data_file)
+        monkeypatch.setenv("SLANG_LEXICON_STORE", str(tmp_path / "missing.slex"))
+
+        import importlib
+
+        from src import retrieval
+
+        importlib.reload(retrieval)
+
+        assert isinstance(retrieval.lexicon(), dict)
+        assert retrieval.lookup("rizz")["definition"] == "Charisma"
+
     def test_load_lexicon_missing_file(self, monkeypatch):
         """Test loading lexicon when file doesn't exist."""
         monkeypatch.setenv("SLANG_DATA", "/nonexistent/path/file.jsonl")
@@ -131,13 +221,14 @@ class TestRetrieval:
             monkeypatch.setenv("SLANG_DATA", temp_path)
 
             import importlib
+
             from src import retrieval
 
             importlib.reload(retrieval)
 
-            assert len(retrieval._LEX) == 2
-            assert "test" in retrieval._LEX
-            assert "test2" in retrieval._LEX
+            assert len(retrieval.lexicon()) == 2
+            assert "test" in retrieval.lexicon()
+            assert "test2" in retrieval.lexicon()
         finally:
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
@@ -152,3 +243,152 @@ class TestRetrieval:
         result = lookup("   ")
         # This might return None or find a match - depends on data
         # Just verify it doesn't crash
+
+
+def _line(term, definition):
+    """One lexicon JSONL line."""
+    return json.dumps({"term": term, "definition": definition, "example": f"So {term}"}) + "\n"
+
+
+class TestHotReload:
+    """Test reloading the lexicon while it is being served."""
+
+    @pytest.fixture
+    def retrieval(self, monkeypatch, tmp_path):
+        """Load retrieval from a writable lexicon file."""
+        path = tmp_path / "lexicon.jsonl"
+        path.write_text(_line("rizz", "Charisma") + _line("mid", "Mediocre"), encoding="utf-8")
+        monkeypatch.setenv("SLANG_DATA", str(path))
+        monkeypatch.delenv("SLANG_LEXICON_STORE", raising=False)
+
+        import importlib
+
+        from src import retrieval
+
+        importlib.reload(retrieval)
+        retrieval.path = path
+        yield retrieval
+        retrieval.stop_watcher()
+
+    def test_unchanged_source_is_not_reloaded(self, retrieval):
+        """Test that nothing is swapped when the file did not change."""
+        assert retrieval.reload_lexicon() is False
+        assert retrieval.lexicon_status()["version"] == 1
+
+    def test_appended_lines_are_incremental(self, retrieval):
+        """Test that appended lines are merged without reloading the whole file."""
+        old_index = retrieval._STATE.index
+        with open(retrieval.path, "a", encoding="utf-8") as f:
+            f.write(_line("bussin", "Really good") + _line("rizz", "Charm"))
+
+        assert retrieval.reload_lexicon() is True
+
+        status = retrieval.lexicon_status()
+        assert status["version"] == 2
+        assert status["terms"] == 3
+        assert status["last_reload"]["mode"] == "incremental"
+        assert status["last_reload"]["added"] == 2
+        assert retrieval.match("bussn").entry["definition"] == "Really good"
+        assert retrieval.lookup("rizz")["definition"] == "Charm"
+        # The previous version is untouched for lookups still holding it
+        assert old_index.match("bussin") is None
+
+    def test_term_matcher_follows_reloads(self, retrieval):
+        """Test that the term matcher is rebuilt for a new lexicon version."""
+        matcher, entries = retrieval.term_matcher()
+        assert [span.term for span in matcher.find("mid and bussin")] == ["mid"]
+        with open(retrieval.path, "a", encoding="utf-8") as f:
+            f.write(_line("bussin", "Really good"))
+
+        assert retrieval.reload_lexicon() is True
+        retrieval._refresh_matcher()
+
+        matcher, entries = retrieval.term_matcher()
+        assert [span.term for span in matcher.find("mid and bussin")] == ["mid", "bussin"]
+        assert entries["bussin"]["definition"] == "Really good"
+
+    def test_partial_line_waits_for_newline(self, retrieval):
+        """Test that a line still being written is applied once it is complete."""
+        with open(retrieval.path, "a", encoding="utf-8") as f:
+            f.write(_line("bussin", "Really good")[:20])
+
+        assert retrieval.reload_lexicon() is False
+        assert retrieval.lookup("bussin") is None
+
+        with open(retrieval.path, "a", encoding="utf-8") as f:
+            f.write(_line("bussin", "Really good")[20:])
+
+        assert retrieval.reload_lexicon() is True
+        assert retrieval.lookup("bussin")["definition"] == "Really good"
+
+    def test_invalid_appended_lines_are_read_once(self, retrieval, caplog):
+        """Test that appended lines that are all invalid are skipped, not re-read each poll."""
+        with open(retrieval.path, "a", encoding="utf-8") as f:
+            f.write('{"term": "bussin"}\n')
+
+        assert retrieval.reload_lexicon() is False
+        assert retrieval._STATE.offset == os.path.getsize(retrieval.path)
+
+        caplog.clear()
+        with open(retrieval.path, "a", encoding="utf-8") as f:
+            f.write(_line("npc", "Scripted person"))
+
+        assert retrieval.reload_lexicon() is True
+        assert retrieval.lexicon_status()["last_reload"]["added"] == 1
+        assert "Skipping invalid" not in caplog.text
+
+    def test_replaced_file_is_reloaded_in_full(self, retrieval):
+        """Test that a rewritten file replaces the lexicon, dropping removed terms."""
+        tmp = retrieval.path.with_suffix(".new")
+        tmp.write_text(_line("npc", "Scripted person"), encoding="utf-8")
+        os.replace(tmp, retrieval.path)
+
+        assert retrieval.reload_lexicon() is True
+
+        assert retrieval.lexicon_status()["last_reload"]["mode"] == "full"
+        assert retrieval.lookup("rizz") is None
+        assert retrieval.lookup("npc")["definition"] == "Scripted person"
+
+    def test_forced_full_reload(self, retrieval):
+        """Test that full=True reloads even an unchanged file."""
+        assert retrieval.reload_lexicon(full=True) is True
+        assert retrieval.lexicon_status()["version"] == 2
+
+    def test_missing_source_keeps_lexicon(self, retrieval):
+        """Test that a deleted file does not empty the served lexicon."""
+        os.unlink(retrieval.path)
+
+        assert retrieval.reload_lexicon() is False
+        assert retrieval.lookup("rizz")["definition"] == "Charisma"
+
+    def test_watcher_picks_up_appends(self, retrieval):
+        """Test that the polling watcher reloads in the background."""
+        import time
+
+        assert retrieval.start_watcher(0.01) is not None
+        assert retrieval.lexicon_status()["watching"] is True
+        with open(retrieval.path, "a", encoding="utf-8") as f:
+            f.write(_line("bussin", "Really good"))
+
+        deadline = time.monotonic() + 5
+        while retrieval.lookup("bussin") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert retrieval.lookup("bussin")["definition"] == "Really good"
+
+    def test_watcher_disabled(self, retrieval):
+        """Test that an interval of 0 does not start a watcher."""
+        assert retrieval.start_watcher(0) is None
+
+    def test_vector_index_refreshed_after_reload(self, retrieval):
+        """Test that an open vector index is rebuilt and the replaced one closed."""
+        _, old = retrieval.vector_index()
+        with open(retrieval.path, "a", encoding="utf-8") as f:
+            f.write(_line("bussin", "Really good"))
+
+        retrieval.reload_lexicon()
+        # Run the refresh inline instead of waiting for its thread
+        retrieval._refresh_vectors()
+
+        _, index = retrieval.vector_index()
+        assert len(index) == 3
+        assert old.closed and old._meta.closed
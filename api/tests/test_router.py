@@ -1,8 +1,21 @@
 """Tests for API router endpoints."""
 
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch
+
+from src.inference import engine
+from src.lexicon_index import Match
+
+DEFAULT_ADAPTER = engine.default_adapter
+
+
+def hit(definition, example, term="rizz", kind="exact"):
+    """Authoritative lexicon match, as returned by retrieval.lookup_match."""
+    return Match(term, {"definition": definition, "example": example}, kind, 1.0)
 
 
 class TestAPIEndpoints:
@@ -32,8 +45,217 @@ class TestAPIEndpoints:
         data = response.json()
         assert data["ok"] is True
 
+    @patch("src.router.engine")
+    def test_ready_endpoint_loading(self, mock_engine, client):
+        """Test that /ready reports 503 with progress while the model is loading."""
+        mock_engine.status.return_value = {"state": "loading", "stage": "base_model"}
+
+        response = client.get("/ready")
+
+        assert response.status_code == 503
+        data = response.json()
+        assert data["ready"] is False
+        assert data["stage"] == "base_model"
+
+    @patch("src.router.engine")
+    def test_ready_endpoint_ready(self, mock_engine, client):
+        """Test that /ready reports 200 once the model is loaded."""
+        mock_engine.status.return_value = {"state": "ready", "stage": None}
+
+        response = client.get("/ready")
+
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+
+    def test_health_does_not_need_model(self, client):
+        """Test that /health stays a pure liveness check."""
+        with patch("src.router.engine", MagicMock(is_ready=False)):
+            response = client.get("/health")
+
+        assert response.status_code == 200
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.generate")
+    def test_explain_model_not_ready(self, mock_generate, client):
+        """Test that a lexicon miss returns 503 with Retry-After while warming."""
+        from src.inference import ModelNotReadyError
+
+        mock_generate.side_effect = ModelNotReadyError("Model is still loading")
+
+        response = client.post("/v1/explain", json={"term": "notinlexicon"})
+
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
     @patch("src.router.generate")
-    @patch("src.router.parse_definition_example")
+    @patch("src.answers.lookup_match")
+    def test_explain_lexicon_hit_while_warming(self, mock_lookup, mock_generate, client):
+        """Test that lexicon hits are served while the model is still loading."""
+        from src.inference import ModelNotReadyError
+
+        mock_lookup.return_value = hit("Charisma", "He's got rizz")
+        mock_generate.side_effect = ModelNotReadyError("Model is still loading")
+
+        response = client.post("/v1/explain", json={"term": "rizz"})
+
+        assert response.status_code == 200
+        assert response.json()["source"] == "lexicon"
+
+    @patch("src.router.cache_stats")
+    def test_cache_stats_endpoint(self, mock_stats, client):
+        """Test the cache stats endpoint."""
+        mock_stats.return_value = {"size": 1, "hits": 3, "misses": 1, "evictions": 0}
+
+        response = client.get("/v1/cache/stats")
+
+        assert response.status_code == 200
+        assert response.json()["hits"] == 3
+
+    def test_queue_stats_endpoint(self, client):
+        """Test the inference queue stats endpoint."""
+        response = client.get("/v1/queue/stats")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["running"] == 0
+        assert data["max_queue"] >= 0
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.gate")
+    def test_explain_overloaded(self, mock_gate, client):
+        """Test that a full inference queue returns 429 with Retry-After."""
+        from src.admission import OverloadedError
+
+        mock_gate.run = AsyncMock(side_effect=OverloadedError("busy"))
+
+        response = client.post("/v1/explain", json={"term": "rizz"})
+
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.gate")
+    def test_explain_queue_timeout(self, mock_gate, client):
+        """Test that a timed-out queue wait returns 503 with Retry-After."""
+        from src.admission import QueueTimeoutError
+
+        mock_gate.run = AsyncMock(side_effect=QueueTimeoutError("waited too long"))
+
+        response = client.post("/v1/explain", json={"term": "rizz"})
+
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.gate")
+    def test_stream_overloaded(self, mock_gate, client):
+        """Test that a stream turned away by the queue gets 429 before it starts."""
+        from src.admission import OverloadedError
+
+        mock_gate.acquire = AsyncMock(side_effect=OverloadedError("busy"))
+
+        response = client.post("/v1/explain/stream", json={"term": "rizz"})
+
+        assert response.status_code == 429
+        mock_gate.release.assert_not_called()
+
+    @patch("src.router.decode_stats")
+    def test_decode_stats_endpoint(self, mock_stats, client):
+        """Test the decode stats endpoint."""
+        mock_stats.return_value = {"requests": 2, "tokens_saved": 40}
+
+        response = client.get("/v1/decode/stats")
+
+        assert response.status_code == 200
+        assert response.json()["tokens_saved"] == 40
+
+    def test_metrics_endpoint(self, client):
+        """Test that /metrics serves the Prometheus text format."""
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        for name in (
+            "slang_stage_seconds",
+            "slang_answers_total",
+            "slang_generated_tokens_total",
+            "slang_generated_tokens_per_second",
+            "slang_cache_hit_ratio",
+        ):
+            assert f"# TYPE {name} " in response.text
+
+    @patch("src.router.cache_stats")
+    def test_metrics_include_disk_cache(self, mock_stats, client):
+        """Test that the disk cache gets its own label when it is enabled."""
+        tier = {"size": 2, "hits": 5, "misses": 1, "hit_rate": 5 / 6}
+        mock_stats.return_value = {**tier, "disk": {**tier, "hits": 7}}
+
+        text = client.get("/metrics").text
+
+        assert 'slang_cache_hits_total{cache="disk"} 7' in text
+        assert 'slang_cache_hits_total{cache="response"} 5' in text
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.generate")
+    @patch("src.answers.lookup_match")
+    def test_metrics_count_sources_and_stages(self, mock_lookup, mock_generate, client):
+        """Test that answers are counted per source and lookup/parse stages are timed."""
+        from src.metrics import ANSWERS, STAGE_SECONDS
+
+        mock_lookup.side_effect = lambda t: hit("d", "e", "a") if t == "a" else None
+        mock_generate.return_value = "Some unparseable text"
+        before = [ANSWERS.value("lexicon"), ANSWERS.value("lora_raw")]
+        stages = [STAGE_SECONDS.count("lookup"), STAGE_SECONDS.count("parse")]
+
+        client.post("/v1/explain", json={"term": "a"})
+        client.post("/v1/explain", json={"term": "b"})
+
+        assert [ANSWERS.value("lexicon"), ANSWERS.value("lora_raw")] == [
+            before[0] + 1,
+            before[1] + 1,
+        ]
+        assert [STAGE_SECONDS.count("lookup"), STAGE_SECONDS.count("parse")] == [
+            stages[0] + 2,
+            stages[1] + 1,
+        ]
+        assert 'slang_answers_total{source="lora_raw"}' in client.get("/metrics").text
+
+    @patch("src.router.lexicon_status")
+    def test_lexicon_status_endpoint(self, mock_status, client):
+        """Test the admin lexicon status endpoint."""
+        mock_status.return_value = {"version": 3, "terms": 20}
+
+        response = client.get("/v1/admin/lexicon")
+
+        assert response.status_code == 200
+        assert response.json() == {"version": 3, "terms": 20}
+
+    @patch("src.router.lexicon_status")
+    @patch("src.router.reload_lexicon")
+    def test_lexicon_reload_endpoint(self, mock_reload, mock_status, client):
+        """Test that the reload endpoint forwards full= and reports the new version."""
+        mock_reload.return_value = True
+        mock_status.return_value = {"version": 4, "terms": 21}
+
+        response = client.post("/v1/admin/lexicon/reload?full=true")
+
+        assert response.status_code == 200
+        assert response.json() == {"reloaded": True, "version": 4, "terms": 21}
+        mock_reload.assert_called_once_with(True)
+
+    @patch("src.router.reload_lexicon")
+    def test_lexicon_reload_failure(self, mock_reload, client):
+        """Test that a failed reload returns 500."""
+        mock_reload.side_effect = OSError("disk error")
+
+        response = client.post("/v1/admin/lexicon/reload")
+
+        assert response.status_code == 500
+        assert "disk error" in response.json()["detail"]
+
+    @patch("src.router.generate")
+    @patch("src.answers.parse_definition_example")
     def test_explain_endpoint_success(self, mock_parse, mock_generate, client):
         """Test the explain endpoint with successful generation."""
         # Mock the generate function to return a formatted response
@@ -54,15 +276,50 @@ class TestAPIEndpoints:
         assert data["definition"] == "Cool slang"
         assert data["example"] == "That's so cool"
         assert data["source"] == "lora"
+        assert data["precision"] == "fp32"
 
         # Verify the mocks were called correctly
-        mock_generate.assert_called_once_with("cool")
+        mock_generate.assert_called_once_with("cool", adapter=DEFAULT_ADAPTER)
+        assert data["adapter"] == DEFAULT_ADAPTER
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch.dict(engine.adapter_dirs, {"canary@v2": "/adapters/canary@v2"})
+    @patch("src.router.generate")
+    def test_explain_named_adapter(self, mock_generate, client):
+        """Test that a requested adapter is passed to generation and reported."""
+        mock_generate.return_value = "Definition: Charm\nExample: So much rizz"
+
+        response = client.post("/v1/explain", json={"term": "rizz", "adapter": "canary@v2"})
+
+        assert response.status_code == 200
+        assert response.json()["adapter"] == "canary@v2"
+        mock_generate.assert_called_once_with("rizz", adapter="canary@v2")
 
     @patch("src.router.generate")
-    @patch("src.router.parse_definition_example")
-    @patch("src.router.lookup")
+    def test_explain_unknown_adapter(self, mock_generate, client):
+        """Test that naming an unregistered adapter returns 400 without generating."""
+        response = client.post("/v1/explain", json={"term": "rizz", "adapter": "nope"})
+
+        assert response.status_code == 400
+        assert "Unknown adapter 'nope'" in response.json()["detail"]
+        mock_generate.assert_not_called()
+
+    @patch("src.router.adapters_info")
+    def test_adapters_endpoint(self, mock_info, client):
+        """Test that /v1/adapters reports the registered adapters."""
+        mock_info.return_value = {"default": "a", "split": {}, "adapters": [{"name": "a"}]}
+
+        response = client.get("/v1/adapters")
+
+        assert response.status_code == 200
+        assert response.json()["default"] == "a"
+
+    @patch("src.router.SERVING_POLICY", "model_first")
+    @patch("src.router.generate")
+    @patch("src.answers.parse_definition_example")
+    @patch("src.answers.lookup_match")
     def test_explain_endpoint_with_fallback(self, mock_lookup, mock_parse, mock_generate, client):
-        """Test the explain endpoint falling back to baseline."""
+        """Test the explain endpoint falling back to baseline under model_first."""
         # Mock generate to return unparseable text
         mock_generate.return_value = "Some unparseable text"
 
@@ -70,10 +327,7 @@ class TestAPIEndpoints:
         mock_parse.return_value = {"definition": None, "example": None, "format_ok": False}
 
         # Mock lookup to return baseline data
-        mock_lookup.return_value = {
-            "definition": "Baseline definition",
-            "example": "Baseline example",
-        }
+        mock_lookup.return_value = hit("Baseline definition", "Baseline example", "test")
 
         response = client.post("/v1/explain", json={"term": "test"})
 
@@ -85,8 +339,8 @@ class TestAPIEndpoints:
         assert data["source"] == "lora+baseline"
 
     @patch("src.router.generate")
-    @patch("src.router.parse_definition_example")
-    @patch("src.router.lookup")
+    @patch("src.answers.parse_definition_example")
+    @patch("src.answers.lookup_match")
     def test_explain_endpoint_no_fallback(self, mock_lookup, mock_parse, mock_generate, client):
         """Test the explain endpoint when fallback also fails."""
         # Mock generate to return unparseable text
@@ -109,7 +363,7 @@ class TestAPIEndpoints:
         """Test that the endpoint normalizes term case."""
         with (
             patch("src.router.generate") as mock_generate,
-            patch("src.router.parse_definition_example") as mock_parse,
+            patch("src.answers.parse_definition_example") as mock_parse,
         ):
 
             mock_generate.return_value = "Definition: Test\nExample: Test"
@@ -123,7 +377,7 @@ class TestAPIEndpoints:
             assert data["term"] == "uppercase"
 
             # Verify generate was called with normalized term
-            mock_generate.assert_called_once_with("uppercase")
+            mock_generate.assert_called_once_with("uppercase", adapter=DEFAULT_ADAPTER)
 
     def test_explain_endpoint_validation(self, client):
         """Test that the endpoint validates input."""
@@ -140,3 +394,467 @@ class TestAPIEndpoints:
         # After stripping, the term is empty, so it should raise a 400 error
         assert response.status_code == 400
         assert "empty" in response.json()["detail"].lower()
+
+
+class TestServingPolicy:
+    """Test the lexicon/model serving policies of the explain endpoint."""
+
+    @pytest.fixture
+    def client(self):
+        """Create a test client."""
+        from src.router import app
+
+        return TestClient(app)
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.generate")
+    @patch("src.answers.lookup_match")
+    def test_lexicon_first_hit_skips_model(self, mock_lookup, mock_generate, client):
+        """Test that a lexicon hit is answered without running the model."""
+        mock_lookup.return_value = hit("Charisma", "He's got rizz")
+
+        response = client.post("/v1/explain", json={"term": "Rizz"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["term"] == "rizz"
+        assert data["definition"] == "Charisma"
+        assert data["example"] == "He's got rizz"
+        assert data["source"] == "lexicon"
+        assert data["precision"] is None
+        assert (data["matched_term"], data["match_kind"]) == ("rizz", "exact")
+        mock_lookup.assert_called_once_with("rizz")
+        mock_generate.assert_not_called()
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.generate")
+    @patch("src.retrieval.match")
+    @pytest.mark.parametrize("kind", ["squeezed", "fuzzy"])
+    def test_similar_term_is_not_a_lexicon_answer(self, mock_match, mock_generate, kind, client):
+        """Test that a squeezed or fuzzy match ("boat" -> "goat") goes to the model."""
+        mock_match.return_value = hit("Greatest of all time", "She's the GOAT", "goat", kind)
+        mock_generate.return_value = "Definition: A small ship\nExample: We took the boat"
+
+        data = client.post("/v1/explain", json={"term": "boat"}).json()
+
+        assert data["source"] == "lora"
+        assert data["definition"] == "A small ship"
+        assert data["matched_term"] is None
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.generate")
+    @patch("src.answers.lookup_match")
+    def test_lexicon_first_miss_runs_model(self, mock_lookup, mock_generate, client):
+        """Test that a lexicon miss falls through to the model."""
+        mock_lookup.return_value = None
+        mock_generate.return_value = "Definition: New slang\nExample: So new"
+
+        response = client.post("/v1/explain", json={"term": "newterm"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["definition"] == "New slang"
+        assert data["source"] == "lora"
+        mock_generate.assert_called_once_with("newterm", adapter=DEFAULT_ADAPTER)
+        # The lexicon is consulted once, not again after generation
+        mock_lookup.assert_called_once_with("newterm")
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.generate")
+    @patch("src.answers.lookup_match")
+    def test_lexicon_first_miss_bad_format(self, mock_lookup, mock_generate, client):
+        """Test that a miss with unparseable output is returned raw."""
+        mock_lookup.return_value = None
+        mock_generate.return_value = "Some unparseable text"
+
+        response = client.post("/v1/explain", json={"term": "newterm"})
+
+        assert response.status_code == 200
+        assert response.json()["source"] == "lora_raw"
+        mock_lookup.assert_called_once_with("newterm")
+
+    @patch("src.router.SERVING_POLICY", "model_first")
+    @patch("src.router.generate")
+    @patch("src.answers.lookup_match")
+    def test_model_first_prefers_model(self, mock_lookup, mock_generate, client):
+        """Test that model_first runs the model even for lexicon terms."""
+        mock_lookup.return_value = hit("Charisma", "He's got rizz")
+        mock_generate.return_value = "Definition: Charm\nExample: So much rizz"
+
+        response = client.post("/v1/explain", json={"term": "rizz"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["definition"] == "Charm"
+        assert data["source"] == "lora"
+        mock_lookup.assert_not_called()
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.generate")
+    @patch("src.answers.lookup_match")
+    def test_model_only_never_consults_lexicon(self, mock_lookup, mock_generate, client):
+        """Test that model_only returns raw output instead of the lexicon."""
+        mock_lookup.return_value = hit("Charisma", "He's got rizz")
+        mock_generate.return_value = "Some unparseable text"
+
+        response = client.post("/v1/explain", json={"term": "rizz"})
+
+        assert response.status_code == 200
+        assert response.json()["source"] == "lora_raw"
+        mock_lookup.assert_not_called()
+
+    def test_resolve_policy_from_env(self, monkeypatch):
+        """Test that the policy is read from SLANG_SERVING_POLICY."""
+        from src.router import _resolve_serving_policy
+
+        monkeypatch.setenv("SLANG_SERVING_POLICY", " Model_Only ")
+        assert _resolve_serving_policy() == "model_only"
+
+    def test_resolve_unknown_policy(self, monkeypatch):
+        """Test that an unknown policy falls back to the default."""
+        from src.router import DEFAULT_SERVING_POLICY, _resolve_serving_policy
+
+        monkeypatch.setenv("SLANG_SERVING_POLICY", "yolo")
+        assert _resolve_serving_policy() == DEFAULT_SERVING_POLICY
+
+
+def parse_sse(body: str):
+    """Split a text/event-stream body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestExplainStream:
+    """Test the SSE streaming endpoint."""
+
+    @pytest.fixture
+    def client(self):
+        """Create a test client."""
+        from src.router import app
+
+        return TestClient(app)
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.stream_generate")
+    @patch("src.answers.lookup_match")
+    def test_stream_tokens_then_done(self, mock_lookup, mock_stream, client):
+        """Test that tokens are streamed followed by the parsed answer."""
+        mock_lookup.return_value = None
+        mock_stream.return_value = iter([" New slang", "\nExample:", " So new\n"])
+
+        response = client.post("/v1/explain/stream", json={"term": "NewTerm"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert [e for e, _ in events] == ["token", "token", "token", "done"]
+        assert events[0][1] == {"text": " New slang"}
+        done = events[-1][1]
+        assert done["term"] == "newterm"
+        assert done["definition"] == "New slang"
+        assert done["example"] == "So new"
+        assert done["source"] == "lora"
+        assert done["ttft_ms"] <= done["total_ms"]
+        mock_stream.assert_called_once_with("newterm", adapter=DEFAULT_ADAPTER)
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.stream_generate")
+    @patch("src.answers.lookup_match")
+    def test_stream_lexicon_hit(self, mock_lookup, mock_stream, client):
+        """Test that a lexicon hit produces a single done event."""
+        mock_lookup.return_value = hit("Charisma", "He's got rizz")
+
+        response = client.post("/v1/explain/stream", json={"term": "rizz"})
+
+        events = parse_sse(response.text)
+        assert [e for e, _ in events] == ["done"]
+        assert events[0][1]["source"] == "lexicon"
+        mock_stream.assert_not_called()
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.stream_generate")
+    def test_stream_model_not_ready(self, mock_stream, client):
+        """Test that a warming model returns 503 before the stream starts."""
+        from src.inference import ModelNotReadyError
+
+        mock_stream.side_effect = ModelNotReadyError("Model is still loading")
+
+        response = client.post("/v1/explain/stream", json={"term": "rizz"})
+
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.stream_generate")
+    def test_stream_error_event(self, mock_stream, client):
+        """Test that a failure mid-stream is reported as an error event."""
+
+        def failing():
+            yield " partial"
+            raise RuntimeError("decode failed")
+
+        mock_stream.return_value = failing()
+
+        response = client.post("/v1/explain/stream", json={"term": "rizz"})
+
+        events = parse_sse(response.text)
+        assert [e for e, _ in events] == ["token", "error"]
+        assert "decode failed" in events[-1][1]["detail"]
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.gate")
+    @patch("src.router.stream_generate")
+    def test_abandoned_stream_cancels_decode_before_release(self, mock_stream, mock_gate):
+        """Test that a stream the client left is closed before its slot is freed."""
+        from src.router import ExplainInput, explain_stream
+
+        order = []
+
+        def decode():
+            try:
+                yield " partial"
+                yield " more"
+            finally:
+                order.append("decode closed")
+
+        mock_stream.return_value = decode()
+        mock_gate.acquire = AsyncMock()
+        mock_gate.release.side_effect = lambda: order.append("slot released")
+
+        async def disconnect():
+            response = await explain_stream(ExplainInput(term="rizz"))
+            await response.body_iterator.__anext__()
+            # The client is gone: Starlette runs the background task
+            await response.background()
+
+        asyncio.run(disconnect())
+
+        assert order == ["decode closed", "slot released"]
+
+    def test_stream_empty_term(self, client):
+        """Test that an empty term is rejected."""
+        response = client.post("/v1/explain/stream", json={"term": "   "})
+
+        assert response.status_code == 400
+
+
+class TestExplainBatch:
+    """Test the /v1/explain:batch endpoint."""
+
+    @pytest.fixture
+    def client(self):
+        """Create a test client."""
+        from src.router import app
+
+        return TestClient(app)
+
+    @staticmethod
+    def fake_lookup(term):
+        """Pretend only 'rizz' is in the lexicon."""
+        if term == "rizz":
+            return hit("Charm", "He has rizz")
+        return None
+
+    @staticmethod
+    def fake_generate_batch(terms, adapter=None):
+        """Return well-formed model output for every term."""
+        return [f"Definition: {t} meaning\nExample: so {t}\n" for t in terms]
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.generate_batch")
+    @patch("src.answers.lookup_match")
+    def test_dedup_and_lexicon_split(self, mock_lookup, mock_batch, client):
+        """Test that terms are deduplicated and only lexicon misses reach the model."""
+        mock_lookup.side_effect = self.fake_lookup
+        mock_batch.side_effect = self.fake_generate_batch
+
+        response = client.post("/v1/explain:batch", json={"terms": ["Rizz", "mid ", "MID", "rizz"]})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["unique_terms"] == 2
+        assert [r["term"] for r in data["results"]] == ["rizz", "mid", "mid", "rizz"]
+        assert [r["source"] for r in data["results"]] == ["lexicon", "lora", "lora", "lexicon"]
+        assert data["results"][1]["definition"] == "mid meaning"
+        mock_batch.assert_called_once_with(["mid"], adapter=DEFAULT_ADAPTER)
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.BATCH_MAX_SIZE", 2)
+    @patch("src.router.generate_batch")
+    def test_misses_are_chunked(self, mock_batch, client):
+        """Test that misses are generated at most BATCH_MAX_SIZE terms per call."""
+        mock_batch.side_effect = self.fake_generate_batch
+
+        response = client.post("/v1/explain:batch", json={"terms": ["a", "b", "c"]})
+
+        assert response.status_code == 200
+        assert [c.args[0] for c in mock_batch.call_args_list] == [["a", "b"], ["c"]]
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.BATCH_MAX_SIZE", 1)
+    @patch("src.router.generate_batch")
+    def test_per_item_errors(self, mock_batch, client):
+        """Test that invalid terms and failed chunks only fail their own items."""
+
+        def flaky(terms, adapter=None):
+            if terms == ["bad"]:
+                raise RuntimeError("decode failed")
+            return self.fake_generate_batch(terms, adapter)
+
+        mock_batch.side_effect = flaky
+
+        response = client.post("/v1/explain:batch", json={"terms": ["ok", "  ", "bad", "x" * 101]})
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0]["source"] == "lora" and results[0]["error"] is None
+        assert "empty" in results[1]["error"]
+        assert "decode failed" in results[2]["error"]
+        assert "100 characters" in results[3]["error"]
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.generate_batch")
+    def test_model_not_ready(self, mock_batch, client):
+        """Test that misses report a retryable error while the model is loading."""
+        from src.inference import ModelNotReadyError
+
+        mock_batch.side_effect = ModelNotReadyError("Model is still loading")
+
+        response = client.post("/v1/explain:batch", json={"terms": ["mid", "cap"]})
+
+        assert response.status_code == 200
+        assert all("loading" in r["error"] for r in response.json()["results"])
+
+    @patch("src.router.SERVING_POLICY", "model_only")
+    @patch("src.router.choose_adapter")
+    @patch("src.router.generate_batch")
+    def test_misses_grouped_by_adapter(self, mock_batch, mock_choose, client):
+        """Test that each generate_batch call only holds terms of one adapter."""
+        mock_batch.side_effect = self.fake_generate_batch
+        mock_choose.side_effect = lambda term, adapter: "canary" if term in "bd" else "stable"
+
+        response = client.post("/v1/explain:batch", json={"terms": ["a", "b", "c", "d"]})
+
+        assert response.status_code == 200
+        assert [(c.args[0], c.kwargs["adapter"]) for c in mock_batch.call_args_list] == [
+            (["a", "c"], "stable"),
+            (["b", "d"], "canary"),
+        ]
+        adapters = [r["adapter"] for r in response.json()["results"]]
+        assert adapters == ["stable", "canary", "stable", "canary"]
+
+    def test_unknown_adapter(self, client):
+        """Test that a batch naming an unregistered adapter is rejected."""
+        response = client.post("/v1/explain:batch", json={"terms": ["a"], "adapter": "nope"})
+
+        assert response.status_code == 400
+
+    @patch("src.router.EXPLAIN_BATCH_MAX", 2)
+    def test_too_many_terms(self, client):
+        """Test that batches over EXPLAIN_BATCH_MAX are rejected."""
+        response = client.post("/v1/explain:batch", json={"terms": ["a", "b", "c"]})
+
+        assert response.status_code == 413
+
+    def test_empty_list(self, client):
+        """Test that an empty term list fails validation."""
+        response = client.post("/v1/explain:batch", json={"terms": []})
+
+        assert response.status_code == 422
+
+
+class TestAnnotate:
+    """Test the /v1/annotate endpoint."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        """Create a test client serving a small fixed lexicon to the annotator."""
+        from src import retrieval
+        from src.lexicon_index import TermMatcher
+        from src.router import app
+
+        entries = {
+            "mid": {"definition": "Mediocre", "example": "So mid"},
+            "no cap": {"definition": "For real", "example": "No cap"},
+        }
+        matcher = TermMatcher(entries)
+        monkeypatch.setattr(retrieval, "term_matcher", lambda: (matcher, entries))
+        monkeypatch.setattr(retrieval, "match", lambda term: None)
+        return TestClient(app)
+
+    @patch("src.router.generate_batch")
+    def test_lexicon_spans(self, mock_batch, client):
+        """Test that lexicon terms are returned per text without running the model."""
+        response = client.post(
+            "/v1/annotate", json={"texts": ["that fit is mid, no cap", "gr8 news"]}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["unknown_terms"] == 0
+        first, second = data["results"]
+        assert [span["term"] for span in first["spans"]] == ["mid", "no cap"]
+        assert first["spans"][0]["source"] == "lexicon"
+        assert second["spans"][0]["match"] == "unknown"
+        assert second["spans"][0]["definition"] is None
+        mock_batch.assert_not_called()
+
+    def test_scans_run_off_the_event_loop(self, client):
+        """Test that texts are annotated in a worker thread, not on the event loop."""
+        loops = []
+
+        def annotate(text):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return []
+
+        with patch("src.router.annotate", annotate):
+            response = client.post("/v1/annotate", json={"texts": ["mid", "no cap"]})
+
+        assert response.status_code == 200
+        assert loops == [None, None]
+
+    @patch("src.router.SERVING_POLICY", "lexicon_first")
+    @patch("src.router.generate_batch")
+    def test_explain_unknown(self, mock_batch, client):
+        """Test that unique unknown terms of all texts go to the model in one batch."""
+        mock_batch.side_effect = TestExplainBatch.fake_generate_batch
+
+        response = client.post(
+            "/v1/annotate",
+            json={"texts": ["gr8, mid", "GR8 ISTG"], "explain_unknown": True},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["unknown_terms"] == 2
+        spans = [span for result in data["results"] for span in result["spans"]]
+        assert [(span["term"], span["source"]) for span in spans] == [
+            ("gr8", "lora"),
+            ("mid", "lexicon"),
+            ("gr8", "lora"),
+            ("istg", "lora"),
+        ]
+        assert spans[3]["definition"] == "istg meaning"
+        mock_batch.assert_called_once_with(["gr8", "istg"], adapter=DEFAULT_ADAPTER)
+
+    def test_nul_in_text(self, client):
+        """Test that a NUL character in a text is ignored instead of failing the request."""
+        response = client.post("/v1/annotate", json={"texts": ["no cap \u0000 mid"]})
+
+        assert response.status_code == 200
+        spans = response.json()["results"][0]["spans"]
+        assert [span["term"] for span in spans] == ["no cap", "mid"]
+
+    @patch("src.router.ANNOTATE_MAX_TEXTS", 2)
+    @patch("src.router.ANNOTATE_MAX_CHARS", 10)
+    def test_limits(self, client):
+        """Test that too many or too long texts are rejected with 413."""
+        assert client.post("/v1/annotate", json={"texts": ["a", "b", "c"]}).status_code == 413
+        assert client.post("/v1/annotate", json={"texts": ["x" * 11]}).status_code == 413
+        assert client.post("/v1/annotate", json={"texts": []}).status_code == 422
@@ -0,0 +1,95 @@
+"""Tests for serve module."""
+
+import gc
+import json
+import os
+import time
+
+import pytest
+
+from src import serve
+from src.inference import InferenceEngine
+
+
+@pytest.fixture
+def loaded_engine(tiny_checkpoint, monkeypatch):
+    """Tiny engine loaded the way the pre-fork server loads it."""
+    import torch
+
+    monkeypatch.delenv("TOKENIZERS_PARALLELISM", raising=False)
+    threads = torch.get_num_threads()
+    model_dir, adapter_dir = tiny_checkpoint
+    engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=0)
+    serve.preload(engine)
+    yield engine
+    gc.unfreeze()
+    torch.set_num_threads(threads)
+
+
+class TestCpuSlices:
+    """Test dividing CPUs between workers."""
+
+    def test_even_split(self):
+        """Test contiguous, disjoint slices with the threads derived from the CPU count."""
+        assert serve.cpu_slices(2, cpus=range(8)) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+        assert serve.cpu_slices(4, threads=1, cpus=[2, 3, 4, 5]) == [[2], [3], [4], [5]]
+        assert serve.cpu_slices(3, cpus=range(2)) == [[0], [1], [0]]
+
+    def test_oversubscribed(self, caplog):
+        """Test that slices wrap around with a warning when CPUs run out."""
+        assert serve.cpu_slices(2, threads=3, cpus=range(4)) == [[0, 1, 2], [3, 0, 1]]
+        assert "oversubscribe" in caplog.text
+
+    def test_invalid(self):
+        """Test that a worker count below one is rejected."""
+        with pytest.raises(ValueError):
+            serve.cpu_slices(0)
+
+
+class TestWorkerPool:
+    """Test forking workers from a loaded parent."""
+
+    def test_workers_share_loaded_model(self, loaded_engine, tmp_path):
+        """Test that forked workers generate like the parent without loading the model."""
+        cpus = serve.available_cpus()[:1]
+
+        def target(index):
+            import torch
+
+            result = {
+                "state_at_start": loaded_engine.state,
+                "threads": torch.get_num_threads(),
+                "cpus": sorted(os.sched_getaffinity(0)),
+                "output": loaded_engine.generate_batch(["rizz"], 8),
+            }
+            (tmp_path / f"worker{index}.json").write_text(json.dumps(result))
+
+        pool = serve.WorkerPool(target, [cpus, cpus], respawn=False)
+        pool.start()
+
+        assert pool.supervise() == {0: 0, 1: 0}
+        expected = loaded_engine.generate_batch(["rizz"], 8)
+        for index in range(2):
+            result = json.loads((tmp_path / f"worker{index}.json").read_text())
+            assert result["state_at_start"] == "ready"
+            assert result["threads"] == 1 and result["cpus"] == cpus
+            assert result["output"] == expected
+
+    def test_respawn(self, tmp_path, monkeypatch):
+        """Test that a crashed worker is replaced but a crash loop is not."""
+        monkeypatch.setattr(serve, "RESPAWN_MIN_UPTIME_S", 0.2)
+        runs = tmp_path / "runs"
+
+        def target(index):
+            with open(runs, "a") as f:
+                f.write("x")
+            if runs.read_text() == "x":
+                time.sleep(0.3)
+                raise RuntimeError("worker crashed")
+            raise RuntimeError("crashes at once")
+
+        pool = serve.WorkerPool(target, [serve.available_cpus()[:1]])
+        pool.start()
+
+        assert pool.supervise() == {0: 1}
+        assert runs.read_text() == "xx"
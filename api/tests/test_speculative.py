@@ -0,0 +1,129 @@
+"""Tests for speculative module."""
+
+import pytest
+import torch
+from transformers import (
+    LogitsProcessorList,
+    RepetitionPenaltyLogitsProcessor,
+    StoppingCriteria,
+    StoppingCriteriaList,
+)
+
+from src.speculative import PromptLookupDraft, greedy_decode
+
+
+class StopAtLength(StoppingCriteria):
+    """Stop once the sequence reaches a given length."""
+
+    def __init__(self, length: int):
+        self.length = length
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), input_ids.shape[1] >= self.length)
+
+
+@pytest.fixture(scope="module")
+def model_and_tokenizer(tiny_checkpoint):
+    """The tiny base model and its tokenizer."""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    model_dir, _ = tiny_checkpoint
+    return AutoModelForCausalLM.from_pretrained(model_dir).eval(), AutoTokenizer.from_pretrained(
+        model_dir
+    )
+
+
+def _generate(model, input_ids, max_new_tokens, stopping=()):
+    """Plain greedy generate() with the repetition penalty used in serving."""
+    with torch.no_grad():
+        return model.generate(
+            input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            repetition_penalty=1.2,
+            pad_token_id=model.config.eos_token_id,
+            stopping_criteria=StoppingCriteriaList(stopping),
+        )
+
+
+def _decode(model, input_ids, max_new_tokens, draft, stopping=()):
+    """greedy_decode() with the same settings as _generate."""
+    with torch.no_grad():
+        return greedy_decode(
+            model,
+            input_ids,
+            max_new_tokens,
+            draft,
+            LogitsProcessorList([RepetitionPenaltyLogitsProcessor(1.2)]),
+            StoppingCriteriaList(stopping),
+            [model.config.eos_token_id],
+        )
+
+
+class TestPromptLookupDraft:
+    """Test proposing draft tokens."""
+
+    def test_source_match(self):
+        """Test that the longest n-gram is looked up in the sources first."""
+        draft = PromptLookupDraft([[7, 1, 2, 3, 4, 5]], max_ngram=2, num_tokens=2)
+
+        assert draft.propose([9, 1, 2]) == [3, 4]
+        assert draft.propose([9, 4]) == [5]
+
+    def test_sequence_match(self):
+        """Test that earlier occurrences in the sequence itself are used, not the tail."""
+        draft = PromptLookupDraft(num_tokens=3)
+
+        assert draft.propose([5, 6, 7, 8, 5, 6]) == [7, 8, 5]
+        assert draft.propose([1, 2, 3]) == []
+
+
+class TestGreedyDecode:
+    """Test that assisted decoding reproduces plain greedy decoding."""
+
+    @pytest.mark.parametrize("text", ["Term: rizz\n\nDefinition:", "Term: no cap\nDefinition:"])
+    def test_matches_generate(self, model_and_tokenizer, text):
+        """Test identical tokens with no, wrong and perfect drafts."""
+        model, tokenizer = model_and_tokenizer
+        input_ids = tokenizer(text, return_tensors="pt")["input_ids"]
+        expected = _generate(model, input_ids, 24)
+        greedy = expected[0, input_ids.shape[1] :].tolist()
+
+        for sources in (
+            [],
+            [input_ids[0].tolist()[::-1]],
+            [input_ids[0].tolist() + greedy],
+        ):
+            out, drafted, accepted, forwards = _decode(
+                model, input_ids, 24, PromptLookupDraft(sources)
+            )
+            assert out.tolist() == expected.tolist()
+            assert 0 <= accepted <= drafted
+            assert forwards == 24 - accepted
+
+    def test_perfect_draft_is_accepted(self, model_and_tokenizer):
+        """Test that a draft of the model's own output takes few forward passes."""
+        model, tokenizer = model_and_tokenizer
+        input_ids = tokenizer("Term: sus\n\nDefinition:", return_tensors="pt")["input_ids"]
+        expected = _generate(model, input_ids, 24)
+
+        _, drafted, accepted, forwards = _decode(
+            model, input_ids, 24, PromptLookupDraft([expected[0].tolist()], num_tokens=8)
+        )
+
+        assert accepted == drafted > 0
+        assert forwards <= 4
+
+    def test_stops_inside_an_accepted_draft(self, model_and_tokenizer):
+        """Test that stopping criteria end decoding at the same token as generate()."""
+        model, tokenizer = model_and_tokenizer
+        input_ids = tokenizer("Term: mid\n\nDefinition:", return_tensors="pt")["input_ids"]
+        stop = StopAtLength(input_ids.shape[1] + 5)
+        expected = _generate(model, input_ids, 24, [stop])
+        full = _generate(model, input_ids, 24)
+
+        out, *_ = _decode(model, input_ids, 24, PromptLookupDraft([full[0].tolist()]), [stop])
+
+        assert out.shape[1] == input_ids.shape[1] + 5
+        assert out.tolist() == expected.tolist()
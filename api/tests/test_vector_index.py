@@ -0,0 +1,122 @@
+"""Tests for vector_index module."""
+
+import numpy as np
+import pytest
+
+from src.vector_index import HashingVectorizer, VectorIndex, build_vector_index, is_vector_index
+
+ENTRIES = [
+    {"term": "rizz", "definition": "Charm in flirting", "example": "He has rizz"},
+    {"term": "no cap", "definition": "No lie", "example": "That's true, no cap"},
+    {"term": "lowkey", "definition": "Secretly or slightly", "example": "I lowkey like it"},
+    {"term": "highkey", "definition": "Openly", "example": "I highkey love it"},
+]
+
+
+class TestHashingVectorizer:
+    """Test the offline hashed n-gram vectorizer."""
+
+    def test_unit_length_rows(self):
+        """Test that encoded rows are L2-normalized float32."""
+        vectors = HashingVectorizer(dim=64).encode_documents(ENTRIES)
+
+        assert vectors.shape == (4, 64)
+        assert vectors.dtype == np.float32
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+    def test_deterministic(self):
+        """Test that encoding does not depend on Python's salted hash."""
+        a = HashingVectorizer(dim=64).encode_queries(["rizzler"])
+        b = HashingVectorizer(dim=64).encode_queries(["rizzler"])
+
+        assert np.array_equal(a, b)
+
+    def test_empty_text(self):
+        """Test that text without words encodes to a zero row instead of NaN."""
+        vectors = HashingVectorizer(dim=16).encode_queries(["!!"])
+
+        assert not np.isnan(vectors).any()
+
+
+class TestVectorIndex:
+    """Test building, memory-mapping and searching the index."""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        """Build an index over the sample entries."""
+        vectorizer = HashingVectorizer(dim=256)
+        path = build_vector_index(ENTRIES, str(tmp_path / "index"), vectorizer, chunk_size=3)
+        index = VectorIndex(path, chunk_rows=3)
+        yield vectorizer, index
+        index.close()
+
+    def test_build_layout(self, index, tmp_path):
+        """Test that a complete index is written and memory-mapped."""
+        _, idx = index
+
+        assert is_vector_index(str(tmp_path / "index"))
+        assert not is_vector_index(str(tmp_path))
+        assert len(idx) == 4
+        assert isinstance(idx.vectors, np.memmap)
+
+    def test_entry(self, index):
+        """Test that row metadata is read back by offset."""
+        _, idx = index
+
+        assert idx.entry(1)["term"] == "no cap"
+        assert idx.entry(3)["example"] == "I highkey love it"
+
+    def test_search_nearest(self, index):
+        """Test that spelling variants find their lexicon term first."""
+        vectorizer, idx = index
+
+        hits = idx.search(vectorizer.encode_queries(["rizzler", "lowkeyy"]), k=2)
+
+        assert idx.entry(hits[0][0][0])["term"] == "rizz"
+        assert idx.entry(hits[1][0][0])["term"] == "lowkey"
+        assert hits[0][0][1] >= hits[0][1][1]
+
+    def test_search_across_chunks_matches_brute_force(self, index):
+        """Test that chunked top-k equals a full sort of all scores."""
+        vectorizer, idx = index
+        queries = vectorizer.encode_queries(["highkey", "cap"])
+
+        hits = idx.search(queries, k=3)
+
+        scores = queries @ np.asarray(idx.vectors).T
+        expected = np.argsort(-scores, axis=1, kind="stable")[:, :3]
+        assert [[row for row, _ in h] for h in hits] == expected.tolist()
+
+    def test_k_larger_than_index(self, index):
+        """Test that k is capped at the index size."""
+        vectorizer, idx = index
+
+        hits = idx.search(vectorizer.encode_queries(["rizz"]), k=10)
+
+        assert len(hits[0]) == 4
+
+    def test_close_waits_for_readers(self, index):
+        """Test that closing during a search keeps the file open until the search ends."""
+        _, idx = index
+
+        with idx.reading():
+            idx.close()
+            assert idx.closed
+            assert idx.entry(0)["term"] == "rizz"
+
+        assert idx._meta.closed
+        with pytest.raises(ValueError, match="closed"), idx.reading():
+            pass
+
+    def test_rebuild_replaces_index(self, tmp_path):
+        """Test that rebuilding into an existing directory replaces it."""
+        vectorizer = HashingVectorizer(dim=32)
+        path = str(tmp_path / "index")
+        build_vector_index(ENTRIES, path, vectorizer)
+        build_vector_index(ENTRIES[:2], path, vectorizer)
+
+        idx = VectorIndex(path)
+        try:
+            assert len(idx) == 2
+        finally:
+            idx.close()
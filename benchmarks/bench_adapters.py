@@ -0,0 +1,122 @@
+"""
+Multi-adapter serving benchmark: memory per extra adapter and batch latency.
+
+Loads the engine with 1, 2, ... LoRA adapters on one base model, each count in a
+fresh process so resident memory is measured in isolation. Reports RSS, the RSS
+added per extra adapter next to the adapter's size on disk, and the latency of
+a generate_batch call for the default and the extra adapters. The memory of one
+process per adapter is estimated as ``count * rss`` of the single-adapter run.
+
+Usage:
+    python benchmarks/bench_adapters.py --adapters 1 2 4 --rank 16
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchutil import add_api_to_path, rss_mb, summarize
+
+add_api_to_path()
+
+from src.tiny_model import build_tiny_adapter, build_tiny_model  # noqa: E402
+
+TERMS = ["rizz", "no cap", "bussin", "delulu", "mid", "touch grass", "sus", "gyatt"]
+
+
+def dir_size_mb(path):
+    """Total size of the files in a directory, in MB."""
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20
+
+
+def measure(base_model, adapter_dirs, new_tokens, runs):
+    """Load the first adapter as default plus the rest and measure (runs in a child process)."""
+    import peft  # noqa: F401
+    import torch  # noqa: F401
+    import transformers  # noqa: F401
+
+    from src.inference import InferenceEngine, adapter_name
+
+    # Baseline after the heavy imports so model_rss_mb covers the weights only
+    rss_before = rss_mb()
+    default, *extras = adapter_dirs
+    engine = InferenceEngine(
+        base_model=base_model,
+        adapter_dir=default,
+        adapters={adapter_name(path): path for path in extras},
+        few_shot_k=0,
+    )
+    engine.load()
+    rss_loaded = rss_mb()
+
+    latency = {}
+    for name in sorted(engine.adapter_dirs):
+        engine.generate_batch(TERMS, new_tokens, name)  # warm-up
+        batch_ms = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            engine.generate_batch(TERMS, new_tokens, name)
+            batch_ms.append((time.perf_counter() - t0) * 1000)
+        latency[name] = summarize(batch_ms)
+
+    return {
+        "adapters": len(engine.adapter_dirs),
+        "rss_mb": round(rss_loaded, 1),
+        "model_rss_mb": round(rss_loaded - rss_before, 1),
+        "batch_latency": latency,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--adapters", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--hidden-size", type=int, default=512, help="Tiny model width")
+    parser.add_argument("--layers", type=int, default=8, help="Tiny model depth")
+    parser.add_argument("--rank", type=int, default=16, help="LoRA rank of each adapter")
+    parser.add_argument("--new-tokens", type=int, default=16)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Each count gets a fresh interpreter so RSS is not polluted by earlier runs
+    ctx = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_model = build_tiny_model(
+            f"{tmp}/model", hidden_size=args.hidden_size, num_layers=args.layers
+        )
+        adapter_dirs = [
+            build_tiny_adapter(base_model, f"{tmp}/adapter-{i}", r=args.rank, seed=i)
+            for i in range(max(args.adapters))
+        ]
+
+        runs = []
+        for count in args.adapters:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                future = pool.submit(
+                    measure, base_model, adapter_dirs[:count], args.new_tokens, args.runs
+                )
+                runs.append(future.result())
+
+        single = min(runs, key=lambda run: run["adapters"])
+        for run in runs:
+            extra = run["adapters"] - single["adapters"]
+            if extra:
+                added = run["model_rss_mb"] - single["model_rss_mb"]
+                run["rss_mb_per_extra_adapter"] = round(added / extra, 1)
+            run["one_process_per_adapter_rss_mb"] = round(run["adapters"] * single["rss_mb"], 1)
+
+        results = {
+            "model_mb_on_disk": round(dir_size_mb(base_model), 1),
+            "adapter_mb_on_disk": round(dir_size_mb(adapter_dirs[0]), 1),
+            "runs": runs,
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
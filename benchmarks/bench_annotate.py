@@ -0,0 +1,134 @@
+"""
+Bulk text annotation benchmark: messages per second on one core.
+
+Builds the term matcher over the real lexicon (slang_pairs.jsonl plus the
+training terms) and over a synthetic lexicon, then annotates synthetic chat
+messages. The messages mix filler words, lexicon terms (multi-word ones
+included) and slang-looking unknown words. Reports matcher build time and
+messages/sec for the trie scan alone and for the full ``annotate()`` path,
+which adds the candidate scan and typo-tolerant lookups. The baseline is what
+a client does today: one lexicon index lookup per word.
+
+Usage:
+    python benchmarks/bench_annotate.py --messages 20000 --synthetic-terms 100000
+"""
+
+import argparse
+import json
+import random
+import string
+import time
+from unittest.mock import patch
+
+from benchutil import add_api_to_path
+
+add_api_to_path()
+
+from src import retrieval  # noqa: E402
+from src.annotate import annotate  # noqa: E402
+from src.lexicon_index import LexiconIndex, TermMatcher  # noqa: E402
+from src.lexicon_store import _DEFAULT_SOURCES, read_sources  # noqa: E402
+
+FILLER = (
+    "i you the a to and it is that was so we just like this my lol omg going "
+    "today he she they with for on at be have not but what when know really "
+    "think about your fit party game class later tonight yesterday food music"
+).split()
+UNKNOWN = ["gr8", "sheeesh", "ISTG", "l8r", "yesss", "2day", "IYKYK", "brooo"]
+
+
+def real_lexicon():
+    """Lexicon entries from the bundled data and training file."""
+    return {
+        term: {"definition": definition, "example": example}
+        for term, (definition, example) in read_sources(_DEFAULT_SOURCES).items()
+    }
+
+
+def synthetic_lexicon(n_terms: int, seed: int):
+    """Random single-word and two-word terms."""
+    rng = random.Random(seed)
+    lex = {}
+    while len(lex) < n_terms:
+        term = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        if rng.random() < 0.2:
+            term += " " + "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        lex[term] = {"definition": f"Meaning of {term}", "example": f"So {term}"}
+    return lex
+
+
+def messages(lex, n: int, seed: int):
+    """Chat-like messages of 6-24 words, about one in five words slang."""
+    rng = random.Random(seed)
+    terms = [term for term in lex if any(ch.isalpha() for ch in term)]
+    out = []
+    for _ in range(n):
+        words = []
+        for _ in range(rng.randint(6, 24)):
+            roll = rng.random()
+            if roll < 0.17:
+                words.append(rng.choice(terms))
+            elif roll < 0.2:
+                words.append(rng.choice(UNKNOWN))
+            else:
+                words.append(rng.choice(FILLER))
+        text = " ".join(words)
+        out.append(text[0].upper() + text[1:] + rng.choice(["", "!", "?", " 💀", "..."]))
+    return out
+
+
+def per_second(fn, texts):
+    """Messages per second of ``fn`` over ``texts`` and the total number of spans found."""
+    t0 = time.perf_counter()
+    spans = sum(len(fn(text)) for text in texts)
+    return round(len(texts) / (time.perf_counter() - t0)), spans
+
+
+def run(name, lex, texts):
+    """Time the matcher build, the trie scan, full annotate() and per-word lookups."""
+    t0 = time.perf_counter()
+    matcher = TermMatcher(lex)
+    build_ms = (time.perf_counter() - t0) * 1000
+    index = LexiconIndex(lex)
+
+    trie_mps, trie_spans = per_second(matcher.find, texts)
+    with (
+        patch.object(retrieval, "term_matcher", lambda: (matcher, lex)),
+        patch.object(retrieval, "match", index.match),
+    ):
+        annotate_mps, annotate_spans = per_second(annotate, texts)
+    per_word_mps, per_word_hits = per_second(
+        lambda text: [hit for word in text.split() if (hit := index.match(word))], texts
+    )
+    return {
+        "lexicon": name,
+        "terms": len(lex),
+        "matcher_terms": len(matcher),
+        "build_ms": round(build_ms, 1),
+        "trie_msgs_per_s": trie_mps,
+        "annotate_msgs_per_s": annotate_mps,
+        "per_word_lookup_msgs_per_s": per_word_mps,
+        "spans_per_msg": round(annotate_spans / len(texts), 2),
+        "trie_spans_per_msg": round(trie_spans / len(texts), 2),
+        "per_word_hits_per_msg": round(per_word_hits / len(texts), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--synthetic-terms", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Per-word lookups log every miss at debug level; keep logging out of the timings
+    retrieval.logger.disabled = True
+    lexicons = [("real", real_lexicon())]
+    if args.synthetic_terms:
+        lexicons.append(("synthetic", synthetic_lexicon(args.synthetic_terms, args.seed)))
+    results = [run(name, lex, messages(lex, args.messages, args.seed)) for name, lex in lexicons]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
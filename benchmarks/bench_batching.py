@@ -0,0 +1,101 @@
+"""
+Micro-batching throughput benchmark.
+
+Drives inference.generate from N concurrent client threads with micro-batching
+enabled and disabled (max batch size 1) and reports throughput and latency.
+
+Usage:
+    python benchmarks/bench_batching.py --concurrency 1 8 16 32 --requests-per-client 2
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchutil import add_api_to_path, summarize
+
+add_api_to_path()
+
+from src import inference  # noqa: E402
+from src.batching import MicroBatcher  # noqa: E402
+
+TERMS = [
+    "u",
+    "stan",
+    "jk",
+    "sis",
+    "lmao",
+    "ngl",
+    "irl",
+    "idc",
+    "asap",
+    "ez",
+    "idk",
+    "rizz",
+]
+
+
+def run(concurrency, requests_per_client, max_batch_size, max_wait_ms, max_new_tokens):
+    """Run one concurrency level against a freshly configured batcher."""
+    previous = inference._batcher
+    inference._batcher = MicroBatcher(
+        inference._run_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+    )
+
+    def client(idx):
+        latencies = []
+        for n in range(requests_per_client):
+            term = TERMS[(idx + n) % len(TERMS)]
+            t0 = time.perf_counter()
+            inference.generate(term, max_new_tokens=max_new_tokens)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        return latencies
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = [ms for result in pool.map(client, range(concurrency)) for ms in result]
+        wall_s = time.perf_counter() - start
+    finally:
+        inference._batcher.close()
+        inference._batcher = previous
+
+    return {
+        "concurrency": concurrency,
+        "max_batch_size": max_batch_size,
+        "wall_s": round(wall_s, 3),
+        "requests_per_s": round(len(latencies) / wall_s, 3),
+        "latency": summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16, 32])
+    parser.add_argument("--requests-per-client", type=int, default=2)
+    parser.add_argument("--max-batch-size", type=int, default=inference.BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=inference.BATCH_MAX_WAIT_MS)
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    # Warm up so the first configuration does not pay one-off costs
+    inference.generate(TERMS[0], max_new_tokens=args.max_new_tokens)
+
+    results = []
+    for concurrency in args.concurrency:
+        for max_batch_size in (1, args.max_batch_size):
+            results.append(
+                run(
+                    concurrency,
+                    args.requests_per_client,
+                    max_batch_size,
+                    args.max_wait_ms,
+                    args.max_new_tokens,
+                )
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Lexicon index lookup benchmark.
+
+Builds a LexiconIndex over a synthetic lexicon (100k terms by default) and times
+lookups for exact hits, normalized hits (punctuation/case/repeated letters),
+one-typo hits and misses. Compares against the old exact dict lookup.
+
+Usage:
+    python benchmarks/bench_lexicon.py --terms 100000 --queries 20000
+"""
+
+import argparse
+import json
+import random
+import string
+import time
+
+from benchutil import add_api_to_path, summarize
+
+add_api_to_path()
+
+from src.lexicon_index import LexiconIndex  # noqa: E402
+
+
+def random_word(rng, min_len=2, max_len=10):
+    """A random lowercase word."""
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(min_len, max_len)))
+
+
+def build_lexicon(n_terms: int, seed: int):
+    """Synthetic lexicon with a mix of single words and two-word phrases."""
+    rng = random.Random(seed)
+    lex = {}
+    while len(lex) < n_terms:
+        term = random_word(rng)
+        if rng.random() < 0.2:
+            term += " " + random_word(rng)
+        lex[term] = {"definition": f"Meaning of {term}", "example": f"So {term}"}
+    return lex
+
+
+def normalized_variant(rng, term):
+    """Same term with changed case, punctuation and a repeated letter."""
+    chars = [ch.upper() if rng.random() < 0.3 else ch for ch in term.replace(" ", "")]
+    i = rng.randrange(len(chars))
+    chars[i] = chars[i] * 3
+    return ".".join(chars) if len(chars) <= 4 else "".join(chars) + "!"
+
+
+def typo_variant(rng, term):
+    """Same term with one character substituted, if long enough to be accepted."""
+    chars = list(term.replace(" ", ""))
+    i = rng.randrange(len(chars))
+    chars[i] = rng.choice([c for c in string.ascii_lowercase if c != chars[i]])
+    return "".join(chars)
+
+
+def build_queries(lex, n_queries: int, seed: int):
+    """Queries per kind: exact, normalized, typo and miss."""
+    rng = random.Random(seed + 1)
+    terms = list(lex)
+    long_terms = [t for t in terms if len(t.replace(" ", "")) >= 6]
+    per_kind = n_queries // 4
+    return {
+        "exact": [rng.choice(terms) for _ in range(per_kind)],
+        "normalized": [normalized_variant(rng, rng.choice(terms)) for _ in range(per_kind)],
+        "typo": [typo_variant(rng, rng.choice(long_terms)) for _ in range(per_kind)],
+        "miss": [random_word(rng, 11, 14) for _ in range(per_kind)],
+    }
+
+
+def time_lookups(fn, queries):
+    """Per-call latency in milliseconds and the hit count."""
+    latencies = []
+    hits = 0
+    for query in queries:
+        t0 = time.perf_counter()
+        result = fn(query)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        hits += result is not None
+    return latencies, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--terms", type=int, default=100_000, help="Lexicon size")
+    parser.add_argument("--queries", type=int, default=20_000, help="Total lookups")
+    parser.add_argument("--max-distance", type=int, default=1, help="Fuzzy edit distance")
+    parser.add_argument("--min-score", type=float, default=0.75, help="Fuzzy score threshold")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    lex = build_lexicon(args.terms, args.seed)
+    queries = build_queries(lex, args.queries, args.seed)
+
+    t0 = time.perf_counter()
+    index = LexiconIndex(lex, max_distance=args.max_distance, min_score=args.min_score)
+    build_s = time.perf_counter() - t0
+
+    results = {
+        "terms": len(lex),
+        "build_s": round(build_s, 3),
+        "delete_variants": len(index._tables._variants),
+        "kinds": {},
+    }
+    for kind, batch in queries.items():
+        exact_ms, exact_hits = time_lookups(lambda q: lex.get(q.strip().lower()), batch)
+        index_ms, index_hits = time_lookups(index.match, batch)
+        results["kinds"][kind] = {
+            "dict_hit_rate": round(exact_hits / len(batch), 3),
+            "index_hit_rate": round(index_hits / len(batch), 3),
+            "dict": summarize(exact_ms),
+            "index": summarize(index_ms),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Lexicon store benchmark: load time, resident memory and lookup latency.
+
+Writes a synthetic JSONL lexicon (100k terms by default), then in a fresh
+process per backend either parses it into the in-memory dict + LexiconIndex or
+opens the compiled memory-mapped store. Reports load time, RSS growth and
+exact / normalized / typo lookup latency for each backend.
+
+Usage:
+    python benchmarks/bench_lexicon_store.py --terms 100000 --queries 20000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench_lexicon import build_lexicon, build_queries, time_lookups
+from benchutil import add_api_to_path, rss_mb, summarize
+
+add_api_to_path()
+
+from src.lexicon_index import LexiconIndex  # noqa: E402
+from src.lexicon_store import LexiconStore, compile_lexicon, read_sources  # noqa: E402
+
+
+def load_backend(backend: str, path: str):
+    """Load a lexicon the way retrieval does for ``backend``."""
+    if backend == "store":
+        return LexiconStore(path)
+    return {term: {"definition": d, "example": e} for term, (d, e) in read_sources([path]).items()}
+
+
+def measure(backend: str, path: str, queries):
+    """Load one backend in this process and time lookups against it."""
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    lex = load_backend(backend, path)
+    index = LexiconIndex(lex)
+    load_ms = (time.perf_counter() - t0) * 1000
+    rss_loaded = rss_mb()
+
+    results = {
+        "backend": backend,
+        "load_ms": round(load_ms, 1),
+        "rss_mb": round(rss_loaded - rss_before, 1),
+        "kinds": {},
+    }
+    for kind, batch in queries.items():
+        latencies, hits = time_lookups(index.match, batch)
+        results["kinds"][kind] = {"hit_rate": round(hits / len(batch), 3), **summarize(latencies)}
+    # Lookups page in parts of the mapped file; report how much that added
+    results["rss_after_lookups_mb"] = round(rss_mb() - rss_before, 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--terms", type=int, default=100_000, help="Lexicon size")
+    parser.add_argument("--queries", type=int, default=20_000, help="Total lookups")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    lex = build_lexicon(args.terms, args.seed)
+    queries = build_queries(lex, args.queries, args.seed)
+    queries.pop("miss")
+
+    with tempfile.TemporaryDirectory() as root:
+        source = os.path.join(root, "lexicon.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            for term, entry in lex.items():
+                f.write(json.dumps({"term": term, **entry}) + "\n")
+
+        store = os.path.join(root, "lexicon.slex")
+        t0 = time.perf_counter()
+        compile_lexicon([source], store)
+        results = {
+            "terms": len(lex),
+            "compile_s": round(time.perf_counter() - t0, 2),
+            "jsonl_mb": round(os.path.getsize(source) / 2**20, 1),
+            "store_mb": round(os.path.getsize(store) / 2**20, 1),
+            "backends": [],
+        }
+
+        # A fresh process per backend so RSS growth is measured in isolation
+        ctx = multiprocessing.get_context("spawn")
+        for backend, path in (("dict", source), ("store", store)):
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                results["backends"].append(pool.submit(measure, backend, path, queries).result())
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
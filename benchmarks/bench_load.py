@@ -0,0 +1,285 @@
+"""
+Load test for the API: latency percentiles, requests/sec and tokens/sec.
+
+Runs closed-loop clients against /v1/explain for a fixed duration at each
+concurrency level, after a warm-up that is not measured. The terms requested
+follow one of these distributions:
+
+- zipf: Zipfian over the lexicon terms, so a few terms are very hot
+- hit: uniform over the lexicon terms
+- miss: a pool of synthetic terms that are not in the lexicon
+
+By default the app runs in-process (httpx ASGI transport) on a tiny randomly
+initialized Llama, so the whole suite runs offline on any Linux box. ``--serve``
+serves the same app on a local port with uvicorn and drives it over TCP.
+``--url`` drives a server that is already running; the terms still come from
+the local lexicon. Tokens/sec is computed from the server's /v1/decode/stats.
+
+With ``--max-p95-ms`` or ``--min-rps`` the script exits with status 1 when a
+run misses the target, so it can guard against performance regressions.
+
+Usage:
+    python benchmarks/bench_load.py --distribution zipf --policy model_only \\
+        --concurrency 1 8 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import string
+import sys
+import tempfile
+import threading
+import time
+
+from benchutil import add_api_to_path, summarize
+
+add_api_to_path()
+
+DISTRIBUTIONS = ("zipf", "hit", "miss")
+
+
+def zipf_sampler(terms, s: float, rng):
+    """Draw terms with probability proportional to 1 / rank**s (rank from a shuffle)."""
+    ranked = list(terms)
+    rng.shuffle(ranked)
+    cum_weights = list(itertools.accumulate(1 / rank**s for rank in range(1, len(ranked) + 1)))
+    return lambda: rng.choices(ranked, cum_weights=cum_weights)[0]
+
+
+def miss_terms(lexicon, pool: int, rng):
+    """Synthetic terms (two made-up words) that are not lexicon entries."""
+    terms = set()
+    while len(terms) < pool:
+        words = ("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 8))) for _ in "ab")
+        term = " ".join(words)
+        if term not in lexicon:
+            terms.add(term)
+    return sorted(terms)
+
+
+def build_sampler(distribution: str, lexicon, args):
+    """Return a zero-argument function giving the next term to request."""
+    rng = random.Random(args.seed)
+    if distribution == "zipf":
+        return zipf_sampler(sorted(lexicon), args.zipf_s, rng)
+    if distribution == "hit":
+        terms = sorted(lexicon)
+        return lambda: rng.choice(terms)
+    terms = miss_terms(lexicon, args.miss_pool, rng)
+    return lambda: rng.choice(terms)
+
+
+async def wait_ready(client, timeout_s: float):
+    """Poll /ready until the model is loaded."""
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        response = await client.get("/ready")
+        if response.status_code == 200:
+            return
+        if response.json().get("state") == "failed":
+            raise SystemExit(f"Model failed to load: {response.json().get('error')}")
+        await asyncio.sleep(0.2)
+    raise SystemExit(f"Model not ready after {timeout_s}s")
+
+
+async def drive(client, sample, concurrency: int, duration_s: float):
+    """
+    Run ``concurrency`` closed-loop clients for ``duration_s`` seconds.
+
+    Returns:
+        tuple: (latencies in ms of 200 responses, status counts, source counts, wall seconds)
+    """
+    latencies = []
+    statuses = {}
+    sources = {}
+    deadline = time.perf_counter() + duration_s
+
+    async def client_loop():
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                response = await client.post("/v1/explain", json={"term": sample()})
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == "200":
+                latencies.append(elapsed_ms)
+                source = response.json()["source"]
+                sources[source] = sources.get(source, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, statuses, sources, time.perf_counter() - start
+
+
+async def server_counters(client):
+    """Generated tokens and response cache hits/misses reported by the server."""
+    decode = (await client.get("/v1/decode/stats")).json()
+    cache = (await client.get("/v1/cache/stats")).json()
+    return decode["generated_tokens"], cache["hits"], cache["misses"]
+
+
+async def run_levels(client, sample, args):
+    """Warm up, then measure every concurrency level."""
+    await wait_ready(client, args.ready_timeout)
+    if args.warmup > 0:
+        await drive(client, sample, max(args.concurrency), args.warmup)
+
+    runs = []
+    for concurrency in args.concurrency:
+        tokens0, hits0, misses0 = await server_counters(client)
+        latencies, statuses, sources, wall_s = await drive(
+            client, sample, concurrency, args.duration
+        )
+        tokens1, hits1, misses1 = await server_counters(client)
+        lookups = (hits1 - hits0) + (misses1 - misses0)
+        runs.append(
+            {
+                "concurrency": concurrency,
+                "wall_s": round(wall_s, 3),
+                "requests": sum(statuses.values()),
+                "requests_per_s": round(len(latencies) / wall_s, 3),
+                "tokens_per_s": round((tokens1 - tokens0) / wall_s, 2),
+                "response_cache_hit_rate": (
+                    round((hits1 - hits0) / lookups, 3) if lookups else None
+                ),
+                "latency": summarize(latencies),
+                "statuses": statuses,
+                "sources": sources,
+            }
+        )
+    return runs
+
+
+def configure_tiny_model(root: str, args):
+    """Point the API at a tiny random model before it is imported."""
+    from src.tiny_model import build_tiny_adapter, build_tiny_model
+
+    model_dir = build_tiny_model(
+        os.path.join(root, "model"), hidden_size=args.hidden_size, num_layers=args.layers
+    )
+    adapter_dir = build_tiny_adapter(model_dir, os.path.join(root, "adapters", "tiny-lora"))
+    os.environ["SLANG_BASE_MODEL"] = model_dir
+    os.environ["SLANG_ADAPTER_DIR"] = adapter_dir
+    os.environ["SLANG_ADAPTERS_ROOT"] = os.path.dirname(adapter_dir)
+    os.environ.setdefault("SLANG_VECTOR_DIR", os.path.join(root, "vectors"))
+
+
+def free_port():
+    """An unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run(args):
+    """Set up the target (in-process, local port or URL) and measure it."""
+    import httpx
+
+    timeout = httpx.Timeout(args.request_timeout)
+    if args.url:
+        from src.retrieval import lexicon
+
+        sample = build_sampler(args.distribution, lexicon(), args)
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout) as client:
+            return await run_levels(client, sample, args)
+
+    with tempfile.TemporaryDirectory() as root:
+        if not args.real_model:
+            configure_tiny_model(root, args)
+        os.environ["SLANG_SERVING_POLICY"] = args.policy
+        # Imported only now: the API reads its configuration at import time
+        from src import router
+        from src.retrieval import lexicon
+
+        sample = build_sampler(args.distribution, lexicon(), args)
+        if args.serve:
+            import uvicorn
+
+            port = free_port()
+            server = uvicorn.Server(
+                uvicorn.Config(router.app, host="127.0.0.1", port=port, log_level="warning")
+            )
+            thread = threading.Thread(target=server.run, name="bench-uvicorn", daemon=True)
+            thread.start()
+            while not server.started:
+                await asyncio.sleep(0.05)
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+                    return await run_levels(client, sample, args)
+            finally:
+                server.should_exit = True
+                thread.join()
+
+        # The ASGI transport does not run startup/shutdown events, so run them here
+        await router.startup_event()
+        try:
+            transport = httpx.ASGITransport(app=router.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", timeout=timeout
+            ) as client:
+                return await run_levels(client, sample, args)
+        finally:
+            await router.shutdown_event()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="zipf")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument("--miss-pool", type=int, default=500, help="Distinct terms for 'miss'")
+    parser.add_argument("--policy", default="lexicon_first", help="SLANG_SERVING_POLICY")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per level")
+    parser.add_argument("--warmup", type=float, default=2, help="Unmeasured seconds first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Drive an already running server instead")
+    parser.add_argument("--serve", action="store_true", help="Serve on a local port (uvicorn)")
+    parser.add_argument("--real-model", action="store_true", help="Use the configured model")
+    parser.add_argument("--hidden-size", type=int, default=256, help="Tiny model width")
+    parser.add_argument("--layers", type=int, default=4, help="Tiny model depth")
+    parser.add_argument("--ready-timeout", type=float, default=300)
+    parser.add_argument("--request-timeout", type=float, default=120)
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if any level's p95 is higher")
+    parser.add_argument("--min-rps", type=float, help="Fail if any level serves fewer req/s")
+    args = parser.parse_args()
+
+    runs = asyncio.run(run(args))
+    target = args.url or ("local port" if args.serve else "in-process")
+    print(
+        json.dumps(
+            {
+                "target": target,
+                "model": "configured" if args.real_model or args.url else "tiny-random",
+                "distribution": args.distribution,
+                "policy": args.policy,
+                "runs": runs,
+            },
+            indent=2,
+        )
+    )
+
+    failures = []
+    for result in runs:
+        p95 = result["latency"].get("p95_ms")
+        if args.max_p95_ms is not None and (p95 is None or p95 > args.max_p95_ms):
+            failures.append(f"concurrency {result['concurrency']}: p95 {p95} ms")
+        if args.min_rps is not None and result["requests_per_s"] < args.min_rps:
+            failures.append(
+                f"concurrency {result['concurrency']}: {result['requests_per_s']} req/s"
+            )
+    if failures:
+        print("Performance targets missed: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
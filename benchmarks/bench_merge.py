@@ -0,0 +1,87 @@
+"""
+LoRA merge per-token latency benchmark.
+
+Compares decode latency of the PEFT-wrapped model against the same adapter merged
+into the base weights.
+
+Usage:
+    python benchmarks/bench_merge.py --new-tokens 64 --runs 5
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from benchutil import add_api_to_path, summarize
+
+add_api_to_path()
+
+from src.inference import INSTRUCT_TEMPLATE, InferenceEngine  # noqa: E402
+from src.tiny_model import build_tiny_adapter, build_tiny_model  # noqa: E402
+
+
+def per_token_latency(engine, term, new_tokens, runs):
+    """Time greedy decoding of exactly ``new_tokens`` tokens, in ms per token."""
+    import torch
+
+    engine.ensure_loaded()
+    inputs = engine.tokenizer([INSTRUCT_TEMPLATE.format(term=term)], return_tensors="pt")
+
+    def decode():
+        with torch.no_grad():
+            engine.model.generate(
+                **inputs,
+                max_new_tokens=new_tokens,
+                min_new_tokens=new_tokens,
+                do_sample=False,
+                num_beams=1,
+                pad_token_id=engine.tokenizer.eos_token_id,
+            )
+
+    decode()  # warm-up
+    per_token_ms = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        decode()
+        per_token_ms.append((time.perf_counter() - t0) * 1000 / new_tokens)
+    return summarize(per_token_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-model", help="Base model id or path (default: tiny random)")
+    parser.add_argument("--adapter-dir", help="LoRA adapter directory (default: tiny random)")
+    parser.add_argument("--hidden-size", type=int, default=256, help="Tiny model width")
+    parser.add_argument("--layers", type=int, default=4, help="Tiny model depth")
+    parser.add_argument("--new-tokens", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--term", default="rizz")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_model, adapter_dir = args.base_model, args.adapter_dir
+        if base_model is None or adapter_dir is None:
+            base_model = build_tiny_model(
+                f"{tmp}/model", hidden_size=args.hidden_size, num_layers=args.layers
+            )
+            adapter_dir = build_tiny_adapter(base_model, f"{tmp}/adapter", r=16)
+
+        results = {}
+        for label, merge in (("peft", False), ("merged", True)):
+            engine = InferenceEngine(
+                base_model=base_model,
+                adapter_dir=adapter_dir,
+                merge_adapter=merge,
+                merged_root=f"{tmp}/merged",
+            )
+            results[label] = per_token_latency(engine, args.term, args.new_tokens, args.runs)
+            results[label]["load_seconds"] = round(engine.load_seconds, 3)
+
+        speedup = results["peft"]["mean_ms"] / results["merged"]["mean_ms"]
+        results["speedup"] = round(speedup, 3)
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
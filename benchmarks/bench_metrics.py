@@ -0,0 +1,100 @@
+"""
+Metrics instrumentation overhead benchmark.
+
+Measures the cost of one histogram observation and one counter increment, alone
+and with several threads contending for the same metric, and the time to render
+/metrics. It then times the lexicon-hit and model-answer (parse) request paths
+of the API with the instrumentation on and with it replaced by no-ops.
+
+Usage:
+    python benchmarks/bench_metrics.py --ops 200000 --threads 8
+"""
+
+import argparse
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from benchutil import add_api_to_path
+
+add_api_to_path()
+
+from src import answers  # noqa: E402
+from src.metrics import ANSWERS, REGISTRY, STAGE_SECONDS  # noqa: E402
+from src.retrieval import lexicon  # noqa: E402
+
+STAGES = ("lookup", "parse", "retrieve", "tokenize", "prefill", "decode")
+RAW = "Task: Explain the internet slang.\nTerm: mid\n\nDefinition: Average\nExample: That was mid"
+
+
+def ns_per_op(fn, ops: int, threads: int = 1):
+    """Wall time per call of ``fn`` over ``ops`` calls spread across threads, in ns."""
+    per_thread = ops // threads
+
+    def work():
+        for _ in range(per_thread):
+            fn()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return round((time.perf_counter() - t0) * 1e9 / (per_thread * threads), 1)
+
+
+def request_path_us(term: str, ops: int):
+    """Per-request time of a lexicon hit and of parsing a model answer, in us."""
+    t0 = time.perf_counter()
+    for _ in range(ops):
+        answers.lexicon_answer(term, "lexicon_first")
+    lexicon_us = (time.perf_counter() - t0) * 1e6 / ops
+
+    t0 = time.perf_counter()
+    for _ in range(ops):
+        answers.model_answer("mid", RAW, "model_only")
+    parse_us = (time.perf_counter() - t0) * 1e6 / ops
+    return {"lexicon_hit_us": round(lexicon_us, 2), "model_answer_us": round(parse_us, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ops", type=int, default=200_000, help="Metric updates per run")
+    parser.add_argument("--requests", type=int, default=20_000, help="Request paths timed")
+    parser.add_argument("--threads", type=int, default=8, help="Threads in the contended run")
+    args = parser.parse_args()
+
+    results = {
+        "observe_ns": ns_per_op(lambda: STAGE_SECONDS.observe(0.003, "decode"), args.ops),
+        "observe_ns_contended": ns_per_op(
+            lambda: STAGE_SECONDS.observe(0.003, "decode"), args.ops, args.threads
+        ),
+        "inc_ns": ns_per_op(lambda: ANSWERS.inc("lora"), args.ops),
+        "inc_ns_contended": ns_per_op(lambda: ANSWERS.inc("lora"), args.ops, args.threads),
+    }
+
+    for stage in STAGES:
+        STAGE_SECONDS.observe(0.01, stage)
+    t0 = time.perf_counter()
+    text = REGISTRY.render()
+    results["render_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    results["render_lines"] = len(text.splitlines())
+
+    # Logging is formatted per request regardless; silence it so only the paths are timed
+    answers.logger.disabled = True
+    term = next(iter(lexicon()))
+    request_path_us(term, args.requests // 10)  # warm-up
+    results["instrumented"] = request_path_us(term, args.requests)
+    with (
+        patch.object(STAGE_SECONDS, "observe", lambda *a: None),
+        patch.object(ANSWERS, "inc", lambda *a: None),
+    ):
+        results["no_op_metrics"] = request_path_us(term, args.requests)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
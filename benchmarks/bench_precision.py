@@ -0,0 +1,125 @@
+"""
+Precision mode benchmark: memory, throughput and output format quality.
+
+Loads the engine once per precision mode (fp32, bf16, int8), each in a fresh
+process so resident memory is measured in isolation, generates explanations for
+a list of terms and reports RSS, tokens/sec and the parse_definition_example
+format_ok rate.
+
+Usage:
+    python benchmarks/bench_precision.py --terms 20 --max-new-tokens 100
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchutil import add_api_to_path, rss_mb
+
+add_api_to_path()
+
+from src.inference import PRECISIONS  # noqa: E402
+
+TRAINING_DATA = os.path.join(
+    os.path.dirname(__file__), "..", "training", "genz_slang_training_v2.jsonl"
+)
+
+
+def load_terms(n):
+    """Read the first ``n`` terms from the training JSONL."""
+    terms = []
+    with open(TRAINING_DATA, encoding="utf-8") as f:
+        for line in f:
+            match = re.search(r"Term: (.+)", json.loads(line)["text"])
+            if match:
+                terms.append(match.group(1).strip())
+            if len(terms) == n:
+                break
+    return terms
+
+
+def measure(precision, base_model, adapter_dir, terms, batch_size, max_new_tokens):
+    """Load one precision mode and measure it (runs in a child process)."""
+    import peft  # noqa: F401
+    import torch  # noqa: F401
+    import transformers  # noqa: F401
+
+    from src.inference import INSTRUCT_TEMPLATE, InferenceEngine
+    from src.postprocess import parse_definition_example
+
+    # Baseline after the heavy imports so model_rss_mb covers the weights only
+    rss_before = rss_mb()
+    engine = InferenceEngine(base_model=base_model, adapter_dir=adapter_dir, precision=precision)
+    engine.load()
+    rss_loaded = rss_mb()
+
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(terms), batch_size):
+        outputs += engine.generate_batch(terms[i : i + batch_size], max_new_tokens)
+    decode_s = time.perf_counter() - start
+
+    generated_tokens = 0
+    for term, output in zip(terms, outputs):
+        prompt = INSTRUCT_TEMPLATE.format(term=term)
+        generated_tokens += len(engine.tokenizer(output[len(prompt) :])["input_ids"])
+    format_ok = sum(parse_definition_example(output)["format_ok"] for output in outputs)
+
+    return {
+        "precision": precision,
+        "load_seconds": round(engine.load_seconds, 3),
+        "rss_mb": round(rss_loaded, 1),
+        "model_rss_mb": round(rss_loaded - rss_before, 1),
+        "peak_rss_mb": round(max(rss_mb(), rss_loaded), 1),
+        "decode_seconds": round(decode_s, 3),
+        "tokens_per_s": round(generated_tokens / decode_s, 2),
+        "format_ok_rate": round(format_ok / len(outputs), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-model", help="Base model id or path (default: tiny random)")
+    parser.add_argument("--adapter-dir", help="LoRA adapter directory (default: tiny random)")
+    parser.add_argument("--precisions", nargs="+", default=list(PRECISIONS), choices=PRECISIONS)
+    parser.add_argument("--terms", type=int, default=20, help="Number of training terms")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    terms = load_terms(args.terms)
+    # Each mode gets a fresh interpreter so RSS is not polluted by earlier modes
+    ctx = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_model, adapter_dir = args.base_model, args.adapter_dir
+        if base_model is None or adapter_dir is None:
+            from src.tiny_model import build_tiny_adapter, build_tiny_model
+
+            base_model = build_tiny_model(f"{tmp}/model", hidden_size=256, num_layers=4)
+            adapter_dir = build_tiny_adapter(base_model, f"{tmp}/adapter", r=16)
+
+        results = []
+        for precision in args.precisions:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                future = pool.submit(
+                    measure,
+                    precision,
+                    base_model,
+                    adapter_dir,
+                    terms,
+                    args.batch_size,
+                    args.max_new_tokens,
+                )
+                results.append(future.result())
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
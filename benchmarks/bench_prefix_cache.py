@@ -0,0 +1,95 @@
+"""
+Prefix KV cache benchmark: prefill time per request with and without reuse.
+
+Times the prompt prefill (generate with max_new_tokens=1) of the engine with the
+cached PROMPT_PREFIX past_key_values against full prefill, for several batch
+sizes.
+
+Usage:
+    python benchmarks/bench_prefix_cache.py --batch-sizes 1 8 --runs 20
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from benchutil import add_api_to_path, summarize
+
+add_api_to_path()
+
+from src.inference import InferenceEngine, build_prompt  # noqa: E402
+from src.tiny_model import build_tiny_adapter, build_tiny_model  # noqa: E402
+
+TERMS = ["rizz", "no cap", "bussin", "delulu", "mid", "touch grass", "sus", "gyatt"]
+
+
+def prefill_ms(engine, prompts, runs):
+    """Per-request latency of encoding a batch and running its prefill, in ms."""
+    import torch
+
+    def prefill():
+        inputs, _, _ = engine._encode(prompts, engine.default_adapter)
+        with torch.no_grad():
+            engine.model.generate(
+                **inputs,
+                max_new_tokens=1,
+                do_sample=False,
+                num_beams=1,
+                pad_token_id=engine.tokenizer.eos_token_id,
+            )
+
+    prefill()  # warm-up
+    per_request = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        prefill()
+        per_request.append((time.perf_counter() - t0) * 1000 / len(prompts))
+    return summarize(per_request)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-model", help="Base model id or path (default: tiny random)")
+    parser.add_argument("--adapter-dir", help="LoRA adapter directory (default: tiny random)")
+    parser.add_argument("--hidden-size", type=int, default=256, help="Tiny model width")
+    parser.add_argument("--layers", type=int, default=4, help="Tiny model depth")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_model, adapter_dir = args.base_model, args.adapter_dir
+        if base_model is None or adapter_dir is None:
+            base_model = build_tiny_model(
+                f"{tmp}/model", hidden_size=args.hidden_size, num_layers=args.layers
+            )
+            adapter_dir = build_tiny_adapter(base_model, f"{tmp}/adapter", r=16)
+
+        engine = InferenceEngine(base_model=base_model, adapter_dir=adapter_dir, few_shot_k=0)
+        engine.load()
+        prefix_kv = engine._prefix_kv
+        prompt_tokens = [len(engine.tokenizer(build_prompt(t))["input_ids"]) for t in TERMS]
+        results = {
+            "prefix_tokens": len(engine._prefix_ids),
+            "avg_prompt_tokens": round(sum(prompt_tokens) / len(prompt_tokens), 1),
+            "batches": {},
+        }
+
+        for batch_size in args.batch_sizes:
+            prompts = [build_prompt(TERMS[i % len(TERMS)]) for i in range(batch_size)]
+            engine._prefix_kv = {}
+            full = prefill_ms(engine, prompts, args.runs)
+            engine._prefix_kv = prefix_kv
+            reused = prefill_ms(engine, prompts, args.runs)
+            results["batches"][f"batch_{batch_size}"] = {
+                "full_prefill": full,
+                "prefix_cache": reused,
+                "saved_ms_per_request": round(full["p50_ms"] - reused["p50_ms"], 3),
+            }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
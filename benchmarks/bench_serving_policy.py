@@ -0,0 +1,114 @@
+"""
+Serving policy latency benchmark.
+
+Replays a mixed workload of lexicon hits and misses against /v1/explain under each
+serving policy (lexicon_first, model_first, model_only) and reports latency stats.
+
+Usage:
+    python benchmarks/bench_serving_policy.py --requests 40 --hit-ratio 0.8
+"""
+
+import argparse
+import json
+import random
+import time
+
+from benchutil import add_api_to_path, summarize
+
+add_api_to_path()
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src import router  # noqa: E402
+from src.answers import SERVING_POLICIES  # noqa: E402
+from src.retrieval import lexicon  # noqa: E402
+
+# Terms that are not in the shipped lexicon and always need the model
+MISS_TERMS = [
+    "u",
+    "stan",
+    "jk",
+    "sis",
+    "lmao",
+    "ngl",
+    "irl",
+    "idc",
+    "asap",
+    "ez",
+    "idk",
+]
+
+
+def build_workload(n_requests: int, hit_ratio: float, seed: int):
+    """Build a shuffled list of (term, is_hit) pairs."""
+    rng = random.Random(seed)
+    lex = lexicon()
+    hits = sorted(lex)
+    misses = [t for t in MISS_TERMS if t not in lex]
+    if not hits or not misses:
+        raise SystemExit("Workload needs both lexicon terms and non-lexicon terms")
+
+    n_hits = round(n_requests * hit_ratio)
+    workload = [(rng.choice(hits), True) for _ in range(n_hits)]
+    workload += [(rng.choice(misses), False) for _ in range(n_requests - n_hits)]
+    rng.shuffle(workload)
+    return workload
+
+
+def run_policy(client, policy, workload):
+    """Replay the workload under one serving policy."""
+    router.SERVING_POLICY = policy
+    all_ms, hit_ms, miss_ms = [], [], []
+    sources = {}
+
+    start = time.perf_counter()
+    for term, is_hit in workload:
+        t0 = time.perf_counter()
+        response = client.post("/v1/explain", json={"term": term})
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        response.raise_for_status()
+
+        source = response.json()["source"]
+        sources[source] = sources.get(source, 0) + 1
+        all_ms.append(elapsed_ms)
+        (hit_ms if is_hit else miss_ms).append(elapsed_ms)
+    wall_s = time.perf_counter() - start
+
+    return {
+        "policy": policy,
+        "wall_s": round(wall_s, 3),
+        "requests_per_s": round(len(workload) / wall_s, 3),
+        "all": summarize(all_ms),
+        "hits": summarize(hit_ms),
+        "misses": summarize(miss_ms),
+        "sources": sources,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per policy")
+    parser.add_argument("--hit-ratio", type=float, default=0.8, help="Share of lexicon hits")
+    parser.add_argument("--seed", type=int, default=0, help="Workload shuffle seed")
+    parser.add_argument(
+        "--policies",
+        nargs="+",
+        default=list(SERVING_POLICIES),
+        choices=SERVING_POLICIES,
+        help="Policies to compare",
+    )
+    args = parser.parse_args()
+
+    workload = build_workload(args.requests, args.hit_ratio, args.seed)
+    client = TestClient(router.app)
+
+    # Warm up the model so the first policy does not pay one-off costs
+    router.SERVING_POLICY = "model_only"
+    client.post("/v1/explain", json={"term": workload[0][0]})
+
+    results = [run_policy(client, policy, workload) for policy in args.policies]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Assisted (prompt-lookup) decoding: draft acceptance rate and speedup over greedy.
+
+Each term is generated twice on one loaded model with the same settings:
+plain greedy generate() and assisted decoding (SLANG_SPECULATIVE), where drafts
+come from the term's lexicon answer and the prompt. Reports the mean latency of
+both, the speedup, the share of draft tokens accepted, the tokens generated per
+forward pass, and how many outputs were identical (all of them should be).
+
+Terms come in two sets: lexicon terms, whose answer the model has learned, and
+made-up terms without a lexicon entry. A randomly initialized model agrees
+with no lexicon, so by default the tiny offline model is first trained for a
+few hundred steps on the lexicon set. It then answers those terms the way a
+fine-tuned model answers terms close to its training data. ``--real-model``
+benchmarks the configured base model and adapter instead, without training.
+The sampled entries (training data included) are served as the lexicon.
+
+Usage:
+    python benchmarks/bench_speculative.py --terms 32 --train-steps 300
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import tempfile
+import time
+
+from benchutil import add_api_to_path, summarize
+
+add_api_to_path()
+
+from src import retrieval  # noqa: E402
+from src.inference import INSTRUCT_TEMPLATE, InferenceEngine  # noqa: E402
+from src.lexicon_store import _DEFAULT_SOURCES, read_sources  # noqa: E402
+
+
+def lexicon_terms(n: int, seed: int, max_chars: int = 160):
+    """``n`` random lexicon entries with short answers, as (term, definition, example)."""
+    entries = [
+        (term, definition, example)
+        for term, (definition, example) in read_sources(_DEFAULT_SOURCES).items()
+        if len(definition) + len(example) <= max_chars
+    ]
+    return random.Random(seed).sample(entries, n)
+
+
+def made_up_terms(n: int, seed: int):
+    """Random words that are not lexicon terms."""
+    rng = random.Random(seed + 1)
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 8))) for _ in range(n)]
+
+
+def serve_lexicon(root: str, entries):
+    """Write the entries as a JSONL lexicon and load it as the served lexicon."""
+    path = os.path.join(root, "lexicon.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for term, definition, example in entries:
+            record = {"term": term, "definition": definition, "example": example}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    retrieval.DATA = path
+    retrieval.reload_lexicon(full=True)
+
+
+def train_tiny_model(root: str, entries, args):
+    """Build the tiny model, fit it to the entries' answers and add an identity adapter."""
+    import torch
+    from peft import LoraConfig, get_peft_model
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    from src.tiny_model import build_tiny_model, train_tokenizer
+
+    texts = [
+        INSTRUCT_TEMPLATE.format(term=term) + f" {definition}\nExample: {example}\n"
+        for term, definition, example in entries
+    ]
+    # Subword tokens, so the repetition penalty acts on words as with the real tokenizer
+    model_dir = build_tiny_model(
+        os.path.join(root, "model"),
+        hidden_size=args.hidden_size,
+        num_layers=args.layers,
+        tokenizer=train_tokenizer(texts, args.vocab_size),
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForCausalLM.from_pretrained(model_dir)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=args.lr)
+    rng = random.Random(args.seed)
+    tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "right"
+    model.train()
+    t0 = time.perf_counter()
+    for step in range(args.train_steps):
+        batch = tokenizer(rng.sample(texts, min(16, len(texts))), return_tensors="pt", padding=True)
+        labels = batch["input_ids"].masked_fill(batch["attention_mask"] == 0, -100)
+        loss = model(**batch, labels=labels).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+    train_s = time.perf_counter() - t0
+    model.eval().save_pretrained(model_dir)
+
+    # Zero-initialized LoRA: the served adapter leaves the trained weights' outputs unchanged
+    lora = LoraConfig(r=4, target_modules=["q_proj", "k_proj", "v_proj", "o_proj"])
+    adapter_dir = os.path.join(root, "adapter")
+    get_peft_model(model, lora).save_pretrained(adapter_dir)
+    return (
+        model_dir,
+        adapter_dir,
+        {"train_s": round(train_s, 1), "final_loss": round(loss.item(), 3)},
+    )
+
+
+def run_set(name, terms, plain, assisted, max_new_tokens: int):
+    """Time plain and assisted decoding of every term and compare their outputs."""
+    plain_ms, assisted_ms = [], []
+    identical = 0
+    assisted.decode_stats.reset()
+    for term in terms:
+        t0 = time.perf_counter()
+        expected = plain.generate_batch([term], max_new_tokens)
+        t1 = time.perf_counter()
+        got = assisted.generate_batch([term], max_new_tokens)
+        t2 = time.perf_counter()
+        plain_ms.append((t1 - t0) * 1000)
+        assisted_ms.append((t2 - t1) * 1000)
+        identical += got == expected
+    stats = assisted.decode_stats.snapshot()
+    plain_summary, assisted_summary = summarize(plain_ms), summarize(assisted_ms)
+    return {
+        "terms": name,
+        "n": len(terms),
+        "identical": identical,
+        "plain": plain_summary,
+        "assisted": assisted_summary,
+        "speedup": round(plain_summary["mean_ms"] / assisted_summary["mean_ms"], 2),
+        "draft_acceptance_rate": stats["draft_acceptance_rate"],
+        "tokens_per_forward": round(stats["generated_tokens"] / stats["assisted_forwards"], 2),
+        "avg_tokens_per_request": round(stats["avg_tokens_per_request"], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--terms", type=int, default=32, help="Terms per set")
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    parser.add_argument("--draft-tokens", type=int, default=8, help="SLANG_DRAFT_TOKENS")
+    parser.add_argument("--real-model", action="store_true", help="Use the configured model")
+    parser.add_argument("--hidden-size", type=int, default=128, help="Tiny model width")
+    parser.add_argument("--layers", type=int, default=2, help="Tiny model depth")
+    parser.add_argument("--vocab-size", type=int, default=2000, help="Tiny model BPE vocabulary")
+    parser.add_argument("--train-steps", type=int, default=300, help="Tiny model training steps")
+    parser.add_argument("--lr", type=float, default=3e-3, help="Tiny model learning rate")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    entries = lexicon_terms(args.terms, args.seed)
+    sets = [
+        ("lexicon", [term for term, _, _ in entries]),
+        ("unknown", made_up_terms(args.terms, args.seed)),
+    ]
+
+    with tempfile.TemporaryDirectory() as root:
+        training = None
+        serve_lexicon(root, entries)
+        kwargs = {"few_shot_k": 0}
+        if not args.real_model:
+            model_dir, adapter_dir, training = train_tiny_model(root, entries, args)
+            kwargs.update(base_model=model_dir, adapter_dir=adapter_dir)
+        plain = InferenceEngine(**kwargs)
+        assisted = InferenceEngine(**kwargs, speculative=True, draft_tokens=args.draft_tokens)
+        plain.load()
+        assisted.load()
+        # Warm up both paths outside the measurements
+        plain.generate_batch(["warmup"], 8)
+        assisted.generate_batch(["warmup"], 8)
+        runs = [run_set(name, terms, plain, assisted, args.max_new_tokens) for name, terms in sets]
+
+    print(
+        json.dumps(
+            {
+                "model": "configured" if args.real_model else "tiny-trained",
+                "training": training,
+                "draft_tokens": args.draft_tokens,
+                "runs": runs,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Prompt encoding cache benchmark: tokenizer time as a share of request latency.
+
+Sends a skewed workload (a few hot terms repeat, most are rare) through the
+engine in batches, once with the encode cache disabled and once enabled, and
+reports tokenizer time per request, its share of tokenize + generate time, the
+encode cache hit rate and per-request latency.
+
+Usage:
+    python benchmarks/bench_tokenizer_cache.py --requests 400 --batch-size 8
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from bench_lexicon import random_word
+from benchutil import add_api_to_path, summarize
+
+add_api_to_path()
+
+from src.inference import ENCODE_CACHE_SIZE, InferenceEngine  # noqa: E402
+from src.tiny_model import build_tiny_adapter, build_tiny_model  # noqa: E402
+
+
+def build_workload(n_requests: int, n_terms: int, seed: int):
+    """Zipf-like term stream: term i is requested with weight 1 / (i + 1)."""
+    rng = random.Random(seed)
+    terms = [random_word(rng, 3, 10) for _ in range(n_terms)]
+    weights = [1 / (i + 1) for i in range(n_terms)]
+    return rng.choices(terms, weights=weights, k=n_requests)
+
+
+def run(engine, workload, batch_size: int, max_new_tokens: int):
+    """Serve the workload in batches; per-request latency plus the engine's counters."""
+    engine.decode_stats.reset()
+    per_request_ms = []
+    for start in range(0, len(workload), batch_size):
+        batch = workload[start : start + batch_size]
+        t0 = time.perf_counter()
+        engine.generate_batch(batch, max_new_tokens)
+        per_request_ms.append((time.perf_counter() - t0) * 1000 / len(batch))
+
+    stats = engine.decode_stats.snapshot()
+    return {
+        "tokenize_ms_per_request": round(stats["tokenize_seconds"] * 1000 / len(workload), 4),
+        "tokenize_share": stats["tokenize_share"],
+        "encode_hit_rate": round(engine.encode_cache.stats()["hit_rate"], 3),
+        "latency": summarize(per_request_ms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-model", help="Base model id or path (default: tiny random)")
+    parser.add_argument("--adapter-dir", help="LoRA adapter directory (default: tiny random)")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--terms", type=int, default=2000, help="Distinct terms in the workload")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=8)
+    parser.add_argument("--few-shot-k", type=int, default=0, help="Few-shot examples per prompt")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workload = build_workload(args.requests, args.terms, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        base_model, adapter_dir = args.base_model, args.adapter_dir
+        if base_model is None or adapter_dir is None:
+            base_model = build_tiny_model(f"{tmp}/model")
+            adapter_dir = build_tiny_adapter(base_model, f"{tmp}/adapter")
+
+        results = {"requests": len(workload), "distinct_terms": len(set(workload))}
+        for label, size in (("no_cache", 0), ("encode_cache", ENCODE_CACHE_SIZE)):
+            engine = InferenceEngine(
+                base_model=base_model,
+                adapter_dir=adapter_dir,
+                few_shot_k=args.few_shot_k,
+                encode_cache_size=size,
+            )
+            engine.load()
+            engine.generate_batch(workload[:1], args.max_new_tokens)  # warm-up
+            engine.encode_cache.invalidate()
+            results[label] = run(engine, workload, args.batch_size, args.max_new_tokens)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
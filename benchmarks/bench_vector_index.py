@@ -0,0 +1,87 @@
+"""
+Vector index build and search benchmark.
+
+Builds the memory-mapped lexicon vector index over a synthetic lexicon (100k terms
+by default) with the hashed n-gram vectorizer, then times batched top-k searches.
+Reports build time, index size on disk, and per-query search latency for each
+batch size.
+
+Usage:
+    python benchmarks/bench_vector_index.py --terms 100000 --batch-sizes 1 8 64
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from bench_lexicon import build_lexicon, random_word
+from benchutil import add_api_to_path, summarize
+
+add_api_to_path()
+
+from src.vector_index import HashingVectorizer, VectorIndex, build_vector_index  # noqa: E402
+
+
+def dir_size_mb(path):
+    """Total size of the files in a directory, in MB."""
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--terms", type=int, default=100_000, help="Lexicon size")
+    parser.add_argument("--dim", type=int, default=256, help="Hashed vector width")
+    parser.add_argument("--k", type=int, default=2, help="Neighbors per query")
+    parser.add_argument("--queries", type=int, default=512, help="Queries per batch size")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    lex = build_lexicon(args.terms, args.seed)
+    entries = [{"term": term, **entry} for term, entry in lex.items()]
+    vectorizer = HashingVectorizer(dim=args.dim)
+    rng = random.Random(args.seed + 1)
+    queries = [random_word(rng, 4, 10) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "index")
+        t0 = time.perf_counter()
+        build_vector_index(entries, path, vectorizer)
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        index = VectorIndex(path)
+        open_ms = (time.perf_counter() - t0) * 1000
+
+        results = {
+            "terms": len(entries),
+            "dim": args.dim,
+            "build_s": round(build_s, 3),
+            "open_ms": round(open_ms, 3),
+            "index_mb": round(dir_size_mb(path), 1),
+            "search": {},
+        }
+        # Fault the matrix in once so every batch size sees a warm page cache
+        index.search(vectorizer.encode_queries(queries[:1]), args.k)
+
+        for batch_size in args.batch_sizes:
+            per_query_ms = []
+            for start in range(0, len(queries), batch_size):
+                batch = queries[start : start + batch_size]
+                t0 = time.perf_counter()
+                hits = index.search(vectorizer.encode_queries(batch), args.k)
+                for per_term in hits:
+                    [index.entry(row) for row, _ in per_term]
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                per_query_ms.append(elapsed_ms / len(batch))
+            results["search"][f"batch_{batch_size}"] = summarize(per_query_ms)
+        index.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Pre-fork worker layouts: requests/sec, tokens/sec and memory per workers x threads.
+
+Loads the model once (src.serve.preload) and, for each layout, forks a
+WorkerPool with one CPU slice per worker. Every worker warms up with one
+unmeasured generate call, waits for the others, then claims requests from a
+shared counter until ``--requests`` have run. Requests go straight to the
+engine (no response cache), so every one of them is generated.
+
+Throughput is measured from the common start to the last finished request.
+Memory is reported as the parent's RSS (the weights, loaded once) plus each
+worker's private pages, i.e. what the workers copied or allocated for
+themselves. ``independent_mb_est`` is what the same layout would take with
+every worker loading its own model, as ``uvicorn --workers N`` does.
+
+By default the layouts are every workers x threads split of the available
+CPUs. The tiny random model is used unless ``--real-model`` is given.
+
+Usage:
+    python benchmarks/bench_workers.py --requests 64 --layouts 1x4 2x2 4x1
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchutil import add_api_to_path, rss_mb, summarize
+
+add_api_to_path()
+
+from src import serve  # noqa: E402
+from src.inference import InferenceEngine  # noqa: E402
+
+
+def default_layouts(cores: int):
+    """Every (workers, threads) pair that uses exactly ``cores`` CPUs."""
+    return [(w, cores // w) for w in range(1, cores + 1) if cores % w == 0]
+
+
+def parse_layout(text: str):
+    """Parse ``WxT`` into (workers, threads)."""
+    workers, threads = text.lower().split("x")
+    return int(workers), int(threads)
+
+
+def private_mb():
+    """Private (unshared) resident memory of this process in MB."""
+    total = 0
+    with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1])
+    return total / 1024
+
+
+def run_layout(engine, workers: int, threads: int, args, out_dir: str):
+    """Fork ``workers`` workers and have them share ``args.requests`` requests."""
+    ctx = multiprocessing.get_context("fork")
+    claimed = ctx.Value("i", 0)
+    barrier = ctx.Barrier(workers)
+    terms = [f"term {i}" for i in range(args.requests * args.batch_size)]
+
+    def target(index):
+        engine.generate_batch(terms[: args.batch_size], args.max_new_tokens)
+        tokens0 = engine.decode_stats.snapshot()["generated_tokens"]
+        barrier.wait()
+        start = time.monotonic()
+        latencies = []
+        while True:
+            with claimed.get_lock():
+                i = claimed.value
+                claimed.value += 1
+            if i >= args.requests:
+                break
+            t0 = time.perf_counter()
+            engine.generate_batch(
+                terms[i * args.batch_size : (i + 1) * args.batch_size], args.max_new_tokens
+            )
+            latencies.append((time.perf_counter() - t0) * 1000)
+        result = {
+            "start": start,
+            "end": time.monotonic(),
+            "latencies": latencies,
+            "tokens": engine.decode_stats.snapshot()["generated_tokens"] - tokens0,
+            "private_mb": private_mb(),
+        }
+        with open(os.path.join(out_dir, f"{workers}x{threads}-{index}.json"), "w") as f:
+            json.dump(result, f)
+
+    pool = serve.WorkerPool(target, serve.cpu_slices(workers, threads, args.cpus), respawn=False)
+    pool.start()
+    statuses = pool.supervise()
+    if any(statuses.values()):
+        raise SystemExit(f"Workers failed for layout {workers}x{threads}: {statuses}")
+
+    results = []
+    for index in range(workers):
+        with open(os.path.join(out_dir, f"{workers}x{threads}-{index}.json")) as f:
+            results.append(json.load(f))
+    wall_s = max(r["end"] for r in results) - min(r["start"] for r in results)
+    parent_mb = rss_mb()
+    worker_mb = [r["private_mb"] for r in results]
+    return {
+        "layout": f"{workers}x{threads}",
+        "workers": workers,
+        "threads": threads,
+        "requests_per_s": round(args.requests / wall_s, 2),
+        "tokens_per_s": round(sum(r["tokens"] for r in results) / wall_s, 1),
+        "latency": summarize([ms for r in results for ms in r["latencies"]]),
+        "parent_rss_mb": round(parent_mb, 1),
+        "worker_private_mb": round(sum(worker_mb) / workers, 1),
+        "total_mb_est": round(parent_mb + sum(worker_mb), 1),
+        "independent_mb_est": round(workers * (parent_mb + sum(worker_mb) / workers), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--layouts", nargs="+", help="WxT layouts (default: splits of the CPUs)")
+    parser.add_argument("--cpus", type=int, nargs="+", help="CPU ids to use (default: all)")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per layout")
+    parser.add_argument("--batch-size", type=int, default=1, help="Terms per request")
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--real-model", action="store_true", help="Use the configured model")
+    parser.add_argument("--hidden-size", type=int, default=256, help="Tiny model width")
+    parser.add_argument("--layers", type=int, default=4, help="Tiny model depth")
+    args = parser.parse_args()
+    args.cpus = args.cpus or serve.available_cpus()
+    layouts = (
+        [parse_layout(text) for text in args.layouts]
+        if args.layouts
+        else default_layouts(len(args.cpus))
+    )
+
+    with tempfile.TemporaryDirectory() as root:
+        if args.real_model:
+            engine = InferenceEngine(few_shot_k=0)
+        else:
+            from src.tiny_model import build_tiny_adapter, build_tiny_model
+
+            model_dir = build_tiny_model(
+                os.path.join(root, "model"), hidden_size=args.hidden_size, num_layers=args.layers
+            )
+            adapter_dir = build_tiny_adapter(model_dir, os.path.join(root, "adapter"))
+            engine = InferenceEngine(base_model=model_dir, adapter_dir=adapter_dir, few_shot_k=0)
+        start = time.perf_counter()
+        serve.preload(engine)
+        load_s = time.perf_counter() - start
+
+        runs = [run_layout(engine, w, t, args, root) for w, t in layouts]
+
+    best = max(runs, key=lambda run: run["requests_per_s"])
+    print(
+        json.dumps(
+            {
+                "model": "configured" if args.real_model else "tiny-random",
+                "cpus": len(args.cpus),
+                "load_s": round(load_s, 2),
+                "best_layout": best["layout"],
+                "runs": runs,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Shared helpers for the benchmark scripts."""
+
+import os
+import resource
+import statistics
+import sys
+
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api"))
+
+
+def add_api_to_path():
+    """Make the API package importable as `src`."""
+    if API_DIR not in sys.path:
+        sys.path.append(API_DIR)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def summarize(latencies):
+    """Summarize a list of latencies in milliseconds."""
+    if not latencies:
+        return {"n": 0}
+    return {
+        "n": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies), 3),
+    }
+
+
+def rss_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS (KB on Linux) where /proc is unavailable
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -14,6 +14,7 @@ from transformers import AutoTokenizer, AutoModelForCausalLM
 from peft import PeftModel
 from postprocess import parse_definition_example
 import time
+from functools import lru_cache
 
 # Configuration
 BASE_MODEL = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
@@ -63,10 +64,16 @@ finetuned_model.eval()
 print("\n✓ Both models loaded!\n")
 
 
+@lru_cache(maxsize=4096)
+def encode_prompt(term: str):
+    """Token ids of the prompt for a term (both models share the tokenizer, so encode once)"""
+    return tuple(tokenizer(INSTRUCT_TEMPLATE.format(term=term))["input_ids"])
+
+
 def generate_with_model(model, term: str, max_new_tokens: int = 100) -> str:
     """Generate explanation using a specific model"""
-    prompt = INSTRUCT_TEMPLATE.format(term=term.strip())
-    inputs = tokenizer(prompt, return_tensors="pt")
+    input_ids = torch.tensor([encode_prompt(term.strip())])
+    inputs = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
 
     with torch.no_grad():
         out = model.generate(
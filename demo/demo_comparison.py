@@ -6,11 +6,11 @@ Shows BOTH model output AND dataset truth for educational purposes
 import sys
 import os
 
-# Add the API src directory to Python path for imports
-sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api", "src"))
+# Add the API directory to Python path so `src` imports as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
 
-from inference import generate
-from postprocess import parse_definition_example
+from src.inference import generate
+from src.postprocess import parse_definition_example
 from datasets import load_dataset
 import time
 